@@ -0,0 +1,71 @@
+#!/usr/bin/env node
+
+/**
+ * 後端打包腳本：將 server/ 打包成單一 JS 檔（dist-bundle/index.js，另加 worker thread 腳本）
+ *
+ * 除了 Prisma 以外的相依套件都會打包進去（只包含實際用到的程式碼），
+ * Prisma 的產生檔與 query engine 會複製到 dist-bundle/node_modules，
+ * 部署時只需要上傳 dist-bundle，不必在伺服器上執行 npm install --production
+ *
+ * 用法：
+ *   node build-server.mjs                               # 打包 server/index.ts
+ *   node build-server.mjs server/index-standalone.ts    # 打包其他進入點
+ *   node build-server.mjs --analyze                     # 額外輸出各模組的大小
+ *
+ * 執行前需先 npm run prisma:generate（產生 node_modules/.prisma/client）
+ */
+
+import { build, analyzeMetafile } from 'esbuild';
+import { cpSync, existsSync, mkdirSync, rmSync, writeFileSync } from 'fs';
+import path from 'path';
+
+const args = process.argv.slice(2);
+const analyze = args.includes('--analyze');
+const entry = args.find(arg => !arg.startsWith('--')) || 'server/index.ts';
+// 不放在 dist/ 底下：dist/ 會被 express.static 公開
+const outdir = 'dist-bundle';
+
+// Prisma 需要產生的 client 與平台相關的 query engine，不能打包成單一檔案
+const PRISMA_PACKAGES = ['@prisma/client', '.prisma/client'];
+
+rmSync(outdir, { recursive: true, force: true });
+mkdirSync(outdir, { recursive: true });
+
+const result = await build({
+  // worker thread 腳本需要獨立的檔案（JsonWorkerService 會在 workers/ 底下尋找）
+  entryPoints: { index: entry, 'workers/json.worker': 'server/workers/json.worker.ts' },
+  outdir,
+  bundle: true,
+  platform: 'node',
+  target: 'node18',
+  format: 'cjs',
+  external: PRISMA_PACKAGES,
+  // 保留函式與類別名稱，錯誤堆疊與 logger 輸出才看得懂
+  keepNames: true,
+  minifySyntax: true,
+  minifyWhitespace: true,
+  sourcemap: true,
+  legalComments: 'none',
+  metafile: true,
+  logLevel: 'info',
+});
+
+for (const pkg of PRISMA_PACKAGES) {
+  const source = path.join('node_modules', pkg);
+  if (!existsSync(source)) {
+    console.error(`找不到 ${source}，請先執行 npm install 與 npm run prisma:generate`);
+    process.exit(1);
+  }
+  cpSync(source, path.join(outdir, 'node_modules', pkg), { recursive: true, dereference: true });
+}
+
+// 確保即使上層 package.json 改成 "type": "module"，打包結果仍以 CommonJS 載入
+writeFileSync(
+  path.join(outdir, 'package.json'),
+  JSON.stringify({ private: true, type: 'commonjs', main: 'index.js' }, null, 2) + '\n'
+);
+writeFileSync(path.join(outdir, 'meta.json'), JSON.stringify(result.metafile));
+
+if (analyze) {
+  console.log(await analyzeMetafile(result.metafile, { verbose: false }));
+}
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""API 壓力測試：模擬報名高峰，輸出各路由的吞吐量與 p50/p95/p99 延遲
+
+只使用標準函式庫（asyncio + 自帶的 HTTP/1.1 keep-alive 客戶端），不需要額外安裝套件。
+
+請對本地伺服器執行，不要對正式站：
+    npm run dev:server                       # DATABASE_URL 指向本地 MySQL（例如 docker 的 mysql:8）
+    python3 load_test.py --users 200 --concurrency 50
+    python3 load_test.py --scenario mixed --duration 60 --save-baseline benchmarks/mixed.json
+    python3 load_test.py --scenario mixed --duration 60 --baseline benchmarks/mixed.json
+
+所有模擬玩家都來自同一個 IP，登入/註冊會受到 AUTH_RATE_LIMIT_IP 與 AUTH_RATE_LIMIT_REGISTER 的限制
+（處理中的請求也佔用 token），伺服器請以較寬的限制啟動，否則登入與註冊會大量回傳 429：
+    AUTH_RATE_LIMIT_IP=100000,1000 AUTH_RATE_LIMIT_REGISTER=100000,1000 npm run dev:server
+
+模擬管理員讀取需要管理員帳號，以 --admin-id / --admin-password 或環境變數
+LOADTEST_ADMIN_ID / LOADTEST_ADMIN_PASSWORD 指定（請使用測試資料庫的帳號）；未指定時不模擬管理員讀取
+
+情境：
+    rush   每位模擬玩家同時登入並送出一次七天的報名（報名開放瞬間），管理員同時輪詢報名列表
+    mixed  在指定時間內依比例混合報名、查詢自己的報名、管理員讀取報名/官職/地圖
+
+--baseline 比對時，任何路由的 p95 超過基準值 (1 + --max-regression) 倍，或錯誤率上升，結束碼為 1。
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import ssl
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+DAY_KEYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+ALLIANCES = ['TWD', 'FOX', 'WOS', 'ACE', 'SKY']
+
+# 登入/註冊遇到 429 時最多重試幾次
+MAX_RATE_LIMIT_RETRIES = 5
+
+# mixed 情境的請求比例
+DEFAULT_MIX = 'submit=50,my=20,admin_submissions=15,admin_officers=10,admin_maps=5'
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpClient:
+    """單一 keep-alive 連線的 HTTP/1.1 客戶端（每個模擬使用者一條連線）"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.use_tls = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.use_tls else 80)
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        # 最後一次回應的標頭（小寫名稱）
+        self.last_headers = {}
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+    async def _connect(self):
+        ssl_context = ssl.create_default_context() if self.use_tls else None
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=ssl_context)
+
+    async def request(self, method, path, body=None, token=None):
+        """回傳 (status, 解析後的 JSON 或 None)；連線被關閉時重連一次"""
+        for attempt in range(2):
+            if not self.writer:
+                await self._connect()
+            try:
+                return await asyncio.wait_for(self._send(method, path, body, token), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, HttpError):
+                await self.close()
+                if attempt == 1:
+                    raise
+            except asyncio.TimeoutError:
+                await self.close()
+                raise
+
+    async def _send(self, method, path, body, token):
+        payload = json.dumps(body).encode() if body is not None else b''
+        headers = [
+            f'{method} {self.prefix}{path} HTTP/1.1',
+            f'Host: {self.host}',
+            'Connection: keep-alive',
+            'Accept: application/json',
+        ]
+        if token:
+            headers.append(f'Authorization: Bearer {token}')
+        if body is not None:
+            headers.append('Content-Type: application/json')
+        headers.append(f'Content-Length: {len(payload)}')
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HttpError('connection closed')
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                data += await self.reader.readexactly(size)
+                await self.reader.readline()
+            data = bytes(data)
+        else:
+            data = await self.reader.readexactly(int(response_headers.get('content-length', '0')))
+
+        self.last_headers = response_headers
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+
+class Stats:
+    """依路由樣板記錄延遲、狀態碼與連線錯誤"""
+
+    def __init__(self):
+        self.routes = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def record(self, route, latency_ms, status):
+        entry = self.routes.setdefault(route, {'latencies': [], 'statuses': {}, 'errors': 0})
+        entry['latencies'].append(latency_ms)
+        key = str(status)
+        entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+        if status == 'error' or (isinstance(status, int) and status >= 500):
+            entry['errors'] += 1
+
+    @staticmethod
+    def percentile(sorted_values, p):
+        if not sorted_values:
+            return 0.0
+        # nearest-rank
+        index = min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))
+        return sorted_values[index]
+
+    def summary(self):
+        elapsed = max(1e-9, (self.finished_at or time.perf_counter()) - self.started_at)
+        routes = {}
+        all_latencies = []
+        total_errors = 0
+        for route, entry in sorted(self.routes.items()):
+            values = sorted(entry['latencies'])
+            all_latencies.extend(values)
+            total_errors += entry['errors']
+            routes[route] = self._describe(values, entry['errors'], elapsed)
+            routes[route]['statuses'] = entry['statuses']
+        all_latencies.sort()
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'total': self._describe(all_latencies, total_errors, elapsed),
+            'routes': routes,
+        }
+
+    def _describe(self, values, errors, elapsed):
+        count = len(values)
+        return {
+            'count': count,
+            'rps': round(count / elapsed, 1),
+            'p50_ms': round(self.percentile(values, 50), 1),
+            'p95_ms': round(self.percentile(values, 95), 1),
+            'p99_ms': round(self.percentile(values, 99), 1),
+            'max_ms': round(values[-1], 1) if values else 0.0,
+            'error_rate': round(errors / count, 4) if count else 0.0,
+        }
+
+
+async def timed(stats, client, route, method, path, body=None, token=None):
+    start = time.perf_counter()
+    try:
+        status, data = await client.request(method, path, body, token)
+    except Exception:
+        stats.record(route, (time.perf_counter() - start) * 1000, 'error')
+        return None, None
+    stats.record(route, (time.perf_counter() - start) * 1000, status)
+    return status, data
+
+
+def build_slots(rng):
+    """產生七天都勾選的報名資料（與前端送出的格式相同）"""
+    slots = {}
+    for day in DAY_KEYS:
+        start_hour = rng.randrange(0, 22, 2)
+        slots[day] = {
+            'checked': True,
+            'researchAccel': {'days': rng.randint(0, 30), 'hours': rng.randint(0, 23), 'minutes': rng.randint(0, 59)},
+            'generalAccel': {'days': rng.randint(0, 30), 'hours': rng.randint(0, 23), 'minutes': rng.randint(0, 59)},
+            'upgradeT11': rng.random() < 0.2,
+            'fireSparkleCount': rng.randint(0, 500),
+            'fireGemCount': rng.randint(0, 5000),
+            'refinedFireGemCount': rng.randint(0, 200),
+            'timeSlots': [{'start': f'{start_hour:02d}:00', 'end': f'{start_hour + 2:02d}:00'}],
+        }
+    return slots
+
+
+class VirtualUser:
+    def __init__(self, index, args):
+        self.index = index
+        self.game_id = str(args.game_id_base + index)
+        self.alliance = ALLIANCES[index % len(ALLIANCES)]
+        self.rng = random.Random(args.seed + index)
+        self.client = HttpClient(args.base_url, args.timeout)
+        self.token = None
+        self.submissions = 0
+
+    def submission_payload(self, event_date):
+        return {
+            'fid': self.game_id,
+            'gameId': self.game_id,
+            'playerName': f'LoadTest_{self.game_id}',
+            'alliance': self.alliance,
+            'eventDate': event_date,
+            'slots': build_slots(self.rng),
+        }
+
+
+rate_limit_warned = False
+
+
+async def wait_if_rate_limited(status, client, attempt):
+    """429 時依 Retry-After 等待並回傳 True（可重試）；超過重試次數或非 429 回傳 False"""
+    global rate_limit_warned
+    if status != 429 or attempt >= MAX_RATE_LIMIT_RETRIES:
+        return False
+    if not rate_limit_warned:
+        rate_limit_warned = True
+        print('⚠️  登入被限流（429），請以較寬的 AUTH_RATE_LIMIT_IP 啟動伺服器，見 load_test.py 說明')
+    try:
+        delay = float(client.last_headers.get('retry-after', '1'))
+    except ValueError:
+        delay = 1.0
+    await asyncio.sleep(max(delay, 0.1))
+    return True
+
+
+async def login_with_retry(client, game_id, password, stats=None):
+    """登入；被限流時依 Retry-After 等待後重試。傳入 stats 時計入統計"""
+    body = {'gameId': game_id, 'password': password}
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        if stats is not None:
+            status, data = await timed(stats, client, 'POST /api/auth/login', 'POST', '/api/auth/login', body)
+        else:
+            status, data = await client.request('POST', '/api/auth/login', body)
+        if not await wait_if_rate_limited(status, client, attempt):
+            return status, data
+    return status, data
+
+
+async def login_or_register(stats, user, password):
+    """帳號不存在時先註冊（註冊不計入統計），已存在時登入；被限流時等待後重試
+
+    先查詢帳號是否存在，不以失敗的登入（401）判斷，避免消耗伺服器的失敗次數限制
+    """
+    status, data = await user.client.request('GET', f'/api/auth/check-user/{user.game_id}')
+    exists = status == 200 and bool(data and data.get('exists'))
+
+    if not exists:
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            status, data = await user.client.request('POST', '/api/auth/register', {
+                'gameId': user.game_id,
+                'password': password,
+                'allianceName': user.alliance,
+                'playerData': {'nickname': f'LoadTest_{user.game_id}'},
+            })
+            if not await wait_if_rate_limited(status, user.client, attempt):
+                break
+        # 同時有其他程序註冊了同一個帳號時改為登入
+        exists = status == 400 and bool(data and data.get('error') == 'User already exists')
+
+    if exists:
+        status, data = await login_with_retry(user.client, user.game_id, password, stats)
+
+    if status not in (200, 201) or not data:
+        raise RuntimeError(f'無法登入模擬玩家 {user.game_id}: HTTP {status} {data}')
+    user.token = data['token']
+
+
+async def admin_read(stats, client, token, kind, event_date):
+    if kind == 'admin_submissions':
+        await timed(stats, client, 'GET /api/submissions/all', 'GET', '/api/submissions/all', token=token)
+    elif kind == 'admin_officers':
+        await timed(stats, client, 'GET /api/officers/:eventDate', 'GET', f'/api/officers/{event_date}', token=token)
+    elif kind == 'admin_maps':
+        await timed(stats, client, 'GET /api/maps', 'GET', '/api/maps', token=token)
+
+
+async def run_rush(args, stats, users, admin_token):
+    """所有玩家同時送出一次報名；管理員持續輪詢直到報名結束"""
+    gate = asyncio.Event()
+    done = asyncio.Event()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def submit(user):
+        await gate.wait()
+        async with semaphore:
+            await timed(stats, user.client, 'POST /api/submissions', 'POST', '/api/submissions',
+                        user.submission_payload(args.event_date), user.token)
+
+    async def admin_poller():
+        client = HttpClient(args.base_url, args.timeout)
+        try:
+            await gate.wait()
+            while not done.is_set():
+                await admin_read(stats, client, admin_token, 'admin_submissions', args.event_date)
+                await asyncio.sleep(args.admin_poll_interval)
+        finally:
+            await client.close()
+
+    pollers = [asyncio.create_task(admin_poller()) for _ in range(args.admin_readers if admin_token else 0)]
+    tasks = [asyncio.create_task(submit(user)) for user in users]
+    stats.started_at = time.perf_counter()
+    gate.set()
+    await asyncio.gather(*tasks)
+    stats.finished_at = time.perf_counter()
+    done.set()
+    await asyncio.gather(*pollers)
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {'submit', 'my', 'admin_submissions', 'admin_officers', 'admin_maps'}
+    if unknown:
+        raise SystemExit(f'未知的請求類型: {", ".join(sorted(unknown))}')
+    return mix
+
+
+async def run_mixed(args, stats, users, admin_token):
+    """在 --duration 秒內依比例混合各種請求；每位玩家每次報名使用不同的場次避免被判重複"""
+    mix = parse_mix(args.mix)
+    if not admin_token:
+        mix = {k: v for k, v in mix.items() if not k.startswith('admin_')}
+    kinds, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + args.duration
+
+    # 同一條連線不能並行送出請求，每個 worker 固定負責一部分玩家
+    workers = min(args.concurrency, len(users))
+    buckets = [users[i::workers] for i in range(workers)]
+
+    async def worker(index):
+        rng = random.Random(args.seed * 1000 + index)
+        admin_client = HttpClient(args.base_url, args.timeout)
+        try:
+            while time.perf_counter() < deadline:
+                user = rng.choice(buckets[index])
+                kind = rng.choices(kinds, weights)[0]
+                if kind == 'submit':
+                    user.submissions += 1
+                    await timed(stats, user.client, 'POST /api/submissions', 'POST', '/api/submissions',
+                                user.submission_payload(f'{args.event_date}-{user.submissions}'), user.token)
+                elif kind == 'my':
+                    await timed(stats, user.client, 'GET /api/submissions/my', 'GET', '/api/submissions/my',
+                                token=user.token)
+                else:
+                    await admin_read(stats, admin_client, admin_token, kind, args.event_date)
+                if args.think_time:
+                    await asyncio.sleep(rng.uniform(0, args.think_time))
+        finally:
+            await admin_client.close()
+
+    stats.started_at = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    stats.finished_at = time.perf_counter()
+
+
+def print_report(summary, baseline=None):
+    header = f"{'route':<34}{'count':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'err%':>7}"
+    print(header)
+    print('-' * len(header))
+    rows = list(summary['routes'].items()) + [('TOTAL', summary['total'])]
+    for route, r in rows:
+        line = (f"{route:<34}{r['count']:>8}{r['rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+                f"{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}{r['error_rate'] * 100:>6.1f}%")
+        base = (baseline or {}).get('routes', {}).get(route) if route != 'TOTAL' else (baseline or {}).get('total')
+        if base and base['p95_ms']:
+            line += f"   p95 {(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%"
+        print(line)
+    print(f"\n耗時 {summary['elapsed_s']}s（延遲單位 ms）")
+    for route, r in summary['routes'].items():
+        statuses = ', '.join(f'{k}×{v}' for k, v in sorted(r['statuses'].items()))
+        print(f'  {route}: {statuses}')
+
+
+def compare_with_baseline(summary, baseline, max_regression):
+    """回傳退步項目的說明列表"""
+    regressions = []
+    for route, base in baseline.get('routes', {}).items():
+        current = summary['routes'].get(route)
+        if not current or not current['count']:
+            continue
+        if base['p95_ms'] and current['p95_ms'] > base['p95_ms'] * (1 + max_regression):
+            regressions.append(f"{route}: p95 {base['p95_ms']}ms → {current['p95_ms']}ms")
+        if current['error_rate'] > base['error_rate'] + 0.01:
+            regressions.append(f"{route}: 錯誤率 {base['error_rate']:.2%} → {current['error_rate']:.2%}")
+    return regressions
+
+
+async def main(args):
+    stats = Stats()
+    users = [VirtualUser(i, args) for i in range(args.users)]
+
+    print(f'🔐 登入 {len(users)} 位模擬玩家...')
+    setup_stats = Stats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def setup(user):
+        async with semaphore:
+            await login_or_register(setup_stats, user, args.password)
+
+    setup_stats.started_at = time.perf_counter()
+    await asyncio.gather(*(setup(user) for user in users))
+    setup_stats.finished_at = time.perf_counter()
+
+    admin_token = None
+    if args.admin_id:
+        client = HttpClient(args.base_url, args.timeout)
+        status, data = await login_with_retry(client, args.admin_id, args.admin_password)
+        await client.close()
+        if status != 200 or not data:
+            raise SystemExit(f'❌ 管理員登入失敗: HTTP {status} {data}')
+        admin_token = data['token']
+
+    print(f'🚀 情境 {args.scenario}（並行 {args.concurrency}）...\n')
+    if args.scenario == 'rush':
+        await run_rush(args, stats, users, admin_token)
+    else:
+        await run_mixed(args, stats, users, admin_token)
+
+    for user in users:
+        await user.client.close()
+
+    summary = stats.summary()
+    # 登入延遲另外列出（rush 情境中登入也是高峰的一部分）
+    summary['routes'].update(setup_stats.summary()['routes'])
+    summary['meta'] = {
+        'scenario': args.scenario,
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'duration': args.duration if args.scenario == 'mixed' else None,
+        'mix': args.mix if args.scenario == 'mixed' else None,
+        'base_url': args.base_url,
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_report(summary, baseline)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(summary, ensure_ascii=False, indent=2))
+        print(f'\n💾 已儲存基準值: {path}')
+
+    if baseline:
+        if baseline.get('meta', {}).get('scenario') != args.scenario:
+            print('\n⚠️  基準值的情境不同，比較結果僅供參考')
+        regressions = compare_with_baseline(summary, baseline, args.max_regression)
+        if regressions:
+            print('\n❌ 效能退步：')
+            for item in regressions:
+                print(f'   {item}')
+            return 1
+        print('\n✅ 與基準值相比沒有退步')
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='WOS Manager API 壓力測試')
+    parser.add_argument('--base-url', default='http://localhost:3001')
+    parser.add_argument('--scenario', choices=['rush', 'mixed'], default='rush')
+    parser.add_argument('--users', type=int, default=200, help='模擬玩家數')
+    parser.add_argument('--concurrency', type=int, default=50, help='同時進行的請求數')
+    parser.add_argument('--duration', type=float, default=30, help='mixed 情境的執行秒數')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'mixed 情境的請求比例（預設 {DEFAULT_MIX}）')
+    parser.add_argument('--think-time', type=float, default=0, help='每次請求後隨機等待的最長秒數')
+    parser.add_argument('--event-date', default=f'loadtest-{datetime.now():%Y%m%d%H%M%S}',
+                        help='報名使用的場次（預設每次執行不同，避免重複報名）')
+    parser.add_argument('--game-id-base', type=int, default=990000000, help='模擬玩家 gameId 起始值')
+    parser.add_argument('--password', default='loadtest-password')
+    parser.add_argument('--admin-id', default=os.environ.get('LOADTEST_ADMIN_ID', ''),
+                        help='管理員 gameId（預設讀取 LOADTEST_ADMIN_ID；未指定則不模擬管理員讀取）')
+    parser.add_argument('--admin-password', default=os.environ.get('LOADTEST_ADMIN_PASSWORD', ''),
+                        help='管理員密碼（預設讀取 LOADTEST_ADMIN_PASSWORD）')
+    parser.add_argument('--admin-readers', type=int, default=2, help='rush 情境中輪詢報名列表的管理員數')
+    parser.add_argument('--admin-poll-interval', type=float, default=1.0)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='將結果寫入 JSON 檔')
+    parser.add_argument('--save-baseline', help='將結果存為基準值（例如 benchmarks/rush.json）')
+    parser.add_argument('--baseline', help='與基準值比較')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='可接受的 p95 退步比例（預設 0.2）')
+    args = parser.parse_args()
+    if args.admin_id and not args.admin_password:
+        parser.error('指定 --admin-id 時需要 --admin-password（或 LOADTEST_ADMIN_PASSWORD）')
+    return args
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,221 @@
+-- CreateTable
+CREATE TABLE `User` (
+    `id` VARCHAR(191) NOT NULL,
+    `gameId` VARCHAR(191) NOT NULL,
+    `password` VARCHAR(191) NOT NULL,
+    `nickname` VARCHAR(191) NULL,
+    `kid` INTEGER NULL,
+    `stoveLv` INTEGER NULL,
+    `avatarImage` VARCHAR(191) NULL,
+    `allianceId` VARCHAR(191) NULL,
+    `allianceName` VARCHAR(191) NULL,
+    `coordinateX` INTEGER NULL,
+    `coordinateY` INTEGER NULL,
+    `powerPoints` INTEGER NULL,
+    `T11Status` VARCHAR(191) NULL,
+    `isAdmin` BOOLEAN NOT NULL DEFAULT false,
+    `managedAlliances` VARCHAR(191) NULL,
+    `canAssignOfficers` BOOLEAN NOT NULL DEFAULT true,
+    `canManageEvents` BOOLEAN NOT NULL DEFAULT true,
+    `parentUserId` VARCHAR(191) NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    UNIQUE INDEX `User_gameId_key`(`gameId`),
+    INDEX `User_gameId_idx`(`gameId`),
+    INDEX `User_allianceId_idx`(`allianceId`),
+    INDEX `User_isAdmin_idx`(`isAdmin`),
+    INDEX `User_parentUserId_idx`(`parentUserId`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `TimeslotSubmission` (
+    `id` VARCHAR(191) NOT NULL,
+    `userId` VARCHAR(191) NOT NULL,
+    `fid` VARCHAR(191) NOT NULL,
+    `gameId` VARCHAR(191) NOT NULL,
+    `playerName` VARCHAR(191) NOT NULL,
+    `alliance` VARCHAR(191) NOT NULL,
+    `eventDate` VARCHAR(191) NULL,
+    `slotsData` TEXT NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    INDEX `TimeslotSubmission_userId_idx`(`userId`),
+    INDEX `TimeslotSubmission_alliance_idx`(`alliance`),
+    INDEX `TimeslotSubmission_eventDate_idx`(`eventDate`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `AllianceStatistic` (
+    `id` VARCHAR(191) NOT NULL,
+    `allianceId` VARCHAR(191) NOT NULL,
+    `userId` VARCHAR(191) NOT NULL,
+    `allianceName` VARCHAR(191) NOT NULL,
+    `totalMembersT11` INTEGER NOT NULL DEFAULT 0,
+    `totalMembersT10` INTEGER NOT NULL DEFAULT 0,
+    `totalMembers` INTEGER NOT NULL DEFAULT 0,
+    `totalFireSparkle` INTEGER NOT NULL DEFAULT 0,
+    `totalFireGem` INTEGER NOT NULL DEFAULT 0,
+    `totalResearchAccel` INTEGER NOT NULL DEFAULT 0,
+    `totalGeneralAccel` INTEGER NOT NULL DEFAULT 0,
+    `statisticDate` DATETIME(3) NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    INDEX `AllianceStatistic_allianceId_idx`(`allianceId`),
+    INDEX `AllianceStatistic_userId_idx`(`userId`),
+    INDEX `AllianceStatistic_statisticDate_idx`(`statisticDate`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `SVSApplication` (
+    `id` VARCHAR(191) NOT NULL,
+    `userId` VARCHAR(191) NOT NULL,
+    `allianceId` VARCHAR(191) NOT NULL,
+    `allianceName` VARCHAR(191) NOT NULL,
+    `applicationDate` DATETIME(3) NOT NULL,
+    `status` VARCHAR(191) NOT NULL DEFAULT 'pending',
+    `notes` VARCHAR(191) NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    INDEX `SVSApplication_userId_idx`(`userId`),
+    INDEX `SVSApplication_allianceId_idx`(`allianceId`),
+    INDEX `SVSApplication_status_idx`(`status`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `PlayerPosition` (
+    `id` VARCHAR(191) NOT NULL,
+    `userId` VARCHAR(191) NOT NULL,
+    `allianceId` VARCHAR(191) NOT NULL,
+    `position` VARCHAR(191) NOT NULL,
+    `isOfficer` BOOLEAN NOT NULL DEFAULT false,
+    `assignedDate` DATETIME(3) NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    INDEX `PlayerPosition_userId_idx`(`userId`),
+    INDEX `PlayerPosition_allianceId_idx`(`allianceId`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `AuditLog` (
+    `id` VARCHAR(191) NOT NULL,
+    `userId` VARCHAR(191) NULL,
+    `action` VARCHAR(191) NOT NULL,
+    `targetTable` VARCHAR(191) NOT NULL,
+    `targetId` VARCHAR(191) NULL,
+    `changes` VARCHAR(191) NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+
+    INDEX `AuditLog_userId_idx`(`userId`),
+    INDEX `AuditLog_action_idx`(`action`),
+    INDEX `AuditLog_createdAt_idx`(`createdAt`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `AdminSettings` (
+    `id` VARCHAR(191) NOT NULL,
+    `settingKey` VARCHAR(191) NOT NULL,
+    `settingValue` VARCHAR(191) NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    UNIQUE INDEX `AdminSettings_settingKey_key`(`settingKey`),
+    INDEX `AdminSettings_settingKey_idx`(`settingKey`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `OfficerAssignment` (
+    `id` VARCHAR(191) NOT NULL,
+    `eventDate` VARCHAR(191) NOT NULL,
+    `officerType` VARCHAR(191) NOT NULL,
+    `utcOffset` VARCHAR(191) NOT NULL DEFAULT '00:00',
+    `slotsData` TEXT NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    INDEX `OfficerAssignment_eventDate_idx`(`eventDate`),
+    INDEX `OfficerAssignment_officerType_idx`(`officerType`),
+    UNIQUE INDEX `OfficerAssignment_eventDate_officerType_key`(`eventDate`, `officerType`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `Event` (
+    `id` VARCHAR(191) NOT NULL,
+    `eventDate` VARCHAR(191) NOT NULL,
+    `title` VARCHAR(191) NULL,
+    `status` VARCHAR(191) NOT NULL DEFAULT 'open',
+    `registrationStart` DATETIME(3) NOT NULL,
+    `registrationEnd` DATETIME(3) NOT NULL,
+    `description` VARCHAR(191) NULL,
+    `dayConfig` VARCHAR(191) NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    UNIQUE INDEX `Event_eventDate_key`(`eventDate`),
+    INDEX `Event_eventDate_idx`(`eventDate`),
+    INDEX `Event_status_idx`(`status`),
+    INDEX `Event_registrationEnd_idx`(`registrationEnd`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `EventSlotConfiguration` (
+    `id` VARCHAR(191) NOT NULL,
+    `eventId` VARCHAR(191) NOT NULL,
+    `defaultSlots` VARCHAR(191) NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    UNIQUE INDEX `EventSlotConfiguration_eventId_key`(`eventId`),
+    INDEX `EventSlotConfiguration_eventId_idx`(`eventId`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `AllianceMap` (
+    `id` VARCHAR(191) NOT NULL,
+    `title` VARCHAR(191) NOT NULL,
+    `status` VARCHAR(191) NOT NULL DEFAULT 'open',
+    `alliances` TEXT NOT NULL,
+    `gridData` TEXT NOT NULL,
+    `gridOwners` TEXT NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    INDEX `AllianceMap_status_idx`(`status`),
+    INDEX `AllianceMap_createdAt_idx`(`createdAt`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- AddForeignKey
+ALTER TABLE `User` ADD CONSTRAINT `User_parentUserId_fkey` FOREIGN KEY (`parentUserId`) REFERENCES `User`(`id`) ON DELETE SET NULL ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE `TimeslotSubmission` ADD CONSTRAINT `TimeslotSubmission_userId_fkey` FOREIGN KEY (`userId`) REFERENCES `User`(`id`) ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE `AllianceStatistic` ADD CONSTRAINT `AllianceStatistic_userId_fkey` FOREIGN KEY (`userId`) REFERENCES `User`(`id`) ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE `SVSApplication` ADD CONSTRAINT `SVSApplication_userId_fkey` FOREIGN KEY (`userId`) REFERENCES `User`(`id`) ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE `PlayerPosition` ADD CONSTRAINT `PlayerPosition_userId_fkey` FOREIGN KEY (`userId`) REFERENCES `User`(`id`) ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE `AuditLog` ADD CONSTRAINT `AuditLog_userId_fkey` FOREIGN KEY (`userId`) REFERENCES `User`(`id`) ON DELETE SET NULL ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE `EventSlotConfiguration` ADD CONSTRAINT `EventSlotConfiguration_eventId_fkey` FOREIGN KEY (`eventId`) REFERENCES `Event`(`id`) ON DELETE CASCADE ON UPDATE CASCADE;
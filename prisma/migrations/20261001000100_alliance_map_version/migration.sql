@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE `AllianceMap` ADD COLUMN `version` INTEGER NOT NULL DEFAULT 0;
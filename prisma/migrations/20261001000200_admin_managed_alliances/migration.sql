@@ -0,0 +1,20 @@
+-- AlterTable
+ALTER TABLE `User` ADD COLUMN `allAlliances` BOOLEAN NOT NULL DEFAULT true;
+
+-- CreateTable
+CREATE TABLE `AdminManagedAlliance` (
+    `id` VARCHAR(191) NOT NULL,
+    `userId` VARCHAR(191) NOT NULL,
+    `alliance` VARCHAR(191) NOT NULL,
+    `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+
+    INDEX `AdminManagedAlliance_alliance_idx`(`alliance`),
+    UNIQUE INDEX `AdminManagedAlliance_userId_alliance_key`(`userId`, `alliance`),
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateIndex
+CREATE INDEX `User_allianceName_idx` ON `User`(`allianceName`);
+
+-- AddForeignKey
+ALTER TABLE `AdminManagedAlliance` ADD CONSTRAINT `AdminManagedAlliance_userId_fkey` FOREIGN KEY (`userId`) REFERENCES `User`(`id`) ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE `AuditLog` MODIFY `changes` MEDIUMTEXT NULL;
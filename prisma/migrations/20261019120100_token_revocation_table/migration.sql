@@ -0,0 +1,9 @@
+-- CreateTable
+CREATE TABLE `TokenRevocation` (
+    `userId` VARCHAR(191) NOT NULL,
+    `revokedBefore` INTEGER NOT NULL,
+    `updatedAt` DATETIME(3) NOT NULL,
+
+    INDEX `TokenRevocation_revokedBefore_idx`(`revokedBefore`),
+    PRIMARY KEY (`userId`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
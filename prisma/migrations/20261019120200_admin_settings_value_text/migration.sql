@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE `AdminSettings` MODIFY `settingValue` TEXT NOT NULL;
@@ -0,0 +1,248 @@
+import cluster, { Worker } from 'cluster';
+import os from 'os';
+import { logger } from './utils/logger';
+import { ClusterMessage, isClusterMessage, METRICS_TIMEOUT_MS } from './utils/cluster-bus';
+import { mergeWorkerMetrics } from './utils/metrics';
+
+const log = logger.child({ module: 'cluster' });
+
+// 叢集模式：主程序只負責管理 worker，所有請求由 worker 處理（共用同一個 port）
+//
+// CLUSTER_WORKERS   worker 數量；未設定或 1 時維持單一程序，max 使用所有 CPU
+// SIGHUP            輪替重啟：逐一啟動新 worker，暖機完成後才關閉舊的，服務不中斷
+// SIGINT / SIGTERM  通知所有 worker 正常關閉後結束
+//
+// 主程序同時轉送 worker 之間的 ClusterBus 訊息，並彙整各 worker 的指標
+
+// worker 異常結束後重新啟動的等待時間（連續崩潰時加倍）
+const RESTART_DELAY_MS = 1000;
+const MAX_RESTART_DELAY_MS = 30 * 1000;
+// 存活超過此時間才視為穩定，重置崩潰退避
+const STABLE_UPTIME_MS = 30 * 1000;
+// 輪替重啟時等待新 worker 暖機完成的上限
+const READY_TIMEOUT_MS = 60 * 1000;
+// 等待 worker 正常關閉的上限，逾時強制結束
+const STOP_TIMEOUT_MS = 20 * 1000;
+
+interface WorkerSlot {
+  index: number;
+  worker: Worker | null;
+  startedAt: number;
+  restartDelayMs: number;
+}
+
+interface MetricsCollection {
+  requester: Worker;
+  requestId: number;
+  waiting: Set<number>;
+  parts: Array<{ worker: number; text: string }>;
+  timer: NodeJS.Timeout;
+}
+
+const slots: WorkerSlot[] = [];
+const workerIndexes = new Map<number, number>();
+const collections = new Map<number, MetricsCollection>();
+let sequence = 0;
+let nextCollectionId = 1;
+let reloading = false;
+let shuttingDown = false;
+
+export function clusterWorkerCount(): number {
+  const setting = (process.env.CLUSTER_WORKERS || '').trim().toLowerCase();
+  if (setting === 'max') {
+    return os.availableParallelism ? os.availableParallelism() : os.cpus().length;
+  }
+  const count = parseInt(setting, 10);
+  return Number.isFinite(count) && count > 1 ? count : 1;
+}
+
+// 是否應以叢集主程序執行（主程序不處理請求）
+export function isClusterPrimary(): boolean {
+  return cluster.isPrimary && clusterWorkerCount() > 1;
+}
+
+function liveWorkers(): Worker[] {
+  return Object.values(cluster.workers || {}).filter((worker): worker is Worker => !!worker && worker.isConnected());
+}
+
+function sendTo(worker: Worker, message: ClusterMessage) {
+  if (worker.isConnected()) worker.send(message);
+}
+
+function fork(slot: WorkerSlot): Worker {
+  const worker = cluster.fork({ CLUSTER_WORKER_INDEX: String(slot.index) });
+  slot.worker = worker;
+  slot.startedAt = Date.now();
+  workerIndexes.set(worker.id, slot.index);
+
+  worker.on('message', message => {
+    if (isClusterMessage(message)) handleMessage(worker, message);
+  });
+  worker.on('exit', (code, signal) => handleExit(slot, worker, code, signal));
+  return worker;
+}
+
+function handleMessage(sender: Worker, message: ClusterMessage) {
+  switch (message.type) {
+    case 'cluster:bus':
+      if (message.sequenced) {
+        // 編號後送給所有 worker（包含發送者），確保各 worker 的順序一致
+        const sequenced = { ...message, seq: ++sequence };
+        for (const worker of liveWorkers()) sendTo(worker, sequenced);
+      } else {
+        for (const worker of liveWorkers()) {
+          if (worker !== sender) sendTo(worker, message);
+        }
+      }
+      break;
+    case 'cluster:metrics-request':
+      collectMetrics(sender, message.requestId);
+      break;
+    case 'cluster:metrics-report':
+      receiveMetrics(sender, message.requestId, message.text);
+      break;
+  }
+}
+
+function handleExit(slot: WorkerSlot, worker: Worker, code: number | null, signal: string | null) {
+  workerIndexes.delete(worker.id);
+  // 輪替重啟時被替換掉的舊 worker，或正在關閉
+  if (shuttingDown || slot.worker !== worker) return;
+
+  slot.worker = null;
+  const uptime = Date.now() - slot.startedAt;
+  slot.restartDelayMs = uptime > STABLE_UPTIME_MS
+    ? RESTART_DELAY_MS
+    : Math.min(slot.restartDelayMs * 2, MAX_RESTART_DELAY_MS);
+  log.error('Worker exited unexpectedly', { worker: slot.index, pid: worker.process.pid, code, signal, restartInMs: slot.restartDelayMs });
+
+  setTimeout(() => {
+    if (!shuttingDown && !slot.worker) fork(slot);
+  }, slot.restartDelayMs);
+}
+
+// 只收集目前使用中的 worker（輪替中的舊 worker 不計，避免重複的指標序列）
+function collectMetrics(requester: Worker, requestId: number) {
+  const id = nextCollectionId++;
+  const targets = slots
+    .map(slot => slot.worker)
+    .filter((worker): worker is Worker => !!worker && worker.isConnected());
+
+  const collection: MetricsCollection = {
+    requester,
+    requestId,
+    waiting: new Set(targets.map(worker => worker.id)),
+    parts: [],
+    timer: setTimeout(() => finishMetrics(id), METRICS_TIMEOUT_MS),
+  };
+  collections.set(id, collection);
+  for (const worker of targets) sendTo(worker, { type: 'cluster:metrics-collect', requestId: id });
+  if (collection.waiting.size === 0) finishMetrics(id);
+}
+
+function receiveMetrics(sender: Worker, id: number, text: string) {
+  const collection = collections.get(id);
+  if (!collection || !collection.waiting.delete(sender.id)) return;
+  collection.parts.push({ worker: workerIndexes.get(sender.id) ?? -1, text });
+  if (collection.waiting.size === 0) finishMetrics(id);
+}
+
+function finishMetrics(id: number) {
+  const collection = collections.get(id);
+  if (!collection) return;
+  collections.delete(id);
+  clearTimeout(collection.timer);
+
+  collection.parts.sort((a, b) => a.worker - b.worker);
+  sendTo(collection.requester, {
+    type: 'cluster:metrics-response',
+    requestId: collection.requestId,
+    text: collection.parts.length > 0 ? mergeWorkerMetrics(collection.parts) : null,
+  });
+}
+
+function waitForReady(worker: Worker): Promise<boolean> {
+  return new Promise(resolve => {
+    const finish = (ready: boolean) => {
+      clearTimeout(timer);
+      worker.off('message', onMessage);
+      worker.off('exit', onExit);
+      resolve(ready);
+    };
+    const onMessage = (message: any) => {
+      if (isClusterMessage(message) && message.type === 'cluster:ready') finish(true);
+    };
+    const onExit = () => finish(false);
+    const timer = setTimeout(() => finish(false), READY_TIMEOUT_MS);
+    worker.on('message', onMessage);
+    worker.once('exit', onExit);
+  });
+}
+
+// 送出 SIGTERM 讓 worker 自行關閉（停止接收連線、完成進行中的請求、寫出審計紀錄），逾時強制結束
+function stopWorker(worker: Worker): Promise<void> {
+  if (worker.isDead()) return Promise.resolve();
+  return new Promise(resolve => {
+    const timer = setTimeout(() => {
+      log.warn('Worker did not stop in time, killing', { pid: worker.process.pid });
+      worker.process.kill('SIGKILL');
+    }, STOP_TIMEOUT_MS);
+    worker.once('exit', () => {
+      clearTimeout(timer);
+      resolve();
+    });
+    worker.process.kill('SIGTERM');
+  });
+}
+
+// 輪替重啟：一次替換一個 worker，新的暖機完成才停止舊的
+async function rollingRestart() {
+  if (reloading || shuttingDown) return;
+  reloading = true;
+  log.info('Rolling restart started', { workers: slots.length });
+
+  try {
+    for (const slot of slots) {
+      const previous = slot.worker;
+      const replacement = fork(slot);
+      if (!(await waitForReady(replacement))) {
+        log.error('Replacement worker did not become ready, rolling restart aborted', { worker: slot.index });
+        // 保留舊 worker 繼續服務
+        slot.worker = previous;
+        await stopWorker(replacement);
+        if (!previous) fork(slot);
+        return;
+      }
+      if (previous) await stopWorker(previous);
+      if (shuttingDown) return;
+    }
+    log.info('Rolling restart completed');
+  } finally {
+    reloading = false;
+  }
+}
+
+async function shutdown(signal: string) {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  log.info('Stopping cluster', { signal });
+  await Promise.all(liveWorkers().map(stopWorker));
+  process.exit(0);
+}
+
+export function runClusterPrimary() {
+  const count = clusterWorkerCount();
+  log.info('Starting cluster', { workers: count, pid: process.pid });
+
+  for (let index = 0; index < count; index++) {
+    const slot: WorkerSlot = { index, worker: null, startedAt: 0, restartDelayMs: RESTART_DELAY_MS };
+    slots.push(slot);
+    fork(slot);
+  }
+
+  process.on('SIGHUP', () => {
+    rollingRestart().catch(error => log.error('Rolling restart failed', { error }));
+  });
+  process.on('SIGINT', () => shutdown('SIGINT'));
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+}
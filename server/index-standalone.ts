@@ -10,25 +10,44 @@ import cors from 'cors';
 import dotenv from 'dotenv';
 import path from 'path';
 import { fileURLToPath } from 'url';
-import { PrismaClient } from '@prisma/client';
-import UserService from './services/user.service';
+import { metricsMiddleware, metricsAuthorized } from './middleware/metrics';
+import { trustProxySetting } from './middleware/rate-limit';
+import { metrics } from './utils/metrics';
+import { logger } from './utils/logger';
+import { recordPhase, timePhase, isReady, markReady, reportStartup, readinessGate, lazyRouter } from './utils/startup';
 
-// Routes
-import authRoutes from './routes/auth';
-import submissionRoutes from './routes/submissions';
-import statisticsRoutes from './routes/statistics';
-import officerRoutes from './routes/officers';
-import eventRoutes from './routes/events';
-import mapRoutes from './routes/maps';
+// 只同步载入监听端口所需的模块；Prisma、服务与路由在 listen 之后才载入
+// （STARTUP_PROFILE=1 输出各阶段耗时）
+recordPhase('imports', 0);
+
+// Routes（第一次请求时载入，暖机完成后在后台预先载入）
+const routes = {
+  auth: lazyRouter('auth', () => import('./routes/auth')),
+  submissions: lazyRouter('submissions', () => import('./routes/submissions')),
+  statistics: lazyRouter('statistics', () => import('./routes/statistics')),
+  officers: lazyRouter('officers', () => import('./routes/officers')),
+  events: lazyRouter('events', () => import('./routes/events')),
+  maps: lazyRouter('maps', () => import('./routes/maps')),
+  stream: lazyRouter('stream', () => import('./routes/stream')),
+  players: lazyRouter('players', () => import('./routes/players')),
+  audit: lazyRouter('audit', () => import('./routes/audit')),
+  groups: lazyRouter('groups', () => import('./routes/groups')),
+};
 
 // 加载环境变量
 dotenv.config({ path: '.env.production' });
 dotenv.config(); // 作为备份
 
 const app: Express = express();
-const prisma = new PrismaClient();
 const PORT = parseInt(process.env.PORT || process.env.SERVER_PORT || '3001', 10);
 const HOST = process.env.HOST || 'localhost';
+// 关闭时等待进行中请求的时间，超过后强制关闭剩余连线
+const SHUTDOWN_GRACE_MS = parseInt(process.env.SHUTDOWN_GRACE_MS || '10000', 10);
+
+// 反向代理后方时设置 TRUST_PROXY，使 req.ip 为真实客户端地址（登录限流使用）
+if (process.env.TRUST_PROXY) {
+  app.set('trust proxy', trustProxySetting(process.env.TRUST_PROXY));
+}
 
 // Middleware
 app.use(
@@ -51,58 +70,134 @@ app.use(
     credentials: true,
   })
 );
+app.use('/api', metricsMiddleware);
+// 分組同步一次上傳整個分組，可能超過預設的 100kb 上限
+app.use('/api/groups', express.json({ limit: '2mb' }));
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 
 // 健康检查路由
-app.get('/api/health', (req: Request, res: Response) => {
-  res.json({ status: 'ok', message: 'Backend server is running' });
+app.get('/api/health', async (req: Request, res: Response) => {
+  const { checkDatabase } = await import('./prisma');
+  const database = await checkDatabase();
+  res.status(database.ok ? 200 : 503).json({
+    status: database.ok ? 'ok' : 'degraded',
+    message: database.ok ? 'Backend server is running' : 'Database unavailable',
+    uptime: Math.round(process.uptime()),
+    database,
+  });
+});
+
+// 指标（Prometheus 文本格式；需要以 METRICS_TOKEN 作为 Bearer token，或设置 METRICS_PUBLIC=true）
+app.get('/api/metrics', (req: Request, res: Response) => {
+  if (!metricsAuthorized(req)) {
+    return res.status(401).json({ error: 'Unauthorized' });
+  }
+  res.type('text/plain; version=0.0.4').send(metrics.render());
+});
+
+// 就绪检查（暖机完成后回传 200）
+app.get('/api/ready', (req: Request, res: Response) => {
+  res.status(isReady() ? 200 : 503).json({ ready: isReady(), uptime: Math.round(process.uptime()) });
 });
 
+// 暖机完成前到达的请求先等待（health、metrics、ready 已在上方处理）
+app.use('/api', readinessGate);
+
 // Routes
-app.use('/api/auth', authRoutes);
-app.use('/api/submissions', submissionRoutes);
-app.use('/api/statistics', statisticsRoutes);
-app.use('/api/officers', officerRoutes);
-app.use('/api/events', eventRoutes);
-app.use('/api/maps', mapRoutes);
+app.use('/api/auth', routes.auth);
+app.use('/api/submissions', routes.submissions);
+app.use('/api/statistics', routes.statistics);
+app.use('/api/officers', routes.officers);
+app.use('/api/events', routes.events);
+app.use('/api/maps', routes.maps);
+app.use('/api/stream', routes.stream);
+app.use('/api/players', routes.players);
+app.use('/api/audit', routes.audit);
+app.use('/api/groups', routes.groups);
 
 // 错误处理
 app.use((err: any, req: Request, res: Response, next: Function) => {
-  console.error('Error:', err);
+  logger.error('Unhandled request error', { error: err });
   res.status(err.status || 500).json({
     error: err.message || 'Internal Server Error',
   });
 });
 
-// 启动服务器
+// 启动服务器：先监听端口，再于后台暖机
 const server = app.listen(PORT, HOST, () => {
-  console.log(`✓ Backend server running on http://${HOST}:${PORT}`);
-  console.log(`✓ Frontend URL: ${process.env.FRONTEND_URL}`);
-  console.log(`✓ Environment: ${process.env.NODE_ENV || 'development'}`);
-});
-
-// 优雅关闭
-process.on('SIGTERM', async () => {
-  console.log('SIGTERM signal received: closing HTTP server');
-  server.close(async () => {
-    console.log('HTTP server closed');
-    await prisma.$disconnect();
-    process.exit(0);
+  recordPhase('listen', 0);
+  logger.info(`Backend server running on http://${HOST}:${PORT}`, {
+    frontend: process.env.FRONTEND_URL,
+    environment: process.env.NODE_ENV || 'development',
   });
+  warmup();
 });
 
-process.on('SIGINT', async () => {
-  console.log('SIGINT signal received: closing HTTP server');
-  server.close(async () => {
-    console.log('HTTP server closed');
-    await prisma.$disconnect();
-    process.exit(0);
+async function warmup() {
+  try {
+    const { default: prisma } = await timePhase('prisma', () => import('./prisma'));
+    await timePhase('database', () => prisma.$connect());
+    // 已撤销的 token 列表必须在处理任何认证请求前载入
+    const { default: TokenRevocationService } = await timePhase('services', () => import('./services/token-revocation.service'));
+    await timePhase('token-revocations', () => TokenRevocationService.load());
+    // 旧的 managedAlliances JSON 栏位迁移到 AdminManagedAlliance
+    const { default: UserService } = await import('./services/user.service');
+    await timePhase('managed-alliances', () => UserService.migrateManagedAlliances());
+    markReady();
+  } catch (error) {
+    logger.error('Failed to start server', { error });
+    process.exit(1);
+  }
+
+  try {
+    await timePhase('routes', () => Promise.all(Object.values(routes).map(route => route.load())));
+  } catch (error) {
+    // 失败的路由会在第一次请求时重试
+    logger.error('Failed to preload routes', { error });
+  }
+  reportStartup();
+}
+
+// 停止接受新连线并等待进行中的请求完成；SSE 连线立即结束（否则 server.close 永远不会完成），
+// 超过 SHUTDOWN_GRACE_MS 仍未结束的连线强制关闭
+async function closeServer() {
+  const { default: RealtimeService } = await import('./services/realtime.service');
+  RealtimeService.closeAll();
+  await new Promise<void>(resolve => {
+    const timer = setTimeout(() => {
+      server.closeAllConnections();
+      resolve();
+    }, SHUTDOWN_GRACE_MS);
+    server.close(() => {
+      clearTimeout(timer);
+      resolve();
+    });
+    server.closeIdleConnections();
   });
-});
+}
+
+// 优雅关闭
+let shuttingDown = false;
+
+async function shutdown(signal: string) {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  logger.info('Shutting down', { signal });
+  await closeServer();
+  logger.info('HTTP server closed');
+  const { default: AuditService } = await import('./services/audit.service');
+  const { default: prisma } = await import('./prisma');
+  await AuditService.shutdown();
+  await prisma.$disconnect();
+  process.exit(0);
+}
+
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+process.on('SIGINT', () => shutdown('SIGINT'));
 
 // 未捕获的异常
 process.on('uncaughtException', (err) => {
-  console.error('Uncaught Exception:', err);
+  logger.error('Uncaught Exception', { error: err });
   process.exit(1);
 });
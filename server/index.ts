@@ -2,22 +2,44 @@ import express, { Express, Request, Response } from 'express';
 import cors from 'cors';
 import dotenv from 'dotenv';
 import path from 'path';
-import { PrismaClient } from '@prisma/client';
-import UserService from './services/user.service';
+import { Server } from 'http';
+import { metricsMiddleware, metricsAuthorized } from './middleware/metrics';
+import { trustProxySetting } from './middleware/rate-limit';
+import { metrics } from './utils/metrics';
+import { logger } from './utils/logger';
+import { recordPhase, timePhase, isReady, markReady, reportStartup, readinessGate, lazyRouter } from './utils/startup';
+import { ClusterBus } from './utils/cluster-bus';
+import { isClusterPrimary, runClusterPrimary } from './cluster';
 
-// Routes
-import authRoutes from './routes/auth';
-import submissionRoutes from './routes/submissions';
-import statisticsRoutes from './routes/statistics';
-import officerRoutes from './routes/officers';
-import eventRoutes from './routes/events';
-import mapRoutes from './routes/maps';
+// Only the modules needed to bind the port are imported eagerly; Prisma, services and
+// route modules are loaded after listen (STARTUP_PROFILE=1 logs the time spent per phase)
+recordPhase('imports', 0);
+
+// Routes (loaded on first request, then preloaded in the background after warmup)
+const routes = {
+  auth: lazyRouter('auth', () => import('./routes/auth')),
+  submissions: lazyRouter('submissions', () => import('./routes/submissions')),
+  statistics: lazyRouter('statistics', () => import('./routes/statistics')),
+  officers: lazyRouter('officers', () => import('./routes/officers')),
+  events: lazyRouter('events', () => import('./routes/events')),
+  maps: lazyRouter('maps', () => import('./routes/maps')),
+  stream: lazyRouter('stream', () => import('./routes/stream')),
+  players: lazyRouter('players', () => import('./routes/players')),
+  audit: lazyRouter('audit', () => import('./routes/audit')),
+  groups: lazyRouter('groups', () => import('./routes/groups')),
+};
 
 dotenv.config();
 
 const app: Express = express();
-const prisma = new PrismaClient();
 const PORT = parseInt(process.env.SERVER_PORT || process.env.PORT || '3001', 10);
+// How long shutdown waits for in-flight requests before closing remaining connections
+const SHUTDOWN_GRACE_MS = parseInt(process.env.SHUTDOWN_GRACE_MS || '10000', 10);
+
+// Behind a reverse proxy, set TRUST_PROXY so req.ip is the client address (used by the auth rate limiter)
+if (process.env.TRUST_PROXY) {
+  app.set('trust proxy', trustProxySetting(process.env.TRUST_PROXY));
+}
 
 // Middleware
 app.use(
@@ -40,60 +62,154 @@ app.use(
     credentials: true,
   })
 );
+app.use('/api', metricsMiddleware);
+// Group sync uploads a whole group per request, which can exceed the default 100kb body limit
+app.use('/api/groups', express.json({ limit: '2mb' }));
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 
 // Static files
 app.use(express.static('dist'));
 
-// Routes
-app.use('/api/auth', authRoutes);
-app.use('/api/submissions', submissionRoutes);
-app.use('/api/statistics', statisticsRoutes);
-app.use('/api/officers', officerRoutes);
-app.use('/api/events', eventRoutes);
-app.use('/api/maps', mapRoutes);
-
 // Health check
-app.get('/api/health', (req: Request, res: Response) => {
-  res.json({ status: 'ok', message: 'Server is running' });
+app.get('/api/health', async (req: Request, res: Response) => {
+  const { checkDatabase } = await import('./prisma');
+  const database = await checkDatabase();
+  res.status(database.ok ? 200 : 503).json({
+    status: database.ok ? 'ok' : 'degraded',
+    message: database.ok ? 'Server is running' : 'Database unavailable',
+    uptime: Math.round(process.uptime()),
+    database,
+  });
 });
 
+// Metrics (Prometheus text format; requires METRICS_TOKEN as a bearer token, or METRICS_PUBLIC=true)
+// In cluster mode every worker's metrics are returned, labelled with worker="<index>"
+app.get('/api/metrics', async (req: Request, res: Response) => {
+  if (!metricsAuthorized(req)) {
+    return res.status(401).json({ error: 'Unauthorized' });
+  }
+  const merged = await ClusterBus.collectMetrics();
+  res.type('text/plain; version=0.0.4').send(merged ?? metrics.render());
+});
+
+// Readiness (200 once warmup has finished; for load balancers and pm2 wait_ready scripts)
+app.get('/api/ready', (req: Request, res: Response) => {
+  res.status(isReady() ? 200 : 503).json({ ready: isReady(), uptime: Math.round(process.uptime()) });
+});
+
+// Requests arriving before warmup finishes wait for it (health, metrics and ready are answered above)
+app.use('/api', readinessGate);
+
+// Routes
+app.use('/api/auth', routes.auth);
+app.use('/api/submissions', routes.submissions);
+app.use('/api/statistics', routes.statistics);
+app.use('/api/officers', routes.officers);
+app.use('/api/events', routes.events);
+app.use('/api/maps', routes.maps);
+app.use('/api/stream', routes.stream);
+app.use('/api/players', routes.players);
+app.use('/api/audit', routes.audit);
+app.use('/api/groups', routes.groups);
+
 // Fallback for SPA - serve index.html for all requests that are not API routes
 app.use((req: Request, res: Response) => {
   // If it's not an API route, serve the frontend
   if (!req.path.startsWith('/api')) {
-    res.sendFile(path.join(__dirname, '../dist/index.html'));
+    // Resolved from the working directory like express.static above, so the bundled server works too
+    res.sendFile(path.resolve('dist/index.html'));
   } else {
     res.status(404).json({ error: 'API endpoint not found' });
   }
 });
 
-// Start server
+// Start server: bind the port first so restarts are visible immediately, then warm up
+let server: Server | undefined;
+
+async function warmup() {
+  const { default: prisma } = await timePhase('prisma', () => import('./prisma'));
+  await timePhase('database', () => prisma.$connect());
+  // Revoked tokens must be loaded before any authenticated request is served
+  const { default: TokenRevocationService } = await timePhase('services', () => import('./services/token-revocation.service'));
+  await timePhase('token-revocations', () => TokenRevocationService.load());
+  // One-off data tasks run in a single worker when clustered
+  if (ClusterBus.workerIndex === 0) {
+    const { default: UserService } = await import('./services/user.service');
+    await timePhase('super-admin', () => UserService.initializeSuperAdmin());
+    await timePhase('managed-alliances', () => UserService.migrateManagedAlliances());
+  }
+}
+
 async function main() {
+  const HOST = process.env.HOST || '0.0.0.0';
   try {
-    // Initialize super admin
-    await UserService.initializeSuperAdmin();
-
-    const HOST = process.env.HOST || '0.0.0.0';
-    app.listen(PORT, HOST, () => {
-      console.log(`🚀 Server is running at http://${HOST}:${PORT}`);
-      console.log(`📊 Database: ${process.env.DATABASE_URL}`);
-      console.log(`🔗 Frontend: ${process.env.FRONTEND_URL}`);
+    await timePhase('listen', () => new Promise<void>((resolve, reject) => {
+      server = app.listen(PORT, HOST, (error?: Error) => (error ? reject(error) : resolve()));
+    }));
+    logger.info(`Server is running at http://${HOST}:${PORT}`, {
+      frontend: process.env.FRONTEND_URL,
+      ...(ClusterBus.enabled && { worker: ClusterBus.workerIndex }),
     });
+
+    await warmup();
+    markReady();
+    ClusterBus.notifyReady();
   } catch (error) {
-    console.error('Failed to start server:', error);
+    logger.error('Failed to start server', { error });
     process.exit(1);
   }
+
+  try {
+    await timePhase('routes', () => Promise.all(Object.values(routes).map(route => route.load())));
+  } catch (error) {
+    // Retried on the first request to the failing route
+    logger.error('Failed to preload routes', { error });
+  }
+  reportStartup();
+}
+
+// Stop accepting connections and let in-flight requests finish; event streams are ended
+// right away so clients reconnect (to another worker when clustered)
+async function closeServer() {
+  if (!server) return;
+  const { default: RealtimeService } = await import('./services/realtime.service');
+  RealtimeService.closeAll();
+  await new Promise<void>(resolve => {
+    const timer = setTimeout(() => {
+      server!.closeAllConnections();
+      resolve();
+    }, SHUTDOWN_GRACE_MS);
+    server!.close(() => {
+      clearTimeout(timer);
+      resolve();
+    });
+    server!.closeIdleConnections();
+  });
 }
 
 // Graceful shutdown
-process.on('SIGINT', async () => {
-  console.log('\n🛑 Shutting down...');
+let shuttingDown = false;
+
+async function shutdown(signal: string) {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  logger.info('Shutting down', { signal });
+  await closeServer();
+  const { default: AuditService } = await import('./services/audit.service');
+  const { default: prisma } = await import('./prisma');
+  await AuditService.shutdown();
   await prisma.$disconnect();
   process.exit(0);
-});
+}
 
-main();
+// CLUSTER_WORKERS > 1: this process only supervises the workers (see cluster.ts)
+if (isClusterPrimary()) {
+  runClusterPrimary();
+} else {
+  process.on('SIGINT', () => shutdown('SIGINT'));
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+  main();
+}
 
 export default app;
@@ -1,58 +1,118 @@
 import { Request, Response, NextFunction } from 'express';
 import crypto from 'crypto';
-import { PrismaClient } from '@prisma/client';
+import prisma from '../prisma';
+import { LruCache } from '../utils/lru-cache';
+import { logger } from '../utils/logger';
+import { TokenRevocationService, TOKEN_TTL_SECONDS } from '../services/token-revocation.service';
 
-const prisma = new PrismaClient();
+const log = logger.child({ module: 'auth' });
 
 export interface AuthRequest extends Request {
   user?: {
     id: string;
     gameId: string;
     isAdmin: boolean;
+    legacyToken?: boolean;
   };
 }
 
+export interface TokenPayload {
+  userId: string;
+  gameId: string;
+  isAdmin: boolean;
+  iat: number;
+  exp: number;
+  kid?: string;
+}
+
+// 簽章金鑰：JWT_KEYS="kid1:secret1,kid2:secret2"，以 JWT_ACTIVE_KID 簽發新 token
+// 輪替時先加入新金鑰並切換 JWT_ACTIVE_KID，舊金鑰保留到舊 token 過期後再移除
+// 沒有 kid 的舊 token 以 JWT_SECRET 驗證
+const LEGACY_KID = 'default';
 const JWT_SECRET = process.env.JWT_SECRET || 'dev-secret-key';
 
+function loadSigningKeys(): Map<string, string> {
+  const keys = new Map<string, string>([[LEGACY_KID, JWT_SECRET]]);
+  for (const entry of (process.env.JWT_KEYS || '').split(',')) {
+    const separator = entry.indexOf(':');
+    if (separator > 0) {
+      keys.set(entry.slice(0, separator).trim(), entry.slice(separator + 1).trim());
+    }
+  }
+  return keys;
+}
+
+const signingKeys = loadSigningKeys();
+const ACTIVE_KID = process.env.JWT_ACTIVE_KID && signingKeys.has(process.env.JWT_ACTIVE_KID)
+  ? process.env.JWT_ACTIVE_KID
+  : LEGACY_KID;
+
+// 已驗證的 token 快取（以簽章為 key）；命中時仍比對 header.payload，並檢查過期與撤銷
+const VERIFIED_CACHE_SIZE = 10000;
+const VERIFIED_CACHE_TTL_MS = 10 * 60 * 1000;
+const verifiedTokens = new LruCache<string, { signingInput: string; payload: TokenPayload }>(
+  VERIFIED_CACHE_SIZE,
+  VERIFIED_CACHE_TTL_MS
+);
+
+function sign(signingInput: string, secret: string): Buffer {
+  return crypto.createHmac('sha256', secret).update(signingInput).digest();
+}
+
 export function generateToken(userId: string, gameId: string, isAdmin: boolean): string {
-  const header = Buffer.from(JSON.stringify({ alg: 'HS256', typ: 'JWT' })).toString('base64url');
+  const header = Buffer.from(JSON.stringify({ alg: 'HS256', typ: 'JWT', kid: ACTIVE_KID })).toString('base64url');
+  const iat = Math.floor(Date.now() / 1000);
   const payload = Buffer.from(
     JSON.stringify({
       userId,
       gameId,
       isAdmin,
-      iat: Math.floor(Date.now() / 1000),
-      exp: Math.floor(Date.now() / 1000) + 7 * 24 * 60 * 60, // 7 days
+      iat,
+      exp: iat + TOKEN_TTL_SECONDS, // 7 days
     })
   ).toString('base64url');
 
-  const signature = crypto
-    .createHmac('sha256', JWT_SECRET)
-    .update(`${header}.${payload}`)
-    .digest('base64url');
+  const signature = sign(`${header}.${payload}`, signingKeys.get(ACTIVE_KID)!).toString('base64url');
 
   return `${header}.${payload}.${signature}`;
 }
 
-export function verifyToken(token: string): any {
+function isCurrent(payload: TokenPayload): boolean {
+  return payload.exp >= Math.floor(Date.now() / 1000) && !TokenRevocationService.isRevoked(payload.userId, payload.iat);
+}
+
+export function verifyToken(token: string): TokenPayload | null {
   try {
-    const [header, payload, signature] = token.split('.');
+    const lastDot = token.lastIndexOf('.');
+    if (lastDot <= 0) return null;
+    const signingInput = token.slice(0, lastDot);
+    const signature = token.slice(lastDot + 1);
+
+    const cached = verifiedTokens.get(signature);
+    if (cached && cached.signingInput === signingInput) {
+      return isCurrent(cached.payload) ? cached.payload : null;
+    }
+
+    const [header, payload, extra] = signingInput.split('.');
+    if (!header || !payload || extra !== undefined) return null;
 
-    const expectedSignature = crypto
-      .createHmac('sha256', JWT_SECRET)
-      .update(`${header}.${payload}`)
-      .digest('base64url');
+    const { kid } = JSON.parse(Buffer.from(header, 'base64url').toString());
+    const secret = signingKeys.get(kid || LEGACY_KID);
+    if (!secret) return null;
 
-    if (signature !== expectedSignature) {
+    const expected = sign(signingInput, secret);
+    const actual = Buffer.from(signature, 'base64url');
+    if (actual.length !== expected.length || !crypto.timingSafeEqual(actual, expected)) {
       return null;
     }
 
-    const decoded = JSON.parse(Buffer.from(payload, 'base64url').toString());
-
-    if (decoded.exp < Math.floor(Date.now() / 1000)) {
+    const decoded: TokenPayload = JSON.parse(Buffer.from(payload, 'base64url').toString());
+    decoded.kid = kid;
+    if (!isCurrent(decoded)) {
       return null;
     }
 
+    verifiedTokens.set(signature, { signingInput, payload: decoded });
     return decoded;
   } catch (error) {
     return null;
@@ -75,32 +135,35 @@ export function authMiddleware(req: AuthRequest, res: Response, next: NextFuncti
     id: decoded.userId,
     gameId: decoded.gameId,
     isAdmin: decoded.isAdmin,
+    legacyToken: !decoded.kid,
   };
 
   next();
 }
 
+// 管理員權限以 token 內容為準：權限變更時 UserService 會撤銷該使用者的舊 token，
+// 因此不需要每次請求都查詢資料庫
+// 沒有 kid 的舊 token 簽發時還沒有撤銷機制，仍從資料庫確認（7 天內自然淘汰）
 export async function adminMiddleware(req: AuthRequest, res: Response, next: NextFunction) {
   if (!req.user) {
     return res.status(403).json({ error: 'Admin access required' });
   }
 
-  // 從資料庫檢查最新的 isAdmin 狀態（避免舊 token 問題）
-  try {
-    const user = await prisma.user.findUnique({
-      where: { id: req.user.id },
-      select: { isAdmin: true }
-    });
-
-    if (!user || !user.isAdmin) {
-      return res.status(403).json({ error: 'Admin access required' });
+  if (req.user.legacyToken) {
+    try {
+      const user = await prisma.user.findUnique({
+        where: { id: req.user.id },
+        select: { isAdmin: true }
+      });
+      req.user.isAdmin = !!user?.isAdmin;
+    } catch (error) {
+      log.error('Error checking admin status', { error });
+      return res.status(500).json({ error: 'Internal server error' });
     }
+  }
 
-    // 更新 req.user 的 isAdmin 狀態
-    req.user.isAdmin = user.isAdmin;
-    next();
-  } catch (error) {
-    console.error('Error checking admin status:', error);
-    return res.status(500).json({ error: 'Internal server error' });
+  if (!req.user.isAdmin) {
+    return res.status(403).json({ error: 'Admin access required' });
   }
+  next();
 }
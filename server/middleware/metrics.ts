@@ -0,0 +1,133 @@
+import { Request, Response, NextFunction } from 'express';
+import crypto from 'crypto';
+import { monitorEventLoopDelay } from 'perf_hooks';
+import { metrics, LATENCY_BUCKETS } from '../utils/metrics';
+import { runWithRequestContext, RequestContext } from '../utils/request-context';
+import { logger } from '../utils/logger';
+import { RealtimeService } from '../services/realtime.service';
+import { PlayerService } from '../services/player.service';
+
+const log = logger.child({ module: 'http' });
+
+const requestDuration = metrics.histogram(
+  'http_request_duration_seconds',
+  'HTTP request latency by route template',
+  LATENCY_BUCKETS
+);
+const requestsTotal = metrics.counter('http_requests_total', 'HTTP responses by route template and status code');
+const requestsInFlight = metrics.gauge('http_requests_in_flight', 'HTTP requests currently being handled');
+const requestDbQueries = metrics.histogram(
+  'http_request_db_queries',
+  'Prisma queries issued per HTTP request',
+  [0, 1, 2, 5, 10, 20, 50, 100]
+);
+const requestDbTime = metrics.histogram(
+  'http_request_db_duration_seconds',
+  'Total Prisma time per HTTP request',
+  LATENCY_BUCKETS
+);
+
+// 事件迴圈延遲（每次輸出後重置，代表上次抓取以來的區間）
+const loopDelay = monitorEventLoopDelay({ resolution: 20 });
+loopDelay.enable();
+metrics.gauge('nodejs_eventloop_lag_seconds', 'Event loop delay since the last scrape', gauge => {
+  gauge.set({ quantile: '0.5' }, loopDelay.percentile(50) / 1e9);
+  gauge.set({ quantile: '0.99' }, loopDelay.percentile(99) / 1e9);
+  gauge.set({ quantile: '1' }, loopDelay.max / 1e9);
+  loopDelay.reset();
+});
+
+metrics.gauge('process_memory_bytes', 'Process memory usage', gauge => {
+  const usage = process.memoryUsage();
+  gauge.set({ type: 'rss' }, usage.rss);
+  gauge.set({ type: 'heap_used' }, usage.heapUsed);
+  gauge.set({ type: 'heap_total' }, usage.heapTotal);
+});
+
+metrics.gauge('sse_clients', 'Connected event stream clients', gauge => {
+  const stats = RealtimeService.getStats();
+  gauge.set({ state: 'connected' }, stats.clients);
+  gauge.set({ state: 'blocked' }, stats.blockedClients);
+});
+
+metrics.gauge('player_cache', 'Game player lookup cache', gauge => {
+  const stats = PlayerService.getStats();
+  gauge.set({ stat: 'size' }, stats.cacheSize);
+  gauge.set({ stat: 'hits' }, stats.hits);
+  gauge.set({ stat: 'misses' }, stats.misses);
+  gauge.set({ stat: 'coalesced' }, stats.coalesced);
+  gauge.set({ stat: 'upstream_queued' }, stats.upstreamQueued);
+});
+
+// 用戶端傳入的 X-Request-Id 會寫入日誌與回應標頭，只接受短的安全字元，否則改為自行產生
+const REQUEST_ID_PATTERN = /^[A-Za-z0-9._-]{1,64}$/;
+
+function requestIdFrom(req: Request): string {
+  const header = req.headers['x-request-id'];
+  return typeof header === 'string' && REQUEST_ID_PATTERN.test(header) ? header : crypto.randomUUID();
+}
+
+// /api/metrics 的存取權：需要 METRICS_TOKEN（Bearer）；未設定時不開放，除非明確設定 METRICS_PUBLIC=true
+export function metricsAuthorized(req: Request): boolean {
+  const token = process.env.METRICS_TOKEN;
+  if (!token) return process.env.METRICS_PUBLIC === 'true';
+  const expected = Buffer.from(`Bearer ${token}`);
+  const actual = Buffer.from(req.headers.authorization || '');
+  return actual.length === expected.length && crypto.timingSafeEqual(actual, expected);
+}
+
+// SSE 是長連線，延遲沒有意義，改由 sse_clients 觀察
+const EXCLUDED_PATHS = ['/api/stream', '/api/metrics'];
+
+// 使用路由樣板（例如 /api/maps/:id）作為標籤，避免標籤數量無限增加
+function routeLabel(req: Request): string {
+  if (!req.route) return 'unmatched';
+  return `${req.baseUrl}${req.route.path}`;
+}
+
+export function metricsMiddleware(req: Request, res: Response, next: NextFunction) {
+  if (EXCLUDED_PATHS.some(path => req.originalUrl.startsWith(path))) {
+    return next();
+  }
+
+  const context: RequestContext = {
+    requestId: requestIdFrom(req),
+    startedAt: performance.now(),
+    dbQueries: 0,
+    dbTimeMs: 0,
+  };
+  res.setHeader('X-Request-Id', context.requestId);
+  requestsInFlight.inc();
+
+  let recorded = false;
+  const record = () => {
+    if (recorded) return;
+    recorded = true;
+    requestsInFlight.dec();
+
+    const route = routeLabel(req);
+    const labels = { method: req.method, route };
+    const durationMs = performance.now() - context.startedAt;
+    requestDuration.observe(labels, durationMs / 1000);
+    requestsTotal.inc({ ...labels, status: res.statusCode });
+    requestDbQueries.observe(labels, context.dbQueries);
+    requestDbTime.observe(labels, context.dbTimeMs / 1000);
+
+    // 存取日誌：5xx 一律記錄，其餘為 debug（可用 LOG_DEBUG_SAMPLE_RATE 取樣）
+    const entry = {
+      requestId: context.requestId,
+      method: req.method,
+      route,
+      status: res.statusCode,
+      durationMs: Math.round(durationMs),
+      dbQueries: context.dbQueries,
+      dbTimeMs: Math.round(context.dbTimeMs),
+    };
+    if (res.statusCode >= 500) log.warn('Request failed', entry);
+    else log.debug('Request completed', entry);
+  };
+  res.on('finish', record);
+  res.on('close', record);
+
+  runWithRequestContext(context, () => next());
+}
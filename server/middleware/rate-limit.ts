@@ -0,0 +1,114 @@
+import { Response, NextFunction } from 'express';
+import { TokenBucketLimiter } from '../utils/rate-limit';
+import { metrics } from '../utils/metrics';
+import { logger } from '../utils/logger';
+import { AuthRequest } from './auth';
+
+const log = logger.child({ module: 'rate-limit' });
+
+// 驗證密碼失敗的次數限制：依 IP、以及 IP + gameId 各一個桶
+// 帳號的桶以 IP + gameId 為 key：其他人故意輸錯密碼只會鎖住自己的 IP，不會讓帳號本人無法登入
+// 進入處理前先預扣 token，回應成功（2xx / 3xx）時退還；只有失敗的嘗試會真正消耗，
+// 報名高峰時大量的正常登入不受影響。先預扣再處理，同時送出的大量請求也無法超過桶的容量；
+// 桶空了之後直接回傳 429，不會再查詢資料庫或計算雜湊
+// 註冊另外以 registerRateLimit 依 IP 限制，成功的註冊也會消耗 token（不退還）
+//
+// 環境變數（容量,每秒補充量）：
+//   AUTH_RATE_LIMIT_IP       預設 30,0.5    （同一 IP 連續失敗 30 次後每 2 秒 1 次）
+//   AUTH_RATE_LIMIT_GAME_ID  預設 10,0.05   （同一 IP 對同一帳號連續失敗 10 次後每 20 秒 1 次）
+//   AUTH_RATE_LIMIT_REGISTER 預設 10,0.005  （同一 IP 註冊 10 個帳號後每 200 秒 1 個）
+// 反向代理後方請設定 TRUST_PROXY，讓 req.ip 取得真實的用戶端 IP
+// 桶存在各程序的記憶體中：叢集模式（CLUSTER_WORKERS > 1）下請求分散到各 worker，
+// 實際可嘗試的次數約為設定值 × worker 數，設定時請依 worker 數調低容量
+
+function parseLimit(value: string | undefined, fallback: [number, number]): [number, number] {
+  const [capacity, refill] = (value || '').split(',').map(Number);
+  return capacity > 0 && refill > 0 ? [capacity, refill] : fallback;
+}
+
+const [ipCapacity, ipRefill] = parseLimit(process.env.AUTH_RATE_LIMIT_IP, [30, 0.5]);
+const [accountCapacity, accountRefill] = parseLimit(process.env.AUTH_RATE_LIMIT_GAME_ID, [10, 0.05]);
+const [registerCapacity, registerRefill] = parseLimit(process.env.AUTH_RATE_LIMIT_REGISTER, [10, 0.005]);
+
+const ipLimiter = new TokenBucketLimiter(ipCapacity, ipRefill);
+const accountLimiter = new TokenBucketLimiter(accountCapacity, accountRefill);
+const registerLimiter = new TokenBucketLimiter(registerCapacity, registerRefill);
+
+// 玩家資料查詢的次數限制：批次查詢與強制刷新會直接打到遊戲 API，依 IP 每個請求消耗一個 token
+//   PLAYER_RATE_LIMIT_IP    預設 60,1     （同一 IP 連續 60 次後每秒 1 次）
+const [playerCapacity, playerRefill] = parseLimit(process.env.PLAYER_RATE_LIMIT_IP, [60, 1]);
+const playerLimiter = new TokenBucketLimiter(playerCapacity, playerRefill);
+
+const rateLimited = metrics.counter('auth_rate_limited_total', 'Authentication attempts rejected by the rate limiter');
+const failedAttempts = metrics.counter('auth_failed_attempts_total', 'Failed password checks');
+
+const FAILURE_STATUSES = [400, 401];
+
+export function authRateLimit(req: AuthRequest, res: Response, next: NextFunction) {
+  const ipKey = req.ip || req.socket.remoteAddress || 'unknown';
+  const rawGameId = req.user?.gameId || req.body?.gameId;
+  const gameId = rawGameId ? String(rawGameId) : null;
+  const accountKey = gameId ? `${ipKey}|${gameId}` : null;
+
+  const retryAfterMs = Math.max(
+    ipLimiter.retryAfterMs(ipKey),
+    accountKey ? accountLimiter.retryAfterMs(accountKey) : 0
+  );
+  if (retryAfterMs > 0) {
+    rateLimited.inc({ route: req.baseUrl + req.path });
+    log.warn('Authentication attempt rate limited', { ip: ipKey, gameId, retryAfterMs });
+    res.setHeader('Retry-After', String(Math.ceil(retryAfterMs / 1000)));
+    return res.status(429).json({ error: '嘗試次數過多，請稍後再試' });
+  }
+
+  ipLimiter.take(ipKey);
+  if (accountKey) accountLimiter.take(accountKey);
+
+  // 連線中斷而沒有送出回應時不退還
+  res.on('finish', () => {
+    if (FAILURE_STATUSES.includes(res.statusCode)) {
+      failedAttempts.inc({ route: req.baseUrl + req.path });
+    }
+    if (res.statusCode >= 400) return;
+    ipLimiter.refund(ipKey);
+    if (accountKey) accountLimiter.refund(accountKey);
+  });
+
+  next();
+}
+
+// 建立帳號的次數限制：每次註冊都消耗 token，成功也不退還
+export function registerRateLimit(req: AuthRequest, res: Response, next: NextFunction) {
+  const ipKey = req.ip || req.socket.remoteAddress || 'unknown';
+  const retryAfterMs = registerLimiter.retryAfterMs(ipKey);
+  if (retryAfterMs > 0) {
+    rateLimited.inc({ route: req.baseUrl + req.path });
+    log.warn('Registration rate limited', { ip: ipKey, retryAfterMs });
+    res.setHeader('Retry-After', String(Math.ceil(retryAfterMs / 1000)));
+    return res.status(429).json({ error: '註冊次數過多，請稍後再試' });
+  }
+  registerLimiter.take(ipKey);
+  next();
+}
+
+export function playerLookupRateLimit(req: AuthRequest, res: Response, next: NextFunction) {
+  const ipKey = req.ip || req.socket.remoteAddress || 'unknown';
+  const retryAfterMs = playerLimiter.retryAfterMs(ipKey);
+  if (retryAfterMs > 0) {
+    rateLimited.inc({ route: req.baseUrl + req.path });
+    log.warn('Player lookup rate limited', { ip: ipKey, retryAfterMs });
+    res.setHeader('Retry-After', String(Math.ceil(retryAfterMs / 1000)));
+    return res.status(429).json({ error: '查詢次數過多，請稍後再試' });
+  }
+  playerLimiter.take(ipKey);
+  next();
+}
+
+// 反向代理設定：TRUST_PROXY=true / 代理層數 / IP 清單
+export function trustProxySetting(value: string | undefined): boolean | number | string | undefined {
+  if (!value) return undefined;
+  if (value === 'true') return true;
+  if (value === 'false') return false;
+  const hops = parseInt(value, 10);
+  return String(hops) === value ? hops : value;
+}
@@ -0,0 +1,55 @@
+import { PrismaClient } from '@prisma/client';
+import { metrics, LATENCY_BUCKETS } from './utils/metrics';
+import { getRequestContext } from './utils/request-context';
+
+// 全部共用同一個 PrismaClient：每個 client 都有自己的連線池，
+// 各模組各自 new 會讓 MySQL 連線數成倍增加
+const prisma = new PrismaClient();
+
+const queryDuration = metrics.histogram(
+  'db_query_duration_seconds',
+  'Prisma query duration by model and action',
+  LATENCY_BUCKETS
+);
+const queryErrors = metrics.counter('db_query_errors_total', 'Failed Prisma queries by model and action');
+
+// 記錄每次查詢的耗時，並累計到目前請求的上下文
+prisma.$use(async (params, next) => {
+  const start = performance.now();
+  const labels = { model: params.model || 'raw', action: params.action };
+  try {
+    return await next(params);
+  } catch (error) {
+    queryErrors.inc(labels);
+    throw error;
+  } finally {
+    const durationMs = performance.now() - start;
+    queryDuration.observe(labels, durationMs / 1000);
+    const context = getRequestContext();
+    if (context) {
+      context.dbQueries++;
+      context.dbTimeMs += durationMs;
+    }
+  }
+});
+
+// 健康檢查：確認可以從連線池取得連線並完成查詢
+export async function checkDatabase(timeoutMs: number = 2000): Promise<{ ok: boolean; latencyMs: number; error?: string }> {
+  const start = performance.now();
+  let timer: NodeJS.Timeout | undefined;
+  try {
+    await Promise.race([
+      prisma.$queryRaw`SELECT 1`,
+      new Promise((_, reject) => {
+        timer = setTimeout(() => reject(new Error(`Database did not respond within ${timeoutMs}ms`)), timeoutMs);
+      }),
+    ]);
+    return { ok: true, latencyMs: Math.round(performance.now() - start) };
+  } catch (error: any) {
+    return { ok: false, latencyMs: Math.round(performance.now() - start), error: error.message };
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
+export default prisma;
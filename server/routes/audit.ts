@@ -0,0 +1,55 @@
+import { Router, Response } from 'express';
+import { AuditService } from '../services/audit.service';
+import { UserService } from '../services/user.service';
+import { authMiddleware, adminMiddleware, AuthRequest } from '../middleware/auth';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'audit' });
+
+const router = Router();
+
+function queryString(value: unknown): string | undefined {
+  const first = Array.isArray(value) ? value[0] : value;
+  return typeof first === 'string' && first !== '' ? first : undefined;
+}
+
+function queryDate(value: unknown): Date | undefined | null {
+  const str = queryString(value);
+  if (!str) return undefined;
+  const date = new Date(str);
+  return isNaN(date.getTime()) ? null : date;
+}
+
+// 查詢稽核紀錄（可管理所有聯盟的管理員；稽核紀錄不分聯盟，限定聯盟的管理員不能查詢）
+// ?userId= &action= &targetTable= &targetId= &from= &to= &limit= &cursor=（上一頁回傳的 nextCursor）
+router.get('/', authMiddleware, adminMiddleware, async (req: AuthRequest, res: Response) => {
+  try {
+    const scope = await UserService.getAllianceScope(req.user!.id);
+    if (scope) {
+      return res.status(403).json({ error: 'Audit log requires access to all alliances' });
+    }
+
+    const from = queryDate(req.query.from);
+    const to = queryDate(req.query.to);
+    if (from === null || to === null) {
+      return res.status(400).json({ error: 'Invalid date' });
+    }
+
+    const result = await AuditService.query({
+      userId: queryString(req.query.userId),
+      action: queryString(req.query.action),
+      targetTable: queryString(req.query.targetTable),
+      targetId: queryString(req.query.targetId),
+      from,
+      to,
+      cursor: queryString(req.query.cursor),
+      limit: parseInt(queryString(req.query.limit) || '50', 10) || 50,
+    });
+    res.json(result);
+  } catch (error: any) {
+    log.error('Error querying audit log', { error });
+    res.status(500).json({ error: error.message });
+  }
+});
+
+export default router;
@@ -2,6 +2,11 @@ import { Router } from 'express';
 import { generateToken } from '../middleware/auth';
 import UserService from '../services/user.service';
 import { AuthRequest, authMiddleware, adminMiddleware } from '../middleware/auth';
+import { authRateLimit, registerRateLimit } from '../middleware/rate-limit';
+import { AuditService } from '../services/audit.service';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'auth' });
 
 const router = Router();
 
@@ -23,7 +28,7 @@ router.get('/check-user/:gameId', async (req, res) => {
 });
 
 // 登入
-router.post('/login', async (req, res) => {
+router.post('/login', authRateLimit, async (req, res) => {
   try {
     const { gameId, password } = req.body;
 
@@ -49,12 +54,16 @@ router.post('/login', async (req, res) => {
       },
     });
   } catch (error: any) {
+    // 密碼雜湊排隊已滿（登入洪峰）
+    if (error.message === 'Too many pending requests') {
+      return res.status(503).json({ error: '伺服器忙碌中，請稍後再試' });
+    }
     res.status(500).json({ error: error.message });
   }
 });
 
 // 註冊
-router.post('/register', async (req, res) => {
+router.post('/register', registerRateLimit, authRateLimit, async (req, res) => {
   try {
     const { gameId, password, allianceName, playerData } = req.body;
 
@@ -131,7 +140,7 @@ router.put('/profile', authMiddleware, async (req: AuthRequest, res) => {
 });
 
 // 會員自行變更密碼
-router.put('/change-password', authMiddleware, async (req: AuthRequest, res) => {
+router.put('/change-password', authMiddleware, authRateLimit, async (req: AuthRequest, res) => {
   try {
     const { oldPassword, newPassword } = req.body;
 
@@ -143,9 +152,13 @@ router.put('/change-password', authMiddleware, async (req: AuthRequest, res) =>
       return res.status(400).json({ error: 'New password must be at least 6 characters' });
     }
 
-    await UserService.changePassword(req.user!.gameId, oldPassword, newPassword);
+    const user = await UserService.changePassword(req.user!.gameId, oldPassword, newPassword);
 
-    res.json({ message: 'Password changed successfully' });
+    // 舊 token 已被撤銷，回傳新的 token 讓目前裝置保持登入
+    res.json({
+      message: 'Password changed successfully',
+      token: generateToken(user.id, user.gameId, user.isAdmin),
+    });
   } catch (error: any) {
     if (error.message === 'Current password is incorrect') {
       return res.status(400).json({ error: error.message });
@@ -174,6 +187,7 @@ router.post('/admins/:userId', authMiddleware, adminMiddleware, async (req: Auth
 
     const userIdStr = Array.isArray(userId) ? userId[0] : userId;
     const updated = await UserService.setAdminByGameId(userIdStr, isAdmin);
+    await AuditService.record({ userId: req.user!.id, action: 'user.set-admin', targetTable: 'User', targetId: updated.id, changes: { gameId: updated.gameId, isAdmin } });
 
     res.json({
       message: isAdmin ? 'User promoted to admin' : 'Admin role removed',
@@ -197,6 +211,13 @@ router.put('/users/:userId/admin', authMiddleware, adminMiddleware, async (req:
 
     const userIdStr = Array.isArray(userId) ? userId[0] : userId;
     const updated = await UserService.setAdminByGameId(userIdStr, isAdmin, managedAlliances, canAssignOfficers, canManageEvents);
+    await AuditService.record({
+      userId: req.user!.id,
+      action: 'user.set-admin',
+      targetTable: 'User',
+      targetId: updated.id,
+      changes: { gameId: updated.gameId, isAdmin, managedAlliances, canAssignOfficers, canManageEvents },
+    });
 
     res.json({
       message: isAdmin ? 'User promoted to admin' : 'Admin role removed',
@@ -227,6 +248,8 @@ router.put('/users/:gameId/reset-password', authMiddleware, adminMiddleware, asy
 
     const gameIdStr = Array.isArray(gameId) ? gameId[0] : gameId;
     const updated = await UserService.resetPassword(gameIdStr, newPassword);
+    // 不記錄密碼內容
+    await AuditService.record({ userId: req.user!.id, action: 'user.reset-password', targetTable: 'User', targetId: updated.id, changes: { gameId: updated.gameId } });
 
     res.json({
       message: 'Password reset successfully',
@@ -243,12 +266,11 @@ router.put('/users/:gameId/reset-password', authMiddleware, adminMiddleware, asy
 // 取得所有使用者 (僅管理員)
 router.get('/users', authMiddleware, adminMiddleware, async (req: AuthRequest, res) => {
   try {
-    console.log('[GET /users] Fetching all users...');
-    const users = await UserService.getAllUsers();
-    console.log('[GET /users] Found', users.length, 'users');
+    const scope = await UserService.getAllianceScope(req.user!.id);
+    const users = await UserService.getAllUsers(scope);
     res.json({ users });
   } catch (error: any) {
-    console.error('[GET /users] Error:', error.message);
+    log.error('Error fetching users', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -259,6 +281,7 @@ router.delete('/users/:userId', authMiddleware, adminMiddleware, async (req: Aut
     const userIdStr = Array.isArray(req.params.userId) ? req.params.userId[0] : req.params.userId;
     
     await UserService.deleteUserByGameId(userIdStr);
+    await AuditService.record({ userId: req.user!.id, action: 'user.delete', targetTable: 'User', targetId: userIdStr, changes: { gameId: userIdStr } });
     
     res.json({ message: 'User deleted successfully' });
   } catch (error: any) {
@@ -277,15 +300,8 @@ router.post('/sub-accounts', authMiddleware, async (req: AuthRequest, res) => {
       return res.status(400).json({ error: 'gameId is required' });
     }
 
-    const currentUser = await UserService.getUserById(req.user!.id);
-    if (!currentUser) {
-      return res.status(404).json({ error: 'User not found' });
-    }
-
-    // 確定主帳號 ID（如果當前用戶是子帳號，使用其主帳號 ID）
-    const parentUserId = currentUser.parentUserId || currentUser.id;
-
-    const result = await UserService.addSubAccount(parentUserId, gameId, currentUser.password, playerData);
+    // 主帳號 ID 由 UserService 解析（如果當前用戶是子帳號，使用其主帳號 ID）
+    const result = await UserService.addSubAccount(req.user!.id, gameId, playerData);
     
     res.status(201).json(result);
   } catch (error: any) {
@@ -296,15 +312,7 @@ router.post('/sub-accounts', authMiddleware, async (req: AuthRequest, res) => {
 // 獲取關聯帳號列表
 router.get('/sub-accounts', authMiddleware, async (req: AuthRequest, res) => {
   try {
-    const currentUser = await UserService.getUserById(req.user!.id);
-    if (!currentUser) {
-      return res.status(404).json({ error: 'User not found' });
-    }
-
-    // 確定主帳號 ID
-    const parentUserId = currentUser.parentUserId || currentUser.id;
-    
-    const accounts = await UserService.getLinkedAccounts(parentUserId);
+    const { parentUserId, accounts } = await UserService.getAccountGroup(req.user!.id);
     
     res.json({ 
       accounts, 
@@ -312,6 +320,32 @@ router.get('/sub-accounts', authMiddleware, async (req: AuthRequest, res) => {
       parentUserId 
     });
   } catch (error: any) {
+    if (error.message === '帳號不存在') {
+      return res.status(404).json({ error: 'User not found' });
+    }
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 取得整個帳號群組與各帳號的報名（可指定場次）：/account-group 或 /account-group/:eventDate
+router.get('/account-group{/:eventDate}', authMiddleware, async (req: AuthRequest, res) => {
+  try {
+    const eventDate = Array.isArray(req.params.eventDate) ? req.params.eventDate[0] : req.params.eventDate;
+    const { parentUserId, accounts } = await UserService.getAccountGroup(req.user!.id, {
+      includeSubmissions: true,
+      eventDate,
+    });
+
+    res.json({
+      accounts,
+      currentAccountId: req.user!.id,
+      parentUserId,
+    });
+  } catch (error: any) {
+    if (error.message === '帳號不存在') {
+      return res.status(404).json({ error: 'User not found' });
+    }
+    log.error('Error fetching account group', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -366,15 +400,7 @@ router.delete('/sub-accounts/:gameId', authMiddleware, async (req: AuthRequest,
   try {
     const gameId = Array.isArray(req.params.gameId) ? req.params.gameId[0] : req.params.gameId;
     
-    const currentUser = await UserService.getUserById(req.user!.id);
-    if (!currentUser) {
-      return res.status(404).json({ error: 'User not found' });
-    }
-
-    // 確定主帳號 ID
-    const parentUserId = currentUser.parentUserId || currentUser.id;
-    
-    await UserService.removeSubAccount(parentUserId, gameId);
+    await UserService.removeSubAccount(req.user!.id, gameId);
     
     res.json({ success: true, message: 'Sub-account unlinked' });
   } catch (error: any) {
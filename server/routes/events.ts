@@ -1,6 +1,10 @@
 import { Router, Request, Response } from 'express';
 import { EventService } from '../services/event.service';
-import { authMiddleware } from '../middleware/auth';
+import { AuthRequest, authMiddleware } from '../middleware/auth';
+import { AuditService } from '../services/audit.service';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'events' });
 
 const router = Router();
 
@@ -10,7 +14,7 @@ router.get('/all', authMiddleware, async (req: Request, res: Response) => {
     const events = await EventService.getAllEvents();
     res.json({ events });
   } catch (error) {
-    console.error('Error fetching events:', error);
+    log.error('Error fetching events', { error });
     res.status(500).json({ error: 'Failed to fetch events' });
   }
 });
@@ -21,7 +25,7 @@ router.get('/open', async (req: Request, res: Response) => {
     const events = await EventService.getOpenEvents();
     res.json({ events });
   } catch (error) {
-    console.error('Error fetching open events:', error);
+    log.error('Error fetching open events', { error });
     res.status(500).json({ error: 'Failed to fetch open events' });
   }
 });
@@ -32,7 +36,7 @@ router.get('/public', async (req: Request, res: Response) => {
     const events = await EventService.getPublicEvents();
     res.json({ events });
   } catch (error) {
-    console.error('Error fetching public events:', error);
+    log.error('Error fetching public events', { error });
     res.status(500).json({ error: 'Failed to fetch public events' });
   }
 });
@@ -44,7 +48,7 @@ router.get('/can-register/:eventDate', async (req: Request, res: Response) => {
     const result = await EventService.canRegister(eventDate);
     res.json(result);
   } catch (error) {
-    console.error('Error checking registration:', error);
+    log.error('Error checking registration', { error });
     res.status(500).json({ error: 'Failed to check registration status' });
   }
 });
@@ -59,7 +63,7 @@ router.get('/:eventDate', async (req: Request, res: Response) => {
     }
     res.json(event);
   } catch (error) {
-    console.error('Error fetching event:', error);
+    log.error('Error fetching event', { error });
     res.status(500).json({ error: 'Failed to fetch event' });
   }
 });
@@ -81,10 +85,17 @@ router.post('/create', authMiddleware, async (req: Request, res: Response) => {
       description,
       dayConfig,
     });
+    await AuditService.record({
+      userId: (req as AuthRequest).user?.id,
+      action: 'event.create',
+      targetTable: 'Event',
+      targetId: eventDate,
+      changes: { title, registrationStart, registrationEnd, description, dayConfig },
+    });
     
     res.json({ success: true, event: EventService.formatEvent(event) });
   } catch (error: any) {
-    console.error('Error creating event:', error);
+    log.error('Error creating event', { error });
     if (error.code === 'P2002') {
       return res.status(400).json({ error: '該日期的場次已存在' });
     }
@@ -107,9 +118,10 @@ router.put('/:eventDate', authMiddleware, async (req: Request, res: Response) =>
     if (dayConfig !== undefined) updateData.dayConfig = dayConfig;
     
     const event = await EventService.updateEvent(eventDate, updateData);
+    await AuditService.record({ userId: (req as AuthRequest).user?.id, action: 'event.update', targetTable: 'Event', targetId: eventDate, changes: updateData });
     res.json({ success: true, event: EventService.formatEvent(event) });
   } catch (error) {
-    console.error('Error updating event:', error);
+    log.error('Error updating event', { error });
     res.status(500).json({ error: 'Failed to update event' });
   }
 });
@@ -125,9 +137,10 @@ router.patch('/:eventDate/status', authMiddleware, async (req: Request, res: Res
     }
     
     const event = await EventService.updateEventStatus(eventDate, status);
+    await AuditService.record({ userId: (req as AuthRequest).user?.id, action: 'event.status', targetTable: 'Event', targetId: eventDate, changes: { status } });
     res.json({ success: true, event });
   } catch (error) {
-    console.error('Error updating event status:', error);
+    log.error('Error updating event status', { error });
     res.status(500).json({ error: 'Failed to update event status' });
   }
 });
@@ -137,9 +150,10 @@ router.delete('/:eventDate', authMiddleware, async (req: Request, res: Response)
   try {
     const eventDate = Array.isArray(req.params.eventDate) ? req.params.eventDate[0] : req.params.eventDate;
     await EventService.deleteEvent(eventDate);
+    await AuditService.record({ userId: (req as AuthRequest).user?.id, action: 'event.delete', targetTable: 'Event', targetId: eventDate });
     res.json({ success: true });
   } catch (error) {
-    console.error('Error deleting event:', error);
+    log.error('Error deleting event', { error });
     res.status(500).json({ error: 'Failed to delete event' });
   }
 });
@@ -151,7 +165,7 @@ router.get('/:eventDate/day-config', async (req: Request, res: Response) => {
     const dayConfig = await EventService.getDayConfig(eventDate);
     res.json({ dayConfig });
   } catch (error) {
-    console.error('Error fetching day config:', error);
+    log.error('Error fetching day config', { error });
     res.status(500).json({ error: 'Failed to fetch day config' });
   }
 });
@@ -167,9 +181,10 @@ router.put('/:eventDate/day-config', authMiddleware, async (req: Request, res: R
     }
     
     const event = await EventService.updateDayConfig(eventDate, dayConfig);
+    await AuditService.record({ userId: (req as AuthRequest).user?.id, action: 'event.day-config', targetTable: 'Event', targetId: eventDate, changes: { dayConfig } });
     res.json({ success: true, event: EventService.formatEvent(event) });
   } catch (error) {
-    console.error('Error updating day config:', error);
+    log.error('Error updating day config', { error });
     res.status(500).json({ error: 'Failed to update day config' });
   }
 });
@@ -180,7 +195,7 @@ router.get('/config/default', async (_req: Request, res: Response) => {
     const defaultConfig = EventService.getDefaultDayConfig();
     res.json({ dayConfig: defaultConfig });
   } catch (error) {
-    console.error('Error fetching default config:', error);
+    log.error('Error fetching default config', { error });
     res.status(500).json({ error: 'Failed to fetch default config' });
   }
 });
@@ -0,0 +1,68 @@
+import { Router } from 'express';
+import { GroupService, validateGroupUpload } from '../services/group.service';
+import { authMiddleware, AuthRequest } from '../middleware/auth';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'groups' });
+
+const router = Router();
+
+// 取得目前用戶的所有分組
+router.get('/', authMiddleware, async (req: AuthRequest, res) => {
+  try {
+    const groups = await GroupService.listGroups(req.user!.id);
+    res.json(groups);
+  } catch (error: any) {
+    log.error('Error fetching groups', { error });
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 上傳單一分組；伺服器版本較新時回傳 409 與伺服器版本
+router.put('/:id', authMiddleware, async (req: AuthRequest, res) => {
+  try {
+    const id = req.params.id as string;
+    const { data, updatedAt } = req.body;
+
+    if (!data || typeof data !== 'object' || Array.isArray(data)) {
+      return res.status(400).json({ error: 'data is required' });
+    }
+    const invalid = validateGroupUpload(id, updatedAt);
+    if (invalid) {
+      return res.status(400).json({ error: invalid });
+    }
+
+    const result = await GroupService.saveGroup(req.user!.id, id, data, updatedAt);
+    if (!result.applied) {
+      return res.status(409).json({ error: 'Group has been modified', group: result.group });
+    }
+    res.json(result.group);
+  } catch (error: any) {
+    log.error('Error saving group', { error });
+    if (error.message === 'Group is too large') {
+      return res.status(413).json({ error: error.message });
+    }
+    if (error.message === 'Too many groups') {
+      return res.status(400).json({ error: error.message });
+    }
+    // 重試後仍發生唯一鍵衝突：不附伺服器版本，前端稍後重送
+    if (error.code === 'P2002') {
+      return res.status(409).json({ error: 'Group was modified concurrently, retry' });
+    }
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 刪除分組
+router.delete('/:id', authMiddleware, async (req: AuthRequest, res) => {
+  try {
+    const id = req.params.id as string;
+    await GroupService.deleteGroup(req.user!.id, id);
+    res.json({ success: true });
+  } catch (error: any) {
+    log.error('Error deleting group', { error });
+    res.status(500).json({ error: error.message });
+  }
+});
+
+export default router;
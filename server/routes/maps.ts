@@ -1,38 +1,40 @@
 import { Router } from 'express';
-import { PrismaClient } from '@prisma/client';
+import { MapService } from '../services/map.service';
+import { RealtimeService } from '../services/realtime.service';
+import { AuditService } from '../services/audit.service';
 import { authMiddleware, adminMiddleware, AuthRequest } from '../middleware/auth';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'maps' });
 
 const router = Router();
-const prisma = new PrismaClient();
 
 // 公開查看地圖（不需要登入）
 router.get('/public/:id', async (req, res) => {
   try {
     const id = req.params.id as string;
-    const map = await prisma.allianceMap.findUnique({
-      where: { id }
-    });
-    
+    const map = await MapService.getMap(id);
+
     if (!map) {
       return res.status(404).json({ error: 'Map not found' });
     }
-    
+
     // 只有開放狀態的地圖可以公開查看
     if (map.status !== 'open') {
       return res.status(403).json({ error: 'This map is not publicly available' });
     }
-    
-    // 解析 JSON 欄位
+
     res.json({
       id: map.id,
       title: map.title,
       status: map.status,
-      alliances: JSON.parse(map.alliances || '[]'),
-      gridData: JSON.parse(map.gridData || '{}'),
-      gridOwners: JSON.parse(map.gridOwners || '{}'),
+      version: map.version,
+      alliances: map.alliances,
+      gridData: map.gridData,
+      gridOwners: map.gridOwners,
     });
   } catch (error: any) {
-    console.error('Error fetching public map:', error);
+    log.error('Error fetching public map', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -40,19 +42,10 @@ router.get('/public/:id', async (req, res) => {
 // 獲取所有地圖列表
 router.get('/', authMiddleware, async (req: AuthRequest, res) => {
   try {
-    const maps = await prisma.allianceMap.findMany({
-      orderBy: { createdAt: 'desc' },
-      select: {
-        id: true,
-        title: true,
-        status: true,
-        createdAt: true,
-        updatedAt: true,
-      }
-    });
+    const maps = await MapService.getAllMaps();
     res.json(maps);
   } catch (error: any) {
-    console.error('Error fetching maps:', error);
+    log.error('Error fetching maps', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -61,23 +54,15 @@ router.get('/', authMiddleware, async (req: AuthRequest, res) => {
 router.get('/:id', authMiddleware, async (req: AuthRequest, res) => {
   try {
     const id = req.params.id as string;
-    const map = await prisma.allianceMap.findUnique({
-      where: { id }
-    });
-    
+    const map = await MapService.getMap(id);
+
     if (!map) {
       return res.status(404).json({ error: 'Map not found' });
     }
-    
-    // 解析 JSON 欄位
-    res.json({
-      ...map,
-      alliances: JSON.parse(map.alliances || '[]'),
-      gridData: JSON.parse(map.gridData || '{}'),
-      gridOwners: JSON.parse(map.gridOwners || '{}'),
-    });
+
+    res.json(map);
   } catch (error: any) {
-    console.error('Error fetching map:', error);
+    log.error('Error fetching map', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -86,29 +71,16 @@ router.get('/:id', authMiddleware, async (req: AuthRequest, res) => {
 router.post('/', authMiddleware, adminMiddleware, async (req: AuthRequest, res) => {
   try {
     const { title, alliances, gridData, gridOwners, status } = req.body;
-    
+
     if (!title) {
       return res.status(400).json({ error: 'Title is required' });
     }
-    
-    const map = await prisma.allianceMap.create({
-      data: {
-        title,
-        status: status || 'open',
-        alliances: JSON.stringify(alliances || []),
-        gridData: JSON.stringify(gridData || {}),
-        gridOwners: JSON.stringify(gridOwners || {}),
-      }
-    });
-    
-    res.json({
-      ...map,
-      alliances: JSON.parse(map.alliances),
-      gridData: JSON.parse(map.gridData),
-      gridOwners: JSON.parse(map.gridOwners),
-    });
+
+    const map = await MapService.createMap({ title, alliances, gridData, gridOwners, status });
+    await AuditService.record({ userId: req.user!.id, action: 'map.create', targetTable: 'AllianceMap', targetId: map.id, changes: { title, status } });
+    res.json(map);
   } catch (error: any) {
-    console.error('Error creating map:', error);
+    log.error('Error creating map', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -118,27 +90,74 @@ router.put('/:id', authMiddleware, adminMiddleware, async (req: AuthRequest, res
   try {
     const id = req.params.id as string;
     const { title, alliances, gridData, gridOwners, status } = req.body;
-    
-    const updateData: any = {};
-    if (title !== undefined) updateData.title = title;
-    if (status !== undefined) updateData.status = status;
-    if (alliances !== undefined) updateData.alliances = JSON.stringify(alliances);
-    if (gridData !== undefined) updateData.gridData = JSON.stringify(gridData);
-    if (gridOwners !== undefined) updateData.gridOwners = JSON.stringify(gridOwners);
-    
-    const map = await prisma.allianceMap.update({
-      where: { id },
-      data: updateData,
-    });
-    
-    res.json({
-      ...map,
-      alliances: JSON.parse(map.alliances),
-      gridData: JSON.parse(map.gridData),
-      gridOwners: JSON.parse(map.gridOwners),
+
+    const map = await MapService.updateMap(id, { title, alliances, gridData, gridOwners, status });
+    await AuditService.record({ userId: req.user!.id, action: 'map.replace', targetTable: 'AllianceMap', targetId: id, changes: { title, status, version: map.version } });
+    // map 主題為公開訂閱，非開放狀態的地圖只通知關閉
+    if (map.status === 'open') {
+      RealtimeService.publish(`map:${id}`, 'replaced', map);
+    } else {
+      RealtimeService.publish(`map:${id}`, 'closed', null);
+    }
+    res.json(map);
+  } catch (error: any) {
+    log.error('Error updating map', { error });
+    if (error.message === 'Map not found') {
+      return res.status(404).json({ error: error.message });
+    }
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 以格子差異更新地圖（樂觀鎖，版本不符回傳 409 與最新地圖）
+router.patch('/:id', authMiddleware, adminMiddleware, async (req: AuthRequest, res) => {
+  try {
+    const id = req.params.id as string;
+    const { baseVersion, cells, owners, alliances, title, status } = req.body;
+
+    if (typeof baseVersion !== 'number') {
+      return res.status(400).json({ error: 'baseVersion is required' });
+    }
+    if ((cells !== undefined && !Array.isArray(cells)) || (owners !== undefined && !Array.isArray(owners))) {
+      return res.status(400).json({ error: 'cells and owners must be arrays' });
+    }
+
+    const result = await MapService.patchMap(id, { baseVersion, cells, owners, alliances, title, status });
+
+    if (!result) {
+      return res.status(404).json({ error: 'Map not found' });
+    }
+    if (result.conflict) {
+      return res.status(409).json({ error: 'Map has been modified', map: result.map });
+    }
+
+    await AuditService.record({
+      userId: req.user!.id,
+      action: 'map.patch',
+      targetTable: 'AllianceMap',
+      targetId: id,
+      changes: { baseVersion, version: result.map.version, cells, owners, alliances, title, status },
     });
+
+    // 只推送差異，訂閱者依 version 判斷是否遺漏
+    if (result.map.status === 'open') {
+      RealtimeService.publish(`map:${id}`, 'patched', {
+        version: result.map.version,
+        cells,
+        owners,
+        alliances,
+        title,
+        status,
+      });
+    } else {
+      RealtimeService.publish(`map:${id}`, 'closed', null);
+    }
+    res.json(result.map);
   } catch (error: any) {
-    console.error('Error updating map:', error);
+    log.error('Error patching map', { error });
+    if (error.message?.startsWith('Invalid cell key')) {
+      return res.status(400).json({ error: error.message });
+    }
     res.status(500).json({ error: error.message });
   }
 });
@@ -147,12 +166,12 @@ router.put('/:id', authMiddleware, adminMiddleware, async (req: AuthRequest, res
 router.delete('/:id', authMiddleware, adminMiddleware, async (req: AuthRequest, res) => {
   try {
     const id = req.params.id as string;
-    await prisma.allianceMap.delete({
-      where: { id }
-    });
+    await MapService.deleteMap(id);
+    await AuditService.record({ userId: req.user!.id, action: 'map.delete', targetTable: 'AllianceMap', targetId: id });
+    RealtimeService.publish(`map:${id}`, 'deleted', null);
     res.json({ success: true });
   } catch (error: any) {
-    console.error('Error deleting map:', error);
+    log.error('Error deleting map', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -1,6 +1,11 @@
 import { Router, Request, Response } from 'express';
 import { OfficerService } from '../services/officer.service';
-import { authMiddleware } from '../middleware/auth';
+import { RealtimeService } from '../services/realtime.service';
+import { AuthRequest, authMiddleware } from '../middleware/auth';
+import { AuditService } from '../services/audit.service';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'officers' });
 
 const router = Router();
 
@@ -10,7 +15,7 @@ router.get('/public-dates', async (req: Request, res: Response) => {
     const dates = await OfficerService.getEventDates();
     res.json({ dates });
   } catch (error) {
-    console.error('Error fetching public event dates:', error);
+    log.error('Error fetching public event dates', { error });
     res.status(500).json({ error: 'Failed to fetch event dates' });
   }
 });
@@ -22,7 +27,7 @@ router.get('/public/:eventDate', async (req: Request, res: Response) => {
     const assignments = await OfficerService.getAssignmentsByDate(eventDate);
     res.json(assignments);
   } catch (error) {
-    console.error('Error fetching public assignments:', error);
+    log.error('Error fetching public assignments', { error });
     res.status(500).json({ error: 'Failed to fetch assignments' });
   }
 });
@@ -33,7 +38,7 @@ router.get('/dates', authMiddleware, async (req: Request, res: Response) => {
     const dates = await OfficerService.getEventDates();
     res.json({ dates });
   } catch (error) {
-    console.error('Error fetching event dates:', error);
+    log.error('Error fetching event dates', { error });
     res.status(500).json({ error: 'Failed to fetch event dates' });
   }
 });
@@ -45,7 +50,7 @@ router.get('/:eventDate', authMiddleware, async (req: Request, res: Response) =>
     const assignments = await OfficerService.getAssignmentsByDate(eventDate);
     res.json(assignments);
   } catch (error) {
-    console.error('Error fetching assignments:', error);
+    log.error('Error fetching assignments', { error });
     res.status(500).json({ error: 'Failed to fetch assignments' });
   }
 });
@@ -65,9 +70,24 @@ router.post('/save', authMiddleware, async (req: Request, res: Response) => {
       officers || {}
     );
     
+    // 推送與 GET /public/:eventDate 相同格式的配置
+    const assignments: Record<string, any> = {};
+    for (const assignment of results) {
+      assignments[`${assignment.officerType}_slots`] = JSON.parse(assignment.slotsData);
+      assignments[`${assignment.officerType}_utcOffset`] = assignment.utcOffset;
+    }
+    RealtimeService.publish(`officers:${eventDate}`, 'saved', assignments);
+    await AuditService.record({
+      userId: (req as AuthRequest).user?.id,
+      action: 'officers.save',
+      targetTable: 'OfficerAssignment',
+      targetId: eventDate,
+      changes: { utcOffset: utcOffset || '00:00', officers: officers || {} },
+    });
+    
     res.json({ success: true, saved: results.length });
   } catch (error) {
-    console.error('Error saving assignments:', error);
+    log.error('Error saving assignments', { error });
     res.status(500).json({ error: 'Failed to save assignments' });
   }
 });
@@ -77,9 +97,11 @@ router.delete('/:eventDate', authMiddleware, async (req: Request, res: Response)
   try {
     const eventDate = Array.isArray(req.params.eventDate) ? req.params.eventDate[0] : req.params.eventDate;
     await OfficerService.deleteByDate(eventDate);
+    await AuditService.record({ userId: (req as AuthRequest).user?.id, action: 'officers.delete', targetTable: 'OfficerAssignment', targetId: eventDate });
+    RealtimeService.publish(`officers:${eventDate}`, 'deleted', null);
     res.json({ success: true });
   } catch (error) {
-    console.error('Error deleting assignments:', error);
+    log.error('Error deleting assignments', { error });
     res.status(500).json({ error: 'Failed to delete assignments' });
   }
 });
@@ -0,0 +1,103 @@
+import { Router, Request, Response, NextFunction } from 'express';
+import { PlayerService, MAX_BATCH_SIZE, PLAYER_NOT_FOUND } from '../services/player.service';
+import { PlayerRefreshService } from '../services/player-refresh.service';
+import { authMiddleware, adminMiddleware, AuthRequest } from '../middleware/auth';
+import { playerLookupRateLimit } from '../middleware/rate-limit';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'players' });
+
+const router = Router();
+
+// 強制刷新（refresh=1）略過快取直接查詢遊戲 API，需要登入並受次數限制；一般查詢走快取，不受影響
+function refreshGuard(req: AuthRequest, res: Response, next: NextFunction) {
+  if (req.query.refresh !== '1') return next();
+  authMiddleware(req, res, () => playerLookupRateLimit(req, res, next));
+}
+
+// 批次查詢玩家資料（匯入用）- 必須放在 /:fid 之前
+router.post('/batch', playerLookupRateLimit, async (req: Request, res: Response) => {
+  try {
+    const { fids } = req.body;
+
+    if (!Array.isArray(fids) || fids.length === 0) {
+      return res.status(400).json({ error: 'fids must be a non-empty array' });
+    }
+    if (fids.length > MAX_BATCH_SIZE) {
+      return res.status(400).json({ error: `Too many fids (max ${MAX_BATCH_SIZE})` });
+    }
+
+    // 格式錯誤的 fid 不查上游，直接列入失敗結果
+    const normalized = fids.map(fid => String(fid).trim());
+    const valid = normalized.filter(fid => PlayerService.isValidFid(fid));
+    const result = await PlayerService.getPlayers(valid);
+    for (const fid of normalized) {
+      if (!PlayerService.isValidFid(fid)) result.errors[fid] = 'Invalid fid';
+    }
+    res.json(result);
+  } catch (error: any) {
+    log.error('Error fetching players', { error });
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// ======== 全體玩家資料刷新（管理員） ========
+
+// 查看刷新進度
+router.get('/refresh/status', authMiddleware, adminMiddleware, async (req: AuthRequest, res: Response) => {
+  try {
+    const progress = await PlayerRefreshService.getProgress();
+    res.json(progress);
+  } catch (error: any) {
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 啟動刷新（body.resume 為 true 時從上次中斷處繼續）
+router.post('/refresh', authMiddleware, adminMiddleware, async (req: AuthRequest, res: Response) => {
+  try {
+    const progress = await PlayerRefreshService.start(!!req.body?.resume);
+    res.status(202).json(progress);
+  } catch (error: any) {
+    if (error.message === 'Refresh job is already running') {
+      return res.status(409).json({ error: error.message });
+    }
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 停止刷新
+router.post('/refresh/cancel', authMiddleware, adminMiddleware, async (req: AuthRequest, res: Response) => {
+  try {
+    const progress = await PlayerRefreshService.cancel();
+    res.json(progress);
+  } catch (error: any) {
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 查詢單一玩家資料
+router.get('/:fid', refreshGuard, async (req: Request, res: Response) => {
+  try {
+    const fid = String(Array.isArray(req.params.fid) ? req.params.fid[0] : req.params.fid).trim();
+
+    if (!PlayerService.isValidFid(fid)) {
+      return res.status(400).json({ error: 'Invalid fid' });
+    }
+
+    if (req.query.refresh === '1') {
+      PlayerService.invalidate(fid);
+    }
+
+    const player = await PlayerService.getPlayer(fid);
+    res.json(player);
+  } catch (error: any) {
+    if (error.message === PLAYER_NOT_FOUND) {
+      return res.status(404).json({ error: error.message });
+    }
+    log.error('Error fetching player', { error });
+    res.status(502).json({ error: error.message });
+  }
+});
+
+export default router;
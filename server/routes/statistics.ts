@@ -1,5 +1,6 @@
 import { Router } from 'express';
 import StatisticsService from '../services/statistics.service';
+import UserService from '../services/user.service';
 import { AuthRequest, authMiddleware, adminMiddleware } from '../middleware/auth';
 
 const router = Router();
@@ -67,7 +68,8 @@ router.get('/date/:date', authMiddleware, adminMiddleware, async (req: AuthReque
   try {
     const { date } = req.params;
     const dateStr = Array.isArray(date) ? date[0] : date;
-    const stats = await StatisticsService.getAllAllianceStatisticsByDate(new Date(dateStr));
+    const scope = await UserService.getAllianceScope(req.user!.id);
+    const stats = await StatisticsService.getAllAllianceStatisticsByDate(new Date(dateStr), scope);
     res.json(stats);
   } catch (error: any) {
     res.status(500).json({ error: error.message });
@@ -0,0 +1,72 @@
+import { Router, Request, Response } from 'express';
+import { verifyToken } from '../middleware/auth';
+import UserService from '../services/user.service';
+import { RealtimeService, EventFilter } from '../services/realtime.service';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'stream' });
+
+const router = Router();
+
+// 單一連線最多可訂閱的主題數
+const MAX_TOPICS = 20;
+
+// 公開主題：地圖與官職配置；其餘（報名資料）需要管理員權限
+const PUBLIC_TOPIC_PREFIXES = ['map:', 'officers:'];
+
+function isPublicTopic(topic: string): boolean {
+  return PUBLIC_TOPIC_PREFIXES.some(prefix => topic.startsWith(prefix));
+}
+
+// 限定聯盟的管理員只收到自己聯盟的報名事件（resync 等沒有資料的事件照常送出）
+// 範圍在連線時決定，管理範圍變更後於下次重連生效
+function allianceFilter(scope: ReadonlySet<string>): EventFilter {
+  return event => !event.topic.startsWith('submissions') || !event.data || UserService.inAllianceScope(scope, event.data.alliance);
+}
+
+// SSE 即時推送
+// GET /api/stream?topics=map:<id>,officers:<date>,submissions,submissions:<date>&token=<token>
+// EventSource 無法設定 Authorization header，因此 token 以 query 傳入
+router.get('/', async (req: Request, res: Response) => {
+  try {
+    const topics = String(req.query.topics || '')
+      .split(',')
+      .map(t => t.trim())
+      .filter(Boolean);
+
+    if (topics.length === 0) {
+      return res.status(400).json({ error: 'topics is required' });
+    }
+    if (topics.length > MAX_TOPICS) {
+      return res.status(400).json({ error: `Too many topics (max ${MAX_TOPICS})` });
+    }
+
+    let filter: EventFilter | undefined;
+    if (!topics.every(isPublicTopic)) {
+      const token = (req.query.token as string) || req.headers.authorization?.split(' ')[1];
+      const decoded = token ? verifyToken(token) : null;
+      if (!decoded) {
+        return res.status(401).json({ error: 'Invalid token' });
+      }
+      // 與 adminMiddleware 相同：只有沒有 kid 的舊 token 需要查資料庫
+      const isAdmin = decoded.kid ? decoded.isAdmin : !!(await UserService.getUserById(decoded.userId))?.isAdmin;
+      if (!isAdmin) {
+        return res.status(403).json({ error: 'Admin access required' });
+      }
+      const scope = await UserService.getAllianceScope(decoded.userId);
+      if (scope) filter = allianceFilter(scope);
+    }
+
+    const lastEventIdHeader = req.headers['last-event-id'];
+    const lastEventId = lastEventIdHeader ? parseInt(String(lastEventIdHeader), 10) : NaN;
+
+    RealtimeService.subscribe(res, topics, Number.isNaN(lastEventId) ? undefined : lastEventId, filter);
+  } catch (error: any) {
+    log.error('Error opening event stream', { error });
+    if (!res.headersSent) {
+      res.status(500).json({ error: error.message });
+    }
+  }
+});
+
+export default router;
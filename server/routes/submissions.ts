@@ -1,25 +1,41 @@
 import { Router } from 'express';
 import { SubmissionService } from '../services/submission.service';
 import { EventService } from '../services/event.service';
+import { RealtimeService } from '../services/realtime.service';
+import { SubmissionImportService, MAX_IMPORT_ROWS } from '../services/submission-import.service';
+import { AuditService } from '../services/audit.service';
+import { UserService } from '../services/user.service';
+import { SubmissionExportService } from '../services/submission-export.service';
 import { AuthRequest, authMiddleware, adminMiddleware } from '../middleware/auth';
+import { logger } from '../utils/logger';
+import { sendJson } from '../utils/json-stream';
+
+const log = logger.child({ module: 'submissions' });
 
 const router = Router();
 
+// 推送報名變動到全部報名與該場次的主題
+function publishSubmission(type: 'created' | 'updated' | 'deleted', submission: any) {
+  const topics = ['submissions'];
+  if (submission.eventDate) topics.push(`submissions:${submission.eventDate}`);
+
+  if (type === 'deleted') {
+    // 附上聯盟，讓限定聯盟的管理員連線可以過濾
+    RealtimeService.publish(topics, type, { id: submission.id, eventDate: submission.eventDate, alliance: submission.alliance });
+    return;
+  }
+  RealtimeService.publish(topics, type, {
+    ...submission,
+    slots: submission.slots ?? JSON.parse(submission.slotsData),
+    submittedAt: new Date(submission.createdAt).getTime(),
+  });
+}
+
 // 建立新提交
 router.post('/', authMiddleware, async (req: AuthRequest, res) => {
   try {
     const { fid, gameId, playerName, alliance, slots, eventDate } = req.body;
 
-    console.log('📥 收到報名請求:', {
-      userId: req.user!.id,
-      fid,
-      gameId,
-      playerName,
-      alliance,
-      eventDate,
-      slotsKeys: slots ? Object.keys(slots) : []
-    });
-
     if (!fid || !gameId || !playerName || !alliance || !slots) {
       return res.status(400).json({ 
         error: 'Missing required fields: ' + 
@@ -46,8 +62,6 @@ router.post('/', authMiddleware, async (req: AuthRequest, res) => {
       }
     }
 
-    console.log('📝 最終事件日期:', finalEventDate);
-
     const submission = await SubmissionService.createSubmission(req.user!.id, {
       fid,
       gameId,
@@ -57,15 +71,16 @@ router.post('/', authMiddleware, async (req: AuthRequest, res) => {
       eventDate: finalEventDate,
     });
 
-    console.log('✅ 報名已保存，ID:', submission.id);
+    log.info('Submission created', { submissionId: submission.id, userId: req.user!.id, gameId, eventDate: finalEventDate });
+    publishSubmission('created', submission);
     res.status(201).json(submission);
   } catch (error: any) {
     // 如果是重複報名的錯誤，返回 400
     if (error.message?.includes('已經報名過')) {
-      console.warn('⚠️ 重複報名:', error.message);
+      log.debug('Duplicate submission rejected', { userId: req.user!.id, message: error.message });
       return res.status(400).json({ error: error.message });
     }
-    console.error('❌ 保存報名時出錯:', error);
+    log.error('保存報名時出錯', { error });
     res.status(500).json({ error: error.message });
   }
 });
@@ -75,17 +90,6 @@ router.post('/admin-submit', authMiddleware, adminMiddleware, async (req: AuthRe
   try {
     const { userId, fid, gameId, playerName, alliance, slots, eventDate } = req.body;
 
-    // 記錄收到的請求
-    console.log('📥 /admin-submit 收到請求:', {
-      userId,
-      fid,
-      gameId,
-      playerName,
-      alliance,
-      eventDate,
-      slotsCount: slots ? Object.keys(slots).length : 0
-    });
-
     // 檢查必填字段
     const missingFields = [];
     if (!userId) missingFields.push('userId');
@@ -114,8 +118,6 @@ router.post('/admin-submit', authMiddleware, adminMiddleware, async (req: AuthRe
       }
     }
 
-    console.log('📝 最終事件日期:', finalEventDate);
-
     const submission = await SubmissionService.createSubmission(userId, {
       fid,
       gameId,
@@ -125,19 +127,126 @@ router.post('/admin-submit', authMiddleware, adminMiddleware, async (req: AuthRe
       eventDate: finalEventDate,
     });
 
-    console.log('✅ /admin-submit 報名已保存，ID:', submission.id);
+    log.info('Submission created by admin', { submissionId: submission.id, userId, adminId: req.user!.id, gameId, eventDate: finalEventDate });
+    await AuditService.record({
+      userId: req.user!.id,
+      action: 'submission.admin-create',
+      targetTable: 'TimeslotSubmission',
+      targetId: submission.id,
+      changes: { userId, gameId, alliance, eventDate: finalEventDate, slots },
+    });
+    publishSubmission('created', submission);
     res.status(201).json(submission);
   } catch (error: any) {
     // 如果是重複報名的錯誤，返回 400
     if (error.message?.includes('已經報名過')) {
-      console.warn('⚠️  重複報名錯誤:', error.message);
+      log.debug('Duplicate submission rejected', { userId: req.body?.userId, message: error.message });
+      return res.status(400).json({ error: error.message });
+    }
+    log.error('/admin-submit 錯誤', { error });
+    res.status(500).json({ error: error.message });
+  }
+});
+
+// 管理員批次匯入報名
+// Content-Type: text/csv（每行一位玩家的一天）、application/x-ndjson（每行一筆 JSON）或 application/json（陣列）
+// ?dryRun=1 只驗證不寫入
+router.post('/import', authMiddleware, adminMiddleware, async (req: AuthRequest, res) => {
+  try {
+    const contentType = (req.headers['content-type'] || '').toLowerCase();
+    let parsed: Awaited<ReturnType<typeof SubmissionImportService.readRows>>;
+
+    if (contentType.startsWith('text/csv')) {
+      parsed = await SubmissionImportService.readRows(req, 'csv');
+    } else if (contentType.startsWith('application/x-ndjson')) {
+      parsed = await SubmissionImportService.readRows(req, 'ndjson');
+    } else if (Array.isArray(req.body)) {
+      if (req.body.length > MAX_IMPORT_ROWS) {
+        return res.status(400).json({ error: `Too many rows (max ${MAX_IMPORT_ROWS})` });
+      }
+      parsed = { rows: req.body.map((row: any, i: number) => ({ ...row, line: i + 1 })), invalid: [] };
+    } else {
+      return res.status(415).json({ error: 'Expected text/csv, application/x-ndjson or a JSON array' });
+    }
+
+    // 未指定場次的資料列使用最新的開放場次
+    const openEvents = await EventService.getOpenEvents();
+    const defaultEventDate = openEvents.length > 0 ? openEvents[openEvents.length - 1].eventDate : undefined;
+
+    const report = await SubmissionImportService.importRows(parsed.rows, {
+      dryRun: req.query.dryRun === '1',
+      defaultEventDate,
+    });
+    report.results = [...parsed.invalid, ...report.results].sort((a, b) => a.line - b.line);
+    report.summary.total += parsed.invalid.length;
+    report.summary.invalid += parsed.invalid.length;
+
+    if (report.summary.created > 0 && req.query.dryRun !== '1') {
+      // 大量新增不逐筆推送，通知訂閱者重新載入
+      RealtimeService.publish(['submissions', ...report.eventDates.map(d => `submissions:${d}`)], 'resync', null);
+      await AuditService.record({
+        userId: req.user!.id,
+        action: 'submission.import',
+        targetTable: 'TimeslotSubmission',
+        changes: { summary: report.summary, eventDates: report.eventDates },
+      });
+    }
+
+    res.json(report);
+  } catch (error: any) {
+    log.error('批次匯入報名時出錯', { error });
+    if (error.message?.startsWith('Too many rows')) {
       return res.status(400).json({ error: error.message });
     }
-    console.error('❌ /admin-submit 錯誤:', error);
     res.status(500).json({ error: error.message });
   }
 });
 
+// 匯出場次報名（管理員）：/export/:eventDate/csv 或 /export/:eventDate/xlsx，?alliance= 可只匯出單一聯盟
+// 邊查詢邊輸出，不會把整個場次載入記憶體
+router.get('/export/:eventDate/:format', authMiddleware, adminMiddleware, async (req: AuthRequest, res) => {
+  const eventDate = Array.isArray(req.params.eventDate) ? req.params.eventDate[0] : req.params.eventDate;
+  const format = Array.isArray(req.params.format) ? req.params.format[0] : req.params.format;
+  const alliance = typeof req.query.alliance === 'string' && req.query.alliance ? req.query.alliance : undefined;
+
+  if (format !== 'csv' && format !== 'xlsx') {
+    return res.status(400).json({ error: 'Format must be csv or xlsx' });
+  }
+
+  // 限定聯盟的管理員只能匯出自己管理的聯盟
+  const scope = await UserService.getAllianceScope(req.user!.id);
+  if (alliance && !UserService.inAllianceScope(scope, alliance)) {
+    return res.status(403).json({ error: 'Alliance not managed by this admin' });
+  }
+  const alliances = alliance ? [alliance] : scope && [...scope];
+
+  const filename = `svs_submissions_${eventDate}${alliance ? `_${alliance}` : ''}.${format}`;
+  res.setHeader(
+    'Content-Type',
+    format === 'csv'
+      ? 'text/csv; charset=utf-8'
+      : 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+  );
+  res.setHeader('Content-Disposition', `attachment; filename="export.${format}"; filename*=UTF-8''${encodeURIComponent(filename)}`);
+  res.setHeader('Cache-Control', 'no-store');
+
+  try {
+    await SubmissionExportService.write(res, format, eventDate, alliances);
+    res.end();
+  } catch (error: any) {
+    if (res.destroyed) {
+      log.info('Export aborted by client', { eventDate, format });
+      return;
+    }
+    log.error('匯出報名時出錯', { error, eventDate, format });
+    if (!res.headersSent) {
+      return res.status(500).json({ error: error.message });
+    }
+    // 已經開始輸出，只能中斷連線讓用戶端知道檔案不完整
+    res.destroy(error);
+  }
+});
+
 // 取得我的提交紀錄
 router.get('/my', authMiddleware, async (req: AuthRequest, res) => {
   try {
@@ -151,8 +260,9 @@ router.get('/my', authMiddleware, async (req: AuthRequest, res) => {
 // 取得所有提交 (管理員)
 router.get('/all', authMiddleware, adminMiddleware, async (req: AuthRequest, res) => {
   try {
-    const submissions = await SubmissionService.getAllSubmissions();
-    res.json(submissions);
+    const scope = await UserService.getAllianceScope(req.user!.id);
+    const submissions = await SubmissionService.getAllSubmissions(scope);
+    await sendJson(res, submissions);
   } catch (error: any) {
     res.status(500).json({ error: error.message });
   }
@@ -169,7 +279,11 @@ router.put('/:id', authMiddleware, async (req: AuthRequest, res) => {
       alliance,
       slots,
     });
+    if (req.user!.isAdmin) {
+      await AuditService.record({ userId: req.user!.id, action: 'submission.update', targetTable: 'TimeslotSubmission', targetId: idStr, changes: { alliance, slots } });
+    }
 
+    publishSubmission('updated', updated);
     res.json(updated);
   } catch (error: any) {
     res.status(500).json({ error: error.message });
@@ -188,7 +302,15 @@ router.put('/admin/:id', authMiddleware, adminMiddleware, async (req: AuthReques
       playerName,
       slots,
     });
+    await AuditService.record({
+      userId: req.user!.id,
+      action: 'submission.admin-update',
+      targetTable: 'TimeslotSubmission',
+      targetId: idStr,
+      changes: { alliance, playerName, slots },
+    });
 
+    publishSubmission('updated', updated);
     res.json(updated);
   } catch (error: any) {
     res.status(500).json({ error: error.message });
@@ -200,7 +322,17 @@ router.delete('/:id', authMiddleware, async (req: AuthRequest, res) => {
   try {
     const { id } = req.params;
     const idStr = Array.isArray(id) ? id[0] : id;
-    await SubmissionService.deleteSubmission(idStr);
+    const deleted = await SubmissionService.deleteSubmission(idStr);
+    if (req.user!.isAdmin) {
+      await AuditService.record({
+        userId: req.user!.id,
+        action: 'submission.delete',
+        targetTable: 'TimeslotSubmission',
+        targetId: idStr,
+        changes: { userId: deleted.userId, gameId: deleted.gameId, eventDate: deleted.eventDate },
+      });
+    }
+    publishSubmission('deleted', deleted);
     res.json({ message: 'Submission deleted' });
   } catch (error: any) {
     res.status(500).json({ error: error.message });
@@ -212,7 +344,8 @@ router.get('/summary/:date', authMiddleware, adminMiddleware, async (req: AuthRe
   try {
     const { date } = req.params;
     const dateStr = Array.isArray(date) ? date[0] : date;
-    const summary = await SubmissionService.getDailySubmissionSummary(new Date(dateStr));
+    const scope = await UserService.getAllianceScope(req.user!.id);
+    const summary = await SubmissionService.getDailySubmissionSummary(new Date(dateStr), scope);
     res.json(summary);
   } catch (error: any) {
     res.status(500).json({ error: error.message });
@@ -0,0 +1,285 @@
+import prisma from '../prisma';
+import { logger } from '../utils/logger';
+import { metrics } from '../utils/metrics';
+import { sleep } from '../utils/concurrency';
+
+const log = logger.child({ module: 'audit' });
+
+// 稽核紀錄：管理操作先放進記憶體環狀緩衝區，由背景定時（或累積到一定數量時）以 createMany 批次寫入，
+// 不拖慢管理操作本身
+//
+// 緩衝區滿時 record() 會等待寫入騰出空間（背壓），等太久才放棄並計入 audit_dropped_total
+
+const BUFFER_CAPACITY = parseInt(process.env.AUDIT_BUFFER_SIZE || '5000', 10);
+const FLUSH_INTERVAL_MS = parseInt(process.env.AUDIT_FLUSH_INTERVAL_MS || '1000', 10);
+const FLUSH_THRESHOLD = 100;
+const MAX_BATCH_SIZE = 500;
+const MAX_ENQUEUE_WAIT_MS = 5000;
+const RETRY_BACKOFF_MAX_MS = 30 * 1000;
+// changes 序列化後超過此長度時只保留開頭（欄位為 MEDIUMTEXT，也避免緩衝區占用過多記憶體）
+const MAX_CHANGES_LENGTH = 256 * 1024;
+const CHANGES_PREVIEW_LENGTH = 2000;
+
+export interface AuditEntry {
+  userId?: string | null;
+  action: string;
+  targetTable: string;
+  targetId?: string | null;
+  changes?: unknown;
+}
+
+interface BufferedEntry {
+  userId: string | null;
+  action: string;
+  targetTable: string;
+  targetId: string | null;
+  changes: string | null;
+  createdAt: Date;
+}
+
+const flushedTotal = metrics.counter('audit_flushed_total', 'Audit log entries written to the database');
+const droppedTotal = metrics.counter('audit_dropped_total', 'Audit log entries dropped (buffer stayed full or rejected by the database)');
+metrics.gauge('audit_buffered', 'Audit log entries waiting to be written', gauge => {
+  gauge.set({}, count);
+});
+
+// 環狀緩衝區
+const ring: (BufferedEntry | undefined)[] = new Array(BUFFER_CAPACITY);
+let head = 0;   // 最舊的一筆
+let count = 0;
+
+let flushing: Promise<void> | null = null;
+let timer: NodeJS.Timeout | null = null;
+let retryDelayMs = 0;
+let nextRetryAt = 0;
+const spaceWaiters: Array<() => void> = [];
+
+function push(entry: BufferedEntry) {
+  ring[(head + count) % BUFFER_CAPACITY] = entry;
+  count++;
+}
+
+function peek(n: number): BufferedEntry[] {
+  const batch: BufferedEntry[] = [];
+  for (let i = 0; i < Math.min(n, count); i++) {
+    batch.push(ring[(head + i) % BUFFER_CAPACITY]!);
+  }
+  return batch;
+}
+
+function discard(n: number) {
+  for (let i = 0; i < n; i++) {
+    ring[(head + i) % BUFFER_CAPACITY] = undefined;
+  }
+  head = (head + n) % BUFFER_CAPACITY;
+  count -= n;
+  while (spaceWaiters.length > 0 && count < BUFFER_CAPACITY) {
+    spaceWaiters.shift()!();
+  }
+}
+
+function serializeChanges(changes: unknown): string | null {
+  if (changes === undefined || changes === null) return null;
+  let serialized: string;
+  if (typeof changes === 'string') {
+    serialized = changes;
+  } else {
+    try {
+      serialized = JSON.stringify(changes);
+    } catch {
+      return null;
+    }
+  }
+  if (serialized.length <= MAX_CHANGES_LENGTH) return serialized;
+  // 過長時改存截斷標記，仍是合法 JSON
+  return JSON.stringify({ truncated: true, length: serialized.length, preview: serialized.slice(0, CHANGES_PREVIEW_LENGTH) });
+}
+
+// 連線中斷、逾時等暫時性錯誤：整批保留等待重試
+// 其他錯誤（資料過長、格式不符、沒有錯誤碼的驗證錯誤等）重試也不會成功，逐筆寫入後捨棄寫不進去的紀錄
+const TRANSIENT_ERROR_CODES = new Set([
+  'P1001', // 無法連線到資料庫
+  'P1002', // 連線逾時
+  'P1008', // 操作逾時
+  'P1017', // 資料庫關閉了連線
+  'P2024', // 連線池逾時
+  'P2034', // 寫入衝突或死結
+]);
+
+function isTransientError(error: any): boolean {
+  // PrismaClientInitializationError 的錯誤碼在 errorCode
+  const code: unknown = error?.code ?? error?.errorCode;
+  return typeof code === 'string' && TRANSIENT_ERROR_CODES.has(code);
+}
+
+// 逐筆寫入，外鍵錯誤時改為不關聯使用者，其他失敗的紀錄記錄到日誌後捨棄；暫時性錯誤仍往外拋出
+async function insertIndividually(batch: BufferedEntry[]): Promise<number> {
+  let written = 0;
+  for (const entry of batch) {
+    try {
+      try {
+        await prisma.auditLog.create({ data: entry });
+      } catch (error: any) {
+        if (error.code !== 'P2003') throw error;
+        await prisma.auditLog.create({ data: { ...entry, userId: null } });
+      }
+      written++;
+    } catch (error: any) {
+      if (isTransientError(error)) throw error;
+      droppedTotal.inc();
+      log.error('Audit entry rejected by database, dropped', {
+        error,
+        action: entry.action,
+        targetTable: entry.targetTable,
+        targetId: entry.targetId,
+        changesLength: entry.changes?.length ?? 0,
+      });
+    }
+  }
+  return written;
+}
+
+export class AuditService {
+  // 加入一筆稽核紀錄；緩衝區有空間時立即完成
+  static async record(entry: AuditEntry): Promise<void> {
+    this.start();
+    const buffered: BufferedEntry = {
+      userId: entry.userId || null,
+      action: entry.action,
+      targetTable: entry.targetTable,
+      targetId: entry.targetId ?? null,
+      changes: serializeChanges(entry.changes),
+      createdAt: new Date(),
+    };
+
+    if (count >= BUFFER_CAPACITY) {
+      this.flush();
+      const gotSpace = await Promise.race([
+        new Promise<boolean>(resolve => spaceWaiters.push(() => resolve(true))),
+        sleep(MAX_ENQUEUE_WAIT_MS).then(() => false),
+      ]);
+      if (!gotSpace || count >= BUFFER_CAPACITY) {
+        droppedTotal.inc();
+        log.error('Audit buffer full, entry dropped', { action: entry.action, targetTable: entry.targetTable, targetId: entry.targetId });
+        return;
+      }
+    }
+
+    push(buffered);
+    if (count >= FLUSH_THRESHOLD) this.flush();
+  }
+
+  // 寫出目前緩衝區的內容（同一時間只有一個寫入在進行）
+  static flush(): Promise<void> {
+    if (flushing) return flushing;
+    if (count === 0 || Date.now() < nextRetryAt) return Promise.resolve();
+
+    flushing = (async () => {
+      try {
+        while (count > 0) {
+          const batch = peek(MAX_BATCH_SIZE);
+          let written = batch.length;
+          try {
+            await prisma.auditLog.createMany({ data: batch });
+          } catch (error: any) {
+            if (isTransientError(error)) throw error;
+            // 批次中有無法寫入的紀錄（例如操作者帳號已被刪除的外鍵錯誤）：改為逐筆寫入，
+            // 只捨棄真正寫不進去的那幾筆，避免整批卡在緩衝區最前面
+            log.warn('Audit batch rejected, retrying row by row', { error, size: batch.length });
+            written = await insertIndividually(batch);
+          }
+          discard(batch.length);
+          flushedTotal.inc({}, written);
+        }
+        retryDelayMs = 0;
+        nextRetryAt = 0;
+      } catch (error) {
+        // 寫入失敗時保留在緩衝區，以指數退避重試
+        retryDelayMs = Math.min(RETRY_BACKOFF_MAX_MS, retryDelayMs ? retryDelayMs * 2 : FLUSH_INTERVAL_MS);
+        nextRetryAt = Date.now() + retryDelayMs;
+        log.error('Failed to write audit log batch', { error, buffered: count, retryInMs: retryDelayMs });
+      } finally {
+        flushing = null;
+      }
+    })();
+    return flushing;
+  }
+
+  // 關閉前寫出全部內容（忽略退避時間）
+  static async shutdown() {
+    if (timer) {
+      clearInterval(timer);
+      timer = null;
+    }
+    nextRetryAt = 0;
+    await flushing;
+    await this.flush();
+  }
+
+  // 分頁查詢（以 createdAt + id 作為游標，新的在前）
+  static async query(options: {
+    userId?: string;
+    action?: string;
+    targetTable?: string;
+    targetId?: string;
+    from?: Date;
+    to?: Date;
+    cursor?: string;
+    limit?: number;
+  }) {
+    const limit = Math.min(Math.max(options.limit || 50, 1), 200);
+    const where: any = {};
+    if (options.userId) where.userId = options.userId;
+    if (options.action) where.action = options.action;
+    if (options.targetTable) where.targetTable = options.targetTable;
+    if (options.targetId) where.targetId = options.targetId;
+    if (options.from || options.to) {
+      where.createdAt = {};
+      if (options.from) where.createdAt.gte = options.from;
+      if (options.to) where.createdAt.lte = options.to;
+    }
+
+    const rows = await prisma.auditLog.findMany({
+      where,
+      orderBy: [{ createdAt: 'desc' }, { id: 'desc' }],
+      take: limit + 1,
+      ...(options.cursor && { cursor: { id: options.cursor }, skip: 1 }),
+      include: {
+        user: { select: { gameId: true, nickname: true } },
+      },
+    });
+
+    const hasMore = rows.length > limit;
+    const items = rows.slice(0, limit).map(row => ({
+      id: row.id,
+      userId: row.userId,
+      gameId: row.user?.gameId || null,
+      nickname: row.user?.nickname || null,
+      action: row.action,
+      targetTable: row.targetTable,
+      targetId: row.targetId,
+      changes: row.changes ? safeParse(row.changes) : null,
+      createdAt: row.createdAt,
+    }));
+
+    return { items, nextCursor: hasMore ? items[items.length - 1].id : null };
+  }
+
+  private static start() {
+    if (timer) return;
+    timer = setInterval(() => {
+      this.flush();
+    }, FLUSH_INTERVAL_MS);
+    timer.unref();
+  }
+}
+
+function safeParse(value: string) {
+  try {
+    return JSON.parse(value);
+  } catch {
+    return value;
+  }
+}
+
+export default AuditService;
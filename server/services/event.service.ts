@@ -1,6 +1,4 @@
-import { PrismaClient } from '@prisma/client';
-
-const prisma = new PrismaClient();
+import prisma from '../prisma';
 
 export type EventStatus = 'open' | 'closed' | 'disabled';
 export type ActivityType = 'research' | 'training' | 'building';
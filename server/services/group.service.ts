@@ -0,0 +1,97 @@
+import prisma from '../prisma';
+
+// 分組工具的分組同步
+// 前端以 IndexedDB 為主要儲存，離線修改累積後逐筆上傳；同一分組以 clientUpdatedAt 較新的版本為準
+
+// 單一分組 JSON 的大小上限、每位用戶的分組數上限
+export const MAX_GROUP_BYTES = 2 * 1024 * 1024;
+export const MAX_GROUPS_PER_USER = 50;
+// groupId 欄位為 VARCHAR(191)
+export const MAX_GROUP_ID_LENGTH = 191;
+// 前端時間比伺服器快時可容忍的誤差；更晚的 updatedAt 會讓該版本永遠勝出，視為無效
+const MAX_CLOCK_SKEW_MS = 24 * 60 * 60 * 1000;
+
+// 檢查上傳的 groupId 與 updatedAt，不合法時回傳錯誤訊息
+export function validateGroupUpload(groupId: string, updatedAt: unknown): string | null {
+  if (!groupId || groupId.length > MAX_GROUP_ID_LENGTH) {
+    return `Group id must be 1-${MAX_GROUP_ID_LENGTH} characters`;
+  }
+  if (typeof updatedAt !== 'number' || !Number.isFinite(updatedAt) || updatedAt < 0 || updatedAt > Date.now() + MAX_CLOCK_SKEW_MS) {
+    return 'updatedAt must be a valid timestamp';
+  }
+  return null;
+}
+
+export interface SyncedGroup {
+  id: string;
+  data: any;
+  updatedAt: number;
+}
+
+export class GroupService {
+  // 取得用戶的所有分組
+  static async listGroups(userId: string): Promise<SyncedGroup[]> {
+    const rows = await prisma.playerGroup.findMany({
+      where: { userId },
+      orderBy: { createdAt: 'asc' },
+    });
+    return rows.map(row => ({
+      id: row.groupId,
+      data: JSON.parse(row.data),
+      updatedAt: row.clientUpdatedAt.getTime(),
+    }));
+  }
+
+  // 寫入分組；伺服器上的版本較新時不覆蓋，回傳伺服器版本
+  static async saveGroup(userId: string, groupId: string, data: any, updatedAt: number): Promise<{ applied: boolean; group: SyncedGroup }> {
+    const serialized = JSON.stringify(data);
+    if (Buffer.byteLength(serialized) > MAX_GROUP_BYTES) {
+      throw new Error('Group is too large');
+    }
+
+    // 兩個裝置同時建立同一個分組時，其中一個會遇到唯一鍵衝突（P2002）；重試一次即會走更新的路徑
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await this.writeGroup(userId, groupId, data, serialized, updatedAt);
+      } catch (error: any) {
+        if (error.code !== 'P2002' || attempt >= 1) throw error;
+      }
+    }
+  }
+
+  private static async writeGroup(userId: string, groupId: string, data: any, serialized: string, updatedAt: number) {
+    return await prisma.$transaction(async tx => {
+      const existing = await tx.playerGroup.findUnique({
+        where: { userId_groupId: { userId, groupId } },
+      });
+      if (existing && existing.clientUpdatedAt.getTime() > updatedAt) {
+        return {
+          applied: false,
+          group: { id: groupId, data: JSON.parse(existing.data), updatedAt: existing.clientUpdatedAt.getTime() },
+        };
+      }
+
+      const clientUpdatedAt = new Date(updatedAt);
+      if (existing) {
+        await tx.playerGroup.update({
+          where: { userId_groupId: { userId, groupId } },
+          data: { data: serialized, clientUpdatedAt },
+        });
+      } else {
+        const count = await tx.playerGroup.count({ where: { userId } });
+        if (count >= MAX_GROUPS_PER_USER) {
+          throw new Error('Too many groups');
+        }
+        await tx.playerGroup.create({
+          data: { userId, groupId, data: serialized, clientUpdatedAt },
+        });
+      }
+      return { applied: true, group: { id: groupId, data, updatedAt } };
+    });
+  }
+
+  // 刪除分組（不存在時忽略）
+  static async deleteGroup(userId: string, groupId: string) {
+    await prisma.playerGroup.deleteMany({ where: { userId, groupId } });
+  }
+}
@@ -0,0 +1,79 @@
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { WorkerPool } from '../utils/worker-pool';
+import { metrics } from '../utils/metrics';
+import { logger } from '../utils/logger';
+import { jsonTasks, JsonTaskName } from '../workers/json-tasks';
+
+const log = logger.child({ module: 'json-worker' });
+
+// 大量 JSON 解析／序列化移到 worker thread 執行，避免阻塞事件迴圈
+// JSON_WORKERS：worker thread 數量，0 表示停用（全部在主執行緒執行）
+const JSON_WORKERS = parseInt(process.env.JSON_WORKERS ?? String(Math.min(2, Math.max(1, os.cpus().length - 1))), 10);
+// 輸入小於此大小時直接在主執行緒處理（傳到 worker 的複製成本比省下的時間高）
+export const OFFLOAD_THRESHOLD_BYTES = parseInt(process.env.JSON_OFFLOAD_THRESHOLD || String(256 * 1024), 10);
+
+const tasksTotal = metrics.counter('json_tasks_total', 'JSON tasks by task name and where they ran');
+
+type TaskPayload<K extends JsonTaskName> = Parameters<(typeof jsonTasks)[K]>[0];
+type TaskResult<K extends JsonTaskName> = ReturnType<(typeof jsonTasks)[K]>;
+
+// worker 腳本位置：tsc 輸出、build-server.mjs 打包、tsx 開發模式
+function resolveWorkerScript(): string | null {
+  const candidates = [
+    path.join(__dirname, '../workers/json.worker.js'),
+    path.join(__dirname, 'workers/json.worker.js'),
+    path.join(__dirname, '../workers/json.worker.ts'),
+  ];
+  return candidates.find(file => fs.existsSync(file)) || null;
+}
+
+let pool: WorkerPool | null | undefined;
+
+function getPool(): WorkerPool | null {
+  if (pool === undefined) {
+    const script = JSON_WORKERS > 0 ? resolveWorkerScript() : null;
+    if (JSON_WORKERS > 0 && !script) {
+      log.warn('JSON worker script not found, running JSON tasks inline');
+    }
+    pool = script ? new WorkerPool(script, JSON_WORKERS) : null;
+  }
+  return pool;
+}
+
+metrics.gauge('json_worker_pool', 'JSON worker thread pool', gauge => {
+  gauge.set({ state: 'running' }, pool ? pool.running : 0);
+  gauge.set({ state: 'queued' }, pool ? pool.pending : 0);
+});
+
+export class JsonWorkerService {
+  // 輸入大小是否值得交給 worker thread
+  static shouldOffload(sizeBytes: number): boolean {
+    return sizeBytes >= OFFLOAD_THRESHOLD_BYTES && getPool() !== null;
+  }
+
+  // 執行任務：sizeBytes 達到門檻時在 worker thread 執行，否則直接執行
+  static async run<K extends JsonTaskName>(task: K, payload: TaskPayload<K>, sizeBytes: number): Promise<TaskResult<K>> {
+    const run = jsonTasks[task] as (payload: TaskPayload<K>) => TaskResult<K>;
+    if (!this.shouldOffload(sizeBytes)) {
+      tasksTotal.inc({ task, mode: 'inline' });
+      return run(payload);
+    }
+
+    tasksTotal.inc({ task, mode: 'worker' });
+    const result = await pool!.run<unknown>(task, payload);
+    // Buffer 經過 postMessage 後會變成 Uint8Array
+    if (result instanceof Uint8Array && !Buffer.isBuffer(result)) {
+      return Buffer.from(result.buffer, result.byteOffset, result.byteLength) as TaskResult<K>;
+    }
+    return result as TaskResult<K>;
+  }
+
+  static async close() {
+    if (pool) await pool.close();
+    pool = undefined;
+  }
+}
+
+export default JsonWorkerService;
@@ -0,0 +1,265 @@
+import prisma from '../prisma';
+
+// 地圖格子尺寸（需與前端 AllianceMapEditor 的 GRID_SIZE 一致）
+export const MAP_GRID_SIZE = 14;
+const CELL_COUNT = MAP_GRID_SIZE * MAP_GRID_SIZE;
+
+export interface MapAlliance {
+  id: string;
+  name: string;
+  color: string;
+}
+
+export interface MapCellPatch {
+  key: string;              // "row-col"
+  alliance: string | null;  // null 表示清除
+}
+
+export interface MapOwnerPatch {
+  key: string;              // "row-col"
+  owner: string | null;     // null 表示清除
+}
+
+export interface MapPatch {
+  baseVersion: number;
+  cells?: MapCellPatch[];
+  owners?: MapOwnerPatch[];
+  alliances?: MapAlliance[];
+  title?: string;
+  status?: string;
+}
+
+// 將 "row-col" 轉為陣列索引，超出範圍回傳 -1
+function cellIndex(key: string): number {
+  const match = /^(\d+)-(\d+)$/.exec(key);
+  if (!match) return -1;
+  const row = parseInt(match[1], 10);
+  const col = parseInt(match[2], 10);
+  if (row >= MAP_GRID_SIZE || col >= MAP_GRID_SIZE) return -1;
+  return row * MAP_GRID_SIZE + col;
+}
+
+function cellKey(index: number): string {
+  return `${Math.floor(index / MAP_GRID_SIZE)}-${index % MAP_GRID_SIZE}`;
+}
+
+export class MapService {
+  // ======== 格子編碼 ========
+  // gridData 以陣列儲存：每格一個數字，為 alliances 的索引 + 1（0 表示空格）
+
+  // 解碼為聯盟 ID 陣列（相容舊的 { "row-col": allianceId } 格式）
+  static decodeCells(raw: string | null, alliances: MapAlliance[]): (string | null)[] {
+    const cells: (string | null)[] = new Array(CELL_COUNT).fill(null);
+    if (!raw) return cells;
+
+    let parsed: any;
+    try {
+      parsed = JSON.parse(raw);
+    } catch {
+      return cells;
+    }
+
+    if (Array.isArray(parsed)) {
+      for (let i = 0; i < CELL_COUNT && i < parsed.length; i++) {
+        const idx = parsed[i];
+        if (idx > 0 && idx <= alliances.length) {
+          cells[i] = alliances[idx - 1].id;
+        }
+      }
+    } else if (parsed && typeof parsed === 'object') {
+      const known = new Set(alliances.map(a => a.id));
+      for (const [key, allianceId] of Object.entries(parsed)) {
+        const i = cellIndex(key);
+        if (i >= 0 && known.has(allianceId as string)) {
+          cells[i] = allianceId as string;
+        }
+      }
+    }
+    return cells;
+  }
+
+  // 編碼為索引陣列（不存在於 alliances 的聯盟會變成空格）
+  static encodeCells(cells: (string | null)[], alliances: MapAlliance[]): string {
+    const position = new Map<string, number>();
+    alliances.forEach((a, i) => position.set(a.id, i + 1));
+    const encoded = new Array(CELL_COUNT);
+    for (let i = 0; i < CELL_COUNT; i++) {
+      const allianceId = cells[i];
+      encoded[i] = (allianceId && position.get(allianceId)) || 0;
+    }
+    return JSON.stringify(encoded);
+  }
+
+  // 轉回前端使用的 { "row-col": allianceId } 格式
+  static cellsToGridData(cells: (string | null)[]): Record<string, string> {
+    const gridData: Record<string, string> = {};
+    cells.forEach((allianceId, i) => {
+      if (allianceId) gridData[cellKey(i)] = allianceId;
+    });
+    return gridData;
+  }
+
+  static gridDataToCells(gridData: Record<string, string>): (string | null)[] {
+    const cells: (string | null)[] = new Array(CELL_COUNT).fill(null);
+    for (const [key, allianceId] of Object.entries(gridData || {})) {
+      const i = cellIndex(key);
+      if (i >= 0 && allianceId) cells[i] = allianceId;
+    }
+    return cells;
+  }
+
+  // 格式化地圖回傳（解析 JSON 欄位）
+  static formatMap(map: any) {
+    if (!map) return null;
+    const alliances: MapAlliance[] = JSON.parse(map.alliances || '[]');
+    return {
+      ...map,
+      alliances,
+      gridData: this.cellsToGridData(this.decodeCells(map.gridData, alliances)),
+      gridOwners: JSON.parse(map.gridOwners || '{}'),
+    };
+  }
+
+  // ======== CRUD ========
+
+  // 取得所有地圖列表
+  static async getAllMaps() {
+    return await prisma.allianceMap.findMany({
+      orderBy: { createdAt: 'desc' },
+      select: {
+        id: true,
+        title: true,
+        status: true,
+        version: true,
+        createdAt: true,
+        updatedAt: true,
+      },
+    });
+  }
+
+  // 取得單個地圖
+  static async getMap(id: string) {
+    const map = await prisma.allianceMap.findUnique({ where: { id } });
+    return this.formatMap(map);
+  }
+
+  // 創建地圖
+  static async createMap(data: {
+    title: string;
+    status?: string;
+    alliances?: MapAlliance[];
+    gridData?: Record<string, string>;
+    gridOwners?: Record<string, string>;
+  }) {
+    const alliances = data.alliances || [];
+    const map = await prisma.allianceMap.create({
+      data: {
+        title: data.title,
+        status: data.status || 'open',
+        alliances: JSON.stringify(alliances),
+        gridData: this.encodeCells(this.gridDataToCells(data.gridData || {}), alliances),
+        gridOwners: JSON.stringify(data.gridOwners || {}),
+      },
+    });
+    return this.formatMap(map);
+  }
+
+  // 整份更新地圖（保留給舊版前端使用）
+  static async updateMap(
+    id: string,
+    data: {
+      title?: string;
+      status?: string;
+      alliances?: MapAlliance[];
+      gridData?: Record<string, string>;
+      gridOwners?: Record<string, string>;
+    }
+  ) {
+    const updateData: any = { version: { increment: 1 } };
+    if (data.title !== undefined) updateData.title = data.title;
+    if (data.status !== undefined) updateData.status = data.status;
+    if (data.gridOwners !== undefined) updateData.gridOwners = JSON.stringify(data.gridOwners);
+
+    if (data.alliances !== undefined || data.gridData !== undefined) {
+      // 格子索引依賴聯盟順序，任一變動都需要重新編碼
+      const current = await prisma.allianceMap.findUnique({
+        where: { id },
+        select: { alliances: true, gridData: true },
+      });
+      if (!current) throw new Error('Map not found');
+      const oldAlliances: MapAlliance[] = JSON.parse(current.alliances || '[]');
+      const alliances = data.alliances ?? oldAlliances;
+      const cells = data.gridData !== undefined
+        ? this.gridDataToCells(data.gridData)
+        : this.decodeCells(current.gridData, oldAlliances);
+      updateData.alliances = JSON.stringify(alliances);
+      updateData.gridData = this.encodeCells(cells, alliances);
+    }
+
+    const map = await prisma.allianceMap.update({
+      where: { id },
+      data: updateData,
+    });
+    return this.formatMap(map);
+  }
+
+  // 以格子差異更新地圖（樂觀鎖）
+  // 回傳 { conflict: true, map } 表示 baseVersion 已過期，前端需以最新資料重新套用差異
+  static async patchMap(id: string, patch: MapPatch) {
+    for (const c of patch.cells || []) {
+      if (cellIndex(c.key) < 0) throw new Error(`Invalid cell key: ${c.key}`);
+    }
+    for (const o of patch.owners || []) {
+      if (cellIndex(o.key) < 0) throw new Error(`Invalid cell key: ${o.key}`);
+    }
+
+    const current = await prisma.allianceMap.findUnique({ where: { id } });
+    if (!current) return null;
+
+    if (current.version !== patch.baseVersion) {
+      return { conflict: true, map: this.formatMap(current) };
+    }
+
+    const oldAlliances: MapAlliance[] = JSON.parse(current.alliances || '[]');
+    const alliances = patch.alliances ?? oldAlliances;
+    const cells = this.decodeCells(current.gridData, oldAlliances);
+    for (const c of patch.cells || []) {
+      cells[cellIndex(c.key)] = c.alliance || null;
+    }
+
+    const data: any = { version: { increment: 1 } };
+    if (patch.title !== undefined) data.title = patch.title;
+    if (patch.status !== undefined) data.status = patch.status;
+    if (patch.alliances !== undefined) data.alliances = JSON.stringify(alliances);
+    if (patch.cells?.length || patch.alliances !== undefined) {
+      data.gridData = this.encodeCells(cells, alliances);
+    }
+    if (patch.owners?.length) {
+      const owners: Record<string, string> = JSON.parse(current.gridOwners || '{}');
+      for (const o of patch.owners) {
+        if (o.owner) owners[o.key] = o.owner;
+        else delete owners[o.key];
+      }
+      data.gridOwners = JSON.stringify(owners);
+    }
+
+    // 只有版本未變時才寫入，避免兩個請求同時讀到相同版本而互相覆蓋
+    const result = await prisma.allianceMap.updateMany({
+      where: { id, version: current.version },
+      data,
+    });
+
+    const map = await prisma.allianceMap.findUnique({ where: { id } });
+    if (!map) return null;
+    return { conflict: result.count === 0, map: this.formatMap(map) };
+  }
+
+  // 刪除地圖
+  static async deleteMap(id: string) {
+    return await prisma.allianceMap.delete({
+      where: { id },
+    });
+  }
+}
+
+export default MapService;
@@ -0,0 +1,303 @@
+import crypto from 'crypto';
+import prisma from '../prisma';
+import { PlayerService, GamePlayer, PLAYER_NOT_FOUND } from './player.service';
+import { mapWithConcurrency, sleep } from '../utils/concurrency';
+import { ClusterBus } from '../utils/cluster-bus';
+import { logger } from '../utils/logger';
+
+const log = logger.child({ module: 'player-refresh' });
+
+// 每批讀取的使用者數、同時查詢上游的數量
+const BATCH_SIZE = 200;
+const FETCH_CONCURRENCY = 4;
+// 上游失敗時的重試次數與初始等待時間（指數退避）
+const MAX_ATTEMPTS = 3;
+const BACKOFF_BASE_MS = 1000;
+
+// 進度存放在 AdminSettings，伺服器重啟後可以從上次的位置繼續
+// 叢集模式下同一筆紀錄也是工作鎖：啟動時以比較後寫入（內容未被改動才寫入）取得，執行中的 worker 定期更新 heartbeatAt，
+// 超過 LEASE_MS 沒有更新視為已中斷。查詢進度一律讀取資料庫，停止要求經由 ClusterBus 送到執行中的 worker
+const PROGRESS_SETTING_KEY = 'player_refresh_job';
+const HEARTBEAT_INTERVAL_MS = 15 * 1000;
+const LEASE_MS = 60 * 1000;
+const CANCEL_CHANNEL = 'player-refresh.cancel';
+const LOCK_LOST = 'Refresh job lock lost';
+
+// 本程序的識別碼，記錄在工作鎖中
+const INSTANCE_ID = crypto.randomUUID();
+
+export type RefreshJobStatus = 'idle' | 'running' | 'cancelling' | 'cancelled' | 'completed' | 'failed';
+
+export interface RefreshJobProgress {
+  status: RefreshJobStatus;
+  cursor: string | null;      // 最後處理完成的使用者 ID
+  total: number;
+  processed: number;
+  updated: number;
+  unchanged: number;
+  notFound: number;
+  failed: number;
+  startedAt: string | null;
+  finishedAt: string | null;
+  error?: string;
+}
+
+// 資料庫中的紀錄：進度加上工作鎖
+interface StoredJob extends RefreshJobProgress {
+  owner?: string | null;
+  heartbeatAt?: string | null;
+}
+
+type PlayerFields = {
+  nickname: string | null;
+  kid: number | null;
+  stoveLv: number | null;
+  avatarImage: string | null;
+};
+
+function emptyProgress(): RefreshJobProgress {
+  return {
+    status: 'idle',
+    cursor: null,
+    total: 0,
+    processed: 0,
+    updated: 0,
+    unchanged: 0,
+    notFound: 0,
+    failed: 0,
+    startedAt: null,
+    finishedAt: null,
+  };
+}
+
+// 本程序執行中的工作進度；其他 worker 的工作只存在資料庫中
+let progress: RefreshJobProgress = emptyProgress();
+// 本程序最後寫入的紀錄內容，寫入時以此比對，紀錄被其他程序改寫代表工作鎖已遺失
+let lastWritten: string | null = null;
+let saving: Promise<void> = Promise.resolve();
+
+function isActive(status: RefreshJobStatus): boolean {
+  return status === 'running' || status === 'cancelling';
+}
+
+// 執行中的紀錄超過 LEASE_MS 沒有更新，表示執行的程序已結束
+function isStale(job: StoredJob): boolean {
+  const heartbeat = job.heartbeatAt ? new Date(job.heartbeatAt).getTime() : 0;
+  return Date.now() - heartbeat > LEASE_MS;
+}
+
+function withRate(job: RefreshJobProgress): RefreshJobProgress & { ratePerSecond: number } {
+  const { owner, heartbeatAt, ...rest } = job as StoredJob;
+  const elapsedMs = rest.startedAt
+    ? (rest.finishedAt ? new Date(rest.finishedAt).getTime() : Date.now()) - new Date(rest.startedAt).getTime()
+    : 0;
+  return {
+    ...rest,
+    ratePerSecond: elapsedMs > 0 ? Math.round((rest.processed / elapsedMs) * 1000 * 10) / 10 : 0,
+  };
+}
+
+export class PlayerRefreshService {
+  // 取得目前進度：本程序執行中時用記憶體中的進度，否則讀取資料庫（可能由其他 worker 執行）
+  static async getProgress(): Promise<RefreshJobProgress & { ratePerSecond: number }> {
+    if (isActive(progress.status)) return withRate(progress);
+
+    const saved = (await this.loadProgress())?.job;
+    if (!saved) return withRate(emptyProgress());
+    if (isActive(saved.status) && isStale(saved)) {
+      return withRate({ ...saved, status: 'cancelled' });
+    }
+    return withRate(saved);
+  }
+
+  // 啟動刷新工作；resume 為 true 時從上次中斷的位置繼續
+  static async start(resume: boolean = false) {
+    if (isActive(progress.status)) {
+      throw new Error('Refresh job is already running');
+    }
+
+    const saved = await this.loadProgress();
+    if (saved && isActive(saved.job.status) && !isStale(saved.job)) {
+      throw new Error('Refresh job is already running');
+    }
+
+    let next: RefreshJobProgress = { ...emptyProgress(), status: 'running', startedAt: new Date().toISOString() };
+    if (resume && saved && saved.job.status !== 'completed' && saved.job.cursor) {
+      const { owner, heartbeatAt, ...job } = saved.job;
+      next = { ...job, status: 'running', finishedAt: null, error: undefined };
+    }
+    next.total = await prisma.user.count();
+
+    // 只有紀錄仍是剛才讀到的內容時才寫入，兩個 worker 同時啟動時只有一個成功
+    const value = JSON.stringify({ ...next, owner: INSTANCE_ID, heartbeatAt: new Date().toISOString() });
+    try {
+      if (saved) {
+        const { count } = await prisma.adminSettings.updateMany({
+          where: { settingKey: PROGRESS_SETTING_KEY, settingValue: saved.raw },
+          data: { settingValue: value },
+        });
+        if (count === 0) throw new Error('Refresh job is already running');
+      } else {
+        await prisma.adminSettings.create({ data: { settingKey: PROGRESS_SETTING_KEY, settingValue: value } });
+      }
+    } catch (error: any) {
+      if (error.code === 'P2002') throw new Error('Refresh job is already running');
+      throw error;
+    }
+    progress = next;
+    lastWritten = value;
+
+    // 背景執行，不阻塞請求
+    const heartbeat = setInterval(() => {
+      this.saveProgress().catch(error => log.warn('Failed to renew refresh job lock', { error }));
+    }, HEARTBEAT_INTERVAL_MS);
+    heartbeat.unref();
+    this.run()
+      .catch(async (error: any) => {
+        log.error('Player refresh job failed', { error });
+        progress.status = 'failed';
+        progress.error = error.message;
+        progress.finishedAt = new Date().toISOString();
+        if (error.message !== LOCK_LOST) await this.saveProgress().catch(() => {});
+      })
+      .finally(() => clearInterval(heartbeat));
+
+    return this.getProgress();
+  }
+
+  // 要求停止（目前這批完成後停止，進度會保留）；送到所有 worker，由執行中的 worker 處理
+  static async cancel() {
+    ClusterBus.publish(CANCEL_CHANNEL, null);
+    const current = await this.getProgress();
+    return current.status === 'running' ? { ...current, status: 'cancelling' as RefreshJobStatus } : current;
+  }
+
+  // 收到停止要求：本程序正在執行時標記為停止中
+  static handleCancel() {
+    if (progress.status !== 'running') return;
+    progress.status = 'cancelling';
+    this.saveProgress().catch(error => log.warn('Failed to save refresh job progress', { error }));
+  }
+
+  private static async run() {
+    while (progress.status === 'running') {
+      const users = await prisma.user.findMany({
+        where: progress.cursor ? { id: { gt: progress.cursor } } : undefined,
+        orderBy: { id: 'asc' },
+        take: BATCH_SIZE,
+        select: { id: true, gameId: true, nickname: true, kid: true, stoveLv: true, avatarImage: true },
+      });
+
+      if (users.length === 0) {
+        progress.status = 'completed';
+        break;
+      }
+
+      const fetched = await mapWithConcurrency(users, FETCH_CONCURRENCY, user => this.fetchWithBackoff(user.gameId));
+
+      // 只寫入實際有變動的資料列
+      const updates = [];
+      for (let i = 0; i < users.length; i++) {
+        const user = users[i];
+        const result = fetched[i];
+        if (result === 'notFound') {
+          progress.notFound++;
+          continue;
+        }
+        if (result === 'failed') {
+          progress.failed++;
+          continue;
+        }
+
+        const changes = this.diffPlayerFields(user, result);
+        if (changes) {
+          updates.push(prisma.user.update({ where: { id: user.id }, data: changes }));
+        } else {
+          progress.unchanged++;
+        }
+      }
+
+      if (updates.length > 0) {
+        await prisma.$transaction(updates);
+        progress.updated += updates.length;
+      }
+
+      progress.processed += users.length;
+      progress.cursor = users[users.length - 1].id;
+      await this.saveProgress();
+    }
+
+    if (progress.status === 'cancelling') {
+      progress.status = 'cancelled';
+    }
+    progress.finishedAt = new Date().toISOString();
+    await this.saveProgress();
+  }
+
+  private static async fetchWithBackoff(fid: string): Promise<GamePlayer | 'notFound' | 'failed'> {
+    for (let attempt = 0; attempt < MAX_ATTEMPTS; attempt++) {
+      try {
+        return await PlayerService.getPlayer(fid);
+      } catch (error: any) {
+        if (error.message === PLAYER_NOT_FOUND) return 'notFound';
+        if (attempt < MAX_ATTEMPTS - 1) {
+          await sleep(BACKOFF_BASE_MS * 2 ** attempt);
+        }
+      }
+    }
+    return 'failed';
+  }
+
+  // 比較遊戲資料與資料庫欄位，回傳需要更新的欄位（無變動回傳 null）
+  private static diffPlayerFields(current: PlayerFields, player: GamePlayer): Partial<PlayerFields> | null {
+    const next: PlayerFields = {
+      nickname: player.nickname || current.nickname,
+      kid: player.kid || current.kid,
+      stoveLv: player.stove_lv || current.stoveLv,
+      avatarImage: player.avatar_image || current.avatarImage,
+    };
+
+    const changes: Partial<PlayerFields> = {};
+    for (const key of Object.keys(next) as (keyof PlayerFields)[]) {
+      if (next[key] !== current[key]) {
+        (changes as any)[key] = next[key];
+      }
+    }
+    return Object.keys(changes).length > 0 ? changes : null;
+  }
+
+  // 讀取資料庫中的紀錄；raw 為原始內容，啟動時用於比較後寫入
+  private static async loadProgress(): Promise<{ job: StoredJob; raw: string } | null> {
+    const setting = await prisma.adminSettings.findUnique({
+      where: { settingKey: PROGRESS_SETTING_KEY },
+    });
+    if (!setting) return null;
+    try {
+      return { job: JSON.parse(setting.settingValue), raw: setting.settingValue };
+    } catch {
+      // 無法解析的紀錄視為沒有執行中的工作，但仍以原始內容比對
+      return { job: emptyProgress(), raw: setting.settingValue };
+    }
+  }
+
+  // 寫入進度並更新 heartbeat；依序執行，紀錄已被其他程序改寫時停止工作
+  private static saveProgress(): Promise<void> {
+    saving = saving.catch(() => {}).then(async () => {
+      const settingValue = JSON.stringify({ ...progress, owner: INSTANCE_ID, heartbeatAt: new Date().toISOString() });
+      const { count } = await prisma.adminSettings.updateMany({
+        where: { settingKey: PROGRESS_SETTING_KEY, settingValue: lastWritten ?? '' },
+        data: { settingValue },
+      });
+      if (count === 0) {
+        if (isActive(progress.status)) progress.status = 'failed';
+        throw new Error(LOCK_LOST);
+      }
+      lastWritten = settingValue;
+    });
+    return saving;
+  }
+}
+
+ClusterBus.subscribe(CANCEL_CHANNEL, () => PlayerRefreshService.handleCancel());
+
+export default PlayerRefreshService;
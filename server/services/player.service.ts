@@ -0,0 +1,165 @@
+import crypto from 'crypto';
+import { LruCache } from '../utils/lru-cache';
+import { ConcurrencyLimiter } from '../utils/concurrency';
+import { ClusterBus } from '../utils/cluster-bus';
+
+// 遊戲玩家 API（可透過環境變數指向本地測試用的假 API）
+const GAME_API_URL = process.env.GAME_API_URL || 'https://wos-giftcode-api.centurygame.com/api/player';
+const GAME_API_SECRET = process.env.GAME_API_SECRET || 'tB87#kPtkxqOS2';
+const GAME_API_TIMEOUT_MS = 10 * 1000;
+
+// 快取設定：成功結果保留較久，查無玩家只短暫快取，避免重複打上游
+const CACHE_MAX_SIZE = parseInt(process.env.PLAYER_CACHE_SIZE || '10000', 10);
+const CACHE_TTL_MS = parseInt(process.env.PLAYER_CACHE_TTL_MS || String(10 * 60 * 1000), 10);
+const NOT_FOUND_TTL_MS = 60 * 1000;
+
+// 上游並行上限與排隊上限（上游有速率限制）
+const UPSTREAM_CONCURRENCY = parseInt(process.env.GAME_API_CONCURRENCY || '4', 10);
+const UPSTREAM_MAX_QUEUE = 2000;
+
+// 批次查詢單次上限
+export const MAX_BATCH_SIZE = 200;
+
+export interface GamePlayer {
+  fid: string;
+  nickname: string;
+  kid: number;
+  stove_lv: number;
+  stove_lv_content: string;
+  avatar_image: string;
+  total_recharge_amount?: number;
+  lastUpdated: number;
+}
+
+type CachedLookup = { player: GamePlayer } | { notFound: true };
+
+const cache = new LruCache<string, CachedLookup>(CACHE_MAX_SIZE, CACHE_TTL_MS);
+const inFlight = new Map<string, Promise<GamePlayer>>();
+const limiter = new ConcurrencyLimiter(UPSTREAM_CONCURRENCY, UPSTREAM_MAX_QUEUE);
+
+// 叢集模式下各 worker 各自快取，失效時一併通知
+const INVALIDATE_CHANNEL = 'player-cache.invalidate';
+ClusterBus.subscribe<string>(INVALIDATE_CHANNEL, fid => cache.delete(fid));
+
+const stats = {
+  hits: 0,
+  misses: 0,
+  coalesced: 0,
+  upstreamErrors: 0,
+};
+
+// 查無玩家時的錯誤訊息（路由據此回傳 404）
+export const PLAYER_NOT_FOUND = '玩家不存在';
+
+export class PlayerService {
+  static isValidFid(fid: string): boolean {
+    return /^\d{1,20}$/.test(fid);
+  }
+
+  // 查詢單一玩家：快取 → 進行中的相同請求 → 上游
+  static async getPlayer(fid: string): Promise<GamePlayer> {
+    const cached = cache.get(fid);
+    if (cached) {
+      stats.hits++;
+      if ('notFound' in cached) throw new Error(PLAYER_NOT_FOUND);
+      return cached.player;
+    }
+
+    const pending = inFlight.get(fid);
+    if (pending) {
+      stats.coalesced++;
+      return pending;
+    }
+
+    stats.misses++;
+    const request = limiter
+      .run(() => this.fetchFromGameApi(fid))
+      .finally(() => inFlight.delete(fid));
+    inFlight.set(fid, request);
+    return request;
+  }
+
+  // 批次查詢，回傳成功與失敗兩組結果
+  static async getPlayers(fids: string[]) {
+    const unique = Array.from(new Set(fids));
+    const players: Record<string, GamePlayer> = {};
+    const errors: Record<string, string> = {};
+
+    await Promise.all(unique.map(async fid => {
+      try {
+        players[fid] = await this.getPlayer(fid);
+      } catch (error: any) {
+        errors[fid] = error.message;
+      }
+    }));
+
+    return { players, errors };
+  }
+
+  // 強制重新查詢（例如玩家剛改名）
+  static invalidate(fid: string) {
+    ClusterBus.publish(INVALIDATE_CHANNEL, fid);
+  }
+
+  static getStats() {
+    return {
+      ...stats,
+      cacheSize: cache.size,
+      inFlight: inFlight.size,
+      upstreamRunning: limiter.running,
+      upstreamQueued: limiter.pending,
+    };
+  }
+
+  private static async fetchFromGameApi(fid: string): Promise<GamePlayer> {
+    const timestamp = Math.floor(Date.now() / 1000);
+    const signData = `fid=${fid}&time=${timestamp}`;
+    const sign = crypto.createHash('md5').update(`${signData}${GAME_API_SECRET}`).digest('hex');
+
+    let response: Response;
+    try {
+      response = await fetch(GAME_API_URL, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        body: `${signData}&sign=${sign}`,
+        signal: AbortSignal.timeout(GAME_API_TIMEOUT_MS),
+      });
+    } catch (error: any) {
+      stats.upstreamErrors++;
+      throw new Error(`無法連接遊戲 API: ${error.message}`);
+    }
+
+    if (!response.ok) {
+      stats.upstreamErrors++;
+      throw new Error(response.status === 429 ? '遊戲 API 請求過於頻繁' : '無法獲取玩家資訊');
+    }
+
+    const data: any = await response.json();
+
+    if (data.code !== 0 || !data.data) {
+      // 只有明確查無玩家才快取，其他錯誤（如速率限制）下次重試
+      if (!data.msg || /not exist/i.test(data.msg)) {
+        cache.set(fid, { notFound: true }, NOT_FOUND_TTL_MS);
+        throw new Error(PLAYER_NOT_FOUND);
+      }
+      stats.upstreamErrors++;
+      throw new Error(data.msg);
+    }
+
+    const player: GamePlayer = {
+      fid: data.data.fid?.toString() || fid,
+      nickname: data.data.nickname || `Player_${fid}`,
+      kid: data.data.kid || 0,
+      stove_lv: data.data.stove_lv || 0,
+      stove_lv_content: data.data.stove_lv_content || '',
+      avatar_image: data.data.avatar_image || '',
+      total_recharge_amount: data.data.total_recharge_amount,
+      lastUpdated: Date.now(),
+    };
+
+    cache.set(fid, { player });
+    return player;
+  }
+}
+
+export default PlayerService;
@@ -0,0 +1,251 @@
+import { Response } from 'express';
+import { ClusterBus } from '../utils/cluster-bus';
+
+// 單一連線允許積壓的最大位元組數，超過代表用戶端太慢，直接中斷讓它重連後重新同步
+const MAX_QUEUED_BYTES = 256 * 1024;
+// 每個主題保留最近的事件數，用於斷線重連時以 Last-Event-ID 補發
+const REPLAY_BUFFER_SIZE = 100;
+// 心跳間隔，避免代理伺服器因閒置而關閉連線
+const HEARTBEAT_INTERVAL_MS = 25 * 1000;
+// 主題沒有訂閱者後保留緩衝區的時間（讓短暫斷線的用戶端重連後補發），超過後移除主題、不再緩衝
+const TOPIC_IDLE_TTL_MS = 2 * 60 * 1000;
+
+// 事件經由 ClusterBus 編號後送到每個 worker，叢集模式下各 worker 的事件 ID 與補發緩衝區一致，
+// 用戶端重連到其他 worker 時仍可用 Last-Event-ID 補發
+const REALTIME_CHANNEL = 'realtime';
+
+interface RealtimeMessage {
+  topics: string[];
+  type: string;
+  data: any;
+}
+
+export interface RealtimeEvent {
+  id: number;
+  topic: string;
+  type: string;
+  data: any;
+}
+
+// 連線層級的事件過濾（例如限定聯盟的管理員只收到自己聯盟的報名），回傳 false 的事件不送出
+export type EventFilter = (event: RealtimeEvent) => boolean;
+
+interface StreamClient {
+  id: number;
+  res: Response;
+  topics: Set<string>;
+  filter: EventFilter | null;
+  queue: string[];
+  queuedBytes: number;
+  blocked: boolean;
+}
+
+interface TopicState {
+  clients: Set<StreamClient>;
+  recent: RealtimeEvent[];
+  // 緩衝區涵蓋的起點：已從 recent 移除的最大事件 ID，或主題建立時的最新事件 ID；
+  // 重連的 Last-Event-ID 小於此值時無法確定是否漏掉事件
+  evictedUpTo: number;
+  // 最後一位訂閱者離開的時間，有訂閱者時為 null
+  idleSince: number | null;
+}
+
+const topics = new Map<string, TopicState>();
+let latestEventId = 0;
+let nextClientId = 1;
+let heartbeat: NodeJS.Timeout | null = null;
+const clients = new Set<StreamClient>();
+
+function getTopic(name: string): TopicState {
+  let state = topics.get(name);
+  if (!state) {
+    state = { clients: new Set(), recent: [], evictedUpTo: latestEventId, idleSince: null };
+    topics.set(name, state);
+  }
+  return state;
+}
+
+// 移除沒有訂閱者超過 TOPIC_IDLE_TTL_MS 的主題
+function evictIdleTopics() {
+  const cutoff = Date.now() - TOPIC_IDLE_TTL_MS;
+  for (const [name, state] of topics) {
+    if (state.idleSince !== null && state.idleSince < cutoff) topics.delete(name);
+  }
+}
+
+function formatEvent(event: RealtimeEvent): string {
+  return `id: ${event.id}\ndata: ${JSON.stringify({ topic: event.topic, type: event.type, data: event.data })}\n\n`;
+}
+
+export class RealtimeService {
+  // 註冊 SSE 連線並訂閱主題；lastEventId 用於補發斷線期間的事件，filter 用於過濾此連線可收到的事件
+  static subscribe(res: Response, topicNames: string[], lastEventId?: number, filter?: EventFilter) {
+    const client: StreamClient = {
+      id: nextClientId++,
+      res,
+      topics: new Set(topicNames),
+      filter: filter || null,
+      queue: [],
+      queuedBytes: 0,
+      blocked: false,
+    };
+
+    res.writeHead(200, {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache, no-transform',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no',
+    });
+    res.write('retry: 3000\n\n');
+
+    evictIdleTopics();
+    for (const name of client.topics) {
+      const state = getTopic(name);
+      state.clients.add(client);
+      state.idleSince = null;
+    }
+    clients.add(client);
+    this.ensureHeartbeat();
+
+    if (lastEventId !== undefined) {
+      this.replay(client, lastEventId);
+    }
+
+    res.on('close', () => this.unsubscribe(client));
+    return client.id;
+  }
+
+  // 發佈事件到一個或多個主題，同一連線訂閱多個主題時只會收到一次
+  static publish(topicNames: string | string[], type: string, data: any) {
+    const names = Array.isArray(topicNames) ? topicNames : [topicNames];
+    ClusterBus.publish(REALTIME_CHANNEL, { topics: names, type, data }, { sequenced: true });
+  }
+
+  // 送出已編號的事件（由 ClusterBus 呼叫）；同一次發佈的各主題事件共用同一個 ID
+  static deliver(message: RealtimeMessage, id: number) {
+    const { type, data } = message;
+    const delivered = new Set<StreamClient>();
+    latestEventId = Math.max(latestEventId, id);
+    evictIdleTopics();
+
+    for (const name of message.topics) {
+      // 沒有訂閱者（也不在重連保留期間）的主題不緩衝
+      const state = topics.get(name);
+      if (!state) continue;
+      const event: RealtimeEvent = { id, topic: name, type, data };
+
+      state.recent.push(event);
+      if (state.recent.length > REPLAY_BUFFER_SIZE) {
+        state.evictedUpTo = state.recent.shift()!.id;
+      }
+
+      if (state.clients.size === 0) continue;
+      const chunk = formatEvent(event);
+      for (const client of state.clients) {
+        if (delivered.has(client)) continue;
+        delivered.add(client);
+        if (client.filter && !client.filter(event)) continue;
+        this.send(client, chunk);
+      }
+    }
+  }
+
+  // 結束所有連線（程序關閉時）；用戶端會自動重連並以 Last-Event-ID 補發
+  static closeAll() {
+    for (const client of Array.from(clients)) {
+      client.res.end();
+      this.unsubscribe(client);
+    }
+  }
+
+  // 目前連線與主題統計
+  static getStats() {
+    let blocked = 0;
+    for (const client of clients) {
+      if (client.blocked) blocked++;
+    }
+    return { clients: clients.size, blockedClients: blocked, topics: topics.size };
+  }
+
+  private static replay(client: StreamClient, since: number) {
+    const missed = new Map<number, RealtimeEvent>();
+    for (const name of client.topics) {
+      const state = getTopic(name);
+      // since 大於目前最新的事件 ID：伺服器重啟或新的 worker，事件編號已重新開始；
+      // 或緩衝區不足以補發（事件已被移除、主題在 since 之後才開始緩衝），都通知用戶端重新載入完整資料
+      if (since > latestEventId || state.evictedUpTo > since) {
+        this.send(client, formatEvent({ id: latestEventId, topic: name, type: 'resync', data: null }));
+        continue;
+      }
+      for (const event of state.recent) {
+        // 同一事件發佈到多個已訂閱的主題時只補發一次
+        if (event.id > since && !missed.has(event.id)) missed.set(event.id, event);
+      }
+    }
+    const ordered = Array.from(missed.values()).sort((a, b) => a.id - b.id);
+    for (const event of ordered) {
+      if (client.filter && !client.filter(event)) continue;
+      this.send(client, formatEvent(event));
+    }
+  }
+
+  private static send(client: StreamClient, chunk: string) {
+    if (client.blocked) {
+      client.queue.push(chunk);
+      client.queuedBytes += chunk.length;
+      if (client.queuedBytes > MAX_QUEUED_BYTES) {
+        client.res.end();
+        this.unsubscribe(client);
+      }
+      return;
+    }
+
+    if (!client.res.write(chunk)) {
+      client.blocked = true;
+      client.res.once('drain', () => this.flush(client));
+    }
+  }
+
+  private static flush(client: StreamClient) {
+    while (client.queue.length > 0) {
+      const chunk = client.queue.shift()!;
+      client.queuedBytes -= chunk.length;
+      if (!client.res.write(chunk)) {
+        client.res.once('drain', () => this.flush(client));
+        return;
+      }
+    }
+    client.blocked = false;
+  }
+
+  private static unsubscribe(client: StreamClient) {
+    if (!clients.delete(client)) return;
+    for (const name of client.topics) {
+      const state = topics.get(name);
+      if (!state) continue;
+      state.clients.delete(client);
+      if (state.clients.size === 0) state.idleSince = Date.now();
+    }
+    client.queue = [];
+    client.queuedBytes = 0;
+
+    if (clients.size === 0 && heartbeat) {
+      clearInterval(heartbeat);
+      heartbeat = null;
+    }
+  }
+
+  private static ensureHeartbeat() {
+    if (heartbeat) return;
+    heartbeat = setInterval(() => {
+      for (const client of clients) {
+        if (!client.blocked) client.res.write(': ping\n\n');
+      }
+    }, HEARTBEAT_INTERVAL_MS);
+    heartbeat.unref();
+  }
+}
+
+ClusterBus.subscribe<RealtimeMessage>(REALTIME_CHANNEL, (message, id) => RealtimeService.deliver(message, id));
+
+export default RealtimeService;
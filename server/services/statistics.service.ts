@@ -1,6 +1,5 @@
-import { PrismaClient } from '@prisma/client';
-
-const prisma = new PrismaClient();
+import prisma from '../prisma';
+import { AllianceScope } from './user.service';
 
 export class StatisticsService {
   // 建立或更新聯盟統計
@@ -78,9 +77,10 @@ export class StatisticsService {
   }
 
   // 取得全體聯盟統計 (按日期)
-  static async getAllAllianceStatisticsByDate(statisticDate: Date) {
+  static async getAllAllianceStatisticsByDate(statisticDate: Date, scope: AllianceScope = null) {
     return await prisma.allianceStatistic.findMany({
       where: {
+        ...(scope && { allianceName: { in: [...scope] } }),
         statisticDate: {
           gte: new Date(statisticDate.setHours(0, 0, 0, 0)),
           lt: new Date(statisticDate.setHours(23, 59, 59, 999)),
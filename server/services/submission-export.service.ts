@@ -0,0 +1,136 @@
+import { Writable } from 'stream';
+import prisma from '../prisma';
+import { EventService } from './event.service';
+import { toCsvLine } from '../utils/csv';
+import { writeXlsx } from '../utils/xlsx';
+import { writeChunk } from '../utils/stream';
+
+// 場次報名匯出：以 id 游標分批讀取，逐列展開 slotsData 並直接寫入回應
+// 不會一次載入整個場次，匯出大小不影響記憶體用量
+
+export const EXPORT_BATCH_SIZE = 500;
+
+export type ExportFormat = 'csv' | 'xlsx';
+
+const DAY_NAMES: Record<string, string> = {
+  monday: '週一',
+  tuesday: '週二',
+  wednesday: '週三',
+  thursday: '週四',
+  friday: '週五',
+  saturday: '週六',
+  sunday: '週日',
+};
+
+const BASE_HEADERS = ['ID', 'FID', '遊戲ID', '玩家名稱', '聯盟', '場次', '報名時間', '更新時間'];
+
+const DAY_COLUMNS = ['時段', '研究加速(分)', '通用加速(分)', '升級T11', '火晶微粒', '火晶', '精煉火晶'];
+
+function accelMinutes(accel: any): number | '' {
+  if (!accel) return '';
+  return (accel.days || 0) * 1440 + (accel.hours || 0) * 60 + (accel.minutes || 0);
+}
+
+function formatTimeSlots(timeSlots: any): string {
+  if (!Array.isArray(timeSlots)) return '';
+  return timeSlots
+    .filter(slot => slot && slot.start && slot.end)
+    .map(slot => `${slot.start}-${slot.end}`)
+    .join(', ');
+}
+
+// 單日欄位；未報名該日時全部留空
+function dayCells(slot: any): unknown[] {
+  if (!slot || !slot.checked) return DAY_COLUMNS.map(() => '');
+  return [
+    formatTimeSlots(slot.timeSlots),
+    accelMinutes(slot.researchAccel),
+    accelMinutes(slot.generalAccel),
+    slot.upgradeT11 ? 'Y' : '',
+    slot.fireSparkleCount ?? '',
+    slot.fireGemCount ?? '',
+    slot.refinedFireGemCount ?? '',
+  ];
+}
+
+export class SubmissionExportService {
+  // 以 id 游標逐批讀取指定場次的報名；alliances 為 null 時不限聯盟
+  static async *iterateSubmissions(eventDate: string, alliances: string[] | null) {
+    let cursor: string | undefined;
+    while (true) {
+      const batch = await prisma.timeslotSubmission.findMany({
+        where: { eventDate, ...(alliances && { alliance: { in: alliances } }) },
+        orderBy: { id: 'asc' },
+        take: EXPORT_BATCH_SIZE,
+        ...(cursor && { cursor: { id: cursor }, skip: 1 }),
+        select: {
+          id: true,
+          fid: true,
+          gameId: true,
+          playerName: true,
+          alliance: true,
+          eventDate: true,
+          slotsData: true,
+          createdAt: true,
+          updatedAt: true,
+        },
+      });
+      yield* batch;
+      if (batch.length < EXPORT_BATCH_SIZE) return;
+      cursor = batch[batch.length - 1].id;
+    }
+  }
+
+  // 標題列 + 每筆報名一列；每日欄位依場次的 dayConfig 順序展開
+  static async *rows(eventDate: string, alliances: string[] | null): AsyncGenerator<unknown[]> {
+    const days = Object.keys(await EventService.getDayConfig(eventDate));
+
+    yield [
+      ...BASE_HEADERS,
+      ...days.flatMap(day => DAY_COLUMNS.map(column => `${DAY_NAMES[day] || day} ${column}`)),
+    ];
+
+    for await (const submission of this.iterateSubmissions(eventDate, alliances)) {
+      let slots: Record<string, any> = {};
+      try {
+        slots = JSON.parse(submission.slotsData) || {};
+      } catch {
+        // 損壞的 slotsData 仍輸出基本欄位
+      }
+      yield [
+        submission.id,
+        submission.fid,
+        submission.gameId,
+        submission.playerName,
+        submission.alliance,
+        submission.eventDate,
+        submission.createdAt.toISOString(),
+        submission.updatedAt.toISOString(),
+        ...days.flatMap(day => dayCells(slots[day])),
+      ];
+    }
+  }
+
+  // 寫入匯出內容（不會結束 output）
+  static async write(output: Writable, format: ExportFormat, eventDate: string, alliances: string[] | null) {
+    const rows = this.rows(eventDate, alliances);
+    if (format === 'xlsx') {
+      await writeXlsx(output, rows, eventDate);
+      return;
+    }
+
+    // BOM 讓 Excel 以 UTF-8 開啟中文
+    await writeChunk(output, '\ufeff');
+    let buffer = '';
+    for await (const row of rows) {
+      buffer += toCsvLine(row);
+      if (buffer.length >= 64 * 1024) {
+        await writeChunk(output, buffer);
+        buffer = '';
+      }
+    }
+    if (buffer) await writeChunk(output, buffer);
+  }
+}
+
+export default SubmissionExportService;
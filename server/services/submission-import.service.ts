@@ -0,0 +1,249 @@
+import prisma from '../prisma';
+import readline from 'readline';
+import { Readable } from 'stream';
+import { parseCsvLine } from '../utils/csv';
+
+// 單次匯入上限、IN 查詢與 createMany 的分批大小
+export const MAX_IMPORT_ROWS = 20000;
+const QUERY_CHUNK_SIZE = 1000;
+const INSERT_CHUNK_SIZE = 500;
+
+const DAY_KEYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'];
+
+export interface ImportRow {
+  line: number;
+  gameId: string;
+  fid?: string;
+  playerName?: string;
+  alliance: string;
+  eventDate?: string;
+  slots: Record<string, any>;
+}
+
+export interface ImportRowResult {
+  line: number;
+  gameId?: string;
+  status: 'created' | 'duplicate' | 'invalid' | 'error';
+  error?: string;
+}
+
+function chunk<T>(items: T[], size: number): T[][] {
+  const chunks: T[][] = [];
+  for (let i = 0; i < items.length; i += size) {
+    chunks.push(items.slice(i, i + size));
+  }
+  return chunks;
+}
+
+function toInt(value: string | undefined): number {
+  const n = parseInt(value || '0', 10);
+  return Number.isNaN(n) ? 0 : n;
+}
+
+// "08:00-10:00;12:00-14:00" → [{ start, end }, ...]
+function parseTimeSlots(value: string | undefined): Array<{ start: string; end: string }> {
+  if (!value) return [];
+  return value.split(';').map(s => s.trim()).filter(Boolean).map(range => {
+    const [start, end] = range.split('-').map(t => t.trim());
+    return { start, end };
+  });
+}
+
+export class SubmissionImportService {
+  // 將 CSV 的一行（每行一位玩家的一天）轉為匯入資料
+  // 欄位：gameId, fid, playerName, alliance, eventDate, day, researchDays, researchHours, researchMinutes,
+  //      generalDays, generalHours, generalMinutes, upgradeT11, fireSparkleCount, fireGemCount,
+  //      refinedFireGemCount, timeSlots
+  static csvRecordToRow(header: string[], fields: string[], line: number): ImportRow {
+    const record: Record<string, string> = {};
+    header.forEach((name, i) => { record[name] = fields[i] ?? ''; });
+
+    const day = (record.day || '').toLowerCase();
+    const slots: Record<string, any> = {};
+    if (day) {
+      slots[day] = {
+        checked: true,
+        researchAccel: {
+          days: toInt(record.researchdays),
+          hours: toInt(record.researchhours),
+          minutes: toInt(record.researchminutes),
+        },
+        generalAccel: {
+          days: toInt(record.generaldays),
+          hours: toInt(record.generalhours),
+          minutes: toInt(record.generalminutes),
+        },
+        upgradeT11: /^(1|true|yes|y)$/i.test(record.upgradet11 || ''),
+        fireSparkleCount: toInt(record.firesparklecount),
+        fireGemCount: toInt(record.firegemcount),
+        refinedFireGemCount: toInt(record.refinedfiregemcount),
+        timeSlots: parseTimeSlots(record.timeslots),
+      };
+    }
+
+    return {
+      line,
+      gameId: record.gameid,
+      fid: record.fid || undefined,
+      playerName: record.playername || undefined,
+      alliance: record.alliance,
+      eventDate: record.eventdate || undefined,
+      slots,
+    };
+  }
+
+  // 逐行讀取 CSV 或 NDJSON 串流
+  static async readRows(stream: Readable, format: 'csv' | 'ndjson'): Promise<{ rows: ImportRow[]; invalid: ImportRowResult[] }> {
+    const rows: ImportRow[] = [];
+    const invalid: ImportRowResult[] = [];
+    const lines = readline.createInterface({ input: stream, crlfDelay: Infinity });
+
+    let header: string[] | null = null;
+    let lineNo = 0;
+    for await (const rawLine of lines) {
+      lineNo++;
+      const text = lineNo === 1 ? rawLine.replace(/^\uFEFF/, '') : rawLine;
+      if (!text.trim()) continue;
+
+      if (rows.length + invalid.length >= MAX_IMPORT_ROWS) {
+        throw new Error(`Too many rows (max ${MAX_IMPORT_ROWS})`);
+      }
+
+      if (format === 'csv') {
+        if (!header) {
+          header = parseCsvLine(text).map(h => h.toLowerCase());
+          continue;
+        }
+        rows.push(this.csvRecordToRow(header, parseCsvLine(text), lineNo));
+      } else {
+        try {
+          rows.push({ ...JSON.parse(text), line: lineNo });
+        } catch {
+          invalid.push({ line: lineNo, status: 'invalid', error: 'Invalid JSON' });
+        }
+      }
+    }
+
+    return { rows, invalid };
+  }
+
+  // 驗證單行資料，回傳錯誤訊息（通過時回傳 null）
+  static validateRow(row: ImportRow): string | null {
+    if (!row.gameId) return 'gameId is required';
+    if (!row.alliance) return 'alliance is required';
+    if (!row.slots || typeof row.slots !== 'object') return 'slots is required';
+
+    const days = Object.keys(row.slots);
+    if (days.length === 0) return 'Slots cannot be empty';
+    const unknown = days.filter(d => !DAY_KEYS.includes(d));
+    if (unknown.length > 0) return `Invalid day: ${unknown.join(', ')}`;
+    if (!days.some(d => row.slots[d]?.checked)) return 'No day is checked';
+    return null;
+  }
+
+  // 匯入報名：一次查詢解析使用者、在記憶體中比對重複，最後分批 createMany
+  static async importRows(rows: ImportRow[], options: { dryRun?: boolean; defaultEventDate?: string } = {}) {
+    const results: ImportRowResult[] = [];
+    const valid: ImportRow[] = [];
+
+    for (const row of rows) {
+      row.gameId = row.gameId ? String(row.gameId).trim() : row.gameId;
+      row.eventDate = row.eventDate || options.defaultEventDate;
+      const error = this.validateRow(row);
+      if (error) {
+        results.push({ line: row.line, gameId: row.gameId, status: 'invalid', error });
+      } else {
+        valid.push(row);
+      }
+    }
+
+    // 依 gameId 批次解析使用者
+    const gameIds = Array.from(new Set(valid.map(r => r.gameId)));
+    const usersByGameId = new Map<string, { id: string; gameId: string; nickname: string | null }>();
+    for (const ids of chunk(gameIds, QUERY_CHUNK_SIZE)) {
+      const users = await prisma.user.findMany({
+        where: { gameId: { in: ids } },
+        select: { id: true, gameId: true, nickname: true },
+      });
+      for (const user of users) usersByGameId.set(user.gameId, user);
+    }
+
+    // 建立既有報名的 (userId, eventDate, day) 索引
+    const userIds = Array.from(new Set(Array.from(usersByGameId.values()).map(u => u.id)));
+    const eventDates = Array.from(new Set(valid.map(r => r.eventDate).filter(Boolean))) as string[];
+    const existingKeys = new Set<string>();
+    if (eventDates.length > 0) {
+      for (const ids of chunk(userIds, QUERY_CHUNK_SIZE)) {
+        const existing = await prisma.timeslotSubmission.findMany({
+          where: { userId: { in: ids }, eventDate: { in: eventDates } },
+          select: { userId: true, eventDate: true, slotsData: true },
+        });
+        for (const submission of existing) {
+          const slots = JSON.parse(submission.slotsData);
+          for (const day of Object.keys(slots)) {
+            if (slots[day]?.checked) {
+              existingKeys.add(`${submission.userId}|${submission.eventDate}|${day}`);
+            }
+          }
+        }
+      }
+    }
+
+    // 在記憶體中比對重複（包含同一份檔案內的重複）
+    const toCreate: { row: ImportRow; data: any }[] = [];
+    for (const row of valid) {
+      const user = usersByGameId.get(row.gameId);
+      if (!user) {
+        results.push({ line: row.line, gameId: row.gameId, status: 'invalid', error: 'User not found' });
+        continue;
+      }
+
+      const days = Object.keys(row.slots).filter(d => row.slots[d]?.checked);
+      const keys = days.map(day => `${user.id}|${row.eventDate}|${day}`);
+      // 與 createSubmission 相同：沒有場次日期的報名不視為重複
+      if (row.eventDate && keys.some(key => existingKeys.has(key))) {
+        results.push({ line: row.line, gameId: row.gameId, status: 'duplicate', error: '已經報名過' });
+        continue;
+      }
+      if (row.eventDate) keys.forEach(key => existingKeys.add(key));
+
+      toCreate.push({
+        row,
+        data: {
+          userId: user.id,
+          fid: row.fid || row.gameId,
+          gameId: row.gameId,
+          playerName: row.playerName || user.nickname || row.gameId,
+          alliance: row.alliance,
+          eventDate: row.eventDate,
+          slotsData: JSON.stringify(row.slots),
+        },
+      });
+    }
+
+    for (const batch of chunk(toCreate, INSERT_CHUNK_SIZE)) {
+      if (options.dryRun) {
+        batch.forEach(({ row }) => results.push({ line: row.line, gameId: row.gameId, status: 'created' }));
+        continue;
+      }
+      try {
+        await prisma.timeslotSubmission.createMany({ data: batch.map(b => b.data) });
+        batch.forEach(({ row }) => results.push({ line: row.line, gameId: row.gameId, status: 'created' }));
+      } catch (error: any) {
+        batch.forEach(({ row }) => results.push({ line: row.line, gameId: row.gameId, status: 'error', error: error.message }));
+      }
+    }
+
+    results.sort((a, b) => a.line - b.line);
+    const summary = { total: results.length, created: 0, duplicate: 0, invalid: 0, error: 0 };
+    for (const result of results) summary[result.status]++;
+
+    return {
+      summary,
+      eventDates: Array.from(new Set(toCreate.map(c => c.row.eventDate).filter(Boolean))) as string[],
+      results,
+    };
+  }
+}
+
+export default SubmissionImportService;
@@ -1,51 +1,58 @@
-import { PrismaClient } from '@prisma/client';
-
-const prisma = new PrismaClient();
+import prisma from '../prisma';
+import { logger } from '../utils/logger';
+import { AllianceScope } from './user.service';
+import { JsonWorkerService } from './json-worker.service';
+import { formatSubmission } from '../workers/json-tasks';
+import { JsonArrayBody } from '../utils/json-stream';
+
+const log = logger.child({ module: 'submissions' });
+
+// 報名列表附帶的使用者欄位
+const SUBMISSION_USER_INCLUDE = {
+  user: {
+    select: {
+      gameId: true,
+      nickname: true,
+      allianceName: true,
+      avatarImage: true,
+      stoveLv: true,
+    },
+  },
+} as const;
+
+// 大量報名時在 worker thread 解析 slotsData 並序列化，少量時逐筆串流輸出
+async function toJsonBody(submissions: Array<{ slotsData: string; createdAt: Date }>): Promise<JsonArrayBody> {
+  const size = submissions.reduce((total, submission) => total + submission.slotsData.length, 0);
+  if (JsonWorkerService.shouldOffload(size)) {
+    return JsonWorkerService.run('submissionsJson', submissions, size);
+  }
+  return submissions.map(formatSubmission);
+}
 
 export class SubmissionService {
   // 檢查是否已有該使用者、該星期幾、該場次的報名
   static async checkExistingSubmission(userId: string, dayKey: string, eventDate?: string): Promise<{ exists: boolean; submissionId?: string }> {
-    console.log('🔍 checkExistingSubmission - 開始檢查:', {
-      userId,
-      dayKey,
-      eventDate,
-      eventDateExists: !!eventDate
-    });
-
     // 取得該使用者所有報名
     const submissions = await prisma.timeslotSubmission.findMany({
       where: { userId },
     });
 
-    console.log('🔍 checkExistingSubmission - 用戶共有', submissions.length, '個報名');
-    
     // 檢查是否有相同星期幾且相同場次的報名
     for (const submission of submissions) {
       const slots = JSON.parse(submission.slotsData);
-      console.log('🔍 checkExistingSubmission - 檢查報名:', {
-        submissionId: submission.id,
-        submissionEventDate: submission.eventDate,
-        hasDayKey: !!slots[dayKey],
-        dayChecked: slots[dayKey]?.checked
-      });
-
       if (slots[dayKey] && slots[dayKey].checked) {
         // 只有當 eventDate 相同且都不為 null 時，才視為重複報名
         // 如果新報名或舊報名的 eventDate 為 null，不視為重複（因為可能是舊數據）
         const isDuplicate = eventDate && submission.eventDate === eventDate;
-        
-        console.log('🔍 checkExistingSubmission - 重複檢查:', {
-          isDuplicate,
-          reason: isDuplicate ? 'eventDate 相同' : `eventDate 不同或為 null (新:${eventDate}, 舊:${submission.eventDate})`
-        });
 
         if (isDuplicate) {
+          log.debug('checkExistingSubmission: duplicate', { userId, dayKey, eventDate, submissionId: submission.id });
           return { exists: true, submissionId: submission.id };
         }
       }
     }
     
-    console.log('🔍 checkExistingSubmission - 檢查完成，無重複報名');
+    log.debug('checkExistingSubmission: no duplicate', { userId, dayKey, eventDate, checked: submissions.length });
     return { exists: false };
   }
 
@@ -123,57 +130,29 @@ export class SubmissionService {
     }));
   }
 
-  // 取得所有提交（管理員用）
-  static async getAllSubmissions() {
+  // 取得所有提交（管理員用）；scope 限定聯盟時以 alliance IN (...) 過濾
+  // 回傳供 sendJson 輸出的 JSON 內容
+  static async getAllSubmissions(scope: AllianceScope = null): Promise<JsonArrayBody> {
     const submissions = await prisma.timeslotSubmission.findMany({
-      include: {
-        user: {
-          select: {
-            gameId: true,
-            nickname: true,
-            allianceName: true,
-            avatarImage: true,
-            stoveLv: true,
-          },
-        },
-      },
+      where: scope ? { alliance: { in: [...scope] } } : undefined,
+      include: SUBMISSION_USER_INCLUDE,
       orderBy: { createdAt: 'desc' },
     });
-    
-    return submissions.map(s => ({
-      ...s,
-      eventDate: s.eventDate,
-      slots: JSON.parse(s.slotsData),
-      submittedAt: new Date(s.createdAt).getTime(),
-    }));
+
+    return toJsonBody(submissions);
   }
 
   // 🔑 按 eventDate 取得提交 - 確保官職管理只顯示該場次的報名
-  static async getSubmissionsByEventDate(eventDate: string) {
+  static async getSubmissionsByEventDate(eventDate: string): Promise<JsonArrayBody> {
     const submissions = await prisma.timeslotSubmission.findMany({
       where: {
         eventDate: eventDate,  // 精確匹配 eventDate
       },
-      include: {
-        user: {
-          select: {
-            gameId: true,
-            nickname: true,
-            allianceName: true,
-            avatarImage: true,
-            stoveLv: true,
-          },
-        },
-      },
+      include: SUBMISSION_USER_INCLUDE,
       orderBy: { createdAt: 'desc' },
     });
-    
-    return submissions.map(s => ({
-      ...s,
-      eventDate: s.eventDate,
-      slots: JSON.parse(s.slotsData),
-      submittedAt: new Date(s.createdAt).getTime(),
-    }));
+
+    return toJsonBody(submissions);
   }
 
   // 更新提交
@@ -236,38 +215,23 @@ export class SubmissionService {
   }
 
   // 取得每日提交摘要
-  static async getDailySubmissionSummary(reportDate: Date) {
+  static async getDailySubmissionSummary(reportDate: Date, scope: AllianceScope = null) {
     const submissions = await prisma.timeslotSubmission.findMany({
       where: {
+        ...(scope && { alliance: { in: [...scope] } }),
         createdAt: {
           gte: new Date(reportDate.getFullYear(), reportDate.getMonth(), reportDate.getDate(), 0, 0, 0, 0),
           lt: new Date(reportDate.getFullYear(), reportDate.getMonth(), reportDate.getDate(), 23, 59, 59, 999),
         },
       },
+      select: { slotsData: true },
     });
 
-    // 計算資源總數
-    let totalFireSparkle = 0;
-    let totalFireGem = 0;
-    let totalResearchAccel = 0;
-    let totalGeneralAccel = 0;
-
-    for (const submission of submissions) {
-      const slots = JSON.parse(submission.slotsData);
-      for (const daySlot of Object.values(slots)) {
-        const slot = daySlot as any;
-        if (slot?.fireSparkleCount) totalFireSparkle += slot.firㄑnt;
-        if (slot?.fireGemCount) totalFireGem += slot.fireGemCount;
-        if (slot?.researchAccel) {
-          const minutes = (slot.researchAccel.days || 0) * 1440 + (slot.researchAccel.hours || 0) * 60 + (slot.researchAccel.minutes || 0);
-          totalResearchAccel += minutes;
-        }
-        if (slot?.generalAccel) {
-          const minutes = (slot.generalAccel.days || 0) * 1440 + (slot.generalAccel.hours || 0) * 60 + (slot.generalAccel.minutes || 0);
-          totalGeneralAccel += minutes;
-        }
-      }
-    }
+    // 計算資源總數（大量資料時在 worker thread 解析）
+    const slotsDataList = submissions.map(submission => submission.slotsData);
+    const size = slotsDataList.reduce((total, slotsData) => total + slotsData.length, 0);
+    const { totalFireSparkle, totalFireGem, totalResearchAccel, totalGeneralAccel } =
+      await JsonWorkerService.run('summarizeSlots', slotsDataList, size);
 
     return {
       date: reportDate,
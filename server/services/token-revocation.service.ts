@@ -0,0 +1,80 @@
+import prisma from '../prisma';
+import { logger } from '../utils/logger';
+import { ClusterBus } from '../utils/cluster-bus';
+
+const log = logger.child({ module: 'token-revocation' });
+
+// 權限或密碼變更時，讓該使用者之前簽發的 token 全部失效
+// 記錄「此時間之前簽發的 token 無效」（秒），超過 token 有效期限的紀錄即可移除
+// 存放在記憶體，並以每位使用者一筆寫入 TokenRevocation 表，伺服器重啟後仍然有效
+// 叢集模式下透過 ClusterBus 通知其他 worker
+
+export const TOKEN_TTL_SECONDS = 7 * 24 * 60 * 60;
+
+const REVOCATION_CHANNEL = 'token-revocation';
+
+const revokedBefore = new Map<string, number>();
+
+function nowSeconds(): number {
+  return Math.floor(Date.now() / 1000);
+}
+
+function markRevoked(userId: string, revokedAt: number) {
+  revokedBefore.set(userId, Math.max(revokedAt, revokedBefore.get(userId) || 0));
+}
+
+ClusterBus.subscribe<{ userId: string; revokedAt: number }>(REVOCATION_CHANNEL, ({ userId, revokedAt }) => {
+  markRevoked(userId, revokedAt);
+});
+
+function prune() {
+  const cutoff = nowSeconds() - TOKEN_TTL_SECONDS;
+  for (const [userId, revokedAt] of revokedBefore) {
+    if (revokedAt < cutoff) revokedBefore.delete(userId);
+  }
+}
+
+export class TokenRevocationService {
+  // 啟動時載入已保存的撤銷紀錄
+  static async load() {
+    const cutoff = nowSeconds() - TOKEN_TTL_SECONDS;
+    await prisma.tokenRevocation.deleteMany({ where: { revokedBefore: { lt: cutoff } } });
+    const rows = await prisma.tokenRevocation.findMany();
+    for (const row of rows) {
+      markRevoked(row.userId, row.revokedBefore);
+    }
+  }
+
+  // 撤銷使用者目前所有的 token（之後重新登入取得的 token 不受影響）
+  // 記憶體中的撤銷立即生效；寫入資料庫失敗只記錄錯誤，不讓已完成的權限或密碼變更回傳失敗
+  static async revokeUser(userId: string) {
+    const revokedAt = nowSeconds();
+    ClusterBus.publish(REVOCATION_CHANNEL, { userId, revokedAt });
+    try {
+      await this.save(userId, revokedAt);
+    } catch (error) {
+      log.error('Failed to persist token revocation (still enforced until restart)', { error, userId });
+    }
+  }
+
+  // 簽發時間早於撤銷時間的 token 視為無效
+  static isRevoked(userId: string, issuedAt: number): boolean {
+    const revokedAt = revokedBefore.get(userId);
+    return revokedAt !== undefined && issuedAt < revokedAt;
+  }
+
+  static get size(): number {
+    return revokedBefore.size;
+  }
+
+  private static async save(userId: string, revokedAt: number) {
+    prune();
+    await prisma.tokenRevocation.upsert({
+      where: { userId },
+      update: { revokedBefore: revokedAt },
+      create: { userId, revokedBefore: revokedAt },
+    });
+  }
+}
+
+export default TokenRevocationService;
@@ -1,14 +1,41 @@
-import { PrismaClient } from '@prisma/client';
-import crypto from 'crypto';
-
-const prisma = new PrismaClient();
+import prisma from '../prisma';
+import { logger } from '../utils/logger';
+import { hashPassword, verifyPassword } from '../utils/password';
+import { TokenRevocationService } from './token-revocation.service';
+import { LruCache } from '../utils/lru-cache';
+import { ClusterBus } from '../utils/cluster-bus';
+
+const log = logger.child({ module: 'users' });
+
+// 帳號群組列表顯示的欄位
+const LINKED_ACCOUNT_SELECT = {
+  id: true,
+  gameId: true,
+  nickname: true,
+  allianceName: true,
+  avatarImage: true,
+  stoveLv: true,
+} as const;
+
+// 管理的聯盟（AdminManagedAlliance）
+const MANAGED_ALLIANCES_SELECT = {
+  select: { alliance: true },
+  orderBy: { alliance: 'asc' as const },
+};
+
+// 管理員可管理的聯盟集合；null 表示可管理所有聯盟，空集合表示不能管理任何聯盟
+export type AllianceScope = ReadonlySet<string> | null;
+
+// 每位管理員的聯盟範圍只在權限變更或過期時重新查詢
+const ALLIANCE_SCOPE_CACHE_SIZE = 1000;
+const ALLIANCE_SCOPE_TTL_MS = 5 * 60 * 1000;
+const allianceScopes = new LruCache<string, { scope: AllianceScope }>(ALLIANCE_SCOPE_CACHE_SIZE, ALLIANCE_SCOPE_TTL_MS);
+
+// 權限變更時清除所有 worker 的快取
+const ALLIANCE_SCOPE_CHANNEL = 'alliance-scope.invalidate';
+ClusterBus.subscribe<string>(ALLIANCE_SCOPE_CHANNEL, userId => allianceScopes.delete(userId));
 
 export class UserService {
-  // Hash password using SHA256
-  private static hashPassword(password: string): string {
-    return crypto.createHash('sha256').update(password).digest('hex');
-  }
-
   // 初始化超級管理員 (380768429)
   static async initializeSuperAdmin() {
     try {
@@ -21,15 +48,51 @@ export class UserService {
         await prisma.user.create({
           data: {
             gameId: superAdminId,
-            password: this.hashPassword('admin@123'),
+            password: await hashPassword('admin@123'),
             allianceName: 'Admin Alliance',
             isAdmin: true,
           },
         });
-        console.log('✅ Super admin created: 380768429');
+        log.info('Super admin created', { gameId: superAdminId });
       }
     } catch (error) {
-      console.error('Error initializing super admin:', error);
+      log.error('Error initializing super admin', { error });
+    }
+  }
+
+  // 將舊的 managedAlliances JSON 欄位遷移到 AdminManagedAlliance（可重複執行）
+  static async migrateManagedAlliances() {
+    try {
+      const users = await prisma.user.findMany({
+        where: { managedAlliances: { not: null } },
+        select: { id: true, managedAlliances: true },
+      });
+      for (const user of users) {
+        let alliances: string[] = [];
+        let restricted = false;
+        try {
+          const parsed = JSON.parse(user.managedAlliances!);
+          if (Array.isArray(parsed)) {
+            alliances = parsed.filter(a => typeof a === 'string' && a);
+            restricted = true;
+          }
+        } catch {
+          log.warn('Ignoring malformed managedAlliances', { userId: user.id });
+        }
+        // 與舊版相同：null 或無法解析表示可管理所有聯盟，陣列（包含空陣列）只能管理列出的聯盟
+        await prisma.$transaction([
+          prisma.adminManagedAlliance.createMany({
+            data: [...new Set(alliances)].map(alliance => ({ userId: user.id, alliance })),
+            skipDuplicates: true,
+          }),
+          prisma.user.update({ where: { id: user.id }, data: { managedAlliances: null, allAlliances: !restricted } }),
+        ]);
+      }
+      if (users.length > 0) {
+        log.info('Migrated managed alliances', { users: users.length });
+      }
+    } catch (error) {
+      log.error('Error migrating managed alliances', { error });
     }
   }
 
@@ -47,13 +110,34 @@ export class UserService {
       where: { gameId },
     });
 
-    if (!user || user.password !== this.hashPassword(password)) {
+    if (!user) {
+      return null;
+    }
+
+    const { valid, needsRehash } = await verifyPassword(password, user.password);
+    if (!valid) {
       return null;
     }
 
+    // 舊格式（未加鹽 SHA-256）登入成功時升級，不阻塞回應
+    if (needsRehash) {
+      this.upgradePasswordHash(user.id, user.password, password).catch(error => {
+        log.warn('Failed to upgrade password hash', { userId: user.id, error });
+      });
+    }
+
     return user;
   }
 
+  // 以新格式重新儲存密碼；只在密碼未被同時修改時更新
+  private static async upgradePasswordHash(userId: string, currentHash: string, password: string) {
+    const upgraded = await hashPassword(password);
+    await prisma.user.updateMany({
+      where: { id: userId, password: currentHash },
+      data: { password: upgraded },
+    });
+  }
+
   // 註冊
   static async register(
     gameId: string, 
@@ -77,7 +161,7 @@ export class UserService {
     return await prisma.user.create({
       data: {
         gameId,
-        password: this.hashPassword(password),
+        password: await hashPassword(password),
         allianceName,
         nickname: playerData?.nickname,
         kid: playerData?.kid,
@@ -111,10 +195,14 @@ export class UserService {
 
   // 設定管理員 (by id)
   static async setAdmin(userId: string, isAdmin: boolean) {
-    return await prisma.user.update({
+    const updated = await prisma.user.update({
       where: { id: userId },
       data: { isAdmin },
     });
+    ClusterBus.publish(ALLIANCE_SCOPE_CHANNEL, updated.id);
+    // 權限變更後舊 token 內的 isAdmin 已過時
+    await TokenRevocationService.revokeUser(updated.id);
+    return updated;
   }
 
   // 設定管理員 (by gameId)
@@ -126,10 +214,15 @@ export class UserService {
     canManageEvents?: boolean
   ) {
     const data: any = { isAdmin };
-    // 如果傳入 managedAlliances，設定管理的聯盟
+    // 如果傳入 managedAlliances，整組取代管理的聯盟（與使用者更新在同一個交易內）
     // null 表示可管理所有聯盟，空陣列表示不能管理任何聯盟
     if (managedAlliances !== undefined) {
-      data.managedAlliances = managedAlliances === null ? null : JSON.stringify(managedAlliances);
+      const alliances = [...new Set((managedAlliances || []).filter(a => typeof a === 'string' && a))];
+      data.allAlliances = managedAlliances === null;
+      data.managedAllianceLinks = {
+        deleteMany: {},
+        ...(alliances.length > 0 && { create: alliances.map(alliance => ({ alliance })) }),
+      };
     }
     // 設定權限
     if (canAssignOfficers !== undefined) {
@@ -140,32 +233,56 @@ export class UserService {
     }
     // 如果取消管理員權限，清除管理的聯盟和權限
     if (!isAdmin) {
-      data.managedAlliances = null;
+      data.allAlliances = true;
+      data.managedAllianceLinks = { deleteMany: {} };
       data.canAssignOfficers = true;
       data.canManageEvents = true;
     }
-    return await prisma.user.update({
+    const updated = await prisma.user.update({
       where: { gameId },
       data,
+      include: { managedAllianceLinks: MANAGED_ALLIANCES_SELECT },
     });
+    ClusterBus.publish(ALLIANCE_SCOPE_CHANNEL, updated.id);
+    await TokenRevocationService.revokeUser(updated.id);
+    return updated;
   }
 
-  // 獲取管理員可管理的聯盟列表
-  static getManagedAlliances(user: any): string[] | null {
-    if (!user.managedAlliances) return null; // null 表示可管理所有聯盟
-    try {
-      return JSON.parse(user.managedAlliances);
-    } catch {
-      return null;
-    }
+  // 獲取管理員可管理的聯盟列表（user 需包含 allAlliances 與 managedAllianceLinks）
+  // null 表示可管理所有聯盟，空陣列表示不能管理任何聯盟
+  static getManagedAlliances(user: { allAlliances: boolean; managedAllianceLinks?: { alliance: string }[] }): string[] | null {
+    if (user.allAlliances) return null;
+    return (user.managedAllianceLinks || []).map(link => link.alliance);
+  }
+
+  // 管理員的聯盟範圍（快取）；列表查詢以此加上 WHERE alliance IN (...)
+  static async getAllianceScope(userId: string): Promise<AllianceScope> {
+    const cached = allianceScopes.get(userId);
+    if (cached) return cached.scope;
+
+    const user = await prisma.user.findUnique({
+      where: { id: userId },
+      select: { allAlliances: true, managedAllianceLinks: { select: { alliance: true } } },
+    });
+    // 帳號已不存在時不給任何範圍
+    const scope = !user ? new Set<string>() : user.allAlliances ? null : new Set(user.managedAllianceLinks.map(link => link.alliance));
+    allianceScopes.set(userId, { scope });
+    return scope;
+  }
+
+  // 聯盟是否在範圍內
+  static inAllianceScope(scope: AllianceScope, alliance: string | null | undefined): boolean {
+    return scope === null || (!!alliance && scope.has(alliance));
   }
 
   // 重設密碼 (管理員功能)
   static async resetPassword(gameId: string, newPassword: string) {
-    return await prisma.user.update({
+    const updated = await prisma.user.update({
       where: { gameId },
-      data: { password: this.hashPassword(newPassword) },
+      data: { password: await hashPassword(newPassword) },
     });
+    await TokenRevocationService.revokeUser(updated.id);
+    return updated;
   }
 
   // 會員自行變更密碼 (需驗證舊密碼)
@@ -174,14 +291,17 @@ export class UserService {
       where: { gameId },
     });
 
-    if (!user || user.password !== this.hashPassword(oldPassword)) {
+    if (!user || !(await verifyPassword(oldPassword, user.password)).valid) {
       throw new Error('Current password is incorrect');
     }
 
-    return await prisma.user.update({
+    const updated = await prisma.user.update({
       where: { gameId },
-      data: { password: this.hashPassword(newPassword) },
+      data: { password: await hashPassword(newPassword) },
     });
+    // 其他裝置上的登入全部失效（呼叫端會發給目前裝置新的 token）
+    await TokenRevocationService.revokeUser(updated.id);
+    return updated;
   }
 
   // 取得所有管理員
@@ -212,7 +332,8 @@ export class UserService {
         coordinateY: true,
         powerPoints: true,
         isAdmin: true,
-        managedAlliances: true,
+        allAlliances: true,
+        managedAllianceLinks: MANAGED_ALLIANCES_SELECT,
         canAssignOfficers: true,
         canManageEvents: true,
         parentUserId: true,
@@ -220,11 +341,12 @@ export class UserService {
         updatedAt: true,
       },
     });
-    // 解析 managedAlliances JSON 字串
-    return user ? {
-      ...user,
-      managedAlliances: this.getManagedAlliances(user),
-    } : null;
+    if (!user) return null;
+    const { allAlliances, managedAllianceLinks, ...rest } = user;
+    return {
+      ...rest,
+      managedAlliances: this.getManagedAlliances({ allAlliances, managedAllianceLinks }),
+    };
   }
 
   // 透過 gameId 取得使用者
@@ -274,36 +396,37 @@ export class UserService {
     });
   }
 
-  // 取得所有使用者 (僅管理員)
-  static async getAllUsers() {
+  // 取得所有使用者 (僅管理員)；scope 限定聯盟時只回傳這些聯盟的使用者
+  static async getAllUsers(scope: AllianceScope = null) {
     const users = await prisma.user.findMany({
+      where: scope ? { allianceName: { in: [...scope] } } : undefined,
       select: {
         id: true,
         gameId: true,
         nickname: true,
         allianceName: true,
         isAdmin: true,
-        managedAlliances: true,
+        allAlliances: true,
+        managedAllianceLinks: MANAGED_ALLIANCES_SELECT,
         canAssignOfficers: true,
         canManageEvents: true,
         createdAt: true,
       },
       orderBy: { createdAt: 'desc' },
     });
-    // 解析 managedAlliances JSON 字串
-    return users.map(user => ({
+    return users.map(({ allAlliances, managedAllianceLinks, ...user }) => ({
       ...user,
-      managedAlliances: this.getManagedAlliances(user),
+      managedAlliances: this.getManagedAlliances({ allAlliances, managedAllianceLinks }),
     }));
   }
 
   // ======== 子帳號管理 ========
 
-  // 新增子帳號
+  // 新增子帳號（currentUserId 可以是主帳號或任一子帳號）
+  // 在同一個交易內完成檢查與寫入；同時綁定同一帳號時只有一個會成功
   static async addSubAccount(
-    parentUserId: string, 
-    subGameId: string, 
-    parentPassword: string,
+    currentUserId: string,
+    subGameId: string,
     playerData?: {
       nickname?: string;
       kid?: number;
@@ -311,169 +434,192 @@ export class UserService {
       avatarImage?: string;
     }
   ) {
-    // 檢查子帳號是否已存在
-    const existingUser = await prisma.user.findUnique({
-      where: { gameId: subGameId },
-    });
+    const profile = playerData && {
+      nickname: playerData.nickname,
+      kid: playerData.kid,
+      stoveLv: playerData.stoveLv,
+      avatarImage: playerData.avatarImage,
+    };
 
-    if (existingUser) {
-      // 如果已存在，檢查是否已經綁定到其他主帳號
-      if (existingUser.parentUserId && existingUser.parentUserId !== parentUserId) {
+    try {
+      return await prisma.$transaction(async tx => {
+        const currentUser = await tx.user.findUnique({
+          where: { id: currentUserId },
+          select: { id: true, parentUserId: true, password: true },
+        });
+        if (!currentUser) {
+          throw new Error('主帳號不存在');
+        }
+        const parentUserId = currentUser.parentUserId || currentUser.id;
+
+        // 檢查子帳號是否已存在
+        const existingUser = await tx.user.findUnique({
+          where: { gameId: subGameId },
+          select: { id: true, parentUserId: true },
+        });
+
+        if (existingUser) {
+          if (existingUser.id === parentUserId) {
+            throw new Error('不能將主帳號添加為子帳號');
+          }
+          // 如果已經綁定到當前主帳號
+          if (existingUser.parentUserId === parentUserId) {
+            throw new Error('此帳號已經是您的子帳號');
+          }
+          if (existingUser.parentUserId) {
+            throw new Error('此帳號已綁定到其他主帳號');
+          }
+
+          // 更新為子帳號，使用主帳號的密碼，並更新玩家資料
+          // 條件包含 parentUserId: null，期間被其他主帳號綁定時不會覆蓋
+          const updated = await tx.user.update({
+            where: { id: existingUser.id, parentUserId: null },
+            data: {
+              parentUserId,
+              password: currentUser.password, // 使用主帳號密碼
+              ...profile,
+            },
+            select: LINKED_ACCOUNT_SELECT,
+          });
+
+          return { success: true, account: updated, message: '已綁定現有帳號' };
+        }
+
+        // 創建新的子帳號
+        const newSubAccount = await tx.user.create({
+          data: {
+            gameId: subGameId,
+            password: currentUser.password, // 使用主帳號密碼
+            parentUserId,
+            allianceName: '',
+            ...profile,
+          },
+          select: LINKED_ACCOUNT_SELECT,
+        });
+
+        return { success: true, account: newSubAccount, message: '已創建新子帳號' };
+      });
+    } catch (error: any) {
+      // P2025：條件更新時已被綁定；P2002：同時建立了相同 gameId
+      if (error.code === 'P2025' || error.code === 'P2002') {
         throw new Error('此帳號已綁定到其他主帳號');
       }
-      if (existingUser.id === parentUserId) {
-        throw new Error('不能將主帳號添加為子帳號');
-      }
-      // 如果已經綁定到當前主帳號
-      if (existingUser.parentUserId === parentUserId) {
-        throw new Error('此帳號已經是您的子帳號');
-      }
-      
-      // 更新為子帳號，使用主帳號的密碼，並更新玩家資料
-      const updated = await prisma.user.update({
-        where: { gameId: subGameId },
-        data: { 
-          parentUserId,
-          password: parentPassword, // 使用主帳號密碼
-          ...(playerData && {
-            nickname: playerData.nickname,
-            kid: playerData.kid,
-            stoveLv: playerData.stoveLv,
-            avatarImage: playerData.avatarImage,
-          }),
-        },
-        select: {
-          id: true,
-          gameId: true,
-          nickname: true,
-          allianceName: true,
-          avatarImage: true,
-          stoveLv: true,
-        },
-      });
-      
-      return { success: true, account: updated, message: '已綁定現有帳號' };
+      throw error;
     }
-
-    // 創建新的子帳號
-    const newSubAccount = await prisma.user.create({
-      data: {
-        gameId: subGameId,
-        password: parentPassword, // 使用主帳號密碼
-        parentUserId,
-        allianceName: '',
-        ...(playerData && {
-          nickname: playerData.nickname,
-          kid: playerData.kid,
-          stoveLv: playerData.stoveLv,
-          avatarImage: playerData.avatarImage,
-        }),
-      },
-      select: {
-        id: true,
-        gameId: true,
-        nickname: true,
-        allianceName: true,
-        avatarImage: true,
-        stoveLv: true,
-      },
-    });
-
-    return { success: true, account: newSubAccount, message: '已創建新子帳號' };
   }
 
-  // 獲取關聯帳號列表（主帳號 + 所有子帳號）
-  static async getLinkedAccounts(parentUserId: string) {
-    // 獲取主帳號
-    const parentAccount = await prisma.user.findUnique({
-      where: { id: parentUserId },
-      select: {
-        id: true,
-        gameId: true,
-        nickname: true,
-        allianceName: true,
-        avatarImage: true,
-        stoveLv: true,
-        isAdmin: true,
-        parentUserId: true,
-      },
+  // 取得帳號群組（主帳號在前，子帳號依建立時間排序）
+  // includeSubmissions 時一併帶出每個帳號的報名（可限定場次），整個群組固定兩次查詢
+  static async getAccountGroup(
+    userId: string,
+    options: { includeSubmissions?: boolean; eventDate?: string } = {}
+  ) {
+    const currentUser = await prisma.user.findUnique({
+      where: { id: userId },
+      select: { id: true, parentUserId: true },
     });
-
-    if (!parentAccount) {
-      throw new Error('主帳號不存在');
+    if (!currentUser) {
+      throw new Error('帳號不存在');
     }
+    const parentUserId = currentUser.parentUserId || currentUser.id;
 
-    // 獲取所有子帳號
-    const subAccounts = await prisma.user.findMany({
-      where: { parentUserId },
+    const accounts = await prisma.user.findMany({
+      where: { OR: [{ id: parentUserId }, { parentUserId }] },
       select: {
-        id: true,
-        gameId: true,
-        nickname: true,
-        allianceName: true,
-        avatarImage: true,
-        stoveLv: true,
+        ...LINKED_ACCOUNT_SELECT,
         isAdmin: true,
+        ...(options.includeSubmissions && {
+          submissions: {
+            where: options.eventDate ? { eventDate: options.eventDate } : undefined,
+            orderBy: { createdAt: 'desc' as const },
+          },
+        }),
       },
       orderBy: { createdAt: 'asc' },
     });
 
-    // 主帳號標記為 isParent
-    return [
-      { ...parentAccount, isParent: true },
-      ...subAccounts.map(acc => ({ ...acc, isParent: false })),
-    ];
+    const parent = accounts.find(acc => acc.id === parentUserId);
+    if (!parent) {
+      throw new Error('主帳號不存在');
+    }
+
+    const format = (account: (typeof accounts)[number], isParent: boolean) => {
+      const { submissions, ...rest } = account as typeof account & { submissions?: any[] };
+      return {
+        ...rest,
+        isParent,
+        ...(submissions && {
+          submissions: submissions.map(s => ({
+            ...s,
+            slots: JSON.parse(s.slotsData),
+            submittedAt: new Date(s.createdAt).getTime(),
+          })),
+        }),
+      };
+    };
+
+    return {
+      parentUserId,
+      accounts: [
+        format(parent, true),
+        ...accounts.filter(acc => acc.id !== parentUserId).map(acc => format(acc, false)),
+      ],
+    };
   }
 
-  // 移除子帳號綁定
-  static async removeSubAccount(parentUserId: string, subGameId: string) {
-    const subAccount = await prisma.user.findUnique({
-      where: { gameId: subGameId },
+  // 移除子帳號綁定（currentUserId 可以是主帳號或任一子帳號）
+  static async removeSubAccount(currentUserId: string, subGameId: string) {
+    const currentUser = await prisma.user.findUnique({
+      where: { id: currentUserId },
+      select: { id: true, parentUserId: true },
     });
-
-    if (!subAccount) {
-      throw new Error('子帳號不存在');
-    }
-
-    if (subAccount.parentUserId !== parentUserId) {
-      throw new Error('此帳號不是您的子帳號');
+    if (!currentUser) {
+      throw new Error('帳號不存在');
     }
+    const parentUserId = currentUser.parentUserId || currentUser.id;
 
     // 將子帳號的 parentUserId 設為 null（解除綁定，但保留帳號）
-    await prisma.user.update({
-      where: { gameId: subGameId },
+    const { count } = await prisma.user.updateMany({
+      where: { gameId: subGameId, parentUserId },
       data: { parentUserId: null },
     });
 
+    if (count === 0) {
+      const exists = await this.userExists(subGameId);
+      throw new Error(exists ? '此帳號不是您的子帳號' : '子帳號不存在');
+    }
+
     return { success: true };
   }
 
   // 刪除用戶（管理員功能）
   static async deleteUserByGameId(gameId: string) {
-    // 先檢查用戶是否存在
-    const user = await prisma.user.findUnique({
-      where: { gameId },
-    });
-
-    if (!user) {
-      throw new Error('用戶不存在');
-    }
-
     // 不能刪除超級管理員
     if (gameId === '380768429') {
       throw new Error('無法刪除超級管理員');
     }
 
-    // 如果該用戶有子帳號，先解除所有子帳號的綁定
-    await prisma.user.updateMany({
-      where: { parentUserId: user.id },
-      data: { parentUserId: null },
-    });
-
-    // 刪除用戶
-    await prisma.user.delete({
-      where: { gameId },
-    });
+    // 解除子帳號綁定與刪除用戶在同一個交易內完成
+    let deleted: { id: string };
+    try {
+      [, deleted] = await prisma.$transaction([
+        prisma.user.updateMany({
+          where: { parentUser: { gameId } },
+          data: { parentUserId: null },
+        }),
+        prisma.user.delete({
+          where: { gameId },
+          select: { id: true },
+        }),
+      ]);
+    } catch (error: any) {
+      if (error.code === 'P2025') {
+        throw new Error('用戶不存在');
+      }
+      throw error;
+    }
+    ClusterBus.publish(ALLIANCE_SCOPE_CHANNEL, deleted.id);
+    await TokenRevocationService.revokeUser(deleted.id);
 
     return { success: true };
   }
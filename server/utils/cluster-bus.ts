@@ -0,0 +1,134 @@
+import cluster from 'cluster';
+import { logger } from './logger';
+import { metrics } from './metrics';
+
+const log = logger.child({ module: 'cluster-bus' });
+
+// 叢集模式（CLUSTER_WORKERS > 1）下各 worker 之間的輕量 pub/sub，經由主程序的 IPC 轉送
+// 用途：記憶體快取失效、SSE 事件廣播；單一程序時直接在本地分派，行為與未啟用叢集相同
+//
+// publish()：本地處理器同步執行，再轉送給其他 worker（快取失效用，寫入後本 worker 立即生效）
+// publish(..., { sequenced: true })：由主程序編號後依序送給所有 worker（包含自己），
+//   所有 worker 看到相同的順序與序號（SSE 事件 ID 用）
+
+// 主程序收集各 worker 指標的等待時間
+export const METRICS_TIMEOUT_MS = 2000;
+
+export type BusHandler<T = any> = (data: T, seq: number) => void;
+
+// worker ↔ 主程序之間的訊息
+export type ClusterMessage =
+  | { type: 'cluster:bus'; channel: string; data: unknown; sequenced?: boolean; seq?: number }
+  | { type: 'cluster:ready' }
+  | { type: 'cluster:metrics-request'; requestId: number }
+  | { type: 'cluster:metrics-collect'; requestId: number }
+  | { type: 'cluster:metrics-report'; requestId: number; text: string }
+  | { type: 'cluster:metrics-response'; requestId: number; text: string | null };
+
+export function isClusterMessage(message: any): message is ClusterMessage {
+  return !!message && typeof message.type === 'string' && message.type.startsWith('cluster:');
+}
+
+const handlers = new Map<string, Set<BusHandler>>();
+const pendingMetrics = new Map<number, (text: string | null) => void>();
+let localSeq = 0;
+let nextRequestId = 1;
+
+function dispatch(channel: string, data: unknown, seq: number) {
+  const channelHandlers = handlers.get(channel);
+  if (!channelHandlers) return;
+  for (const handler of channelHandlers) {
+    try {
+      handler(data, seq);
+    } catch (error) {
+      log.error('Bus handler failed', { channel, error });
+    }
+  }
+}
+
+function send(message: ClusterMessage): boolean {
+  if (!process.send || !process.connected) return false;
+  process.send(message);
+  return true;
+}
+
+if (cluster.isWorker) {
+  process.on('message', (message: any) => {
+    if (!isClusterMessage(message)) return;
+    switch (message.type) {
+      case 'cluster:bus':
+        dispatch(message.channel, message.data, message.seq ?? 0);
+        break;
+      case 'cluster:metrics-collect':
+        send({ type: 'cluster:metrics-report', requestId: message.requestId, text: metrics.render() });
+        break;
+      case 'cluster:metrics-response':
+        pendingMetrics.get(message.requestId)?.(message.text);
+        break;
+    }
+  });
+}
+
+export class ClusterBus {
+  // 是否為叢集中的 worker
+  static get enabled(): boolean {
+    return cluster.isWorker;
+  }
+
+  // worker 編號（0 起算，輪替重啟後沿用）；單一程序時為 0
+  static get workerIndex(): number {
+    return parseInt(process.env.CLUSTER_WORKER_INDEX || '0', 10);
+  }
+
+  static subscribe<T = any>(channel: string, handler: BusHandler<T>): () => void {
+    let channelHandlers = handlers.get(channel);
+    if (!channelHandlers) {
+      channelHandlers = new Set();
+      handlers.set(channel, channelHandlers);
+    }
+    channelHandlers.add(handler);
+    return () => channelHandlers!.delete(handler);
+  }
+
+  static publish(channel: string, data: unknown, options: { sequenced?: boolean } = {}) {
+    if (!cluster.isWorker) {
+      dispatch(channel, data, ++localSeq);
+      return;
+    }
+
+    if (options.sequenced) {
+      // 由主程序編號後送回；主程序已不在時（正在關閉）退回本地分派
+      if (!send({ type: 'cluster:bus', channel, data, sequenced: true })) {
+        dispatch(channel, data, ++localSeq);
+      }
+      return;
+    }
+
+    dispatch(channel, data, 0);
+    send({ type: 'cluster:bus', channel, data });
+  }
+
+  // 暖機完成，通知主程序（輪替重啟時據此關閉舊 worker）
+  static notifyReady() {
+    if (cluster.isWorker) send({ type: 'cluster:ready' });
+  }
+
+  // 取得所有 worker 合併後的指標；單一程序或逾時時回傳 null，由呼叫端改用本地指標
+  static collectMetrics(): Promise<string | null> {
+    if (!cluster.isWorker) return Promise.resolve(null);
+
+    const requestId = nextRequestId++;
+    return new Promise(resolve => {
+      const timer = setTimeout(() => finish(null), METRICS_TIMEOUT_MS + 500);
+      const finish = (text: string | null) => {
+        clearTimeout(timer);
+        pendingMetrics.delete(requestId);
+        resolve(text);
+      };
+      pendingMetrics.set(requestId, finish);
+      if (!send({ type: 'cluster:metrics-request', requestId })) finish(null);
+    });
+  }
+}
+
+export default ClusterBus;
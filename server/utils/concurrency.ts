@@ -0,0 +1,64 @@
+// 限制同時執行的非同步工作數量，超出的工作排隊等待
+// 佇列滿時直接拒絕，避免大量匯入時無限堆積
+
+export class ConcurrencyLimiter {
+  private active = 0;
+  private waiting: Array<() => void> = [];
+
+  constructor(
+    private readonly concurrency: number,
+    private readonly maxQueue: number = Infinity
+  ) {}
+
+  async run<T>(task: () => Promise<T>): Promise<T> {
+    if (this.active >= this.concurrency) {
+      if (this.waiting.length >= this.maxQueue) {
+        throw new Error('Too many pending requests');
+      }
+      // 等待中的工作直接接手完成者的名額，active 不變
+      await new Promise<void>(resolve => this.waiting.push(resolve));
+    } else {
+      this.active++;
+    }
+
+    try {
+      return await task();
+    } finally {
+      const next = this.waiting.shift();
+      if (next) next();
+      else this.active--;
+    }
+  }
+
+  get pending(): number {
+    return this.waiting.length;
+  }
+
+  get running(): number {
+    return this.active;
+  }
+}
+
+// 以固定並行數處理整個陣列，結果順序與輸入相同
+export async function mapWithConcurrency<T, R>(
+  items: T[],
+  concurrency: number,
+  worker: (item: T, index: number) => Promise<R>
+): Promise<R[]> {
+  const results: R[] = new Array(items.length);
+  let nextIndex = 0;
+
+  const runners = Array.from({ length: Math.min(concurrency, items.length) }, async () => {
+    while (nextIndex < items.length) {
+      const index = nextIndex++;
+      results[index] = await worker(items[index], index);
+    }
+  });
+
+  await Promise.all(runners);
+  return results;
+}
+
+export const sleep = (ms: number): Promise<void> => {
+  return new Promise(resolve => setTimeout(resolve, ms));
+};
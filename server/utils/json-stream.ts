@@ -0,0 +1,46 @@
+import { Response } from 'express';
+import { Writable } from 'stream';
+import { setImmediate as yieldToEventLoop } from 'timers/promises';
+import { writeChunk } from './stream';
+
+// 大型 JSON 回應的串流輸出
+// res.json 會在主執行緒一次序列化整個陣列並計算 ETag；這裡逐筆序列化、分段寫出，每段之間讓出事件迴圈
+
+const CHUNK_SIZE = 64 * 1024;
+
+// 已序列化的 JSON（例如 worker thread 的結果），或尚未序列化的陣列
+export type JsonArrayBody = Buffer | Iterable<unknown> | AsyncIterable<unknown>;
+
+// 以 JSON 陣列輸出（不會結束 output）
+export async function writeJsonArray(output: Writable, items: Iterable<unknown> | AsyncIterable<unknown>) {
+  let buffer = '[';
+  let first = true;
+  for await (const item of items) {
+    buffer += (first ? '' : ',') + (JSON.stringify(item) ?? 'null');
+    first = false;
+    if (buffer.length >= CHUNK_SIZE) {
+      await writeChunk(output, buffer);
+      buffer = '';
+      await yieldToEventLoop();
+    }
+  }
+  await writeChunk(output, buffer + ']');
+}
+
+// 回傳 JSON；輸出途中失敗時只能中斷連線
+export async function sendJson(res: Response, body: JsonArrayBody) {
+  res.type('application/json');
+  try {
+    if (Buffer.isBuffer(body)) {
+      res.setHeader('Content-Length', body.length);
+      for (let offset = 0; offset < body.length; offset += CHUNK_SIZE) {
+        await writeChunk(res, body.subarray(offset, offset + CHUNK_SIZE));
+      }
+    } else {
+      await writeJsonArray(res, body);
+    }
+    res.end();
+  } catch (error: any) {
+    res.destroy(error);
+  }
+}
@@ -0,0 +1,155 @@
+import fs from 'fs';
+import { getRequestContext } from './request-context';
+
+// 結構化日誌：每行一筆 JSON，先寫入記憶體緩衝再非同步輸出到 stdout
+// 避免高峰時每個請求都同步寫入（pm2 會再把 stdout 寫到磁碟）
+//
+// 環境變數：
+//   LOG_LEVEL              debug | info | warn | error（預設 info）
+//   LOG_DEBUG_SAMPLE_RATE  debug 日誌的取樣比例 0~1（預設 1，即全部輸出）
+
+export type LogLevel = 'debug' | 'info' | 'warn' | 'error';
+
+const LEVELS: Record<LogLevel, number> = { debug: 10, info: 20, warn: 30, error: 40 };
+
+const minLevel = LEVELS[(process.env.LOG_LEVEL as LogLevel)] || LEVELS.info;
+const debugSampleRate = Math.min(1, Math.max(0, parseFloat(process.env.LOG_DEBUG_SAMPLE_RATE || '1')));
+
+// 緩衝上限：stdout 長時間阻塞時丟棄 info 以下的日誌，避免記憶體無限增加
+const FLUSH_THRESHOLD_BYTES = 64 * 1024;
+const MAX_BUFFER_BYTES = 4 * 1024 * 1024;
+
+let buffer: string[] = [];
+let bufferedBytes = 0;
+let flushScheduled = false;
+let waitingForDrain = false;
+let dropped = 0;
+let stdoutClosed = false;
+
+// 與 console 相同：stdout 被關閉（EPIPE）時靜默停止輸出，而不是讓程序崩潰
+process.stdout.on('error', (error: any) => {
+  if (error.code !== 'EPIPE') throw error;
+  stdoutClosed = true;
+  buffer = [];
+  bufferedBytes = 0;
+});
+
+function flush() {
+  flushScheduled = false;
+  if (stdoutClosed || waitingForDrain || buffer.length === 0) return;
+
+  if (dropped > 0) {
+    buffer.push(serialize('warn', 'Log lines dropped because stdout was blocked', { dropped }, {}));
+    dropped = 0;
+  }
+  const chunk = buffer.join('');
+  buffer = [];
+  bufferedBytes = 0;
+
+  if (!process.stdout.write(chunk)) {
+    waitingForDrain = true;
+    process.stdout.once('drain', () => {
+      waitingForDrain = false;
+      flush();
+    });
+  }
+}
+
+function scheduleFlush() {
+  if (bufferedBytes >= FLUSH_THRESHOLD_BYTES) {
+    flush();
+  } else if (!flushScheduled) {
+    flushScheduled = true;
+    setImmediate(flush);
+  }
+}
+
+// 程序結束前（包含 process.exit）同步寫出剩餘內容
+function flushSync() {
+  if (stdoutClosed || buffer.length === 0) return;
+  const chunk = buffer.join('');
+  buffer = [];
+  bufferedBytes = 0;
+  try {
+    fs.writeSync(1, chunk);
+  } catch {
+    // stdout 已關閉時無法處理
+  }
+}
+
+process.on('exit', flushSync);
+
+function serializeError(error: any) {
+  if (!(error instanceof Error)) return error;
+  const result: Record<string, any> = { name: error.name, message: error.message, stack: error.stack };
+  if ((error as any).code) result.code = (error as any).code;
+  return result;
+}
+
+function serialize(level: LogLevel, msg: string, fields: Record<string, any> | undefined, bindings: Record<string, any>): string {
+  const entry: Record<string, any> = {
+    time: new Date().toISOString(),
+    level,
+    msg,
+    ...bindings,
+  };
+  const requestId = getRequestContext()?.requestId;
+  if (requestId) entry.requestId = requestId;
+  if (fields) {
+    for (const key of Object.keys(fields)) {
+      entry[key] = key === 'error' || key === 'err' ? serializeError(fields[key]) : fields[key];
+    }
+  }
+
+  try {
+    return JSON.stringify(entry) + '\n';
+  } catch {
+    return JSON.stringify({ time: entry.time, level, msg, ...bindings, unserializable: true }) + '\n';
+  }
+}
+
+export class Logger {
+  constructor(private readonly bindings: Record<string, any> = {}) {}
+
+  // 建立帶有固定欄位（例如 module）的子 logger
+  child(bindings: Record<string, any>): Logger {
+    return new Logger({ ...this.bindings, ...bindings });
+  }
+
+  isLevelEnabled(level: LogLevel): boolean {
+    return LEVELS[level] >= minLevel;
+  }
+
+  debug(msg: string, fields?: Record<string, any>) {
+    if (!this.isLevelEnabled('debug')) return;
+    if (debugSampleRate < 1 && Math.random() >= debugSampleRate) return;
+    this.write('debug', msg, fields);
+  }
+
+  info(msg: string, fields?: Record<string, any>) {
+    if (this.isLevelEnabled('info')) this.write('info', msg, fields);
+  }
+
+  warn(msg: string, fields?: Record<string, any>) {
+    if (this.isLevelEnabled('warn')) this.write('warn', msg, fields);
+  }
+
+  error(msg: string, fields?: Record<string, any>) {
+    if (this.isLevelEnabled('error')) this.write('error', msg, fields);
+  }
+
+  private write(level: LogLevel, msg: string, fields?: Record<string, any>) {
+    if (bufferedBytes >= MAX_BUFFER_BYTES && LEVELS[level] < LEVELS.warn) {
+      dropped++;
+      return;
+    }
+    const line = serialize(level, msg, fields, this.bindings);
+    buffer.push(line);
+    bufferedBytes += line.length;
+    scheduleFlush();
+  }
+}
+
+export const logger = new Logger();
+
+export default logger;
@@ -0,0 +1,59 @@
+// 有容量上限與過期時間的 LRU 快取
+// 利用 Map 保留插入順序：最久未使用的項目在最前面
+
+interface CacheEntry<V> {
+  value: V;
+  expiresAt: number;
+}
+
+export class LruCache<K, V> {
+  private entries = new Map<K, CacheEntry<V>>();
+
+  constructor(
+    private readonly maxSize: number,
+    private readonly defaultTtlMs: number
+  ) {}
+
+  get(key: K): V | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+
+    if (entry.expiresAt <= Date.now()) {
+      this.entries.delete(key);
+      return undefined;
+    }
+
+    // 移到最後，標記為最近使用
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  set(key: K, value: V, ttlMs: number = this.defaultTtlMs) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + ttlMs });
+
+    while (this.entries.size > this.maxSize) {
+      const oldest = this.entries.keys().next().value as K;
+      this.entries.delete(oldest);
+    }
+  }
+
+  has(key: K): boolean {
+    return this.get(key) !== undefined;
+  }
+
+  delete(key: K): boolean {
+    return this.entries.delete(key);
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+
+  get size(): number {
+    return this.entries.size;
+  }
+}
+
+export default LruCache;
@@ -0,0 +1,172 @@
+// 輕量的 Prometheus 文字格式指標（Counter / Gauge / Histogram）
+// 標籤組合以字串為 key 存放；請只使用有限集合的標籤值（例如路由樣板，而不是實際網址）
+
+type Labels = Record<string, string | number>;
+
+function labelKey(labels: Labels): string {
+  return Object.keys(labels)
+    .sort()
+    .map(name => `${name}="${String(labels[name]).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`)
+    .join(',');
+}
+
+function formatSample(name: string, key: string, value: number): string {
+  return key ? `${name}{${key}} ${value}` : `${name} ${value}`;
+}
+
+interface Metric {
+  render(): string[];
+}
+
+export class Counter implements Metric {
+  private values = new Map<string, number>();
+
+  constructor(readonly name: string, readonly help: string) {}
+
+  inc(labels: Labels = {}, value: number = 1) {
+    const key = labelKey(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const [key, value] of this.values) lines.push(formatSample(this.name, key, value));
+    return lines;
+  }
+}
+
+export class Gauge implements Metric {
+  private values = new Map<string, number>();
+
+  // collect 在每次輸出前呼叫，用於即時讀取的數值（例如連線數）
+  constructor(readonly name: string, readonly help: string, private readonly collect?: (gauge: Gauge) => void) {}
+
+  set(labels: Labels, value: number) {
+    this.values.set(labelKey(labels), value);
+  }
+
+  inc(labels: Labels = {}, value: number = 1) {
+    const key = labelKey(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  dec(labels: Labels = {}, value: number = 1) {
+    this.inc(labels, -value);
+  }
+
+  render(): string[] {
+    if (this.collect) this.collect(this);
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} gauge`];
+    for (const [key, value] of this.values) lines.push(formatSample(this.name, key, value));
+    return lines;
+  }
+}
+
+interface HistogramSeries {
+  counts: number[];
+  sum: number;
+  count: number;
+}
+
+export class Histogram implements Metric {
+  private series = new Map<string, HistogramSeries>();
+
+  constructor(readonly name: string, readonly help: string, private readonly buckets: number[]) {
+    this.buckets = [...buckets].sort((a, b) => a - b);
+  }
+
+  observe(labels: Labels, value: number) {
+    const key = labelKey(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+    // 各 bucket 只記自己的數量，輸出時再累加
+    const index = this.buckets.findIndex(bound => value <= bound);
+    if (index >= 0) series.counts[index]++;
+    series.sum += value;
+    series.count++;
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const [key, series] of this.series) {
+      const prefix = key ? `${key},` : '';
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += series.counts[i];
+        lines.push(`${this.name}_bucket{${prefix}le="${bound}"} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket{${prefix}le="+Inf"} ${series.count}`);
+      lines.push(formatSample(`${this.name}_sum`, key, series.sum));
+      lines.push(formatSample(`${this.name}_count`, key, series.count));
+    }
+    return lines;
+  }
+}
+
+class MetricsRegistry {
+  private metrics: Metric[] = [];
+
+  counter(name: string, help: string): Counter {
+    return this.register(new Counter(name, help));
+  }
+
+  gauge(name: string, help: string, collect?: (gauge: Gauge) => void): Gauge {
+    return this.register(new Gauge(name, help, collect));
+  }
+
+  histogram(name: string, help: string, buckets: number[]): Histogram {
+    return this.register(new Histogram(name, help, buckets));
+  }
+
+  render(): string {
+    return this.metrics.map(metric => metric.render().join('\n')).join('\n\n') + '\n';
+  }
+
+  private register<T extends Metric>(metric: T): T {
+    this.metrics.push(metric);
+    return metric;
+  }
+}
+
+export const metrics = new MetricsRegistry();
+
+// 秒為單位的延遲 bucket（5ms ~ 10s）
+export const LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+// 合併多個 worker 的輸出：同名指標的 HELP/TYPE 只保留一次，每筆樣本加上 worker 標籤
+export function mergeWorkerMetrics(parts: Array<{ worker: number; text: string }>): string {
+  const families = new Map<string, { header: string[]; samples: string[] }>();
+
+  for (const { worker, text } of parts) {
+    let current: { header: string[]; samples: string[] } | null = null;
+    for (const line of text.split('\n')) {
+      if (!line) continue;
+      const help = line.match(/^# HELP (\S+)/);
+      if (help) {
+        current = families.get(help[1]) || null;
+        if (!current) {
+          current = { header: [line], samples: [] };
+          families.set(help[1], current);
+        }
+        continue;
+      }
+      if (!current) continue;
+      if (line.startsWith('#')) {
+        if (current.header.length < 2 && line.startsWith('# TYPE')) current.header.push(line);
+        continue;
+      }
+      const brace = line.indexOf('{');
+      const space = line.indexOf(' ');
+      current.samples.push(
+        brace >= 0 && brace < space
+          ? `${line.slice(0, brace)}{worker="${worker}",${line.slice(brace + 1)}`
+          : `${line.slice(0, space)}{worker="${worker}"}${line.slice(space)}`
+      );
+    }
+  }
+
+  return Array.from(families.values(), family => [...family.header, ...family.samples].join('\n')).join('\n\n') + '\n';
+}
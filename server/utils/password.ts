@@ -0,0 +1,66 @@
+import crypto from 'crypto';
+import { ConcurrencyLimiter } from './concurrency';
+
+// 密碼雜湊：加鹽的 scrypt，格式為 scrypt$N$r$p$<salt base64>$<hash base64>
+// 舊資料是未加鹽的 SHA-256（64 字元 hex），登入成功時會自動升級
+//
+// crypto.scrypt 在 libuv 的 thread pool 中執行，不會阻塞事件迴圈；
+// 另外限制同時計算的數量，避免登入洪峰佔滿 thread pool（檔案 I/O、DNS 也共用它）
+
+const SCRYPT_N = 16384;
+const SCRYPT_R = 8;
+const SCRYPT_P = 1;
+const KEY_LENGTH = 32;
+const SALT_LENGTH = 16;
+
+const KDF_CONCURRENCY = parseInt(process.env.PASSWORD_HASH_CONCURRENCY || '4', 10);
+const KDF_MAX_QUEUE = 500;
+const kdfLimiter = new ConcurrencyLimiter(KDF_CONCURRENCY, KDF_MAX_QUEUE);
+
+const LEGACY_SHA256 = /^[0-9a-f]{64}$/;
+
+interface ScryptParams {
+  N: number;
+  r: number;
+  p: number;
+}
+
+function scrypt(password: string, salt: Buffer, keyLength: number, params: ScryptParams): Promise<Buffer> {
+  return kdfLimiter.run(() => new Promise<Buffer>((resolve, reject) => {
+    crypto.scrypt(password, salt, keyLength, { ...params, maxmem: 256 * params.N * params.r }, (error, key) => {
+      if (error) reject(error);
+      else resolve(key);
+    });
+  }));
+}
+
+export async function hashPassword(password: string): Promise<string> {
+  const salt = crypto.randomBytes(SALT_LENGTH);
+  const key = await scrypt(password, salt, KEY_LENGTH, { N: SCRYPT_N, r: SCRYPT_R, p: SCRYPT_P });
+  return `scrypt$${SCRYPT_N}$${SCRYPT_R}$${SCRYPT_P}$${salt.toString('base64')}$${key.toString('base64')}`;
+}
+
+// 驗證密碼；needsRehash 表示雜湊格式或參數過舊，應以新格式重新儲存
+export async function verifyPassword(password: string, stored: string): Promise<{ valid: boolean; needsRehash: boolean }> {
+  if (!stored) return { valid: false, needsRehash: false };
+
+  if (LEGACY_SHA256.test(stored)) {
+    const digest = crypto.createHash('sha256').update(password).digest();
+    const valid = crypto.timingSafeEqual(digest, Buffer.from(stored, 'hex'));
+    return { valid, needsRehash: valid };
+  }
+
+  const parts = stored.split('$');
+  if (parts.length !== 6 || parts[0] !== 'scrypt') {
+    return { valid: false, needsRehash: false };
+  }
+
+  const params = { N: parseInt(parts[1], 10), r: parseInt(parts[2], 10), p: parseInt(parts[3], 10) };
+  const salt = Buffer.from(parts[4], 'base64');
+  const expected = Buffer.from(parts[5], 'base64');
+  const key = await scrypt(password, salt, expected.length, params);
+  const valid = key.length === expected.length && crypto.timingSafeEqual(key, expected);
+
+  const outdated = params.N !== SCRYPT_N || params.r !== SCRYPT_R || params.p !== SCRYPT_P || expected.length !== KEY_LENGTH;
+  return { valid, needsRehash: valid && outdated };
+}
@@ -0,0 +1,63 @@
+// 記憶體內的 token bucket 限流器
+// 每個 key 一個桶：容量 capacity，每秒補充 refillPerSecond 個 token
+// 桶數量有上限，超過時淘汰最久沒有使用的（補滿的桶等同新桶，淘汰不影響正確性）
+// 狀態只存在本程序：叢集模式下每個 worker 各有一份，整體上限約為設定值 × worker 數
+
+interface Bucket {
+  tokens: number;
+  updatedAt: number;
+}
+
+export class TokenBucketLimiter {
+  private buckets = new Map<string, Bucket>();
+
+  constructor(
+    private readonly capacity: number,
+    private readonly refillPerSecond: number,
+    private readonly maxKeys: number = 10000
+  ) {}
+
+  // 距離下一個可用 token 的毫秒數（0 表示目前可用），不消耗 token
+  retryAfterMs(key: string): number {
+    const bucket = this.refill(key);
+    if (bucket.tokens >= 1) return 0;
+    return Math.ceil(((1 - bucket.tokens) / this.refillPerSecond) * 1000);
+  }
+
+  // 消耗 token（不足時扣到 0）；回傳消耗前是否足夠
+  take(key: string, count: number = 1): boolean {
+    const bucket = this.refill(key);
+    const enough = bucket.tokens >= count;
+    bucket.tokens = Math.max(0, bucket.tokens - count);
+    return enough;
+  }
+
+  // 退還先前消耗的 token（不超過容量）
+  refund(key: string, count: number = 1) {
+    const bucket = this.refill(key);
+    bucket.tokens = Math.min(this.capacity, bucket.tokens + count);
+  }
+
+  get size(): number {
+    return this.buckets.size;
+  }
+
+  private refill(key: string): Bucket {
+    const now = Date.now();
+    let bucket = this.buckets.get(key);
+    if (bucket) {
+      bucket.tokens = Math.min(this.capacity, bucket.tokens + ((now - bucket.updatedAt) / 1000) * this.refillPerSecond);
+      bucket.updatedAt = now;
+      // 移到最後，維持最近使用的順序
+      this.buckets.delete(key);
+    } else {
+      bucket = { tokens: this.capacity, updatedAt: now };
+      if (this.buckets.size >= this.maxKeys) {
+        const oldest = this.buckets.keys().next().value;
+        if (oldest !== undefined) this.buckets.delete(oldest);
+      }
+    }
+    this.buckets.set(key, bucket);
+    return bucket;
+  }
+}
@@ -0,0 +1,20 @@
+import { AsyncLocalStorage } from 'async_hooks';
+
+// 每個請求的上下文，透過 AsyncLocalStorage 在 await 之間傳遞
+// （Prisma 查詢統計等不需要一路傳參數）
+export interface RequestContext {
+  requestId: string;
+  startedAt: number;
+  dbQueries: number;
+  dbTimeMs: number;
+}
+
+const storage = new AsyncLocalStorage<RequestContext>();
+
+export function runWithRequestContext<T>(context: RequestContext, fn: () => T): T {
+  return storage.run(context, fn);
+}
+
+export function getRequestContext(): RequestContext | undefined {
+  return storage.getStore();
+}
@@ -0,0 +1,125 @@
+import { performance } from 'perf_hooks';
+import { Request, Response, NextFunction, Router } from 'express';
+import { metrics } from './metrics';
+import { logger } from './logger';
+
+const log = logger.child({ module: 'startup' });
+
+// 啟動流程：先 listen，再於背景完成暖機（資料庫連線、載入撤銷清單等），
+// 暖機完成前的 API 請求會先等待（最多 STARTUP_READY_WAIT_MS），逾時回傳 503
+//
+// STARTUP_PROFILE=1     啟動完成後輸出每個階段的耗時
+// STARTUP_PROFILE=exit  同上，輸出後結束程序（量測冷啟動用）
+
+const PROFILE = process.env.STARTUP_PROFILE || '';
+const READY_WAIT_MS = parseInt(process.env.STARTUP_READY_WAIT_MS || '10000', 10);
+
+interface Phase {
+  name: string;
+  startMs: number;
+  durationMs: number;
+}
+
+const phases: Phase[] = [];
+
+let ready = false;
+let resolveReady!: () => void;
+const readyPromise = new Promise<void>(resolve => {
+  resolveReady = resolve;
+});
+
+metrics.gauge('server_ready', 'Whether startup warmup has finished', gauge => {
+  gauge.set({}, ready ? 1 : 0);
+});
+metrics.gauge('startup_phase_seconds', 'Duration of each startup phase', gauge => {
+  for (const phase of phases) {
+    gauge.set({ phase: phase.name }, phase.durationMs / 1000);
+  }
+});
+
+// 記錄一個階段；startMs 為 performance.now() 的時間點（0 = 程序啟動）
+export function recordPhase(name: string, startMs: number, endMs: number = performance.now()) {
+  phases.push({ name, startMs, durationMs: endMs - startMs });
+}
+
+// 執行並記錄一個階段
+export async function timePhase<T>(name: string, fn: () => Promise<T> | T): Promise<T> {
+  const start = performance.now();
+  try {
+    return await fn();
+  } finally {
+    recordPhase(name, start);
+  }
+}
+
+export function isReady(): boolean {
+  return ready;
+}
+
+export function markReady() {
+  if (ready) return;
+  ready = true;
+  recordPhase('ready', 0);
+  resolveReady();
+  log.info('Server ready', { sinceProcessStartMs: Math.round(performance.now()) });
+}
+
+// 輸出啟動報告（STARTUP_PROFILE 未設定時只記 debug）
+export function reportStartup() {
+  const report = phases.map(phase => ({
+    phase: phase.name,
+    startMs: Math.round(phase.startMs),
+    durationMs: Math.round(phase.durationMs * 10) / 10,
+  }));
+  if (!PROFILE) {
+    log.debug('Startup phases', { phases: report });
+    return;
+  }
+
+  log.info('Startup profile', { phases: report, totalMs: Math.round(performance.now()) });
+  if (PROFILE === 'exit') {
+    // 交給 SIGTERM 處理器做正常關閉
+    process.kill(process.pid, 'SIGTERM');
+  }
+}
+
+// 暖機完成前的請求先等待，逾時回傳 503
+export function readinessGate(req: Request, res: Response, next: NextFunction) {
+  if (ready) return next();
+
+  let timer: NodeJS.Timeout;
+  const timeout = new Promise<boolean>(resolve => {
+    timer = setTimeout(() => resolve(false), READY_WAIT_MS);
+  });
+  Promise.race([readyPromise.then(() => true), timeout]).then(isReadyNow => {
+    clearTimeout(timer);
+    if (isReadyNow) return next();
+    res.setHeader('Retry-After', '1');
+    res.status(503).json({ error: 'Server is starting' });
+  });
+}
+
+// 延遲載入路由模組：第一次有請求（或呼叫 load()）時才 require，並記錄載入耗時
+// 載入失敗時下一個請求會重試
+export function lazyRouter(name: string, importer: () => Promise<{ default: Router }>) {
+  let loading: Promise<Router> | null = null;
+
+  const load = (): Promise<Router> => {
+    if (!loading) {
+      loading = timePhase(`routes:${name}`, importer).then(
+        module => module.default,
+        error => {
+          loading = null;
+          throw error;
+        }
+      );
+    }
+    return loading;
+  };
+
+  const handler = (req: Request, res: Response, next: NextFunction) => {
+    load().then(router => router(req, res, next), next);
+  };
+  handler.load = load;
+  return handler;
+}
@@ -0,0 +1,29 @@
+import { Writable } from 'stream';
+
+// 寫入並遵守背壓：緩衝區滿時等待 drain；對方已關閉連線時拋出錯誤，讓呼叫端停止產生資料
+export function writeChunk(output: Writable, chunk: string | Buffer): Promise<void> {
+  if (output.destroyed || output.writableEnded) {
+    return Promise.reject(new Error('Output stream closed'));
+  }
+  if (output.write(chunk)) {
+    return Promise.resolve();
+  }
+  return new Promise((resolve, reject) => {
+    const cleanup = () => {
+      output.off('drain', onDrain);
+      output.off('close', onClose);
+      output.off('error', onClose);
+    };
+    const onDrain = () => {
+      cleanup();
+      resolve();
+    };
+    const onClose = () => {
+      cleanup();
+      reject(new Error('Output stream closed'));
+    };
+    output.on('drain', onDrain);
+    output.on('close', onClose);
+    output.on('error', onClose);
+  });
+}
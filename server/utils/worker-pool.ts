@@ -0,0 +1,117 @@
+import { Worker, TransferListItem } from 'worker_threads';
+import { logger } from './logger';
+
+const log = logger.child({ module: 'worker-pool' });
+
+// 固定大小的 worker_threads 池：任務以 { id, task, payload } 送到閒置的 worker，依序排隊
+// worker 崩潰時，執行中的任務失敗並重新建立該 worker
+
+interface Task {
+  id: number;
+  task: string;
+  payload: unknown;
+  transfer?: TransferListItem[];
+  resolve: (value: any) => void;
+  reject: (error: Error) => void;
+}
+
+interface PoolWorker {
+  worker: Worker;
+  current: Task | null;
+}
+
+export class WorkerPoolFullError extends Error {}
+
+export class WorkerPool {
+  private workers: PoolWorker[] = [];
+  private queue: Task[] = [];
+  private nextId = 1;
+  private closed = false;
+
+  constructor(
+    private readonly script: string,
+    private readonly size: number,
+    private readonly maxQueue: number = 1000
+  ) {}
+
+  get running(): number {
+    return this.workers.filter(entry => entry.current).length;
+  }
+
+  get pending(): number {
+    return this.queue.length;
+  }
+
+  // 執行任務；worker 在第一次使用時才建立
+  run<T>(task: string, payload: unknown, transfer?: TransferListItem[]): Promise<T> {
+    if (this.closed) return Promise.reject(new Error('Worker pool closed'));
+    if (this.queue.length >= this.maxQueue) {
+      return Promise.reject(new WorkerPoolFullError('Worker pool queue is full'));
+    }
+
+    return new Promise<T>((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, task, payload, transfer, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  async close() {
+    this.closed = true;
+    for (const task of this.queue.splice(0)) {
+      task.reject(new Error('Worker pool closed'));
+    }
+    await Promise.all(this.workers.map(entry => entry.worker.terminate()));
+    this.workers = [];
+  }
+
+  private dispatch() {
+    while (this.queue.length > 0) {
+      let entry = this.workers.find(candidate => !candidate.current);
+      if (!entry) {
+        if (this.workers.length >= this.size) return;
+        entry = this.spawn();
+      }
+      const task = this.queue.shift()!;
+      entry.current = task;
+      entry.worker.ref();
+      entry.worker.postMessage({ id: task.id, task: task.task, payload: task.payload }, task.transfer);
+    }
+  }
+
+  private spawn(): PoolWorker {
+    const entry: PoolWorker = { worker: new Worker(this.script), current: null };
+    // 閒置的 worker 不阻止程序結束（執行任務時才 ref）
+    entry.worker.unref();
+
+    entry.worker.on('message', (message: { id: number; result?: unknown; error?: string }) => {
+      const task = entry.current;
+      if (!task || task.id !== message.id) return;
+      entry.current = null;
+      entry.worker.unref();
+      if (message.error !== undefined) {
+        task.reject(new Error(message.error));
+      } else {
+        task.resolve(message.result);
+      }
+      this.dispatch();
+    });
+
+    entry.worker.on('error', error => {
+      log.error('Worker thread crashed', { script: this.script, error });
+    });
+
+    entry.worker.on('exit', code => {
+      this.workers = this.workers.filter(candidate => candidate !== entry);
+      if (entry.current) {
+        entry.current.reject(new Error(`Worker thread exited with code ${code}`));
+        entry.current = null;
+      }
+      if (!this.closed) this.dispatch();
+    });
+
+    this.workers.push(entry);
+    return entry;
+  }
+}
+
+export default WorkerPool;
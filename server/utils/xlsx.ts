@@ -0,0 +1,86 @@
+import { Writable } from 'stream';
+import { ZipStreamWriter } from './zip';
+
+// 串流產生單一工作表的 XLSX
+// 字串使用 inline string（不需要 sharedStrings 表），每列產生後立即壓縮輸出，記憶體用量與資料量無關
+
+const CONTENT_TYPES = `<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>`;
+
+const ROOT_RELS = `<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>`;
+
+const WORKBOOK_RELS = `<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>`;
+
+const SHEET_HEADER = `<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>`;
+
+const SHEET_FOOTER = '</sheetData></worksheet>';
+
+// 每累積約 64 KB 的 XML 才交給壓縮器，減少小區塊寫入
+const CHUNK_SIZE = 64 * 1024;
+
+function escapeXml(value: string): string {
+  return value
+    // XML 1.0 不允許的控制字元
+    .replace(/[\u0000-\u0008\u000b\u000c\u000e-\u001f\ufffe\uffff]/g, '')
+    .replace(/&/g, '&amp;')
+    .replace(/</g, '&lt;')
+    .replace(/>/g, '&gt;')
+    .replace(/"/g, '&quot;');
+}
+
+// 工作表名稱最多 31 字，且不可包含 \ / ? * [ ] :
+function sanitizeSheetName(name: string): string {
+  return name.replace(/[\\/?*[\]:]/g, ' ').slice(0, 31) || 'Sheet1';
+}
+
+function toCell(value: unknown): string {
+  if (value === null || value === undefined || value === '') return '<c/>';
+  if (typeof value === 'number' && Number.isFinite(value)) {
+    return `<c><v>${value}</v></c>`;
+  }
+  if (typeof value === 'boolean') {
+    return `<c t="b"><v>${value ? 1 : 0}</v></c>`;
+  }
+  const str = value instanceof Date ? value.toISOString() : String(value);
+  return `<c t="inlineStr"><is><t xml:space="preserve">${escapeXml(str)}</t></is></c>`;
+}
+
+async function* sheetXml(rows: AsyncIterable<unknown[]>): AsyncGenerator<string> {
+  let buffer = SHEET_HEADER;
+  for await (const row of rows) {
+    buffer += '<row>' + row.map(toCell).join('') + '</row>';
+    if (buffer.length >= CHUNK_SIZE) {
+      yield buffer;
+      buffer = '';
+    }
+  }
+  yield buffer + SHEET_FOOTER;
+}
+
+// 將 rows（第一列通常是標題）寫成 XLSX；不會結束 output
+export async function writeXlsx(output: Writable, rows: AsyncIterable<unknown[]>, sheetName: string = 'Sheet1') {
+  const workbook = `<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="${escapeXml(sanitizeSheetName(sheetName))}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>`;
+
+  const zip = new ZipStreamWriter(output);
+  await zip.addEntry('[Content_Types].xml', [CONTENT_TYPES]);
+  await zip.addEntry('_rels/.rels', [ROOT_RELS]);
+  await zip.addEntry('xl/workbook.xml', [workbook]);
+  await zip.addEntry('xl/_rels/workbook.xml.rels', [WORKBOOK_RELS]);
+  await zip.addEntry('xl/worksheets/sheet1.xml', sheetXml(rows));
+  await zip.finish();
+}
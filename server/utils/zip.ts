@@ -0,0 +1,165 @@
+import { Writable } from 'stream';
+import zlib from 'zlib';
+import { writeChunk } from './stream';
+
+// 串流 ZIP 寫入器（XLSX 用）
+// 每個檔案邊壓縮邊輸出，大小與 CRC 寫在檔案後的 data descriptor，不需要先把內容放進記憶體
+// 不支援 ZIP64：單一檔案與整個壓縮檔都必須小於 4 GB
+
+const LOCAL_FILE_HEADER = 0x04034b50;
+const DATA_DESCRIPTOR = 0x08074b50;
+const CENTRAL_DIRECTORY_HEADER = 0x02014b50;
+const END_OF_CENTRAL_DIRECTORY = 0x06054b50;
+
+const VERSION = 20;
+const FLAG_DATA_DESCRIPTOR = 0x0008;
+const FLAG_UTF8 = 0x0800;
+const METHOD_DEFLATE = 8;
+
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) {
+      c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    }
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+// Node 20.15 / 22.2 起內建 zlib.crc32，舊版本使用查表實作
+const nativeCrc32: ((data: Buffer, value?: number) => number) | undefined = (zlib as any).crc32;
+
+export function crc32(buf: Buffer, previous: number = 0): number {
+  if (nativeCrc32) return nativeCrc32(buf, previous);
+  let crc = previous ^ 0xffffffff;
+  for (let i = 0; i < buf.length; i++) {
+    crc = CRC_TABLE[(crc ^ buf[i]) & 0xff] ^ (crc >>> 8);
+  }
+  return (crc ^ 0xffffffff) >>> 0;
+}
+
+function dosDateTime(date: Date): { time: number; date: number } {
+  return {
+    time: (date.getHours() << 11) | (date.getMinutes() << 5) | Math.floor(date.getSeconds() / 2),
+    date: ((date.getFullYear() - 1980) << 9) | ((date.getMonth() + 1) << 5) | date.getDate(),
+  };
+}
+
+interface CentralEntry {
+  name: Buffer;
+  crc: number;
+  compressedSize: number;
+  size: number;
+  offset: number;
+}
+
+export class ZipStreamWriter {
+  private entries: CentralEntry[] = [];
+  private offset = 0;
+  private readonly timestamp = dosDateTime(new Date());
+
+  constructor(private readonly output: Writable) {}
+
+  // 依序加入檔案；source 可以是字串或 Buffer 的非同步序列
+  async addEntry(name: string, source: Iterable<string | Buffer> | AsyncIterable<string | Buffer>) {
+    const nameBuf = Buffer.from(name, 'utf8');
+    const entry: CentralEntry = { name: nameBuf, crc: 0, compressedSize: 0, size: 0, offset: this.offset };
+
+    const header = Buffer.alloc(30);
+    header.writeUInt32LE(LOCAL_FILE_HEADER, 0);
+    header.writeUInt16LE(VERSION, 4);
+    header.writeUInt16LE(FLAG_DATA_DESCRIPTOR | FLAG_UTF8, 6);
+    header.writeUInt16LE(METHOD_DEFLATE, 8);
+    header.writeUInt16LE(this.timestamp.time, 10);
+    header.writeUInt16LE(this.timestamp.date, 12);
+    // CRC 與大小留 0，寫在 data descriptor
+    header.writeUInt16LE(nameBuf.length, 26);
+    await this.write(Buffer.concat([header, nameBuf]));
+
+    const deflate = zlib.createDeflateRaw();
+    const pump = (async () => {
+      for await (const chunk of deflate) {
+        entry.compressedSize += chunk.length;
+        await this.write(chunk);
+      }
+    })();
+    // 輸出端出錯時中止壓縮，避免下方等待 drain 卡住
+    pump.catch(error => deflate.destroy(error));
+
+    try {
+      for await (const part of source) {
+        const buf = typeof part === 'string' ? Buffer.from(part, 'utf8') : part;
+        if (buf.length === 0) continue;
+        entry.crc = crc32(buf, entry.crc);
+        entry.size += buf.length;
+        if (!deflate.write(buf)) {
+          await new Promise<void>((resolve, reject) => {
+            const onDrain = () => {
+              deflate.off('error', onError);
+              resolve();
+            };
+            const onError = (error: Error) => {
+              deflate.off('drain', onDrain);
+              reject(error);
+            };
+            deflate.once('drain', onDrain);
+            deflate.once('error', onError);
+          });
+        }
+      }
+    } catch (error) {
+      deflate.destroy();
+      throw error;
+    }
+    deflate.end();
+    await pump;
+
+    const descriptor = Buffer.alloc(16);
+    descriptor.writeUInt32LE(DATA_DESCRIPTOR, 0);
+    descriptor.writeUInt32LE(entry.crc, 4);
+    descriptor.writeUInt32LE(entry.compressedSize, 8);
+    descriptor.writeUInt32LE(entry.size, 12);
+    await this.write(descriptor);
+
+    this.entries.push(entry);
+  }
+
+  // 寫出中央目錄（不會結束 output）
+  async finish() {
+    const start = this.offset;
+    for (const entry of this.entries) {
+      const header = Buffer.alloc(46);
+      header.writeUInt32LE(CENTRAL_DIRECTORY_HEADER, 0);
+      header.writeUInt16LE(VERSION, 4);
+      header.writeUInt16LE(VERSION, 6);
+      header.writeUInt16LE(FLAG_DATA_DESCRIPTOR | FLAG_UTF8, 8);
+      header.writeUInt16LE(METHOD_DEFLATE, 10);
+      header.writeUInt16LE(this.timestamp.time, 12);
+      header.writeUInt16LE(this.timestamp.date, 14);
+      header.writeUInt32LE(entry.crc, 16);
+      header.writeUInt32LE(entry.compressedSize, 20);
+      header.writeUInt32LE(entry.size, 24);
+      header.writeUInt16LE(entry.name.length, 28);
+      header.writeUInt32LE(entry.offset, 42);
+      await this.write(Buffer.concat([header, entry.name]));
+    }
+
+    const end = Buffer.alloc(22);
+    end.writeUInt32LE(END_OF_CENTRAL_DIRECTORY, 0);
+    end.writeUInt16LE(this.entries.length, 8);
+    end.writeUInt16LE(this.entries.length, 10);
+    end.writeUInt32LE(this.offset - start, 12);
+    end.writeUInt32LE(start, 16);
+    await this.write(end);
+  }
+
+  private async write(chunk: Buffer) {
+    if (this.offset + chunk.length > 0xffffffff) {
+      throw new Error('ZIP output exceeds 4 GB');
+    }
+    this.offset += chunk.length;
+    await writeChunk(this.output, chunk);
+  }
+}
@@ -0,0 +1,49 @@
+// JSON 解析／序列化與彙總任務
+// 同時在主執行緒（資料量小時）與 json.worker 中執行，必須是純函式，不可存取資料庫或其他服務
+
+export interface SlotTotals {
+  totalFireSparkle: number;
+  totalFireGem: number;
+  totalResearchAccel: number;
+  totalGeneralAccel: number;
+}
+
+function accelMinutes(accel: any): number {
+  return (accel.days || 0) * 1440 + (accel.hours || 0) * 60 + (accel.minutes || 0);
+}
+
+// 報名資料加上解析後的 slots 與 submittedAt（API 回傳格式）
+export function formatSubmission<T extends { slotsData: string; createdAt: Date }>(submission: T) {
+  return {
+    ...submission,
+    slots: JSON.parse(submission.slotsData),
+    submittedAt: new Date(submission.createdAt).getTime(),
+  };
+}
+
+// 加總多筆 slotsData 的資源數量
+export function summarizeSlots(slotsDataList: string[]): SlotTotals {
+  const totals: SlotTotals = { totalFireSparkle: 0, totalFireGem: 0, totalResearchAccel: 0, totalGeneralAccel: 0 };
+
+  for (const slotsData of slotsDataList) {
+    const slots = JSON.parse(slotsData);
+    for (const daySlot of Object.values(slots)) {
+      const slot = daySlot as any;
+      if (slot?.fireSparkleCount) totals.totalFireSparkle += slot.fireSparkleCount;
+      if (slot?.fireGemCount) totals.totalFireGem += slot.fireGemCount;
+      if (slot?.researchAccel) totals.totalResearchAccel += accelMinutes(slot.researchAccel);
+      if (slot?.generalAccel) totals.totalGeneralAccel += accelMinutes(slot.generalAccel);
+    }
+  }
+
+  return totals;
+}
+
+export const jsonTasks = {
+  // 報名列表序列化成 JSON；回傳 Buffer，從 worker 傳回時可以直接轉移而不需複製
+  submissionsJson: (submissions: Array<{ slotsData: string; createdAt: Date }>): Buffer =>
+    Buffer.from(JSON.stringify(submissions.map(formatSubmission))),
+  summarizeSlots,
+};
+
+export type JsonTaskName = keyof typeof jsonTasks;
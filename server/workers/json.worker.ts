@@ -0,0 +1,20 @@
+import { parentPort } from 'worker_threads';
+import { jsonTasks } from './json-tasks';
+
+// JsonWorkerService 的 worker thread：收到 { id, task, payload }，回傳 { id, result } 或 { id, error }
+
+parentPort!.on('message', ({ id, task, payload }: { id: number; task: string; payload: unknown }) => {
+  try {
+    const run = (jsonTasks as Record<string, (payload: any) => unknown>)[task];
+    if (!run) throw new Error(`Unknown task: ${task}`);
+
+    const result = run(payload);
+    // 獨立配置的 Buffer 直接轉移；來自共用記憶體池的小 Buffer 只能複製
+    const transfer = result instanceof Uint8Array && result.byteLength === result.buffer.byteLength
+      ? [result.buffer as ArrayBuffer]
+      : [];
+    parentPort!.postMessage({ id, result }, transfer);
+  } catch (error: any) {
+    parentPort!.postMessage({ id, error: error?.message || String(error) });
+  }
+});
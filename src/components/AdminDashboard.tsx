@@ -1,11 +1,15 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef, useMemo, useDeferredValue } from 'react';
 import { Users, FileText, LogOut, Search, Download, Trash2, Edit, Eye, Filter, ChevronDown, Calendar, Plus, Settings, ArrowLeft, UserPlus, X, Map } from 'lucide-react';
-import { AuthService, FormService, DebugService, OfficerConfigService, EventService, Event, ActivityType, MapService, AllianceMapItem, AllianceMapDetail } from '../services/auth';
+import { AuthService, FormService, DebugService, OfficerConfigService, EventService, Event, ActivityType, MapService, AllianceMapItem, AllianceMapDetail, AllianceMapContent } from '../services/auth';
 import { User, FormSubmission, ACTIVITY_TYPES, DEFAULT_DAY_CONFIG } from '../../types';
 import { useToast } from './ui/Toast';
 import { useI18n } from '../i18n/I18nProvider';
 import { fetchPlayer } from '../services/api';
 import { AllianceMapEditor } from './AllianceMapEditor';
+import { subscribeTopics } from '../services/realtime';
+import { queryCache } from '../services/query-cache';
+import { buildSubmissionIndex, filterSubmissions, countEventSubmissions } from '../services/submission-index';
+import { useVirtualRows, useStableCallback, VirtualSpacer } from './ui/VirtualRows';
 
 // 將 stoveLv 轉換成火晶等級 (1-10) 用於顯示圖片
 const getFireCrystalLevel = (stoveLv: number): number | null => {
@@ -115,6 +119,132 @@ const formatTimeRangeWithTaiwan = (startStr: string, endStr: string): string =>
   return `UTC ${startNormalized}~${endNormalized}（台灣時間 ${startTaiwanStr}～${endTaiwanStr}）`;
 };
 
+// 報名加速時間顯示，例如 1天2時
+const formatAccelText = (accel?: { days: number; hours: number; minutes: number }) => {
+  if (!accel) return '-';
+  const parts = [];
+  if (accel.days > 0) parts.push(`${accel.days}天`);
+  if (accel.hours > 0) parts.push(`${accel.hours}時`);
+  if (accel.minutes > 0) parts.push(`${accel.minutes}分`);
+  return parts.length > 0 ? parts.join('') : '-';
+};
+
+interface SubmissionRowProps {
+  submission: FormSubmission;
+  submissionType: 'research' | 'training' | 'building';
+  onView: (submission: FormSubmission) => void;
+  onEdit: (submission: FormSubmission) => void;
+  onDelete: (submissionId: string) => void;
+}
+
+// 報名管理表格的一列；以 memo 包裝，篩選或捲動時資料沒變的列不會重新渲染
+const SubmissionRow = React.memo(({ submission, submissionType, onView, onEdit, onDelete }: SubmissionRowProps) => {
+  const { t } = useI18n();
+  return (
+    <tr className="border-b border-slate-700 hover:bg-slate-900/50 transition">
+      <td className="px-6 py-3 text-white font-mono text-xs">{submission.gameId}</td>
+      <td className="px-6 py-3 text-white">{submission.playerName}</td>
+      <td className="px-6 py-3">
+        <span className="px-3 py-1 bg-blue-900/30 text-blue-300 rounded-full text-xs">
+          {submission.alliance}
+        </span>
+      </td>
+      {submissionType === 'research' && (() => {
+        const slot = submission.slots?.tuesday;
+        return (
+          <>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {formatAccelText(slot?.researchAccel)}
+            </td>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {formatAccelText(slot?.generalAccel)}
+            </td>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {slot?.upgradeT11 && slot.fireSparkleCount ? slot.fireSparkleCount : '-'}
+            </td>
+          </>
+        );
+      })()}
+      {submissionType === 'training' && (() => {
+        const slot = submission.slots?.thursday;
+        return (
+          <>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {formatAccelText(slot?.researchAccel)}
+            </td>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {formatAccelText(slot?.generalAccel)}
+            </td>
+          </>
+        );
+      })()}
+      {submissionType === 'building' && (() => {
+        const slot = submission.slots?.friday;
+        return (
+          <>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {slot?.fireGemCount ? slot.fireGemCount : '-'}
+            </td>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {slot?.refinedFireGemCount ? slot.refinedFireGemCount : '-'}
+            </td>
+            <td className="px-6 py-3 text-white font-semibold text-xs">
+              {formatAccelText(slot?.generalAccel)}
+            </td>
+          </>
+        );
+      })()}
+      <td className="px-6 py-3 text-slate-300 text-xs">
+        <div className="space-y-1">
+          {(() => {
+            // 根據類型取得對應的 slot
+            const slotKey = submissionType === 'research' ? 'tuesday' : submissionType === 'training' ? 'thursday' : 'friday';
+            const slot = submission.slots[slotKey];
+            if (!slot?.timeSlots?.length) return <span className="text-slate-500">-</span>;
+            
+            return slot.timeSlots.map((ts: any, idx: number) => {
+              if (!ts.start || !ts.end) return null;
+              const labels = ['🥇 ' + t('preferenceLevel').split('|')[0], '🥈 ' + t('preferenceLevel').split('|')[1], '🥉 ' + t('preferenceLevel').split('|')[2]];
+              const colors = ['text-green-300', 'text-blue-300', 'text-purple-300'];
+              return (
+                <div key={idx} className={colors[idx] || 'text-slate-300'}>
+                  {labels[idx] || `第${idx + 1}志願`}: {formatTimeRangeWithTaiwan(ts.start, ts.end)}
+                </div>
+              );
+            });
+          })()}
+        </div>
+      </td>
+      <td className="px-6 py-3 text-slate-400 text-center text-xs">
+        {new Date(submission.submittedAt).toLocaleDateString('zh-TW')}
+      </td>
+      <td className="px-6 py-3 text-center space-x-2">
+        <button
+          onClick={() => onView(submission)}
+          className="inline-flex items-center gap-1 px-3 py-1 bg-blue-900/30 hover:bg-blue-900/50 text-blue-300 rounded transition text-xs"
+        >
+          <Eye size={14} />
+          詳情
+        </button>
+        <button
+          onClick={() => onEdit(submission)}
+          className="inline-flex items-center gap-1 px-3 py-1 bg-amber-900/30 hover:bg-amber-900/50 text-amber-300 rounded transition text-xs"
+        >
+          <Edit size={14} />
+          {t('edit')}
+        </button>
+        <button
+          onClick={() => onDelete(submission.id)}
+          className="inline-flex items-center gap-1 px-3 py-1 bg-red-900/30 hover:bg-red-900/50 text-red-300 rounded transition text-xs"
+        >
+          <Trash2 size={14} />
+          刪除
+        </button>
+      </td>
+    </tr>
+  );
+});
+
 interface AdminDashboardProps {
   onLogout: () => void;
   currentUser?: User;
@@ -146,6 +276,8 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
   const [eventDates, setEventDates] = useState<string[]>([]);
   // 地圖數據
   const [mapData, setMapData] = useState<any>(null);
+  // 最後一次與伺服器同步的地圖內容與版本，用於計算格子差異
+  const savedMapRef = useRef<{ version: number; content: AllianceMapContent } | null>(null);
   const [mapList, setMapList] = useState<AllianceMapItem[]>([]);
   const [editingMapId, setEditingMapId] = useState<string | null>(null);
   const [showMapEditor, setShowMapEditor] = useState(false);
@@ -1019,6 +1151,38 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
     }
   }, []);
 
+  // 快取中的列表有變動（本頁的操作、其他頁面的操作或即時推送）時同步到畫面
+  useEffect(() => {
+    const sync = <T,>(key: string, apply: (value: T) => void) =>
+      queryCache.subscribe(key, () => {
+        const value = queryCache.peek<T>(key);
+        if (value) apply(value);
+      });
+    const unsubscribes = [
+      sync('users:all', setUsers),
+      sync('submissions:all', setSubmissions),
+      sync('events:all', setEvents),
+      sync('officers:dates', setEventDates),
+      sync('maps:all', setMapList),
+    ];
+    return () => unsubscribes.forEach(unsubscribe => unsubscribe());
+  }, []);
+
+  // 即時接收報名變動，只更新快取中變動的那筆資料
+  useEffect(() => {
+    return subscribeTopics(['submissions'], ({ type, data }) => {
+      if (type === 'created') {
+        queryCache.insert('submissions:all', data);
+      } else if (type === 'updated') {
+        queryCache.setEntity('submission', data);
+      } else if (type === 'deleted') {
+        queryCache.removeEntity('submission', data.id);
+      } else if (type === 'resync') {
+        queryCache.invalidate('submissions');
+      }
+    }, AuthService.getToken());
+  }, []);
+
   // 當場次日期變更時載入對應配置
   useEffect(() => {
     if (eventDate) {
@@ -1027,8 +1191,10 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
   }, [eventDate]);
 
   const loadData = async () => {
-    const allUsers = await DebugService.getAllUsers();
-    const allSubmissions = await DebugService.getAllSubmissions();
+    const [allUsers, allSubmissions] = await Promise.all([
+      DebugService.getAllUsers(),
+      DebugService.getAllSubmissions(),
+    ]);
     console.log('📋 AdminDashboard loadData - users:', allUsers.length, 'submissions:', allSubmissions.length);
     console.log('📋 AdminDashboard loadData - submissions details:', allSubmissions);
     setUsers(allUsers);
@@ -1071,12 +1237,14 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
   const handleEditMap = async (id: string) => {
     const map = await MapService.getMap(id);
     if (map) {
-      setEditingMapId(id);
-      setMapData({
+      const content = {
         alliances: map.alliances,
         gridData: map.gridData,
         gridOwners: map.gridOwners,
-      });
+      };
+      savedMapRef.current = { version: map.version, content };
+      setEditingMapId(id);
+      setMapData(content);
       setShowMapEditor(true);
     } else {
       addToast('載入地圖失敗', 'error');
@@ -1084,12 +1252,29 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
   };
 
   // 保存地圖（實時保存，不顯示 toast）
-  const handleSaveMap = async (data: any) => {
-    if (!editingMapId) return;
-    const result = await MapService.updateMap(editingMapId, data);
-    if (!result) {
+  // 只送出變動的格子；若其他管理員已修改過，則以最新版本重新套用本次差異
+  // 回傳伺服器合併後的地圖內容
+  const handleSaveMap = async (data: AllianceMapContent): Promise<AllianceMapContent | null> => {
+    if (!editingMapId || !savedMapRef.current) return null;
+    const patch = MapService.diffMapData(savedMapRef.current.content, data);
+    if (!patch) return savedMapRef.current.content;
+
+    let result = await MapService.patchMap(editingMapId, savedMapRef.current.version, patch);
+    if (result.conflict && result.map) {
+      result = await MapService.patchMap(editingMapId, result.map.version, patch);
+    }
+    if (!result.map || result.conflict) {
       addToast('保存失敗', 'error');
+      return null;
     }
+
+    const content = {
+      alliances: result.map.alliances,
+      gridData: result.map.gridData,
+      gridOwners: result.map.gridOwners,
+    };
+    savedMapRef.current = { version: result.map.version, content };
+    return content;
   };
 
   // 更新地圖狀態
@@ -1133,12 +1318,14 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
       addToast('地圖已複製', 'success');
       await loadMapList();
       // 切換到新地圖
-      setEditingMapId(result.id);
-      setMapData({
+      const content = {
         alliances: result.alliances,
         gridData: result.gridData,
         gridOwners: result.gridOwners,
-      });
+      };
+      savedMapRef.current = { version: result.version, content };
+      setEditingMapId(result.id);
+      setMapData(content);
     } else {
       addToast('複製失敗', 'error');
     }
@@ -1149,6 +1336,9 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
     if (!editingMapId) return;
     const result = await MapService.updateMap(editingMapId, { title: newTitle });
     if (result) {
+      if (savedMapRef.current) {
+        savedMapRef.current = { ...savedMapRef.current, version: result.version };
+      }
       await loadMapList();
     } else {
       addToast('標題更新失敗', 'error');
@@ -1276,54 +1466,93 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
   // 取得當前用戶可管理的聯盟列表（null 表示可管理所有聯盟）
   const userManagedAlliances = currentUser?.managedAlliances;
   
+  // 篩選索引在報名資料載入或變動時建立一次；搜尋字延後套用，輸入時不會被大量列表的重新篩選卡住
+  const submissionIndex = useMemo(() => buildSubmissionIndex(submissions), [submissions]);
+  const deferredSearchTerm = useDeferredValue(searchTerm);
+
   // Filter submissions based on search, alliance filter, selected event, and managed alliances
-  const filteredSubmissions = submissions.filter(submission => {
-    const matchSearch = 
-      submission.playerName.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      submission.gameId.includes(searchTerm) ||
-      submission.fid.includes(searchTerm);
-    
-    const matchAlliance = !filterAlliance || submission.alliance === filterAlliance;
-    
-    // 報名管理表格：僅在有明確選擇場次時才進行場次篩選；否則顯示所有場次的報名
-    // 對於 eventDate 為 null 的舊資料（遷移資料），檢查提交時間是否在該場次報名開始之後
-    let matchEvent = !selectedEventForManagement;
-    if (selectedEventForManagement) {
-      if (submission.eventDate) {
-        // 新資料：eventDate 必須匹配
-        matchEvent = submission.eventDate === selectedEventForManagement.eventDate;
-      } else {
-        // 舊資料（eventDate 為 null）：檢查提交時間
-        // 如果提交時間在該場次報名開始之後，認為屬於此場次
-        const registrationStartTime = new Date(selectedEventForManagement.registrationStart).getTime();
-        const submittedTime = submission.submittedAt;
-        matchEvent = submittedTime >= registrationStartTime;
-      }
-    }
-    
-    // 根據管理員權限過濾：如果 managedAlliances 為 null/undefined 表示可管理所有；否則只能看到指定聯盟
-    const matchManagedAlliances = !userManagedAlliances || userManagedAlliances.length === 0 || userManagedAlliances.includes(submission.alliance);
-    
-    const includeThis = matchSearch && matchAlliance && matchEvent && matchManagedAlliances;
-    return includeThis;
-  });
+  // 報名管理表格：僅在有明確選擇場次時才進行場次篩選；否則顯示所有場次的報名
+  const filteredSubmissions = useMemo(() => filterSubmissions(submissionIndex, {
+    search: deferredSearchTerm,
+    alliance: filterAlliance,
+    event: selectedEventForManagement,
+    managedAlliances: userManagedAlliances,
+  }), [submissionIndex, deferredSearchTerm, filterAlliance, selectedEventForManagement, userManagedAlliances]);
 
   // Filter users based on search and managed alliances
-  const filteredUsers = users.filter(user => {
-    const matchSearch = 
-      (user.nickname?.toLowerCase().includes(searchTerm.toLowerCase()) ?? false) ||
-      (user.gameId?.includes(searchTerm) ?? false) ||
-      (user.allianceName?.toLowerCase().includes(searchTerm.toLowerCase()) ?? false);
-    
-    // 根據管理員權限過濾：如果 managedAlliances 為 null/undefined 表示可管理所有；否則只能看到指定聯盟的用戶
-    const matchManagedAlliances = !userManagedAlliances || userManagedAlliances.length === 0 || 
-      (user.allianceName && userManagedAlliances.includes(user.allianceName));
-    
-    return matchSearch && matchManagedAlliances;
-  });
+  const filteredUsers = useMemo(() => {
+    const searchLower = deferredSearchTerm.toLowerCase();
+    return users.filter(user => {
+      const matchSearch = 
+        (user.nickname?.toLowerCase().includes(searchLower) ?? false) ||
+        (user.gameId?.includes(deferredSearchTerm) ?? false) ||
+        (user.allianceName?.toLowerCase().includes(searchLower) ?? false);
+      
+      // 根據管理員權限過濾：如果 managedAlliances 為 null/undefined 表示可管理所有；否則只能看到指定聯盟的用戶
+      const matchManagedAlliances = !userManagedAlliances || userManagedAlliances.length === 0 || 
+        (user.allianceName && userManagedAlliances.includes(user.allianceName));
+      
+      return matchSearch && matchManagedAlliances;
+    });
+  }, [users, deferredSearchTerm, userManagedAlliances]);
+
+  // 大量列表只渲染可見範圍內的列
+  const submissionRows = useVirtualRows({ count: filteredSubmissions.length, estimateRowHeight: 72 });
+  const userRows = useVirtualRows({ count: filteredUsers.length, estimateRowHeight: 64 });
+
+  // 官職管理左側的候選名單：篩選與排序只在報名資料、官職配置或篩選條件變動時重算
+  const officerCandidates = useMemo(() => submissions
+    .filter(sub => {
+      // 搜索過濾
+      if (officerSearch.trim()) {
+        const searchLower = officerSearch.toLowerCase().trim();
+        const nameMatch = sub.playerName?.toLowerCase().includes(searchLower);
+        const idMatch = sub.gameId?.toLowerCase().includes(searchLower) || sub.fid?.toLowerCase().includes(searchLower);
+        if (!nameMatch && !idMatch) return false;
+      }
+      
+      // 根據類型取得對應的 slot
+      const slotKey = officerType === 'research' ? 'tuesday' : officerType === 'training' ? 'thursday' : 'friday';
+      const slot = sub.slots[slotKey];
+      // 資源篩選
+      let hasResource = false;
+      if (officerType === 'research') {
+        hasResource = slot !== undefined && (slot.researchAccel?.days! > 0 || slot.generalAccel?.days! > 0 || slot.fireSparkleCount! > 0);
+      } else if (officerType === 'training') {
+        hasResource = slot !== undefined && (
+          slot.researchAccel?.days! > 0 || slot.researchAccel?.hours! > 0 || slot.researchAccel?.minutes! > 0 ||
+          slot.generalAccel?.days! > 0 || slot.generalAccel?.hours! > 0 || slot.generalAccel?.minutes! > 0
+        );
+      } else {
+        hasResource = slot !== undefined && (slot.fireGemCount! > 0 || slot.refinedFireGemCount! > 0 || slot.generalAccel?.days! > 0);
+      }
+      if (!hasResource) return false;
+      
+      // 分配狀態篩選
+      if (officerFilter === 'all') return true;
+      const { inSlot } = isPlayerInAnySlot(sub.id);
+      if (officerFilter === 'assigned') return inSlot;
+      if (officerFilter === 'unassigned') return !inSlot;
+      return true;
+    })
+    .sort((a, b) => {
+      const slotKey = officerType === 'research' ? 'tuesday' : officerType === 'training' ? 'thursday' : 'friday';
+      if (officerSort === 'accel') {
+        return getTotalAccelMinutes(b, slotKey) - getTotalAccelMinutes(a, slotKey);
+      } else if (officerSort === 'ember') {
+        if (officerType === 'building') {
+          return (b.slots[slotKey]?.fireGemCount || 0) - (a.slots[slotKey]?.fireGemCount || 0);
+        }
+        return getFireSparkleCount(b, slotKey) - getFireSparkleCount(a, slotKey);
+      } else if (officerSort === 'refined') {
+        return (b.slots[slotKey]?.refinedFireGemCount || 0) - (a.slots[slotKey]?.refinedFireGemCount || 0);
+      }
+      return 0;
+    }), [submissions, officers, officerSearch, officerType, officerFilter, officerSort]);
+  const officerCandidateRows = useVirtualRows({ count: officerCandidates.length, estimateRowHeight: 150 });
 
   // Get unique alliances for filter
-  const alliances = Array.from(new Set(submissions.map(s => s.alliance).filter(Boolean)));
+  const alliances = submissionIndex.alliances;
 
   const handleDeleteSubmission = async (submissionId: string) => {
     if (confirm(t('confirmDeleteSubmission_long'))) {
@@ -1352,6 +1581,14 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
     setShowEditSubmissionModal(true);
   };
 
+  // 傳給 SubmissionRow 的事件處理函數（參考固定，列元件的 memo 才有效）
+  const handleViewSubmission = useStableCallback((submission: FormSubmission) => {
+    setSelectedSubmission(submission);
+    setShowDetailModal(true);
+  });
+  const handleEditSubmissionClick = useStableCallback(openEditSubmissionModal);
+  const handleDeleteSubmissionClick = useStableCallback(handleDeleteSubmission);
+
   // 處理編輯報名資料
   const handleEditSubmission = async () => {
     if (!submissionToEdit) return;
@@ -1615,6 +1852,31 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
     }
   };
 
+  // 已選擇場次時由伺服器串流產生匯出檔，不需要在瀏覽器組出整份資料
+  const exportSubmissions = async (format: 'csv' | 'xlsx') => {
+    if (!selectedEventForManagement) {
+      if (format === 'csv') {
+        exportToCSV();
+      } else {
+        addToast('請先選擇場次', 'error');
+      }
+      return;
+    }
+
+    const eventDate = selectedEventForManagement.eventDate;
+    try {
+      const blob = await FormService.exportSubmissions(eventDate, format, filterAlliance || undefined);
+      const link = document.createElement('a');
+      link.href = URL.createObjectURL(blob);
+      link.download = `svs_submissions_${eventDate}${filterAlliance ? `_${filterAlliance}` : ''}.${format}`;
+      link.click();
+      setTimeout(() => URL.revokeObjectURL(link.href), 0);
+      addToast(t('exportSubmission'), 'success');
+    } catch (error: any) {
+      addToast(error.message || 'Export failed', 'error');
+    }
+  };
+
   const exportToCSV = () => {
     // Build CSV data from submissions
     const headers = [t('gameId'), t('player'), t('gameId'), t('nickname'), t('alliance'), t('tuesday'), t('thursday'), t('friday'), t('registrationTime')];
@@ -2368,197 +2630,153 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                   </div>
                 </div>
                 
-                <div className="space-y-2 max-h-[550px] overflow-y-auto">
-                  {submissions
-                    .filter(sub => {
-                      // 搜索過濾
-                      if (officerSearch.trim()) {
-                        const searchLower = officerSearch.toLowerCase().trim();
-                        const nameMatch = sub.playerName?.toLowerCase().includes(searchLower);
-                        const idMatch = sub.gameId?.toLowerCase().includes(searchLower) || sub.fid?.toLowerCase().includes(searchLower);
-                        if (!nameMatch && !idMatch) return false;
-                      }
+                <div ref={officerCandidateRows.scrollRef} className="max-h-[550px] overflow-y-auto">
+                  <div ref={officerCandidateRows.measureRef} className="space-y-2">
+                    <VirtualSpacer height={officerCandidateRows.paddingTop} />
+                    {officerCandidates.slice(officerCandidateRows.start, officerCandidateRows.end).map(sub => {
+                        const fireLevel = getFireCrystalLevel(sub.user?.stoveLv || 0);
+                        const { inSlot, slotIndex: assignedSlotIndex } = isPlayerInAnySlot(sub.id, sub.gameId);
+                        // 根據類型取得對應的 slot
+                        const slotKey = officerType === 'research' ? 'tuesday' : officerType === 'training' ? 'thursday' : 'friday';
+                        const slot = sub.slots[slotKey];
+                        const researchAccel = slot?.researchAccel;
+                        const generalAccel = slot?.generalAccel;
+                        const fireSparkle = slot?.fireSparkleCount || 0;
+                        const fireGem = slot?.fireGemCount || 0;
+                        const refinedFireGem = slot?.refinedFireGemCount || 0;
                       
-                      // 根據類型取得對應的 slot
-                      const slotKey = officerType === 'research' ? 'tuesday' : officerType === 'training' ? 'thursday' : 'friday';
-                      const slot = sub.slots[slotKey];
-                      // 資源篩選
-                      let hasResource = false;
-                      if (officerType === 'research') {
-                        hasResource = slot !== undefined && (slot.researchAccel?.days! > 0 || slot.generalAccel?.days! > 0 || slot.fireSparkleCount! > 0);
-                      } else if (officerType === 'training') {
-                        hasResource = slot !== undefined && (
-                          slot.researchAccel?.days! > 0 || slot.researchAccel?.hours! > 0 || slot.researchAccel?.minutes! > 0 ||
-                          slot.generalAccel?.days! > 0 || slot.generalAccel?.hours! > 0 || slot.generalAccel?.minutes! > 0
-                        );
-                      } else {
-                        hasResource = slot !== undefined && (slot.fireGemCount! > 0 || slot.refinedFireGemCount! > 0 || slot.generalAccel?.days! > 0);
-                      }
-                      if (!hasResource) return false;
+                        // 格式化加速時間
+                        const formatAccel = (accel?: { days: number; hours: number; minutes: number }) => {
+                          if (!accel) return '0';
+                          const parts = [];
+                          if (accel.days > 0) parts.push(`${accel.days}天`);
+                          if (accel.hours > 0) parts.push(`${accel.hours}時`);
+                          if (accel.minutes > 0) parts.push(`${accel.minutes}分`);
+                          return parts.length > 0 ? parts.join('') : '0';
+                        };
                       
-                      // 分配狀態篩選
-                      if (officerFilter === 'all') return true;
-                      const { inSlot } = isPlayerInAnySlot(sub.id);
-                      if (officerFilter === 'assigned') return inSlot;
-                      if (officerFilter === 'unassigned') return !inSlot;
-                      return true;
-                    })
-                    .sort((a, b) => {
-                      const slotKey = officerType === 'research' ? 'tuesday' : officerType === 'training' ? 'thursday' : 'friday';
-                      if (officerSort === 'accel') {
-                        return getTotalAccelMinutes(b, slotKey) - getTotalAccelMinutes(a, slotKey);
-                      } else if (officerSort === 'ember') {
-                        if (officerType === 'building') {
-                          return (b.slots[slotKey]?.fireGemCount || 0) - (a.slots[slotKey]?.fireGemCount || 0);
-                        }
-                        return getFireSparkleCount(b, slotKey) - getFireSparkleCount(a, slotKey);
-                      } else if (officerSort === 'refined') {
-                        return (b.slots[slotKey]?.refinedFireGemCount || 0) - (a.slots[slotKey]?.refinedFireGemCount || 0);
-                      }
-                      return 0;
-                    })
-                    .map(sub => {
-                      const fireLevel = getFireCrystalLevel(sub.user?.stoveLv || 0);
-                      const { inSlot, slotIndex: assignedSlotIndex } = isPlayerInAnySlot(sub.id, sub.gameId);
-                      // 根據類型取得對應的 slot
-                      const slotKey = officerType === 'research' ? 'tuesday' : officerType === 'training' ? 'thursday' : 'friday';
-                      const slot = sub.slots[slotKey];
-                      const researchAccel = slot?.researchAccel;
-                      const generalAccel = slot?.generalAccel;
-                      const fireSparkle = slot?.fireSparkleCount || 0;
-                      const fireGem = slot?.fireGemCount || 0;
-                      const refinedFireGem = slot?.refinedFireGemCount || 0;
+                        // 檢查是否應該高亮（未分配 + 有選中時段 + 該時段是玩家的志願）
+                        const timeSlots = generateTimeSlots();
+                        const highlightSlot = highlightedSlotIndex !== null ? timeSlots[highlightedSlotIndex] : null;
+                        const isHighlighted = !inSlot && highlightSlot && getSlotPreferenceLevel(highlightSlot.hour, highlightSlot.minute, sub, slotKey) !== null;
                       
-                      // 格式化加速時間
-                      const formatAccel = (accel?: { days: number; hours: number; minutes: number }) => {
-                        if (!accel) return '0';
-                        const parts = [];
-                        if (accel.days > 0) parts.push(`${accel.days}天`);
-                        if (accel.hours > 0) parts.push(`${accel.hours}時`);
-                        if (accel.minutes > 0) parts.push(`${accel.minutes}分`);
-                        return parts.length > 0 ? parts.join('') : '0';
-                      };
-                      
-                      // 檢查是否應該高亮（未分配 + 有選中時段 + 該時段是玩家的志願）
-                      const timeSlots = generateTimeSlots();
-                      const highlightSlot = highlightedSlotIndex !== null ? timeSlots[highlightedSlotIndex] : null;
-                      const isHighlighted = !inSlot && highlightSlot && getSlotPreferenceLevel(highlightSlot.hour, highlightSlot.minute, sub, slotKey) !== null;
-                      
-                      return (
-                      <div
-                        key={sub.id}
-                        draggable={!inSlot}
-                        onDragStart={() => !inSlot && handleDragStart(sub)}
-                        className={`p-3 rounded-lg text-sm transition flex items-center gap-3 relative
-                          ${inSlot 
-                            ? 'bg-slate-800/50 opacity-50 cursor-not-allowed border border-slate-600' 
-                            : isHighlighted
-                              ? 'bg-green-700 ring-2 ring-green-400 cursor-move animate-pulse'
-                              : selectedPlayer?.id === sub.id 
-                                ? 'bg-teal-700 ring-2 ring-teal-400 cursor-move' 
-                                : 'bg-slate-700 hover:bg-slate-600 cursor-move'
-                          }
-                          ${inSlot ? 'text-slate-400' : 'text-white'}
-                        `}
-                      >
-                        {/* 高亮標記 */}
-                        {isHighlighted && (
-                          <div className="absolute top-2 right-2 bg-green-500 text-white text-xs px-2 py-0.5 rounded flex items-center gap-1">
-                            ⭐ 符合時段
-                          </div>
-                        )}
-                        {/* 已分配遮罩 */}
-                        {inSlot && (
-                          <div className="absolute top-2 right-2 bg-amber-600/80 text-white text-xs px-2 py-0.5 rounded">
-                            已分配
-                          </div>
-                        )}
-                        {/* 頭像 */}
-                        <div className={`w-12 h-12 rounded-full overflow-hidden border-2 flex-shrink-0 ${inSlot ? 'border-slate-600 bg-slate-700 grayscale' : isHighlighted ? 'border-green-400 bg-green-800' : 'border-slate-500 bg-slate-600'}`}>
-                          {sub.user?.avatarImage ? (
-                            <img src={sub.user.avatarImage} alt={sub.playerName} className={`w-full h-full object-cover ${inSlot ? 'grayscale' : ''}`} />
-                          ) : (
-                            <div className="w-full h-full flex items-center justify-center text-xl">👤</div>
+                        return (
+                        <div
+                          key={sub.id}
+                          draggable={!inSlot}
+                          onDragStart={() => !inSlot && handleDragStart(sub)}
+                          className={`p-3 rounded-lg text-sm transition flex items-center gap-3 relative
+                            ${inSlot 
+                              ? 'bg-slate-800/50 opacity-50 cursor-not-allowed border border-slate-600' 
+                              : isHighlighted
+                                ? 'bg-green-700 ring-2 ring-green-400 cursor-move animate-pulse'
+                                : selectedPlayer?.id === sub.id 
+                                  ? 'bg-teal-700 ring-2 ring-teal-400 cursor-move' 
+                                  : 'bg-slate-700 hover:bg-slate-600 cursor-move'
+                            }
+                            ${inSlot ? 'text-slate-400' : 'text-white'}
+                          `}
+                        >
+                          {/* 高亮標記 */}
+                          {isHighlighted && (
+                            <div className="absolute top-2 right-2 bg-green-500 text-white text-xs px-2 py-0.5 rounded flex items-center gap-1">
+                              ⭐ 符合時段
+                            </div>
                           )}
-                        </div>
-                        {/* 名字、ID、熔爐等級和資源 */}
-                        <div className="flex-1 min-w-0">
-                          <div className={`font-semibold truncate ${inSlot ? 'text-slate-400' : ''}`}>{sub.playerName}</div>
-                          <div className="text-slate-400 text-xs">ID: {sub.gameId || sub.fid}</div>
-                          <div className="text-slate-300 text-xs flex items-center gap-1">
-                            FURNACE: 
-                            {fireLevel ? (
-                              <>
-                                <img 
-                                  src={`/assets/furnace/stove_lv_${fireLevel}.png`} 
-                                  alt={`FC ${fireLevel}`}
-                                  className={`w-6 h-6 ${inSlot ? 'grayscale' : ''}`}
-                                />
-                                <span className="text-slate-400">({sub.user?.stoveLv})</span>
-                              </>
+                          {/* 已分配遮罩 */}
+                          {inSlot && (
+                            <div className="absolute top-2 right-2 bg-amber-600/80 text-white text-xs px-2 py-0.5 rounded">
+                              已分配
+                            </div>
+                          )}
+                          {/* 頭像 */}
+                          <div className={`w-12 h-12 rounded-full overflow-hidden border-2 flex-shrink-0 ${inSlot ? 'border-slate-600 bg-slate-700 grayscale' : isHighlighted ? 'border-green-400 bg-green-800' : 'border-slate-500 bg-slate-600'}`}>
+                            {sub.user?.avatarImage ? (
+                              <img src={sub.user.avatarImage} alt={sub.playerName} className={`w-full h-full object-cover ${inSlot ? 'grayscale' : ''}`} />
                             ) : (
-                              <span className={`font-semibold ${inSlot ? 'text-slate-400' : 'text-white'}`}>LV {sub.user?.stoveLv || '?'}</span>
+                              <div className="w-full h-full flex items-center justify-center text-xl">👤</div>
                             )}
                           </div>
-                          {/* 資源數量 */}
-                          <div className="text-xs mt-1 space-y-0.5">
-                            {officerType === 'research' && (
-                              <>
-                                <div className="text-blue-400">📚 研究: {formatAccel(researchAccel)}</div>
-                                <div className="text-yellow-400">⚡ 通用: {formatAccel(generalAccel)}</div>
-                                {fireSparkle > 0 && (
-                                  <div className="text-pink-400">✨ 火晶微粒: {fireSparkle}</div>
-                                )}
-                              </>
-                            )}
-                            {officerType === 'training' && (
-                              <>
-                                <div className="text-green-400">🎖️ 訓練: {formatAccel(researchAccel)}</div>
-                                <div className="text-yellow-400">⚡ 通用: {formatAccel(generalAccel)}</div>
-                              </>
-                            )}
-                            {officerType === 'building' && (
-                              <>
-                                <div className="text-red-400">💎 火晶: {fireGem}</div>
-                                <div className="text-purple-400">💠 精煉: {refinedFireGem}</div>
-                                <div className="text-yellow-400">⚡ 通用: {formatAccel(generalAccel)}</div>
-                              </>
+                          {/* 名字、ID、熔爐等級和資源 */}
+                          <div className="flex-1 min-w-0">
+                            <div className={`font-semibold truncate ${inSlot ? 'text-slate-400' : ''}`}>{sub.playerName}</div>
+                            <div className="text-slate-400 text-xs">ID: {sub.gameId || sub.fid}</div>
+                            <div className="text-slate-300 text-xs flex items-center gap-1">
+                              FURNACE: 
+                              {fireLevel ? (
+                                <>
+                                  <img 
+                                    src={`/assets/furnace/stove_lv_${fireLevel}.png`} 
+                                    alt={`FC ${fireLevel}`}
+                                    className={`w-6 h-6 ${inSlot ? 'grayscale' : ''}`}
+                                  />
+                                  <span className="text-slate-400">({sub.user?.stoveLv})</span>
+                                </>
+                              ) : (
+                                <span className={`font-semibold ${inSlot ? 'text-slate-400' : 'text-white'}`}>LV {sub.user?.stoveLv || '?'}</span>
+                              )}
+                            </div>
+                            {/* 資源數量 */}
+                            <div className="text-xs mt-1 space-y-0.5">
+                              {officerType === 'research' && (
+                                <>
+                                  <div className="text-blue-400">📚 研究: {formatAccel(researchAccel)}</div>
+                                  <div className="text-yellow-400">⚡ 通用: {formatAccel(generalAccel)}</div>
+                                  {fireSparkle > 0 && (
+                                    <div className="text-pink-400">✨ 火晶微粒: {fireSparkle}</div>
+                                  )}
+                                </>
+                              )}
+                              {officerType === 'training' && (
+                                <>
+                                  <div className="text-green-400">🎖️ 訓練: {formatAccel(researchAccel)}</div>
+                                  <div className="text-yellow-400">⚡ 通用: {formatAccel(generalAccel)}</div>
+                                </>
+                              )}
+                              {officerType === 'building' && (
+                                <>
+                                  <div className="text-red-400">💎 火晶: {fireGem}</div>
+                                  <div className="text-purple-400">💠 精煉: {refinedFireGem}</div>
+                                  <div className="text-yellow-400">⚡ 通用: {formatAccel(generalAccel)}</div>
+                                </>
+                              )}
+                            </div>
+                            {/* 希望時段 */}
+                            {getPlayerPreferredSlots(sub, slotKey).length > 0 && (
+                              <div className={`text-xs mt-1 ${inSlot ? 'text-slate-500' : 'text-green-400'}`}>
+                                🕐 希望: {getPlayerPreferredSlots(sub, slotKey).join(', ')}
+                              </div>
                             )}
                           </div>
-                          {/* 希望時段 */}
-                          {getPlayerPreferredSlots(sub, slotKey).length > 0 && (
-                            <div className={`text-xs mt-1 ${inSlot ? 'text-slate-500' : 'text-green-400'}`}>
-                              🕐 希望: {getPlayerPreferredSlots(sub, slotKey).join(', ')}
-                            </div>
+                          {/* 新增按鈕 - 已分配時點擊可跳轉到該時段 */}
+                          {!inSlot ? (
+                            <button 
+                              onClick={(e) => {
+                                e.stopPropagation();
+                                handleSelectPlayer(sub);
+                              }}
+                              className={`w-8 h-8 rounded-full flex items-center justify-center text-white text-lg flex-shrink-0 ${selectedPlayer?.id === sub.id ? 'bg-orange-500 hover:bg-orange-600' : 'bg-teal-600 hover:bg-teal-700'}`}
+                            >
+                              {selectedPlayer?.id === sub.id ? '✓' : '+'}
+                            </button>
+                          ) : (
+                            <button 
+                              onClick={(e) => {
+                                e.stopPropagation();
+                                if (assignedSlotIndex !== undefined) {
+                                  scrollToSlot(assignedSlotIndex);
+                                }
+                              }}
+                              className="w-8 h-8 rounded-full flex items-center justify-center bg-amber-600 hover:bg-amber-500 text-white text-lg flex-shrink-0 cursor-pointer transition"
+                              title={t('scrollToAssignedSlot')}
+                            >
+                              📍
+                            </button>
                           )}
                         </div>
-                        {/* 新增按鈕 - 已分配時點擊可跳轉到該時段 */}
-                        {!inSlot ? (
-                          <button 
-                            onClick={(e) => {
-                              e.stopPropagation();
-                              handleSelectPlayer(sub);
-                            }}
-                            className={`w-8 h-8 rounded-full flex items-center justify-center text-white text-lg flex-shrink-0 ${selectedPlayer?.id === sub.id ? 'bg-orange-500 hover:bg-orange-600' : 'bg-teal-600 hover:bg-teal-700'}`}
-                          >
-                            {selectedPlayer?.id === sub.id ? '✓' : '+'}
-                          </button>
-                        ) : (
-                          <button 
-                            onClick={(e) => {
-                              e.stopPropagation();
-                              if (assignedSlotIndex !== undefined) {
-                                scrollToSlot(assignedSlotIndex);
-                              }
-                            }}
-                            className="w-8 h-8 rounded-full flex items-center justify-center bg-amber-600 hover:bg-amber-500 text-white text-lg flex-shrink-0 cursor-pointer transition"
-                            title={t('scrollToAssignedSlot')}
-                          >
-                            📍
-                          </button>
-                        )}
-                      </div>
-                    );})}
+                      );})}
+                    <VirtualSpacer height={officerCandidateRows.paddingBottom} />
+                  </div>
                 </div>
               </div>
 
@@ -2746,9 +2964,9 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                 className="flex-1 px-4 py-2 bg-slate-800 border border-slate-700 rounded-lg text-white placeholder-slate-500 focus:outline-none focus:border-blue-500"
               />
             </div>
-            <div className="bg-slate-800 rounded-lg border border-slate-700 overflow-hidden">
+            <div ref={userRows.scrollRef} className="bg-slate-800 rounded-lg border border-slate-700 overflow-auto max-h-[70vh]">
               <table className="w-full text-sm">
-                <thead>
+                <thead className="sticky top-0 z-10 bg-slate-800">
                   <tr className="border-b border-slate-700 bg-slate-900/50">
                     <th className="px-6 py-3 text-center text-slate-300 font-semibold">會員ID (FID)</th>
                     <th className="px-6 py-3 text-center text-slate-300 font-semibold">名字</th>
@@ -2757,8 +2975,9 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                     <th className="px-6 py-3 text-center text-slate-300 font-semibold">操作</th>
                   </tr>
                 </thead>
-                <tbody>
-                  {filteredUsers.map(user => (
+                <tbody ref={userRows.measureRef}>
+                  <VirtualSpacer height={userRows.paddingTop} colSpan={5} />
+                  {filteredUsers.slice(userRows.start, userRows.end).map(user => (
                     <tr key={user.id} className="border-b border-slate-700">
                       <td className="px-6 py-3 text-white font-mono text-xs text-center">{user.gameId || '-'}</td>
                       <td className="px-6 py-3 text-white text-center">{user.nickname || '-'}</td>
@@ -2856,6 +3075,7 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                       </td>
                     </tr>
                   ))}
+                  <VirtualSpacer height={userRows.paddingBottom} colSpan={5} />
                 </tbody>
               </table>
             </div>
@@ -2895,15 +3115,7 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                       ) : (
                         events.map(event => {
                           // 計算該場次的報名人數（包括舊資料 eventDate 為 null）
-                          const eventSubmissions = submissions.filter(s => {
-                            if (s.eventDate === event.eventDate) return true;
-                            // 對於 eventDate 為 null 的舊資料，檢查提交時間是否在該場次報名開始之後
-                            if (s.eventDate === null) {
-                              const registrationStartTime = new Date(event.registrationStart).getTime();
-                              return s.submittedAt >= registrationStartTime;
-                            }
-                            return false;
-                          });
+                          const eventSubmissionCount = countEventSubmissions(submissionIndex, event);
                           const startTimes = formatTimeWithTimezones(event.registrationStart, true);
                           const endTimes = formatTimeWithTimezones(event.registrationEnd, true);
                           return (
@@ -2928,7 +3140,7 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                                 </span>
                               </td>
                               <td className="px-4 py-3 text-center">
-                                <span className="text-blue-400 font-semibold">{eventSubmissions.length}</span>
+                                <span className="text-blue-400 font-semibold">{eventSubmissionCount}</span>
                               </td>
                               <td className="px-4 py-3 text-center">
                                 <button
@@ -3029,17 +3241,26 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                 ))}
               </select>
               <button
-                onClick={exportToCSV}
+                onClick={() => exportSubmissions('csv')}
                 className="flex items-center gap-2 px-4 py-2 bg-green-600 hover:bg-green-700 text-white rounded-lg transition"
               >
                 <Download size={18} />
                 匯出CSV
               </button>
+              {selectedEventForManagement && (
+                <button
+                  onClick={() => exportSubmissions('xlsx')}
+                  className="flex items-center gap-2 px-4 py-2 bg-green-600 hover:bg-green-700 text-white rounded-lg transition"
+                >
+                  <Download size={18} />
+                  匯出XLSX
+                </button>
+              )}
             </div>
 
-            <div className="bg-slate-800 rounded-lg border border-slate-700 overflow-hidden">
+            <div ref={submissionRows.scrollRef} className="bg-slate-800 rounded-lg border border-slate-700 overflow-auto max-h-[70vh]">
               <table className="w-full text-sm">
-                <thead>
+                <thead className="sticky top-0 z-10 bg-slate-800">
                   <tr className="border-b border-slate-700 bg-slate-900/50">
                     <th className="px-6 py-3 text-left text-slate-300 font-semibold">遊戲ID</th>
                     <th className="px-6 py-3 text-left text-slate-300 font-semibold">遊戲名稱</th>
@@ -3069,7 +3290,7 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                     <th className="px-6 py-3 text-center text-slate-300 font-semibold">操作</th>
                   </tr>
                 </thead>
-                <tbody>
+                <tbody ref={submissionRows.measureRef}>
                   {filteredSubmissions.length === 0 ? (
                     <tr>
                       <td colSpan={9} className="px-6 py-8 text-center text-slate-400">
@@ -3077,138 +3298,20 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                       </td>
                     </tr>
                   ) : (
-                    filteredSubmissions.map(submission => {
-                      return (
-                        <tr key={submission.id} className="border-b border-slate-700 hover:bg-slate-900/50 transition">
-                          <td className="px-6 py-3 text-white font-mono text-xs">{submission.gameId}</td>
-                          <td className="px-6 py-3 text-white">{submission.playerName}</td>
-                          <td className="px-6 py-3">
-                            <span className="px-3 py-1 bg-blue-900/30 text-blue-300 rounded-full text-xs">
-                              {submission.alliance}
-                            </span>
-                          </td>
-                          {submissionType === 'research' && (() => {
-                            const slot = submission.slots?.tuesday;
-                            const formatAccel = (accel?: { days: number; hours: number; minutes: number }) => {
-                              if (!accel) return '-';
-                              const parts = [];
-                              if (accel.days > 0) parts.push(`${accel.days}天`);
-                              if (accel.hours > 0) parts.push(`${accel.hours}時`);
-                              if (accel.minutes > 0) parts.push(`${accel.minutes}分`);
-                              return parts.length > 0 ? parts.join('') : '-';
-                            };
-                            return (
-                              <>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {formatAccel(slot?.researchAccel)}
-                                </td>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {formatAccel(slot?.generalAccel)}
-                                </td>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {slot?.upgradeT11 && slot.fireSparkleCount ? slot.fireSparkleCount : '-'}
-                                </td>
-                              </>
-                            );
-                          })()}
-                          {submissionType === 'training' && (() => {
-                            const slot = submission.slots?.thursday;
-                            const formatAccel = (accel?: { days: number; hours: number; minutes: number }) => {
-                              if (!accel) return '-';
-                              const parts = [];
-                              if (accel.days > 0) parts.push(`${accel.days}天`);
-                              if (accel.hours > 0) parts.push(`${accel.hours}時`);
-                              if (accel.minutes > 0) parts.push(`${accel.minutes}分`);
-                              return parts.length > 0 ? parts.join('') : '-';
-                            };
-                            return (
-                              <>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {formatAccel(slot?.researchAccel)}
-                                </td>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {formatAccel(slot?.generalAccel)}
-                                </td>
-                              </>
-                            );
-                          })()}
-                          {submissionType === 'building' && (() => {
-                            const slot = submission.slots?.friday;
-                            const formatAccel = (accel?: { days: number; hours: number; minutes: number }) => {
-                              if (!accel) return '-';
-                              const parts = [];
-                              if (accel.days > 0) parts.push(`${accel.days}天`);
-                              if (accel.hours > 0) parts.push(`${accel.hours}時`);
-                              if (accel.minutes > 0) parts.push(`${accel.minutes}分`);
-                              return parts.length > 0 ? parts.join('') : '-';
-                            };
-                            return (
-                              <>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {slot?.fireGemCount ? slot.fireGemCount : '-'}
-                                </td>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {slot?.refinedFireGemCount ? slot.refinedFireGemCount : '-'}
-                                </td>
-                                <td className="px-6 py-3 text-white font-semibold text-xs">
-                                  {formatAccel(slot?.generalAccel)}
-                                </td>
-                              </>
-                            );
-                          })()}
-                          <td className="px-6 py-3 text-slate-300 text-xs">
-                            <div className="space-y-1">
-                              {(() => {
-                                // 根據類型取得對應的 slot
-                                const slotKey = submissionType === 'research' ? 'tuesday' : submissionType === 'training' ? 'thursday' : 'friday';
-                                const slot = submission.slots[slotKey];
-                                if (!slot?.timeSlots?.length) return <span className="text-slate-500">-</span>;
-                                
-                                return slot.timeSlots.map((ts: any, idx: number) => {
-                                  if (!ts.start || !ts.end) return null;
-                                  const labels = ['🥇 ' + t('preferenceLevel').split('|')[0], '🥈 ' + t('preferenceLevel').split('|')[1], '🥉 ' + t('preferenceLevel').split('|')[2]];
-                                  const colors = ['text-green-300', 'text-blue-300', 'text-purple-300'];
-                                  return (
-                                    <div key={idx} className={colors[idx] || 'text-slate-300'}>
-                                      {labels[idx] || `第${idx + 1}志願`}: {formatTimeRangeWithTaiwan(ts.start, ts.end)}
-                                    </div>
-                                  );
-                                });
-                              })()}
-                            </div>
-                          </td>
-                          <td className="px-6 py-3 text-slate-400 text-center text-xs">
-                            {new Date(submission.submittedAt).toLocaleDateString('zh-TW')}
-                          </td>
-                          <td className="px-6 py-3 text-center space-x-2">
-                            <button
-                              onClick={() => {
-                                setSelectedSubmission(submission);
-                                setShowDetailModal(true);
-                              }}
-                              className="inline-flex items-center gap-1 px-3 py-1 bg-blue-900/30 hover:bg-blue-900/50 text-blue-300 rounded transition text-xs"
-                            >
-                              <Eye size={14} />
-                              詳情
-                            </button>
-                            <button
-                              onClick={() => openEditSubmissionModal(submission)}
-                              className="inline-flex items-center gap-1 px-3 py-1 bg-amber-900/30 hover:bg-amber-900/50 text-amber-300 rounded transition text-xs"
-                            >
-                              <Edit size={14} />
-                              {t('edit')}
-                            </button>
-                            <button
-                              onClick={() => handleDeleteSubmission(submission.id)}
-                              className="inline-flex items-center gap-1 px-3 py-1 bg-red-900/30 hover:bg-red-900/50 text-red-300 rounded transition text-xs"
-                            >
-                              <Trash2 size={14} />
-                              刪除
-                            </button>
-                          </td>
-                        </tr>
-                      );
-                    })
+                    <>
+                      <VirtualSpacer height={submissionRows.paddingTop} colSpan={9} />
+                      {filteredSubmissions.slice(submissionRows.start, submissionRows.end).map(submission => (
+                        <SubmissionRow
+                          key={submission.id}
+                          submission={submission}
+                          submissionType={submissionType}
+                          onView={handleViewSubmission}
+                          onEdit={handleEditSubmissionClick}
+                          onDelete={handleDeleteSubmissionClick}
+                        />
+                      ))}
+                      <VirtualSpacer height={submissionRows.paddingBottom} colSpan={9} />
+                    </>
                   )}
                 </tbody>
               </table>
@@ -3473,8 +3576,8 @@ export const AdminDashboard: React.FC<AdminDashboardProps> = ({ onLogout, curren
                   allianceName: u.allianceName || undefined,
                 }))}
                 onSave={async (data) => {
-                  await handleSaveMap(data);
-                  setMapData(data);
+                  const merged = await handleSaveMap(data);
+                  setMapData(merged || data);
                 }}
               />
             </>
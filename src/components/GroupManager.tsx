@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { PlayerGroup, GroupPlayer } from '../../types';
 import { StorageService } from '../services/storage';
+import { GroupSyncService } from '../services/group-sync';
 import { Plus, Download, GripVertical, Trash2 } from 'lucide-react';
 import { useToast } from './ui/Toast';
 import { Modal } from './ui/Modal';
@@ -13,6 +14,7 @@ export const GroupManager: React.FC = () => {
   // Data State
   const [groups, setGroups] = useState<PlayerGroup[]>([]);
   const [activeGroupId, setActiveGroupId] = useState<string>('');
+  const [loaded, setLoaded] = useState(false);
 
   // Modal State
   const [modalOpen, setModalOpen] = useState(false);
@@ -30,25 +32,52 @@ export const GroupManager: React.FC = () => {
 
   // --- Initialization ---
   useEffect(() => {
-    const saved = StorageService.loadGroups();
-    if (saved.length > 0) {
-      setGroups(saved);
-      setActiveGroupId(saved[0].id);
-    } else {
-        const defaultGroup: PlayerGroup = {
-            id: 'default',
-            name: 'Main List',
-            columns: [{ id: 'col_note', name: 'Note', type: 'text' }],
-            players: []
-        };
-        setGroups([defaultGroup]);
-        setActiveGroupId('default');
-    }
+    let cancelled = false;
+    // Pull the server's groups first so a placeholder never shadows a synced group with the same id
+    GroupSyncService.start().then(() => StorageService.loadGroups()).then(saved => {
+      if (cancelled) return;
+      if (saved.length > 0) {
+        setGroups(saved);
+        setActiveGroupId(saved[0].id);
+      } else {
+          // Device-unique id, so a placeholder created offline can never collide with another device's group
+          const defaultGroup: PlayerGroup = {
+              id: Date.now().toString(),
+              name: 'Main List',
+              columns: [{ id: 'col_note', name: 'Note', type: 'text' }],
+              players: []
+          };
+          // Untouched placeholder: not written or synced until the user edits it
+          StorageService.markSaved([defaultGroup]);
+          setGroups([defaultGroup]);
+          setActiveGroupId(defaultGroup.id);
+      }
+      setLoaded(true);
+    });
+
+    // Reload when newer versions of groups arrive from the server
+    const unsubscribe = GroupSyncService.subscribe(() => {
+      StorageService.loadGroups().then(saved => {
+        if (cancelled || saved.length === 0) return;
+        setGroups(saved);
+        setActiveGroupId(current => (saved.some(g => g.id === current) ? current : saved[0].id));
+      });
+    });
+
+    return () => {
+      cancelled = true;
+      unsubscribe();
+    };
   }, []);
 
+  // Only groups whose object changed are written (see StorageService.saveGroups)
   useEffect(() => {
-    if (groups.length > 0) StorageService.saveGroups(groups);
-  }, [groups]);
+    if (!loaded || groups.length === 0) return;
+    StorageService.saveGroups(groups).catch(error => {
+      console.error('Failed to save groups', error);
+      addToast('Failed to save groups', 'error');
+    });
+  }, [groups, loaded]);
 
   const activeGroup = groups.find(g => g.id === activeGroupId);
 
@@ -1,6 +1,7 @@
 import React, { useRef, useState } from 'react';
 import { GripVertical, Pencil, X, Trash2 } from 'lucide-react';
-import { PlayerGroup, GroupPlayer } from '../../types';
+import { PlayerGroup, GroupPlayer, PlayerColumn } from '../../types';
+import { useVirtualRows, useStableCallback, VirtualSpacer } from '../ui/VirtualRows';
 
 interface GroupTableProps {
   group: PlayerGroup;
@@ -12,6 +13,90 @@ interface GroupTableProps {
   onReorderRow: (fromIndex: number, toIndex: number) => void;
 }
 
+interface GroupRowProps {
+  player: GroupPlayer;
+  idx: number;
+  columns: PlayerColumn[];
+  onRowDragStart: (e: React.DragEvent, index: number) => void;
+  onRowDrop: (e: React.DragEvent, index: number) => void;
+  onRowTouchStart: (e: React.TouchEvent, index: number) => void;
+  onRowTouchMove: (e: React.TouchEvent) => void;
+  onRowTouchEnd: (e: React.TouchEvent, index: number) => void;
+  onRemovePlayer: (fid: string) => void;
+  onUpdatePlayer: (fid: string, colId: string, value: string) => void;
+}
+
+const GroupRow = React.memo(({
+  player,
+  idx,
+  columns,
+  onRowDragStart,
+  onRowDrop,
+  onRowTouchStart,
+  onRowTouchMove,
+  onRowTouchEnd,
+  onRemovePlayer,
+  onUpdatePlayer,
+}: GroupRowProps) => (
+    <tr
+      data-row-index={idx}
+      className="hover:bg-white/5 group transition-colors"
+      draggable
+      onDragStart={(e) => onRowDragStart(e, idx)}
+      onDragOver={(e) => e.preventDefault()}
+      onDrop={(e) => onRowDrop(e, idx)}
+      onTouchStart={(e) => onRowTouchStart(e, idx)}
+      onTouchMove={onRowTouchMove}
+      onTouchEnd={(e) => onRowTouchEnd(e, idx)}
+    >
+      <td className="p-3 text-center">
+         <div className="cursor-grab active:cursor-grabbing p-1 opacity-20 group-hover:opacity-100 hover:text-teal-400">
+            <GripVertical size={16} />
+         </div>
+      </td>
+      <td className="p-3 text-white/30 text-xs text-center">{idx + 1}</td>
+      <td className="p-3">
+        <div className="flex items-center gap-3 select-none pointer-events-none">
+          <div>
+            <img 
+                src={player.avatar_image} 
+                className="w-9 h-9 rounded-full border border-teal-500/30 bg-black/20" 
+                alt="" 
+                onError={(e) => {
+                    (e.target as HTMLImageElement).src = `https://ui-avatars.com/api/?name=${player.nickname}&background=random`;
+                }}
+            />
+          </div>
+          <div className="flex flex-col">
+              <span className="font-medium text-gray-100">{player.nickname}</span>
+              <span className="text-[10px] text-gray-500 font-mono">ID: {player.fid}</span>
+          </div>
+        </div>
+      </td>
+      {columns.map(col => (
+        <td key={col.id} className="p-2">
+          <input
+            type="text"
+            className="w-full bg-black/10 hover:bg-black/30 focus:bg-black/40 border border-transparent focus:border-teal-500/50 px-3 py-2 rounded text-gray-200 focus:text-white outline-none transition-all placeholder-white/5 text-sm"
+            value={player.customData[col.id] || ''}
+            onChange={(e) => onUpdatePlayer(player.fid, col.id, e.target.value)}
+            placeholder="..."
+          />
+        </td>
+      ))}
+      <td className="p-3 text-right">
+          <button 
+            type="button"
+            onClick={() => onRemovePlayer(player.fid)}
+            className="text-white/20 hover:text-coral-400 transition-colors p-2 rounded-full hover:bg-white/5"
+            title="Remove from group"
+          >
+              <Trash2 size={16} />
+          </button>
+      </td>
+    </tr>
+));
+
 export const GroupTable: React.FC<GroupTableProps> = ({
   group,
   onRenameColumn,
@@ -160,8 +245,19 @@ export const GroupTable: React.FC<GroupTableProps> = ({
     dragIndex.current = -1;
   };
 
+  // Only rows inside the scroll viewport are rendered; row callbacks keep a stable identity so
+  // unchanged rows skip re-rendering when another player's cell is edited
+  const rows = useVirtualRows({ count: group.players.length, estimateRowHeight: 61 });
+  const rowDragStart = useStableCallback(handleRowDragStart);
+  const rowDrop = useStableCallback(handleRowDrop);
+  const rowTouchStart = useStableCallback(handleRowTouchStart);
+  const rowTouchMove = useStableCallback(handleRowTouchMove);
+  const rowTouchEnd = useStableCallback(handleRowTouchEnd);
+  const removePlayer = useStableCallback(onRemovePlayer);
+  const updatePlayer = useStableCallback(onUpdatePlayer);
+
   return (
-    <div className="flex-1 overflow-auto">
+    <div ref={rows.scrollRef} className="flex-1 overflow-auto">
       <table className="w-full text-left text-sm text-white border-collapse">
         <thead className="sticky top-0 z-10 backdrop-blur-md">
           <tr className="bg-teal-900/60 border-b border-teal-500/20">
@@ -213,67 +309,24 @@ export const GroupTable: React.FC<GroupTableProps> = ({
             <th className="p-3 w-10"></th>
           </tr>
         </thead>
-        <tbody className="divide-y divide-white/5">
-          {group.players.map((player, idx) => (
-            <tr
+        <tbody ref={rows.measureRef} className="divide-y divide-white/5">
+          <VirtualSpacer height={rows.paddingTop} colSpan={4 + group.columns.length} />
+          {group.players.slice(rows.start, rows.end).map((player, offset) => (
+            <GroupRow
               key={player.fid}
-              data-row-index={idx}
-              className="hover:bg-white/5 group transition-colors"
-              draggable
-              onDragStart={(e) => handleRowDragStart(e, idx)}
-              onDragOver={(e) => e.preventDefault()}
-              onDrop={(e) => handleRowDrop(e, idx)}
-              onTouchStart={(e) => handleRowTouchStart(e, idx)}
-              onTouchMove={handleRowTouchMove}
-              onTouchEnd={(e) => handleRowTouchEnd(e, idx)}
-            >
-              <td className="p-3 text-center">
-                 <div className="cursor-grab active:cursor-grabbing p-1 opacity-20 group-hover:opacity-100 hover:text-teal-400">
-                    <GripVertical size={16} />
-                 </div>
-              </td>
-              <td className="p-3 text-white/30 text-xs text-center">{idx + 1}</td>
-              <td className="p-3">
-                <div className="flex items-center gap-3 select-none pointer-events-none">
-                  <div>
-                    <img 
-                        src={player.avatar_image} 
-                        className="w-9 h-9 rounded-full border border-teal-500/30 bg-black/20" 
-                        alt="" 
-                        onError={(e) => {
-                            (e.target as HTMLImageElement).src = `https://ui-avatars.com/api/?name=${player.nickname}&background=random`;
-                        }}
-                    />
-                  </div>
-                  <div className="flex flex-col">
-                      <span className="font-medium text-gray-100">{player.nickname}</span>
-                      <span className="text-[10px] text-gray-500 font-mono">ID: {player.fid}</span>
-                  </div>
-                </div>
-              </td>
-              {group.columns.map(col => (
-                <td key={col.id} className="p-2">
-                  <input
-                    type="text"
-                    className="w-full bg-black/10 hover:bg-black/30 focus:bg-black/40 border border-transparent focus:border-teal-500/50 px-3 py-2 rounded text-gray-200 focus:text-white outline-none transition-all placeholder-white/5 text-sm"
-                    value={player.customData[col.id] || ''}
-                    onChange={(e) => onUpdatePlayer(player.fid, col.id, e.target.value)}
-                    placeholder="..."
-                  />
-                </td>
-              ))}
-              <td className="p-3 text-right">
-                  <button 
-                    type="button"
-                    onClick={() => onRemovePlayer(player.fid)}
-                    className="text-white/20 hover:text-coral-400 transition-colors p-2 rounded-full hover:bg-white/5"
-                    title="Remove from group"
-                  >
-                      <Trash2 size={16} />
-                  </button>
-              </td>
-            </tr>
+              player={player}
+              idx={rows.start + offset}
+              columns={group.columns}
+              onRowDragStart={rowDragStart}
+              onRowDrop={rowDrop}
+              onRowTouchStart={rowTouchStart}
+              onRowTouchMove={rowTouchMove}
+              onRowTouchEnd={rowTouchEnd}
+              onRemovePlayer={removePlayer}
+              onUpdatePlayer={updatePlayer}
+            />
           ))}
+          <VirtualSpacer height={rows.paddingBottom} colSpan={4 + group.columns.length} />
           {group.players.length === 0 && (
               <tr>
                   <td colSpan={4 + group.columns.length} className="p-16 text-center text-white/20">
@@ -1,9 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo, useCallback, useDeferredValue } from 'react';
 import { Search, Loader2, FileInput, AlertCircle, Copy, Trash2, X } from 'lucide-react';
 import { Player, ImportStatus } from '../../types';
-import { fetchPlayer, sleep } from '../services/api';
+import { fetchPlayer, fetchPlayers, PLAYER_BATCH_SIZE } from '../services/api';
 import { StorageService } from '../services/storage';
 import { PlayerCard } from './PlayerCard';
+import { useVirtualRows, VirtualSpacer } from './ui/VirtualRows';
 
 interface ImportPanelProps {
   foundPlayers: Player[];
@@ -24,19 +25,29 @@ export const ImportPanel: React.FC<ImportPanelProps> = ({ foundPlayers, setFound
     isImporting: false,
   });
 
+  const [cacheLoaded, setCacheLoaded] = useState(false);
+
   // Load last session
   useEffect(() => {
     const lastIds = StorageService.loadLastImportIds();
     if (lastIds) setBatchText(lastIds);
-    const cached = StorageService.loadCachedPlayers();
-    if (cached.length > 0) setFoundPlayers(cached);
+    StorageService.loadCachedPlayers().then(cached => {
+      // Keep anything imported while the cache was loading
+      if (cached.length > 0) {
+        setFoundPlayers(prev => {
+          const existingIds = new Set(prev.map(p => p.fid));
+          return [...prev, ...cached.filter(p => !existingIds.has(p.fid))];
+        });
+      }
+      setCacheLoaded(true);
+    });
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
-  // Save cache when players change
+  // Save cache when players change (skipped until the previous session is loaded so it isn't overwritten)
   useEffect(() => {
-    StorageService.saveCachedPlayers(foundPlayers);
-  }, [foundPlayers]);
+    if (cacheLoaded) StorageService.saveCachedPlayers(foundPlayers);
+  }, [foundPlayers, cacheLoaded]);
 
   const handleSingleSearch = async () => {
     if (!singleId.trim()) return;
@@ -78,24 +89,33 @@ export const ImportPanel: React.FC<ImportPanelProps> = ({ foundPlayers, setFound
     const newPlayers: Player[] = [];
     const failed: string[] = [];
 
-    for (let i = 0; i < uniqueIds.length; i++) {
-      const id = uniqueIds[i];
+    // 分批交給後端查詢（後端負責快取與上游限流）
+    for (let i = 0; i < uniqueIds.length; i += PLAYER_BATCH_SIZE) {
+      const chunk = uniqueIds.slice(i, i + PLAYER_BATCH_SIZE);
       try {
-        const player = await fetchPlayer(id);
-        newPlayers.push(player);
-        setStatus(prev => ({ ...prev, current: i + 1, success: prev.success + 1 }));
+        const result = await fetchPlayers(chunk);
+        const chunkFailed = chunk.filter(id => !result.players[id]);
+        for (const id of chunk) {
+          if (result.players[id]) newPlayers.push(result.players[id]);
+        }
+        failed.push(...chunkFailed);
+        setStatus(prev => ({
+          ...prev,
+          current: i + chunk.length,
+          success: prev.success + chunk.length - chunkFailed.length,
+          failed: prev.failed + chunkFailed.length,
+          failedIds: [...prev.failedIds, ...chunkFailed]
+        }));
       } catch (e) {
-        console.warn(`Failed to fetch ${id}`, e);
-        failed.push(id);
+        console.warn(`Failed to fetch batch starting at ${i}`, e);
+        failed.push(...chunk);
         setStatus(prev => ({
           ...prev,
-          current: i + 1,
-          failed: prev.failed + 1,
-          failedIds: [...prev.failedIds, id]
+          current: i + chunk.length,
+          failed: prev.failed + chunk.length,
+          failedIds: [...prev.failedIds, ...chunk]
         }));
       }
-      // Rate limit prevention
-      if (i < uniqueIds.length - 1) await sleep(250);
     }
 
     setFoundPlayers(prev => {
@@ -120,17 +140,23 @@ export const ImportPanel: React.FC<ImportPanelProps> = ({ foundPlayers, setFound
     }, 2000);
   };
 
-  const handleRemovePlayer = (fid: string) => {
+  const handleRemovePlayer = useCallback((fid: string) => {
     setFoundPlayers(prev => prev.filter(p => p.fid !== fid));
-  };
+  }, [setFoundPlayers]);
 
-  // Filter players based on search query
-  const filteredPlayers = foundPlayers.filter(player => {
-    if (!searchQuery.trim()) return true;
-    const query = searchQuery.toLowerCase();
-    return player.nickname?.toLowerCase().includes(query) ||
-           String(player.fid).toLowerCase().includes(query);
-  });
+  // Filter players based on search query (deferred so typing stays responsive on large imports)
+  const deferredQuery = useDeferredValue(searchQuery);
+  const filteredPlayers = useMemo(() => {
+    if (!deferredQuery.trim()) return foundPlayers;
+    const query = deferredQuery.toLowerCase();
+    return foundPlayers.filter(player =>
+      player.nickname?.toLowerCase().includes(query) ||
+      String(player.fid).toLowerCase().includes(query)
+    );
+  }, [foundPlayers, deferredQuery]);
+
+  // Only cards inside the scroll viewport are mounted
+  const playerRows = useVirtualRows({ count: filteredPlayers.length, estimateRowHeight: 100 });
 
   return (
     <div className="h-full flex flex-col">
@@ -274,6 +300,7 @@ export const ImportPanel: React.FC<ImportPanelProps> = ({ foundPlayers, setFound
           )}
         </div>
         <div
+          ref={playerRows.scrollRef}
           className="flex-1 overflow-y-auto p-2 lg:p-3 space-y-2 custom-scrollbar"
           style={{
             scrollbarWidth: 'thin',
@@ -290,9 +317,13 @@ export const ImportPanel: React.FC<ImportPanelProps> = ({ foundPlayers, setFound
                    找不到符合的玩家
                </div>
            )}
-           {filteredPlayers.map(player => (
-             <PlayerCard key={player.fid} player={player} onRemove={handleRemovePlayer} />
-           ))}
+           <div ref={playerRows.measureRef} className="space-y-2">
+             <VirtualSpacer height={playerRows.paddingTop} />
+             {filteredPlayers.slice(playerRows.start, playerRows.end).map(player => (
+               <PlayerCard key={player.fid} player={player} onRemove={handleRemovePlayer} />
+             ))}
+             <VirtualSpacer height={playerRows.paddingBottom} />
+           </div>
         </div>
       </div>
     </div>
@@ -7,7 +7,8 @@ interface PlayerCardProps {
   onRemove?: (fid: string) => void;
 }
 
-export const PlayerCard: React.FC<PlayerCardProps> = ({ player, onRemove }) => {
+// Memoized: import lists can hold thousands of cards and re-render on every search keystroke
+export const PlayerCard = React.memo(({ player, onRemove }: PlayerCardProps) => {
   const [iconError, setIconError] = useState(false);
   const [isDragging, setIsDragging] = useState(false);
   const touchStartPos = useRef({ x: 0, y: 0 });
@@ -255,4 +256,4 @@ export const PlayerCard: React.FC<PlayerCardProps> = ({ player, onRemove }) => {
       </div>
     </div>
   );
-};
\ No newline at end of file
+});
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { MapPin, Download, ArrowLeft, RefreshCw } from 'lucide-react';
 import html2canvas from 'html2canvas';
+import { subscribeTopics } from '../services/realtime';
 
 interface Alliance {
   id: string;
@@ -13,6 +14,7 @@ interface MapData {
   id: string;
   title: string;
   status: string;
+  version?: number;
   alliances: Alliance[];
   gridData: Record<string, string>;
   gridOwners: Record<string, string>;
@@ -24,7 +26,13 @@ const PublicMapView: React.FC = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [tooltip, setTooltip] = useState<{ text: string; x: number; y: number } | null>(null);
+  const [reloadToken, setReloadToken] = useState(0);
   const mapRef = useRef<HTMLDivElement>(null);
+  const mapDataRef = useRef<MapData | null>(null);
+
+  useEffect(() => {
+    mapDataRef.current = mapData;
+  }, [mapData]);
 
   useEffect(() => {
     const loadMap = async () => {
@@ -65,6 +73,57 @@ const PublicMapView: React.FC = () => {
     };
 
     loadMap();
+  }, [id, reloadToken]);
+
+  // 即時套用其他管理員的格子變動
+  useEffect(() => {
+    if (!id) return;
+
+    return subscribeTopics([`map:${id}`], ({ type, data }) => {
+      if (type === 'patched') {
+        const prev = mapDataRef.current;
+        // 版本不連續表示遺漏了變動，改為重新載入完整地圖
+        if (!prev || prev.version === undefined || data.version !== prev.version + 1) {
+          setReloadToken(t => t + 1);
+          return;
+        }
+        const gridData = { ...prev.gridData };
+        for (const cell of data.cells || []) {
+          if (cell.alliance) gridData[cell.key] = cell.alliance;
+          else delete gridData[cell.key];
+        }
+        const gridOwners = { ...prev.gridOwners };
+        for (const owner of data.owners || []) {
+          if (owner.owner) gridOwners[owner.key] = owner.owner;
+          else delete gridOwners[owner.key];
+        }
+        const alliances: Alliance[] = data.alliances || prev.alliances;
+        if (data.alliances) {
+          const known = new Set(alliances.map(a => a.id));
+          for (const key of Object.keys(gridData)) {
+            if (!known.has(gridData[key])) delete gridData[key];
+          }
+        }
+        const next = {
+          ...prev,
+          title: data.title ?? prev.title,
+          version: data.version,
+          alliances,
+          gridData,
+          gridOwners,
+        };
+        mapDataRef.current = next;
+        setMapData(next);
+      } else if (type === 'replaced') {
+        setMapData(prev => prev ? { ...prev, ...data } : prev);
+      } else if (type === 'closed') {
+        setError('此地圖未開放查看');
+      } else if (type === 'deleted') {
+        setError('找不到此地圖');
+      } else if (type === 'resync') {
+        setReloadToken(t => t + 1);
+      }
+    });
   }, [id]);
 
   const downloadMapImage = async () => {
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useSearchParams } from 'react-router-dom';
 import { useI18n } from '../i18n/I18nProvider';
 import { LanguageSwitcher } from './LanguageSwitcher';
+import { subscribeTopics } from '../services/realtime';
 
 // 時段類型
 type SlotType = 'research' | 'training' | 'building';
@@ -54,6 +55,7 @@ export const PublicOfficerView: React.FC = () => {
   const [selectedType, setSelectedType] = useState<SlotType>(urlType as SlotType || 'research');
   const [officers, setOfficers] = useState<Record<string, OfficerSlot[]>>({});
   const [loading, setLoading] = useState(true);
+  const [reloadToken, setReloadToken] = useState(0);
   const [showOnlyEmpty, setShowOnlyEmpty] = useState(urlShowEmpty);
   const [copySuccess, setCopySuccess] = useState(false);
   const [shareModal, setShareModal] = useState<{ show: boolean; url: string; title: string; text: string } | null>(null);
@@ -101,6 +103,21 @@ export const PublicOfficerView: React.FC = () => {
       }
     };
     loadOfficers();
+  }, [selectedDate, reloadToken]);
+
+  // 即時接收官職配置變動
+  useEffect(() => {
+    if (!selectedDate) return;
+
+    return subscribeTopics([`officers:${selectedDate}`], ({ type, data }) => {
+      if (type === 'saved') {
+        setOfficers(data || {});
+      } else if (type === 'deleted') {
+        setOfficers({});
+      } else if (type === 'resync') {
+        setReloadToken(t => t + 1);
+      }
+    });
   }, [selectedDate]);
 
   // 獲取當前類型的時段陣列
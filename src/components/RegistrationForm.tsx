@@ -213,9 +213,8 @@ export const RegistrationForm: React.FC<RegistrationFormProps> = ({ user, player
   const [changingPassword, setChangingPassword] = useState(false);
 
   useEffect(() => {
-    loadSubmissions();
+    loadAccountGroup();
     loadEvents();
-    loadLinkedAccounts();
   }, [user.id]);
 
   // 添加鍵盤快捷鍵支持（Escape 鍵退出 SVS 模式）
@@ -478,6 +477,18 @@ export const RegistrationForm: React.FC<RegistrationFormProps> = ({ user, player
     }
   }, [selectedEventDate]);
 
+  // 初次載入：關聯帳號與目前帳號的報名以單一請求取得
+  const loadAccountGroup = async () => {
+    const result = await AuthService.getAccountGroup();
+    const current = result?.accounts.find(account => account.id === result.currentAccountId);
+    if (!result || !current) {
+      await Promise.all([loadSubmissions(), loadLinkedAccounts()]);
+      return;
+    }
+    setLinkedAccounts(result.accounts.map(({ submissions: _submissions, ...account }) => account));
+    setSubmissions(current.submissions);
+  };
+
   const loadLinkedAccounts = async () => {
     try {
       const result = await AuthService.getLinkedAccounts();
@@ -504,8 +515,8 @@ export const RegistrationForm: React.FC<RegistrationFormProps> = ({ user, player
         return;
       }
       
-      // 排序：開放報名的在最上方，然後按日期遞減
-      const sortedEvents = allEvents.sort((a, b) => {
+      // 排序：開放報名的在最上方，然後按日期遞減（複製後排序，不改動快取中的列表）
+      const sortedEvents = [...allEvents].sort((a, b) => {
         // 首先按狀態排序：open 在前
         if (a.status === 'open' && b.status !== 'open') return -1;
         if (a.status !== 'open' && b.status === 'open') return 1;
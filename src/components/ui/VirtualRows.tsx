@@ -0,0 +1,116 @@
+import React, { useCallback, useLayoutEffect, useRef, useState } from 'react';
+
+// 長列表視窗化：只渲染捲動容器可見範圍（加上前後緩衝）內的列，其餘以等高的空白列撐開捲軸
+// 列高不固定時，以已渲染列的平均高度估算（包含列與列之間的間距）
+
+interface VirtualRowsOptions {
+  count: number;
+  // 第一次量測前使用的估計列高（px）
+  estimateRowHeight: number;
+  // 可見範圍前後多渲染的列數
+  overscan?: number;
+}
+
+export interface VirtualRows {
+  // 掛在捲動容器上（需有固定高度與 overflow: auto）
+  scrollRef: (element: HTMLElement | null) => void;
+  // 掛在列的父元素上（tbody 或 div），用來量測實際列高
+  measureRef: (element: HTMLElement | null) => void;
+  start: number;
+  end: number;
+  paddingTop: number;
+  paddingBottom: number;
+}
+
+export function useVirtualRows({ count, estimateRowHeight, overscan = 8 }: VirtualRowsOptions): VirtualRows {
+  const [scrollElement, setScrollElement] = useState<HTMLElement | null>(null);
+  const measureElement = useRef<HTMLElement | null>(null);
+  const [viewport, setViewport] = useState({ scrollTop: 0, height: 800 });
+  const [rowHeight, setRowHeight] = useState(estimateRowHeight);
+
+  // 捲動與尺寸變化時更新可見範圍，同一個畫格只更新一次
+  useLayoutEffect(() => {
+    if (!scrollElement) return;
+    let frame = 0;
+    const update = () => {
+      frame = 0;
+      const next = { scrollTop: scrollElement.scrollTop, height: scrollElement.clientHeight };
+      setViewport(prev => (prev.scrollTop === next.scrollTop && prev.height === next.height ? prev : next));
+    };
+    const schedule = () => {
+      if (!frame) frame = requestAnimationFrame(update);
+    };
+
+    update();
+    scrollElement.addEventListener('scroll', schedule, { passive: true });
+    const observer = typeof ResizeObserver !== 'undefined' ? new ResizeObserver(schedule) : null;
+    observer?.observe(scrollElement);
+    return () => {
+      scrollElement.removeEventListener('scroll', schedule);
+      observer?.disconnect();
+      if (frame) cancelAnimationFrame(frame);
+    };
+  }, [scrollElement]);
+
+  const first = Math.floor(viewport.scrollTop / rowHeight);
+  const end = Math.min(count, Math.ceil((viewport.scrollTop + viewport.height) / rowHeight) + overscan);
+  const start = Math.min(Math.max(0, first - overscan), end);
+
+  // 每次渲染後以實際列高修正估計值
+  useLayoutEffect(() => {
+    const element = measureElement.current;
+    if (!element) return;
+    const rows = Array.from(element.children).filter(
+      child => !(child as HTMLElement).hasAttribute('data-virtual-spacer')
+    ) as HTMLElement[];
+    if (rows.length === 0) return;
+
+    const firstRow = rows[0];
+    const lastRow = rows[rows.length - 1];
+    const average = (lastRow.offsetTop + lastRow.offsetHeight - firstRow.offsetTop) / rows.length;
+    if (average > 0 && Math.abs(average - rowHeight) > 1) {
+      setRowHeight(average);
+    }
+  });
+
+  const measureRef = useCallback((element: HTMLElement | null) => {
+    measureElement.current = element;
+  }, []);
+
+  return {
+    scrollRef: setScrollElement,
+    measureRef,
+    start,
+    end,
+    paddingTop: start * rowHeight,
+    paddingBottom: (count - end) * rowHeight,
+  };
+}
+
+// 回傳參考固定、但永遠呼叫最新版本的函數；傳給 memo 列元件的事件處理函數不會因為父元件重新渲染而讓 memo 失效
+export function useStableCallback<A extends unknown[], R>(callback: (...args: A) => R): (...args: A) => R {
+  const ref = useRef(callback);
+  useLayoutEffect(() => {
+    ref.current = callback;
+  });
+  return useCallback((...args: A) => ref.current(...args), []);
+}
+
+interface VirtualSpacerProps {
+  height: number;
+  // 在表格內使用 tr（需要 colSpan），其他情況使用 div
+  colSpan?: number;
+}
+
+// 撐開未渲染列所佔的高度
+export const VirtualSpacer: React.FC<VirtualSpacerProps> = ({ height, colSpan }) => {
+  if (height <= 0) return null;
+  if (colSpan !== undefined) {
+    return (
+      <tr data-virtual-spacer="" aria-hidden="true" style={{ height }}>
+        <td colSpan={colSpan} style={{ padding: 0, border: 0 }} />
+      </tr>
+    );
+  }
+  return <div data-virtual-spacer="" aria-hidden="true" style={{ height }} />;
+};
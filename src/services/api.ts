@@ -1,44 +1,60 @@
-import CryptoJS from 'crypto-js';
 import { Player } from '../../types';
+import { StorageService } from './storage';
 
-// 生產環境使用 game-api.php，開發環境使用本地代理
-const GAME_API_URL = import.meta.env.DEV 
-  ? '/game-api/player'
-  : '/game-api.php';
+// 玩家資料透過後端查詢（後端負責簽名、快取與合併相同請求）
+const getApiUrl = (endpoint: string): string => {
+  if (typeof window !== 'undefined' && window.location.hostname === 'localhost') {
+    return `http://localhost:3001/api${endpoint}`;
+  }
+  return `/api-proxy.php?path=${endpoint.substring(1)}`;
+};
+
+// 批次查詢單次上限（需與後端 MAX_BATCH_SIZE 一致）
+export const PLAYER_BATCH_SIZE = 200;
+
+// 本地（IndexedDB）玩家資料在此時間內直接使用，不再向後端查詢（與後端快取 TTL 相同）
+export const PLAYER_CACHE_TTL_MS = 10 * 60 * 1000;
 
 export const fetchPlayer = async (fid: string): Promise<Player> => {
-  const timestamp = Math.floor(Date.now() / 1000);
-  const signData = `fid=${fid}&time=${timestamp}`;
-  const sign = CryptoJS.MD5(`${signData}tB87#kPtkxqOS2`).toString();
+  const cached = await StorageService.getFreshPlayers([fid], PLAYER_CACHE_TTL_MS);
+  if (cached[fid]) return cached[fid];
+
+  const response = await fetch(getApiUrl(`/players/${encodeURIComponent(fid)}`));
 
-  const response = await fetch(GAME_API_URL, {
-    method: 'POST',
-    headers: {
-      'Content-Type': 'application/x-www-form-urlencoded',
-    },
-    body: `${signData}&sign=${sign}`,
-  });
-  
   if (!response.ok) {
-    throw new Error('無法獲取玩家資訊');
+    const data = await response.json().catch(() => null);
+    throw new Error(data?.error || '無法獲取玩家資訊');
   }
 
-  const data = await response.json();
-  
-  if (data.code !== 0 || !data.data) {
-    throw new Error(data.msg || '玩家不存在');
+  const player: Player = await response.json();
+  StorageService.cachePlayers([player]);
+  return player;
+};
+
+// 批次查詢玩家，回傳成功的玩家與失敗原因
+export const fetchPlayers = async (fids: string[]): Promise<{
+  players: Record<string, Player>;
+  errors: Record<string, string>;
+}> => {
+  // 本地快取仍有效的玩家不送到後端
+  const cached = await StorageService.getFreshPlayers(fids, PLAYER_CACHE_TTL_MS);
+  const missing = fids.filter(fid => !cached[fid]);
+  if (missing.length === 0) return { players: cached, errors: {} };
+
+  const response = await fetch(getApiUrl('/players/batch'), {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ fids: missing }),
+  });
+
+  if (!response.ok) {
+    const data = await response.json().catch(() => null);
+    throw new Error(data?.error || '無法獲取玩家資訊');
   }
 
-  return {
-    fid: data.data.fid?.toString() || fid,
-    nickname: data.data.nickname || `Player_${fid}`,
-    kid: data.data.kid || 0,
-    stove_lv: data.data.stove_lv || 0,
-    stove_lv_content: data.data.stove_lv_content || '',
-    avatar_image: data.data.avatar_image || '',
-    total_recharge_amount: data.data.total_recharge_amount,
-    lastUpdated: Date.now()
-  };
+  const result: { players: Record<string, Player>; errors: Record<string, string> } = await response.json();
+  StorageService.cachePlayers(Object.values(result.players));
+  return { players: { ...cached, ...result.players }, errors: result.errors };
 };
 
 export const sleep = (ms: number): Promise<void> => {
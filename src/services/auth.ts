@@ -1,3 +1,5 @@
+import { queryCache } from './query-cache';
+
 // API endpoint - use api-proxy.php for production, localhost for development
 const API_URL = typeof window !== 'undefined' && window.location.hostname === 'localhost'
   ? 'http://localhost:3001/api'
@@ -39,6 +41,7 @@ export interface LinkedAccount {
 export class AuthService {
   // 清除所有本地存储数据
   static clearAllData(): void {
+    queryCache.clear();
     localStorage.removeItem(TOKEN_KEY);
     localStorage.removeItem(USER_KEY);
     localStorage.removeItem('wos_users');
@@ -79,7 +82,8 @@ export class AuthService {
       const data = await response.json();
       console.log('✅ Login response data.user:', data.user);
       
-      // 保存 token 和用户信息
+      // 保存 token 和用户信息（換了身分，快取的資料不再適用）
+      queryCache.clear();
       localStorage.setItem(TOKEN_KEY, data.token);
       localStorage.setItem(USER_KEY, JSON.stringify(data.user));
       console.log('✅ Saved to localStorage - USER_KEY:', JSON.stringify(data.user));
@@ -117,7 +121,8 @@ export class AuthService {
 
       const data = await response.json();
       
-      // 保存 token 和用户信息
+      // 保存 token 和用户信息（換了身分，快取的資料不再適用）
+      queryCache.clear();
       localStorage.setItem(TOKEN_KEY, data.token);
       localStorage.setItem(USER_KEY, JSON.stringify(data.user));
 
@@ -128,6 +133,16 @@ export class AuthService {
     }
   }
 
+  // 目前登入的使用者 ID（不輸出日誌，供背景同步頻繁呼叫）
+  static getCurrentUserId(): string | null {
+    try {
+      const stored = localStorage.getItem(USER_KEY);
+      return stored ? JSON.parse(stored).id || null : null;
+    } catch {
+      return null;
+    }
+  }
+
   static getCurrentUser(): User | null {
     const stored = localStorage.getItem(USER_KEY);
     const user = stored ? JSON.parse(stored) : null;
@@ -219,6 +234,7 @@ export class AuthService {
       });
       
       if (response.ok) {
+        queryCache.invalidate('users');
         // 更新本地存儲的用戶資料
         const currentUser = this.getCurrentUser();
         if (currentUser) {
@@ -254,6 +270,7 @@ export class AuthService {
         },
         body: JSON.stringify(playerData)
       });
+      if (response.ok) queryCache.invalidate('users');
       return response.ok;
     } catch (error) {
       console.error('Error updating player data:', error);
@@ -266,6 +283,7 @@ export class AuthService {
   }
 
   static logout(): void {
+    queryCache.clear();
     localStorage.removeItem(TOKEN_KEY);
     localStorage.removeItem(USER_KEY);
   }
@@ -273,17 +291,19 @@ export class AuthService {
   // 获取所有用户（管理员功能）
   static async getAllUsers(): Promise<any[]> {
     try {
-      const token = this.getToken();
-      const url = getApiUrl('/auth/users');
-      const response = await fetch(url, {
-        headers: { 
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        }
-      });
-      if (!response.ok) return [];
-      const data = await response.json();
-      return data.users || [];
+      return await queryCache.fetch('users:all', async () => {
+        const token = this.getToken();
+        const url = getApiUrl('/auth/users');
+        const response = await fetch(url, {
+          headers: { 
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        return data.users || [];
+      }, { entity: 'user' });
     } catch (error) {
       console.error('Error fetching users:', error);
       return [];
@@ -302,6 +322,11 @@ export class AuthService {
           'Content-Type': 'application/json'
         }
       });
+      if (response.ok) {
+        // 刪除用戶會連帶刪除其報名
+        queryCache.removeWhere('user', user => user.gameId === userId);
+        queryCache.removeWhere('submission', submission => submission.user?.gameId === userId);
+      }
       return response.ok;
     } catch (error) {
       console.error('Error deleting user:', error);
@@ -335,6 +360,30 @@ export class AuthService {
     }
   }
 
+  // 一次取得整個帳號群組與各帳號的報名（可限定場次）
+  static async getAccountGroup(eventDate?: string): Promise<{
+    accounts: (LinkedAccount & { submissions: any[] })[];
+    currentAccountId: string;
+    parentUserId: string;
+  } | null> {
+    try {
+      const token = this.getToken();
+      if (!token) return null;
+
+      const url = getApiUrl(`/auth/account-group${eventDate ? `/${encodeURIComponent(eventDate)}` : ''}`);
+      const response = await fetch(url, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+
+      if (!response.ok) return null;
+
+      return await response.json();
+    } catch (error) {
+      console.error('Error fetching account group:', error);
+      return null;
+    }
+  }
+
   // 新增子帳號
   static async addSubAccount(
     gameId: string, 
@@ -365,6 +414,7 @@ export class AuthService {
         return { success: false, message: data.error || '新增失敗' };
       }
 
+      queryCache.invalidate('users');
       return data;
     } catch (error) {
       console.error('Error adding sub-account:', error);
@@ -393,6 +443,7 @@ export class AuthService {
       const data = await response.json();
       
       // 更新本地 token 和用戶資料
+      queryCache.clear();
       localStorage.setItem(TOKEN_KEY, data.token);
       localStorage.setItem(USER_KEY, JSON.stringify(data.user));
 
@@ -415,6 +466,7 @@ export class AuthService {
         headers: { 'Authorization': `Bearer ${token}` }
       });
 
+      if (response.ok) queryCache.invalidate('users');
       return response.ok;
     } catch (error) {
       console.error('Error removing sub-account:', error);
@@ -443,6 +495,7 @@ export class AuthService {
       });
       if (!response.ok) return null;
       const data = await response.json();
+      queryCache.invalidate('users');
       return data.user;
     } catch (error) {
       console.error('Error setting admin:', error);
@@ -492,6 +545,11 @@ export class AuthService {
         return { success: false, message: data.error || '變更密碼失敗' };
       }
 
+      // 變更密碼後舊 token 會失效，改用伺服器回傳的新 token
+      if (data.token) {
+        localStorage.setItem(TOKEN_KEY, data.token);
+      }
+
       return { success: true, message: data.message || '密碼已變更' };
     } catch (error) {
       console.error('Error changing password:', error);
@@ -510,6 +568,12 @@ export class FormService {
     return `/api-proxy.php?path=${endpoint.substring(1)}`;
   }
 
+  // 更新後的報名寫回快取；伺服器回傳不含 user 關聯，以合併方式保留列表中原有的欄位
+  private static mergeSubmission(updated: any): any {
+    if (!updated?.id) return updated;
+    return queryCache.setEntity('submission', updated);
+  }
+
   static async submitForm(data: {
     userId: string;
     fid: string;
@@ -553,6 +617,7 @@ export class FormService {
 
       const result = await response.json();
       console.log('✅ FormService.submitForm - 成功:', result);
+      queryCache.invalidate('submissions');
       return result;
     } catch (error) {
       console.error('❌ FormService.submitForm 錯誤:', error);
@@ -604,6 +669,7 @@ export class FormService {
 
       const result = await response.json();
       console.log('✅ FormService.adminSubmitForm - 成功:', result);
+      queryCache.invalidate('submissions');
       return result;
     } catch (error) {
       console.error('❌ FormService.adminSubmitForm 錯誤:', error);
@@ -631,7 +697,7 @@ export class FormService {
         throw new Error(errorData.error || 'Failed to update submission');
       }
 
-      return await response.json();
+      return this.mergeSubmission(await response.json());
     } catch (error) {
       console.error('Error updating submission:', error);
       throw error;
@@ -660,7 +726,7 @@ export class FormService {
         throw new Error(errorData.error || 'Failed to update submission');
       }
 
-      return await response.json();
+      return this.mergeSubmission(await response.json());
     } catch (error) {
       console.error('Error admin updating submission:', error);
       throw error;
@@ -669,26 +735,27 @@ export class FormService {
 
   static async getSubmissionsByUser(userId: string): Promise<any[]> {
     try {
-      const token = AuthService.getToken();
-      console.log('📡 FormService.getSubmissionsByUser - userId:', userId);
-      console.log('📡 FormService.getSubmissionsByUser - token:', token ? 'exists' : 'missing');
-      const response = await fetch(this.getApiUrl(`/submissions/my`), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      return await queryCache.fetch(`submissions:my:${userId}`, async () => {
+        const token = AuthService.getToken();
+        console.log('📡 FormService.getSubmissionsByUser - userId:', userId);
+        console.log('📡 FormService.getSubmissionsByUser - token:', token ? 'exists' : 'missing');
+        const response = await fetch(this.getApiUrl(`/submissions/my`), {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        console.log('📡 FormService.getSubmissionsByUser - response status:', response.status);
+
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
         }
-      });
-
-      console.log('📡 FormService.getSubmissionsByUser - response status:', response.status);
-      
-      if (!response.ok) {
-        console.warn('📡 FormService.getSubmissionsByUser - response not ok, returning []');
-        return [];
-      }
 
-      const data = await response.json();
-      console.log('📡 FormService.getSubmissionsByUser - data:', data);
-      return data;
+        const data = await response.json();
+        console.log('📡 FormService.getSubmissionsByUser - data:', data);
+        return data;
+      }, { entity: 'submission' });
     } catch (error) {
       console.error('Error fetching submissions:', error);
       return [];
@@ -706,6 +773,7 @@ export class FormService {
         }
       });
 
+      if (response.ok) queryCache.removeEntity('submission', submissionId);
       return response.ok;
     } catch (error) {
       console.error('Error deleting submission:', error);
@@ -715,24 +783,44 @@ export class FormService {
 
   static async getAllSubmissions(): Promise<any[]> {
     try {
-      const token = AuthService.getToken();
-      const response = await fetch(this.getApiUrl(`/submissions/all`), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      return await queryCache.fetch('submissions:all', async () => {
+        const token = AuthService.getToken();
+        const response = await fetch(this.getApiUrl(`/submissions/all`), {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
         }
-      });
-
-      if (!response.ok) {
-        return [];
-      }
 
-      return await response.json();
+        return await response.json();
+      }, { entity: 'submission' });
     } catch (error) {
       console.error('Error fetching all submissions:', error);
       return [];
     }
   }
+
+  // 由伺服器產生場次報名匯出檔（CSV / XLSX），瀏覽器只接收檔案內容
+  static async exportSubmissions(eventDate: string, format: 'csv' | 'xlsx', alliance?: string): Promise<Blob> {
+    const token = AuthService.getToken();
+    const query = alliance ? `?alliance=${encodeURIComponent(alliance)}` : '';
+    const response = await fetch(this.getApiUrl(`/submissions/export/${encodeURIComponent(eventDate)}/${format}${query}`), {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.error || `HTTP ${response.status}: Failed to export submissions`);
+    }
+
+    return await response.blob();
+  }
 }
 
 // 官職配置服務
@@ -748,20 +836,22 @@ export class OfficerConfigService {
   // 取得所有場次日期
   static async getEventDates(): Promise<string[]> {
     try {
-      const token = AuthService.getToken();
-      const response = await fetch(this.getApiUrl(`/officers/dates`), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      return await queryCache.fetch('officers:dates', async () => {
+        const token = AuthService.getToken();
+        const response = await fetch(this.getApiUrl(`/officers/dates`), {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
         }
-      });
 
-      if (!response.ok) {
-        return [];
-      }
-
-      const data = await response.json();
-      return data.dates || [];
+        const data = await response.json();
+        return data.dates || [];
+      });
     } catch (error) {
       console.error('Error fetching event dates:', error);
       return [];
@@ -771,26 +861,27 @@ export class OfficerConfigService {
   // 取得指定日期的官職配置
   static async getAssignments(eventDate: string): Promise<Record<string, any>> {
     try {
-      const token = AuthService.getToken();
-      console.log('OfficerConfigService.getAssignments - token:', token ? 'exists' : 'null');
-      console.log('OfficerConfigService.getAssignments - URL:', this.getApiUrl(`/officers/${eventDate}`));
-      const response = await fetch(this.getApiUrl(`/officers/${eventDate}`), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      return await queryCache.fetch(`officers:assignments:${eventDate}`, async () => {
+        const token = AuthService.getToken();
+        console.log('OfficerConfigService.getAssignments - token:', token ? 'exists' : 'null');
+        console.log('OfficerConfigService.getAssignments - URL:', this.getApiUrl(`/officers/${eventDate}`));
+        const response = await fetch(this.getApiUrl(`/officers/${eventDate}`), {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        console.log('OfficerConfigService.getAssignments - response status:', response.status);
+        if (!response.ok) {
+          const errorText = await response.text();
+          throw new Error(`HTTP ${response.status}: ${errorText}`);
         }
-      });
-
-      console.log('OfficerConfigService.getAssignments - response status:', response.status);
-      if (!response.ok) {
-        const errorText = await response.text();
-        console.error('OfficerConfigService.getAssignments - error:', errorText);
-        return {};
-      }
 
-      const data = await response.json();
-      console.log('OfficerConfigService.getAssignments - data:', data);
-      return data;
+        const data = await response.json();
+        console.log('OfficerConfigService.getAssignments - data:', data);
+        return data;
+      });
     } catch (error) {
       console.error('Error fetching assignments:', error);
       return {};
@@ -810,6 +901,7 @@ export class OfficerConfigService {
         body: JSON.stringify({ eventDate, utcOffset, officers })
       });
 
+      if (response.ok) queryCache.invalidate('officers');
       return response.ok;
     } catch (error) {
       console.error('Error saving assignments:', error);
@@ -829,6 +921,10 @@ export class OfficerConfigService {
         }
       });
 
+      if (response.ok) {
+        queryCache.invalidate('officers');
+        queryCache.invalidate('events');
+      }
       return response.ok;
     } catch (error) {
       console.error('Error deleting assignments:', error);
@@ -866,20 +962,22 @@ export class EventService {
   // 取得所有場次（管理員用）
   static async getAllEvents(): Promise<Event[]> {
     try {
-      const token = AuthService.getToken();
-      const response = await fetch(this.getApiUrl(`/events/all`), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      return await queryCache.fetch('events:all', async () => {
+        const token = AuthService.getToken();
+        const response = await fetch(this.getApiUrl(`/events/all`), {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
         }
-      });
-
-      if (!response.ok) {
-        return [];
-      }
 
-      const data = await response.json();
-      return data.events || [];
+        const data = await response.json();
+        return data.events || [];
+      }, { entity: 'event' });
     } catch (error) {
       console.error('Error fetching events:', error);
       return [];
@@ -889,14 +987,16 @@ export class EventService {
   // 取得開放報名的場次
   static async getOpenEvents(): Promise<Event[]> {
     try {
-      const response = await fetch(this.getApiUrl(`/events/open`));
+      return await queryCache.fetch('events:open', async () => {
+        const response = await fetch(this.getApiUrl(`/events/open`));
 
-      if (!response.ok) {
-        return [];
-      }
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
 
-      const data = await response.json();
-      return data.events || [];
+        const data = await response.json();
+        return data.events || [];
+      }, { entity: 'event' });
     } catch (error) {
       console.error('Error fetching open events:', error);
       return [];
@@ -906,14 +1006,16 @@ export class EventService {
   // 取得所有公開可見的場次（玩家用）
   static async getPublicEvents(): Promise<Event[]> {
     try {
-      const response = await fetch(this.getApiUrl(`/events/public`));
+      return await queryCache.fetch('events:public', async () => {
+        const response = await fetch(this.getApiUrl(`/events/public`));
 
-      if (!response.ok) {
-        return [];
-      }
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
 
-      const data = await response.json();
-      return data.events || [];
+        const data = await response.json();
+        return data.events || [];
+      }, { entity: 'event' });
     } catch (error) {
       console.error('Error fetching public events:', error);
       return [];
@@ -923,13 +1025,15 @@ export class EventService {
   // 取得單一場次
   static async getEvent(eventDate: string): Promise<Event | null> {
     try {
-      const response = await fetch(this.getApiUrl(`/events/${eventDate}`));
+      return await queryCache.fetch(`events:item:${eventDate}`, async () => {
+        const response = await fetch(this.getApiUrl(`/events/${eventDate}`));
 
-      if (!response.ok) {
-        return null;
-      }
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
 
-      return await response.json();
+        return await response.json();
+      });
     } catch (error) {
       console.error('Error fetching event:', error);
       return null;
@@ -977,6 +1081,7 @@ export class EventService {
         return { success: false, error: result.error };
       }
 
+      queryCache.invalidate('events');
       return { success: true, event: result.event };
     } catch (error) {
       console.error('Error creating event:', error);
@@ -997,6 +1102,7 @@ export class EventService {
         body: JSON.stringify({ status })
       });
 
+      if (response.ok) queryCache.invalidate('events');
       return response.ok;
     } catch (error) {
       console.error('Error updating event status:', error);
@@ -1029,6 +1135,7 @@ export class EventService {
 
       if (response.ok) {
         const result = await response.json();
+        queryCache.invalidate('events');
         return { success: true, ...result };
       } else {
         const error = await response.json();
@@ -1052,6 +1159,10 @@ export class EventService {
         }
       });
 
+      if (response.ok) {
+        queryCache.invalidate('events');
+        queryCache.invalidate('officers');
+      }
       return response.ok;
     } catch (error) {
       console.error('Error deleting event:', error);
@@ -1062,14 +1173,16 @@ export class EventService {
   // 取得場次的每日活動配置
   static async getDayConfig(eventDate: string): Promise<Record<string, ActivityType> | null> {
     try {
-      const response = await fetch(this.getApiUrl(`/events/${eventDate}/day-config`));
+      return await queryCache.fetch(`events:day-config:${eventDate}`, async () => {
+        const response = await fetch(this.getApiUrl(`/events/${eventDate}/day-config`));
 
-      if (!response.ok) {
-        return null;
-      }
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
 
-      const data = await response.json();
-      return data.dayConfig;
+        const data = await response.json();
+        return data.dayConfig;
+      });
     } catch (error) {
       console.error('Error fetching day config:', error);
       return null;
@@ -1089,6 +1202,7 @@ export class EventService {
         body: JSON.stringify({ dayConfig })
       });
 
+      if (response.ok) queryCache.invalidate('events');
       return response.ok;
     } catch (error) {
       console.error('Error updating day config:', error);
@@ -1099,22 +1213,17 @@ export class EventService {
   // 取得預設配置
   static async getDefaultDayConfig(): Promise<Record<string, ActivityType>> {
     try {
-      const response = await fetch(this.getApiUrl(`/events/config/default`));
+      // 預設配置幾乎不會變動，快取較久
+      return await queryCache.fetch('events:default-config', async () => {
+        const response = await fetch(this.getApiUrl(`/events/config/default`));
 
-      if (!response.ok) {
-        return {
-          monday: 'building',
-          tuesday: 'research',
-          wednesday: 'training',
-          thursday: 'training',
-          friday: 'building',
-          saturday: 'research',
-          sunday: 'research'
-        };
-      }
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
 
-      const data = await response.json();
-      return data.dayConfig;
+        const data = await response.json();
+        return data.dayConfig;
+      }, { staleMs: 10 * 60 * 1000 });
     } catch (error) {
       console.error('Error fetching default config:', error);
       return {
@@ -1161,11 +1270,25 @@ export interface AllianceMapItem {
 }
 
 export interface AllianceMapDetail extends AllianceMapItem {
+  version: number;
   alliances: { id: string; name: string; color: string }[];
   gridData: Record<string, string>;
   gridOwners: Record<string, string>;
 }
 
+export interface AllianceMapContent {
+  alliances: { id: string; name: string; color: string }[];
+  gridData: Record<string, string>;
+  gridOwners: Record<string, string>;
+}
+
+// 地圖格子差異（只包含有變動的格子）
+export interface AllianceMapPatch {
+  cells?: { key: string; alliance: string | null }[];
+  owners?: { key: string; owner: string | null }[];
+  alliances?: { id: string; name: string; color: string }[];
+}
+
 export class MapService {
   private static getApiUrl(endpoint: string): string {
     if (typeof window !== 'undefined' && window.location.hostname === 'localhost') {
@@ -1174,22 +1297,36 @@ export class MapService {
     return `/api-proxy.php?path=${endpoint.substring(1)}`;
   }
 
+  // 伺服器回傳的最新地圖寫回快取：詳情整份取代，列表只更新摘要欄位
+  private static cacheMap(map: AllianceMapDetail) {
+    queryCache.set(`maps:item:${map.id}`, map);
+    queryCache.setEntity<AllianceMapItem>('map', {
+      id: map.id,
+      title: map.title,
+      status: map.status,
+      createdAt: map.createdAt,
+      updatedAt: map.updatedAt,
+    });
+  }
+
   // 獲取所有地圖列表
   static async getAllMaps(): Promise<AllianceMapItem[]> {
     try {
-      const token = AuthService.getToken();
-      const response = await fetch(this.getApiUrl('/maps'), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      return await queryCache.fetch('maps:all', async () => {
+        const token = AuthService.getToken();
+        const response = await fetch(this.getApiUrl('/maps'), {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
         }
-      });
-
-      if (!response.ok) {
-        return [];
-      }
 
-      return await response.json();
+        return await response.json();
+      }, { entity: 'map' });
     } catch (error) {
       console.error('Error fetching maps:', error);
       return [];
@@ -1197,21 +1334,24 @@ export class MapService {
   }
 
   // 獲取單個地圖詳情
+  // 編輯時需要最新版本號，過期後不先回傳舊資料
   static async getMap(id: string): Promise<AllianceMapDetail | null> {
     try {
-      const token = AuthService.getToken();
-      const response = await fetch(this.getApiUrl(`/maps/${id}`), {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+      return await queryCache.fetch(`maps:item:${id}`, async () => {
+        const token = AuthService.getToken();
+        const response = await fetch(this.getApiUrl(`/maps/${id}`), {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
+
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
         }
-      });
-
-      if (!response.ok) {
-        return null;
-      }
 
-      return await response.json();
+        return await response.json();
+      }, { staleMs: 10 * 1000, swr: false });
     } catch (error) {
       console.error('Error fetching map:', error);
       return null;
@@ -1241,7 +1381,9 @@ export class MapService {
         return null;
       }
 
-      return await response.json();
+      const map: AllianceMapDetail = await response.json();
+      queryCache.invalidate('maps:all');
+      return map;
     } catch (error) {
       console.error('Error creating map:', error);
       return null;
@@ -1271,13 +1413,78 @@ export class MapService {
         return null;
       }
 
-      return await response.json();
+      const map: AllianceMapDetail = await response.json();
+      this.cacheMap(map);
+      return map;
     } catch (error) {
       console.error('Error updating map:', error);
       return null;
     }
   }
 
+  // 計算兩份地圖資料的格子差異，沒有變動時回傳 null
+  static diffMapData(prev: AllianceMapContent, next: AllianceMapContent): AllianceMapPatch | null {
+    const patch: AllianceMapPatch = {};
+
+    const cells: { key: string; alliance: string | null }[] = [];
+    for (const key of new Set([...Object.keys(prev.gridData), ...Object.keys(next.gridData)])) {
+      if (prev.gridData[key] !== next.gridData[key]) {
+        cells.push({ key, alliance: next.gridData[key] ?? null });
+      }
+    }
+    if (cells.length > 0) patch.cells = cells;
+
+    const owners: { key: string; owner: string | null }[] = [];
+    for (const key of new Set([...Object.keys(prev.gridOwners), ...Object.keys(next.gridOwners)])) {
+      if (prev.gridOwners[key] !== next.gridOwners[key]) {
+        owners.push({ key, owner: next.gridOwners[key] ?? null });
+      }
+    }
+    if (owners.length > 0) patch.owners = owners;
+
+    if (JSON.stringify(prev.alliances) !== JSON.stringify(next.alliances)) {
+      patch.alliances = next.alliances;
+    }
+
+    return Object.keys(patch).length > 0 ? patch : null;
+  }
+
+  // 以格子差異更新地圖；版本衝突時 conflict 為 true，map 為伺服器上的最新地圖
+  static async patchMap(
+    id: string,
+    baseVersion: number,
+    patch: AllianceMapPatch
+  ): Promise<{ map: AllianceMapDetail | null; conflict: boolean }> {
+    try {
+      const token = AuthService.getToken();
+      const response = await fetch(this.getApiUrl(`/maps/${id}`), {
+        method: 'PATCH',
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ baseVersion, ...patch })
+      });
+
+      if (response.status === 409) {
+        const data = await response.json();
+        if (data.map) this.cacheMap(data.map);
+        return { map: data.map, conflict: true };
+      }
+
+      if (!response.ok) {
+        return { map: null, conflict: false };
+      }
+
+      const map: AllianceMapDetail = await response.json();
+      this.cacheMap(map);
+      return { map, conflict: false };
+    } catch (error) {
+      console.error('Error patching map:', error);
+      return { map: null, conflict: false };
+    }
+  }
+
   // 更新地圖狀態
   static async updateMapStatus(id: string, status: 'open' | 'closed'): Promise<boolean> {
     try {
@@ -1291,6 +1498,10 @@ export class MapService {
         body: JSON.stringify({ status })
       });
 
+      if (response.ok) {
+        queryCache.setEntity<AllianceMapItem>('map', { id, status });
+        queryCache.invalidate(`maps:item:${id}`);
+      }
       return response.ok;
     } catch (error) {
       console.error('Error updating map status:', error);
@@ -1310,6 +1521,10 @@ export class MapService {
         }
       });
 
+      if (response.ok) {
+        queryCache.removeEntity('map', id);
+        queryCache.invalidate(`maps:item:${id}`);
+      }
       return response.ok;
     } catch (error) {
       console.error('Error deleting map:', error);
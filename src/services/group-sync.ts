@@ -0,0 +1,261 @@
+import { PlayerGroup } from '../../types';
+import { AuthService } from './auth';
+import { withStores, getAll, getOne, requestResult } from './offline-db';
+import { StorageService, StoredGroup, OutboxEntry, GROUP_ORDER_KEY, SYNCED_GROUPS_KEY } from './storage';
+
+// 分組的背景同步
+// 本地修改先寫入 IndexedDB 與 outbox，這裡在登入且連線時逐筆上傳（同一分組只送最後一次修改）
+// 衝突以修改時間較新的為準：伺服器較新時回傳 409，改用伺服器版本覆蓋本地
+// 伺服器不保留已刪除的分組：下載時，曾同步過但伺服器上已不存在、本地也沒有待上傳修改的分組視為在其他裝置刪除
+
+const API_URL = typeof window !== 'undefined' && window.location.hostname === 'localhost'
+  ? 'http://localhost:3001/api'
+  : '';
+const API_PROXY = '/api-proxy.php?path=';
+
+function getApiUrl(endpoint: string): string {
+  if (API_URL) {
+    return `${API_URL}${endpoint}`;
+  }
+  return `${API_PROXY}${endpoint.substring(1)}`;
+}
+
+// 修改後等待多久才上傳（合併連續的修改）
+const SYNC_DELAY_MS = 2000;
+// 失敗後的重試間隔上限
+const MAX_RETRY_DELAY_MS = 5 * 60 * 1000;
+
+interface RemoteGroup {
+  id: string;
+  data: PlayerGroup;
+  updatedAt: number;
+}
+
+// 不會因重試而成功的錯誤（例如分組過大），直接從 outbox 移除
+function isPermanentFailure(status: number): boolean {
+  return status >= 400 && status < 500 && status !== 401 && status !== 408 && status !== 429;
+}
+
+export class GroupSyncService {
+  private static timer: ReturnType<typeof setTimeout> | null = null;
+  private static flushing: Promise<void> | null = null;
+  // 上傳途中又有新的修改，完成後需要再上傳一次
+  private static pending = false;
+  private static retryDelay = SYNC_DELAY_MS;
+  private static initialPull: Promise<void> | null = null;
+  private static listeners = new Set<() => void>();
+
+  // 開始背景同步：先下載伺服器上的分組，再上傳尚未同步的修改；恢復連線時自動重試
+  // 回傳的 Promise 在第一次下載完成（或失敗）後 resolve，畫面應等它完成再載入分組，
+  // 避免在還沒看到伺服器資料前就建立同 ID 的新分組並覆蓋伺服器上的版本
+  static start(): Promise<void> {
+    if (this.initialPull) return this.initialPull;
+    if (typeof window === 'undefined') return Promise.resolve();
+    // 恢復連線時重新下載（取得離線期間其他裝置的修改與刪除）再上傳
+    window.addEventListener('online', () => {
+      this.pull()
+        .catch(error => console.warn('Group pull failed', error))
+        .finally(() => this.schedule(0));
+    });
+    this.initialPull = this.pull()
+      .then(() => undefined)
+      .catch(error => console.warn('Group pull failed', error))
+      .finally(() => this.schedule(0));
+    return this.initialPull;
+  }
+
+  // 伺服器版本寫入本地後通知（畫面需重新載入分組），回傳取消訂閱函數
+  static subscribe(listener: () => void): () => void {
+    this.listeners.add(listener);
+    return () => {
+      this.listeners.delete(listener);
+    };
+  }
+
+  static schedule(delay = SYNC_DELAY_MS) {
+    if (this.timer) clearTimeout(this.timer);
+    this.timer = setTimeout(() => {
+      this.timer = null;
+      this.flush().catch(error => {
+        console.warn('Group sync failed, will retry', error);
+        this.schedule(this.retryDelay);
+        this.retryDelay = Math.min(this.retryDelay * 2, MAX_RETRY_DELAY_MS);
+      });
+    }, delay);
+  }
+
+  // 上傳 outbox 中所有修改
+  static async flush(): Promise<void> {
+    if (this.flushing) {
+      this.pending = true;
+      return this.flushing;
+    }
+    this.flushing = (async () => {
+      do {
+        this.pending = false;
+        await this.flushOnce();
+      } while (this.pending);
+      this.retryDelay = SYNC_DELAY_MS;
+    })();
+    try {
+      await this.flushing;
+    } finally {
+      this.flushing = null;
+    }
+  }
+
+  // 下載伺服器上的分組並合併到本地，回傳本地是否有變動
+  static async pull(): Promise<boolean> {
+    const token = AuthService.getToken();
+    if (!token) return false;
+    // 先清除其他使用者留下的分組，再合併目前帳號的分組
+    const owner = await StorageService.ensureOwner();
+    if (!owner) return false;
+
+    // 下載前已同步的分組；下載途中才上傳的分組不在回應中，不能視為已刪除
+    const syncedBefore = await getOne<{ key: string; value: string[] }>('meta', SYNCED_GROUPS_KEY);
+    const response = await fetch(getApiUrl('/groups'), {
+      headers: { 'Authorization': `Bearer ${token}` },
+    });
+    if (!response.ok) return false;
+
+    const groups: RemoteGroup[] = await response.json();
+    const changed = await this.applyRemote(groups, new Set(syncedBefore?.value || []));
+    if (changed) this.notify();
+    return changed;
+  }
+
+  private static async flushOnce() {
+    const token = AuthService.getToken();
+    if (!token || (typeof navigator !== 'undefined' && !navigator.onLine)) return;
+    // outbox 屬於其他使用者（登出或切換帳號）時先清除，不上傳到目前帳號
+    const owner = await StorageService.ensureOwner();
+    if (!owner) return;
+
+    const entries = await getAll<OutboxEntry>('outbox');
+    let remoteChanged = false;
+    for (const entry of entries) {
+      const url = getApiUrl(`/groups/${encodeURIComponent(entry.id)}`);
+      let response: Response;
+      if (entry.op === 'put') {
+        const record = await getOne<StoredGroup>('groups', entry.id);
+        if (!record) {
+          await this.acknowledge(entry, null);
+          continue;
+        }
+        response = await fetch(url, {
+          method: 'PUT',
+          headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
+          body: JSON.stringify({ data: record.group, updatedAt: record.updatedAt }),
+        });
+        if (response.status === 409) {
+          const { group } = await response.json();
+          // 沒有附上伺服器版本（同時寫入衝突）時稍後重送
+          if (!group) throw new Error('Group sync conflict, retrying');
+          if (await this.applyRemote([group])) remoteChanged = true;
+          await this.acknowledge(entry, true);
+          continue;
+        }
+      } else {
+        response = await fetch(url, {
+          method: 'DELETE',
+          headers: { 'Authorization': `Bearer ${token}` },
+        });
+      }
+
+      // 登入過期：保留 outbox，重新登入後再同步
+      if (response.status === 401) break;
+      if (!response.ok && !isPermanentFailure(response.status)) {
+        throw new Error(`Group sync failed: ${response.status}`);
+      }
+      if (!response.ok) {
+        console.warn(`Group ${entry.id} rejected by server (${response.status}), dropping local change from sync queue`);
+      }
+      // 被拒絕的新分組不會記為已同步，之後下載時不會因伺服器沒有而被刪除
+      const onServer = entry.op === 'delete' ? false : response.ok ? true : null;
+      await this.acknowledge(entry, onServer);
+    }
+    if (remoteChanged) this.notify();
+  }
+
+  // 從 outbox 移除已上傳的修改；上傳途中又被修改過的保留，下次再送
+  // onServer：伺服器上是否有此分組（null 表示不變）
+  private static async acknowledge(entry: OutboxEntry, onServer: boolean | null) {
+    await withStores(['outbox', 'meta'], 'readwrite', async tx => {
+      const outbox = tx.objectStore('outbox');
+      const meta = tx.objectStore('meta');
+      const [current, syncedRecord] = await Promise.all([
+        requestResult(outbox.get(entry.id) as IDBRequest<OutboxEntry | undefined>),
+        requestResult(meta.get(SYNCED_GROUPS_KEY) as IDBRequest<{ key: string; value: string[] } | undefined>),
+      ]);
+      if (current?.updatedAt === entry.updatedAt) outbox.delete(entry.id);
+
+      if (onServer === null) return;
+      const synced = new Set(syncedRecord?.value || []);
+      if (synced.has(entry.id) === onServer) return;
+      if (onServer) synced.add(entry.id);
+      else synced.delete(entry.id);
+      meta.put({ key: SYNCED_GROUPS_KEY, value: [...synced] });
+    });
+  }
+
+  // 伺服器版本較新、且本地沒有待上傳的較新修改時，覆蓋本地分組
+  // 傳入 syncedBefore 時 groups 是伺服器上的完整列表：下載前已同步過但不在列表中、且沒有待上傳修改的分組從本地刪除
+  private static async applyRemote(groups: RemoteGroup[], syncedBefore?: ReadonlySet<string>): Promise<boolean> {
+    if (groups.length === 0 && !syncedBefore) return false;
+    return withStores(['groups', 'outbox', 'meta'], 'readwrite', async tx => {
+      const groupStore = tx.objectStore('groups');
+      const outbox = tx.objectStore('outbox');
+      const meta = tx.objectStore('meta');
+      const [orderRecord, syncedRecord] = await Promise.all([
+        requestResult(meta.get(GROUP_ORDER_KEY) as IDBRequest<{ key: string; value: string[] } | undefined>),
+        requestResult(meta.get(SYNCED_GROUPS_KEY) as IDBRequest<{ key: string; value: string[] } | undefined>),
+      ]);
+      let order = orderRecord?.value || [];
+      const synced = new Set(syncedRecord?.value || []);
+      const remoteIds = new Set(groups.map(group => group.id));
+      let changed = false;
+
+      if (syncedBefore) {
+        for (const id of [...synced]) {
+          if (remoteIds.has(id) || !syncedBefore.has(id)) continue;
+          synced.delete(id);
+          const queued = await requestResult(outbox.get(id) as IDBRequest<OutboxEntry | undefined>);
+          if (queued) continue;
+          groupStore.delete(id);
+          order = order.filter(orderId => orderId !== id);
+          changed = true;
+        }
+      }
+      for (const id of remoteIds) synced.add(id);
+
+      for (const remote of groups) {
+        const [local, queued] = await Promise.all([
+          requestResult(groupStore.get(remote.id) as IDBRequest<StoredGroup | undefined>),
+          requestResult(outbox.get(remote.id) as IDBRequest<OutboxEntry | undefined>),
+        ]);
+        if (queued && queued.updatedAt >= remote.updatedAt) continue;
+        if (local && local.updatedAt >= remote.updatedAt) continue;
+
+        groupStore.put({ id: remote.id, group: { ...remote.data, id: remote.id }, updatedAt: remote.updatedAt } as StoredGroup);
+        if (queued) outbox.delete(remote.id);
+        if (!order.includes(remote.id)) order.push(remote.id);
+        changed = true;
+      }
+
+      if (changed) meta.put({ key: GROUP_ORDER_KEY, value: order });
+      meta.put({ key: SYNCED_GROUPS_KEY, value: [...synced] });
+      return changed;
+    });
+  }
+
+  private static notify() {
+    for (const listener of [...this.listeners]) {
+      try {
+        listener();
+      } catch (error) {
+        console.error('Group sync listener failed', error);
+      }
+    }
+  }
+}
@@ -0,0 +1,107 @@
+// 前端離線資料庫（IndexedDB）
+// - groups：分組，每個分組一筆，修改時只寫入變動的那筆
+// - players：玩家資料快取，以 fid 為 key，附上取得時間供 TTL 判斷
+// - outbox：尚未同步到伺服器的分組變更，每個分組只保留最後一次
+// - meta：其他小型資料（例如匯入面板的玩家順序）
+
+const DB_NAME = 'wos_offline';
+const DB_VERSION = 1;
+
+export type StoreName = 'groups' | 'players' | 'outbox' | 'meta';
+
+let dbPromise: Promise<IDBDatabase> | null = null;
+
+function openDb(): Promise<IDBDatabase> {
+  if (!dbPromise) {
+    dbPromise = new Promise<IDBDatabase>((resolve, reject) => {
+      if (typeof indexedDB === 'undefined') {
+        reject(new Error('IndexedDB is not available'));
+        return;
+      }
+      const request = indexedDB.open(DB_NAME, DB_VERSION);
+      request.onupgradeneeded = () => {
+        const db = request.result;
+        if (!db.objectStoreNames.contains('groups')) db.createObjectStore('groups', { keyPath: 'id' });
+        if (!db.objectStoreNames.contains('players')) db.createObjectStore('players', { keyPath: 'fid' });
+        if (!db.objectStoreNames.contains('outbox')) db.createObjectStore('outbox', { keyPath: 'id' });
+        if (!db.objectStoreNames.contains('meta')) db.createObjectStore('meta', { keyPath: 'key' });
+      };
+      request.onsuccess = () => {
+        const db = request.result;
+        // 其他分頁升級資料庫版本時關閉連線，下次使用時重新開啟
+        db.onversionchange = () => {
+          db.close();
+          dbPromise = null;
+        };
+        resolve(db);
+      };
+      request.onerror = () => reject(request.error);
+      request.onblocked = () => reject(new Error('IndexedDB upgrade blocked by another tab'));
+    });
+    // 開啟失敗時允許之後重試
+    dbPromise.catch(() => {
+      dbPromise = null;
+    });
+  }
+  return dbPromise;
+}
+
+export function requestResult<T>(request: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+// 在同一個 transaction 內執行 fn，transaction 完成（寫入已落地）後才 resolve
+export async function withStores<T>(
+  stores: StoreName[],
+  mode: IDBTransactionMode,
+  fn: (tx: IDBTransaction) => T | Promise<T>
+): Promise<T> {
+  const db = await openDb();
+  const tx = db.transaction(stores, mode);
+  const done = new Promise<void>((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error || new Error('IndexedDB transaction aborted'));
+  });
+  try {
+    const result = await fn(tx);
+    await done;
+    return result;
+  } catch (error) {
+    // fn 失敗時放棄整個 transaction，已送出的寫入不會生效
+    done.catch(() => {});
+    try {
+      tx.abort();
+    } catch {
+      // transaction 已經結束
+    }
+    throw error;
+  }
+}
+
+export async function getAll<T>(store: StoreName): Promise<T[]> {
+  return withStores([store], 'readonly', tx => requestResult(tx.objectStore(store).getAll() as IDBRequest<T[]>));
+}
+
+export async function getOne<T>(store: StoreName, key: string): Promise<T | undefined> {
+  return withStores([store], 'readonly', tx => requestResult(tx.objectStore(store).get(key) as IDBRequest<T | undefined>));
+}
+
+export async function getMany<T>(store: StoreName, keys: string[]): Promise<(T | undefined)[]> {
+  if (keys.length === 0) return [];
+  return withStores([store], 'readonly', tx => {
+    const objectStore = tx.objectStore(store);
+    return Promise.all(keys.map(key => requestResult(objectStore.get(key) as IDBRequest<T | undefined>)));
+  });
+}
+
+export async function putMany(store: StoreName, values: unknown[]): Promise<void> {
+  if (values.length === 0) return;
+  await withStores([store], 'readwrite', tx => {
+    const objectStore = tx.objectStore(store);
+    for (const value of values) objectStore.put(value);
+  });
+}
@@ -0,0 +1,247 @@
+// 前端資料快取層
+// - 正規化：列表查詢只記錄 id，實體（報名、場次、地圖…）每筆只存一份，更新一筆時所有包含它的列表一起更新
+// - 同一個查詢 key 進行中的請求共用同一個 Promise，不會重複發送
+// - stale-while-revalidate：資料超過 staleMs 後先回傳快取，同時在背景重新載入
+// - 變更後以 setEntity / removeEntity 直接更新快取，或以 invalidate(prefix) 讓相關查詢失效（下次讀取必定重新載入）
+// 查詢 key 以 ':' 分段，例如 submissions:all、events:day-config:2025-01-01
+
+type Entity = { id: string } & Record<string, any>;
+type Listener = () => void;
+
+export interface QueryOptions {
+  // 回傳陣列時，以此實體類型正規化（每筆需有 id）
+  entity?: string;
+  // 資料在多久內視為新鮮，不重新請求
+  staleMs?: number;
+  // false：過期時等待重新載入完成，不先回傳舊資料（例如需要最新版本號的編輯器）
+  swr?: boolean;
+}
+
+interface QueryEntry {
+  fetcher: () => Promise<any>;
+  entity?: string;
+  staleMs: number;
+  swr: boolean;
+  hasData: boolean;
+  ids?: string[];
+  value?: any;
+  // 由 ids 組出的陣列，實體有變動時才重新產生（讓 React state 可以比較參考）
+  snapshot?: Entity[];
+  fetchedAt: number;
+  invalidated: boolean;
+  promise?: Promise<any>;
+  // 每次發出請求遞增；只有最新一次請求的結果會寫入快取
+  requestId: number;
+}
+
+const DEFAULT_STALE_MS = 30 * 1000;
+
+export class QueryCache {
+  private entities = new Map<string, Map<string, Entity>>();
+  private queries = new Map<string, QueryEntry>();
+  private listeners = new Map<string, Set<Listener>>();
+  // clear() 後遞增，丟棄清除前發出的請求結果（例如登出後才回來的回應）
+  private generation = 0;
+
+  // 取得查詢結果：新鮮時直接回傳快取，過期時回傳快取並在背景更新，沒有資料或已失效時等待請求
+  async fetch<T>(key: string, fetcher: () => Promise<T>, options: QueryOptions = {}): Promise<T> {
+    let entry = this.queries.get(key);
+    if (!entry) {
+      entry = { fetcher, staleMs: DEFAULT_STALE_MS, swr: true, hasData: false, fetchedAt: 0, invalidated: false, requestId: 0 };
+      this.queries.set(key, entry);
+    }
+    // 每次都換成最新的 fetcher（閉包內的 token 可能已更新）
+    entry.fetcher = fetcher;
+    entry.entity = options.entity;
+    entry.staleMs = options.staleMs ?? DEFAULT_STALE_MS;
+    entry.swr = options.swr ?? true;
+
+    if (entry.hasData && !this.isStale(entry)) return this.read(entry);
+    if (entry.hasData && entry.swr && !entry.invalidated) {
+      this.load(key, entry).catch(error => console.warn(`Background refresh failed: ${key}`, error));
+      return this.read(entry);
+    }
+    return this.load(key, entry);
+  }
+
+  // 只讀取快取，不發出請求
+  peek<T>(key: string): T | undefined {
+    const entry = this.queries.get(key);
+    return entry?.hasData ? this.read(entry) : undefined;
+  }
+
+  // 訂閱查詢結果的變動，回傳取消訂閱函數
+  subscribe(key: string, listener: Listener): () => void {
+    let set = this.listeners.get(key);
+    if (!set) {
+      set = new Set();
+      this.listeners.set(key, set);
+    }
+    set.add(listener);
+    return () => {
+      set!.delete(listener);
+      if (set!.size === 0) this.listeners.delete(key);
+    };
+  }
+
+  // 直接寫入非列表查詢的結果（例如更新地圖後伺服器回傳的最新內容）
+  set<T>(key: string, value: T) {
+    const entry = this.queries.get(key);
+    if (!entry || entry.ids) return;
+    entry.value = value;
+    entry.hasData = true;
+    entry.fetchedAt = Date.now();
+    entry.invalidated = false;
+    this.notify(key);
+  }
+
+  // 合併更新一筆實體，所有包含它的列表都會看到新資料；回傳合併後的實體
+  setEntity<T extends Entity>(type: string, entity: Partial<T> & { id: string }): T {
+    const table = this.table(type);
+    const merged = { ...table.get(entity.id), ...entity } as T;
+    table.set(entity.id, merged);
+    this.touch(type, new Set([entity.id]));
+    return merged;
+  }
+
+  // 從快取與所有列表移除一筆實體
+  removeEntity(type: string, id: string) {
+    this.removeWhere(type, entity => entity.id === id);
+  }
+
+  // 移除符合條件的實體（例如刪除用戶時連帶移除其報名）
+  removeWhere(type: string, predicate: (entity: Entity) => boolean) {
+    const table = this.table(type);
+    const removed = new Set<string>();
+    for (const [id, entity] of table) {
+      if (predicate(entity)) removed.add(id);
+    }
+    if (removed.size === 0) return;
+
+    for (const id of removed) table.delete(id);
+    for (const [key, entry] of this.queries) {
+      if (entry.entity !== type || !entry.ids?.some(id => removed.has(id))) continue;
+      entry.ids = entry.ids.filter(id => !removed.has(id));
+      entry.snapshot = undefined;
+      this.notify(key);
+    }
+  }
+
+  // 在已載入的列表最前面加入一筆實體（已存在時改為合併更新）
+  insert<T extends Entity>(key: string, entity: T) {
+    const entry = this.queries.get(key);
+    if (!entry?.entity || !entry.ids) return;
+    if (entry.ids.includes(entity.id)) {
+      this.setEntity(entry.entity, entity);
+      return;
+    }
+    this.table(entry.entity).set(entity.id, entity);
+    entry.ids = [entity.id, ...entry.ids];
+    entry.snapshot = undefined;
+    this.notify(key);
+  }
+
+  // 讓 key 等於 prefix 或以 `${prefix}:` 開頭的查詢失效；有訂閱者的查詢立即重新載入
+  invalidate(prefix: string) {
+    for (const [key, entry] of this.queries) {
+      if (key !== prefix && !key.startsWith(`${prefix}:`)) continue;
+      entry.invalidated = true;
+      // 進行中的請求可能在變更前就已發出，不再共用它的結果
+      entry.promise = undefined;
+      if (this.listeners.has(key)) {
+        this.load(key, entry).catch(error => console.warn(`Refresh failed: ${key}`, error));
+      }
+    }
+  }
+
+  // 清除全部快取（登出、切換帳號時）
+  clear() {
+    this.generation++;
+    this.entities.clear();
+    this.queries.clear();
+    for (const key of this.listeners.keys()) this.notify(key);
+  }
+
+  private isStale(entry: QueryEntry): boolean {
+    return entry.invalidated || Date.now() - entry.fetchedAt >= entry.staleMs;
+  }
+
+  private load(key: string, entry: QueryEntry): Promise<any> {
+    if (entry.promise) return entry.promise;
+
+    const generation = this.generation;
+    const requestId = ++entry.requestId;
+    const promise = entry.fetcher()
+      .then(data => {
+        if (generation !== this.generation || requestId !== entry.requestId) return data;
+        this.store(key, entry, data);
+        return this.read(entry);
+      })
+      .finally(() => {
+        if (entry.promise === promise) entry.promise = undefined;
+      });
+    entry.promise = promise;
+    return promise;
+  }
+
+  private store(key: string, entry: QueryEntry, data: any) {
+    if (entry.entity && Array.isArray(data) && data.every(item => item && typeof item.id === 'string')) {
+      const table = this.table(entry.entity);
+      // 與既有資料合併：不同端點回傳的欄位可能不同（例如 /submissions/my 不含 user 關聯）
+      for (const item of data) table.set(item.id, { ...table.get(item.id), ...item });
+      entry.ids = data.map(item => item.id);
+      entry.value = undefined;
+      entry.snapshot = undefined;
+      // 其他列表中的同一筆實體也換成新資料
+      this.touch(entry.entity, new Set(entry.ids), key);
+    } else {
+      entry.ids = undefined;
+      entry.value = data;
+    }
+    entry.hasData = true;
+    entry.fetchedAt = Date.now();
+    entry.invalidated = false;
+    this.notify(key);
+  }
+
+  private read(entry: QueryEntry): any {
+    if (!entry.ids) return entry.value;
+    if (!entry.snapshot) {
+      const table = this.table(entry.entity!);
+      entry.snapshot = entry.ids.map(id => table.get(id)).filter((item): item is Entity => item !== undefined);
+    }
+    return entry.snapshot;
+  }
+
+  // 實體變動後，重建包含這些 id 的列表並通知訂閱者
+  private touch(type: string, ids: Set<string>, skipKey?: string) {
+    for (const [key, entry] of this.queries) {
+      if (key === skipKey || entry.entity !== type || !entry.ids?.some(id => ids.has(id))) continue;
+      entry.snapshot = undefined;
+      this.notify(key);
+    }
+  }
+
+  private table(type: string): Map<string, Entity> {
+    let table = this.entities.get(type);
+    if (!table) {
+      table = new Map();
+      this.entities.set(type, table);
+    }
+    return table;
+  }
+
+  private notify(key: string) {
+    const set = this.listeners.get(key);
+    if (!set) return;
+    for (const listener of [...set]) {
+      try {
+        listener();
+      } catch (error) {
+        console.error(`Query listener failed: ${key}`, error);
+      }
+    }
+  }
+}
+
+export const queryCache = new QueryCache();
@@ -0,0 +1,41 @@
+// 即時推送（Server-Sent Events）
+// 伺服器推送格式：{ topic, type, data }，type 為 'resync' 時代表遺漏事件，需重新載入完整資料
+
+export interface RealtimeMessage<T = any> {
+  topic: string;
+  type: string;
+  data: T;
+}
+
+function getStreamUrl(topics: string[], token?: string | null): string {
+  const params = new URLSearchParams({ topics: topics.join(',') });
+  if (token) params.set('token', token);
+  if (typeof window !== 'undefined' && window.location.hostname === 'localhost') {
+    return `http://localhost:3001/api/stream?${params.toString()}`;
+  }
+  return `/api/stream?${params.toString()}`;
+}
+
+// 訂閱主題，回傳取消訂閱函數
+// 瀏覽器不支援 EventSource 時不做任何事，畫面仍可透過手動重新整理取得資料
+export function subscribeTopics(
+  topics: string[],
+  onMessage: (message: RealtimeMessage) => void,
+  token?: string | null
+): () => void {
+  if (typeof window === 'undefined' || typeof EventSource === 'undefined' || topics.length === 0) {
+    return () => {};
+  }
+
+  // EventSource 斷線會自動重連，並帶上 Last-Event-ID 讓伺服器補發
+  const source = new EventSource(getStreamUrl(topics, token));
+  source.onmessage = (event) => {
+    try {
+      onMessage(JSON.parse(event.data));
+    } catch (error) {
+      console.error('Invalid realtime message:', error);
+    }
+  };
+
+  return () => source.close();
+}
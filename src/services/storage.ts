@@ -1,23 +1,340 @@
+import { PlayerGroup, Player } from '../../types';
+import { withStores, getAll, getOne, getMany, putMany, requestResult } from './offline-db';
+import { GroupSyncService } from './group-sync';
+import { AuthService } from './auth';
+
+// 分組與玩家資料的本地儲存（IndexedDB）
+// 每個分組、每位玩家各自一筆，修改時只寫入變動的紀錄；分組變更同時記入 outbox，由 GroupSyncService 在背景上傳
+// 分組與 outbox 屬於目前登入的使用者（記錄在 meta.owner）；登出或切換帳號後第一次存取時，
+// 上一位使用者的分組與未上傳的修改移到 meta 另外保存，該使用者再次登入時還原，
+// 不會把上一位使用者的分組上傳到新帳號，也不會遺失離線修改。未登入時建立的分組由第一個登入的使用者接收
+// 瀏覽器不支援 IndexedDB（例如部分無痕模式）時退回 localStorage
+
+const LEGACY_GROUPS_KEY = 'wos_groups';
+const LAST_IMPORT_IDS_KEY = 'wos_last_import_ids';
+export const GROUP_ORDER_KEY = 'groupOrder';
+// 伺服器上已有的分組 ID；下載時伺服器沒有、本地也沒有待上傳修改的，代表已在其他裝置刪除
+export const SYNCED_GROUPS_KEY = 'syncedGroups';
+const FOUND_PLAYERS_KEY = 'foundPlayers';
+const OWNER_KEY = 'owner';
+const STASH_KEY_PREFIX = 'stash:';
+
+export interface StoredGroup {
+  id: string;
+  group: PlayerGroup;
+  // 本地最後修改時間，同步時以較新的為準
+  updatedAt: number;
+}
+
+export interface OutboxEntry {
+  // 分組 ID
+  id: string;
+  op: 'put' | 'delete';
+  updatedAt: number;
+}
+
+export interface StoredPlayer {
+  fid: string;
+  player: Player;
+  // 從伺服器取得的時間，0 表示來源不明（視為過期）
+  fetchedAt: number;
+}
+
+interface MetaRecord<T> {
+  key: string;
+  value: T;
+}
+
+// 其他使用者的分組資料（切換帳號時保存）
+interface OwnerStash {
+  groups: StoredGroup[];
+  outbox: OutboxEntry[];
+  order: string[];
+  synced: string[];
+}
+
 export class StorageService {
-  static saveGroup(group: any): void {
-    const groups = this.getAllGroups();
-    const existing = groups.findIndex(g => g.id === group.id);
-    if (existing >= 0) {
-      groups[existing] = group;
-    } else {
-      groups.push(group);
+  // 最後一次寫入（或載入）的分組，saveGroups 以參考比較找出有變動的分組
+  private static savedGroups = new Map<string, PlayerGroup>();
+  private static savedGroupOrder: string[] = [];
+  // 已寫入 players 表的玩家物件
+  private static persistedPlayers = new WeakSet<Player>();
+  private static useLegacyStorage = false;
+  // loadGroups 時的使用者；身分改變後，畫面上舊的分組不再寫入
+  private static loadedOwner: string | null = null;
+
+  // ======== 分組 ========
+
+  static async loadGroups(): Promise<PlayerGroup[]> {
+    if (this.useLegacyStorage) return this.loadLegacyGroups();
+    try {
+      await this.migrateLegacyGroups();
+      this.loadedOwner = await this.ensureOwner();
+      const [records, order] = await Promise.all([
+        getAll<StoredGroup>('groups'),
+        getOne<MetaRecord<string[]>>('meta', GROUP_ORDER_KEY),
+      ]);
+      const groups = this.sortGroups(records, order?.value || []).map(record => record.group);
+
+      this.savedGroups = new Map(groups.map(group => [group.id, group]));
+      this.savedGroupOrder = groups.map(group => group.id);
+      return groups;
+    } catch (error) {
+      console.warn('IndexedDB unavailable, falling back to localStorage', error);
+      this.useLegacyStorage = true;
+      return this.loadLegacyGroups();
     }
-    localStorage.setItem('wos_groups', JSON.stringify(groups));
   }
 
-  static getAllGroups(): any[] {
-    const stored = localStorage.getItem('wos_groups');
+  // 寫入整份分組列表；只有參考改變的分組會被寫入，列表中已不存在的分組會被刪除
+  static async saveGroups(groups: PlayerGroup[]): Promise<void> {
+    if (this.useLegacyStorage) {
+      localStorage.setItem(LEGACY_GROUPS_KEY, JSON.stringify(groups));
+      return;
+    }
+
+    // 載入後登入身分已改變：這份分組屬於上一位使用者，不寫入
+    if ((await this.ensureOwner()) !== this.loadedOwner) return;
+
+    const changed = groups.filter(group => this.savedGroups.get(group.id) !== group);
+    const ids = new Set(groups.map(group => group.id));
+    const removed = [...this.savedGroups.keys()].filter(id => !ids.has(id));
+    const order = groups.map(group => group.id);
+    const orderChanged = order.length !== this.savedGroupOrder.length || order.some((id, i) => id !== this.savedGroupOrder[i]);
+    if (changed.length === 0 && removed.length === 0 && !orderChanged) return;
+
+    // 先更新比較基準，連續快速修改時不會重複寫入同一份資料；寫入失敗時還原，下次儲存會重試
+    const previousGroups = this.savedGroups;
+    const previousOrder = this.savedGroupOrder;
+    this.savedGroups = new Map(groups.map(group => [group.id, group]));
+    this.savedGroupOrder = order;
+
+    const now = Date.now();
+    try {
+      await this.writeGroups(changed, removed, orderChanged ? order : null, now);
+    } catch (error) {
+      this.savedGroups = previousGroups;
+      this.savedGroupOrder = previousOrder;
+      throw error;
+    }
+    if (changed.length > 0 || removed.length > 0) GroupSyncService.schedule();
+  }
+
+  private static async writeGroups(changed: PlayerGroup[], removed: string[], order: string[] | null, now: number) {
+    await withStores(['groups', 'outbox', 'meta'], 'readwrite', tx => {
+      const groupStore = tx.objectStore('groups');
+      const outbox = tx.objectStore('outbox');
+      for (const group of changed) {
+        groupStore.put({ id: group.id, group, updatedAt: now } as StoredGroup);
+        outbox.put({ id: group.id, op: 'put', updatedAt: now } as OutboxEntry);
+      }
+      for (const id of removed) {
+        groupStore.delete(id);
+        outbox.put({ id, op: 'delete', updatedAt: now } as OutboxEntry);
+      }
+      if (order) {
+        tx.objectStore('meta').put({ key: GROUP_ORDER_KEY, value: order } as MetaRecord<string[]>);
+      }
+    });
+  }
+
+  // 確認本地分組屬於目前登入的使用者；不是時保存上一位使用者的分組並還原目前使用者的分組，回傳目前使用者 ID
+  static async ensureOwner(): Promise<string | null> {
+    const userId = AuthService.getCurrentUserId();
+    const changed = await withStores(['groups', 'outbox', 'meta'], 'readwrite', async tx => {
+      const groupStore = tx.objectStore('groups');
+      const outbox = tx.objectStore('outbox');
+      const meta = tx.objectStore('meta');
+      const record = await requestResult(meta.get(OWNER_KEY) as IDBRequest<MetaRecord<string | null> | undefined>);
+      const owner = record?.value ?? null;
+      if (owner === userId) return false;
+
+      meta.put({ key: OWNER_KEY, value: userId } as MetaRecord<string | null>);
+      let changed = false;
+      if (owner !== null) {
+        const [groups, entries, order, synced] = await Promise.all([
+          requestResult(groupStore.getAll() as IDBRequest<StoredGroup[]>),
+          requestResult(outbox.getAll() as IDBRequest<OutboxEntry[]>),
+          requestResult(meta.get(GROUP_ORDER_KEY) as IDBRequest<MetaRecord<string[]> | undefined>),
+          requestResult(meta.get(SYNCED_GROUPS_KEY) as IDBRequest<MetaRecord<string[]> | undefined>),
+        ]);
+        if (groups.length > 0 || entries.length > 0) {
+          const stash: OwnerStash = { groups, outbox: entries, order: order?.value || [], synced: synced?.value || [] };
+          meta.put({ key: STASH_KEY_PREFIX + owner, value: stash } as MetaRecord<OwnerStash>);
+        }
+        groupStore.clear();
+        outbox.clear();
+        meta.delete(GROUP_ORDER_KEY);
+        meta.delete(SYNCED_GROUPS_KEY);
+        changed = true;
+      }
+      if (userId !== null && (await this.restoreStash(tx, userId))) changed = true;
+      return changed;
+    });
+    if (changed) {
+      this.savedGroups = new Map();
+      this.savedGroupOrder = [];
+    }
+    return userId;
+  }
+
+  // 還原使用者先前保存的分組；未登入時建立的分組（仍在原處）保留，同 ID 時以它為準
+  private static async restoreStash(tx: IDBTransaction, userId: string): Promise<boolean> {
+    const groupStore = tx.objectStore('groups');
+    const outbox = tx.objectStore('outbox');
+    const meta = tx.objectStore('meta');
+    const stashKey = STASH_KEY_PREFIX + userId;
+    const record = await requestResult(meta.get(stashKey) as IDBRequest<MetaRecord<OwnerStash> | undefined>);
+    if (!record) return false;
+
+    const [groupIds, outboxIds, order, synced] = await Promise.all([
+      requestResult(groupStore.getAllKeys()),
+      requestResult(outbox.getAllKeys()),
+      requestResult(meta.get(GROUP_ORDER_KEY) as IDBRequest<MetaRecord<string[]> | undefined>),
+      requestResult(meta.get(SYNCED_GROUPS_KEY) as IDBRequest<MetaRecord<string[]> | undefined>),
+    ]);
+    const existingGroups = new Set(groupIds.map(String));
+    const existingOutbox = new Set(outboxIds.map(String));
+    const stash = record.value;
+    for (const group of stash.groups) {
+      if (!existingGroups.has(group.id)) groupStore.put(group);
+    }
+    for (const entry of stash.outbox) {
+      if (!existingOutbox.has(entry.id)) outbox.put(entry);
+    }
+    meta.put({ key: GROUP_ORDER_KEY, value: [...new Set([...stash.order, ...(order?.value || [])])] } as MetaRecord<string[]>);
+    meta.put({ key: SYNCED_GROUPS_KEY, value: [...new Set([...stash.synced, ...(synced?.value || [])])] } as MetaRecord<string[]>);
+    meta.delete(stashKey);
+    return true;
+  }
+
+  // 把畫面上的分組視為已保存（例如沒有任何分組時建立的空白預設分組）；
+  // 之後沒有修改就不會寫入、也不會上傳，不會覆蓋伺服器上同 ID 的分組
+  static markSaved(groups: PlayerGroup[]) {
+    if (this.useLegacyStorage) return;
+    this.savedGroups = new Map(groups.map(group => [group.id, group]));
+    this.savedGroupOrder = groups.map(group => group.id);
+  }
+
+  static async saveGroup(group: PlayerGroup): Promise<void> {
+    const groups = await this.getAllGroups();
+    const index = groups.findIndex(g => g.id === group.id);
+    await this.saveGroups(index >= 0 ? groups.map(g => (g.id === group.id ? group : g)) : [...groups, group]);
+  }
+
+  static async getAllGroups(): Promise<PlayerGroup[]> {
+    if (this.useLegacyStorage) return this.loadLegacyGroups();
+    if (this.savedGroupOrder.length === 0) return this.loadGroups();
+    return this.savedGroupOrder.map(id => this.savedGroups.get(id)!);
+  }
+
+  static async deleteGroup(groupId: string): Promise<void> {
+    const groups = await this.getAllGroups();
+    await this.saveGroups(groups.filter(g => g.id !== groupId));
+  }
+
+  // 依記錄的順序排列分組，順序中沒有的（例如從伺服器同步下來的）排在最後
+  private static sortGroups(records: StoredGroup[], order: string[]): StoredGroup[] {
+    const position = new Map(order.map((id, i) => [id, i]));
+    return [...records].sort((a, b) => (position.get(a.id) ?? Infinity) - (position.get(b.id) ?? Infinity));
+  }
+
+  // 舊版整份存在 localStorage 的分組，第一次開啟時搬到 IndexedDB 並排入同步
+  private static async migrateLegacyGroups() {
+    const stored = localStorage.getItem(LEGACY_GROUPS_KEY);
+    if (!stored) return;
+
+    let groups: PlayerGroup[] = [];
+    try {
+      groups = JSON.parse(stored);
+    } catch {
+      // 無法解析的舊資料直接捨棄
+    }
+    const now = Date.now();
+    await withStores(['groups', 'outbox', 'meta'], 'readwrite', tx => {
+      for (const group of groups) {
+        tx.objectStore('groups').put({ id: group.id, group, updatedAt: now } as StoredGroup);
+        tx.objectStore('outbox').put({ id: group.id, op: 'put', updatedAt: now } as OutboxEntry);
+      }
+      tx.objectStore('meta').put({ key: GROUP_ORDER_KEY, value: groups.map(g => g.id) } as MetaRecord<string[]>);
+    });
+    localStorage.removeItem(LEGACY_GROUPS_KEY);
+    if (groups.length > 0) GroupSyncService.schedule();
+  }
+
+  private static loadLegacyGroups(): PlayerGroup[] {
+    const stored = localStorage.getItem(LEGACY_GROUPS_KEY);
     return stored ? JSON.parse(stored) : [];
   }
 
-  static deleteGroup(groupId: string): void {
-    const groups = this.getAllGroups();
-    const filtered = groups.filter(g => g.id !== groupId);
-    localStorage.setItem('wos_groups', JSON.stringify(filtered));
+  // ======== 匯入面板 ========
+
+  static loadLastImportIds(): string | null {
+    return localStorage.getItem(LAST_IMPORT_IDS_KEY);
+  }
+
+  static saveLastImportIds(ids: string): void {
+    localStorage.setItem(LAST_IMPORT_IDS_KEY, ids);
+  }
+
+  // 匯入面板上次的玩家列表（只存 fid 順序，玩家資料來自 players 表）
+  static async loadCachedPlayers(): Promise<Player[]> {
+    try {
+      const order = await getOne<MetaRecord<string[]>>('meta', FOUND_PLAYERS_KEY);
+      const records = await getMany<StoredPlayer>('players', order?.value || []);
+      const players = records.filter((record): record is StoredPlayer => record !== undefined).map(record => record.player);
+      for (const player of players) this.persistedPlayers.add(player);
+      return players;
+    } catch (error) {
+      console.warn('Failed to load cached players', error);
+      return [];
+    }
+  }
+
+  static async saveCachedPlayers(players: Player[]): Promise<void> {
+    try {
+      const unknown = players.filter(player => !this.persistedPlayers.has(player));
+      await withStores(['players', 'meta'], 'readwrite', tx => {
+        const playerStore = tx.objectStore('players');
+        for (const player of unknown) {
+          playerStore.put({ fid: String(player.fid), player, fetchedAt: 0 } as StoredPlayer);
+        }
+        tx.objectStore('meta').put({ key: FOUND_PLAYERS_KEY, value: players.map(p => String(p.fid)) } as MetaRecord<string[]>);
+      });
+      for (const player of unknown) this.persistedPlayers.add(player);
+    } catch (error) {
+      console.warn('Failed to save cached players', error);
+    }
+  }
+
+  // ======== 玩家資料快取 ========
+
+  // 取得 maxAgeMs 內取得過的玩家資料，過期或沒有時回傳 undefined
+  static async getFreshPlayers(fids: string[], maxAgeMs: number): Promise<Record<string, Player>> {
+    const result: Record<string, Player> = {};
+    try {
+      const records = await getMany<StoredPlayer>('players', fids);
+      const now = Date.now();
+      for (const record of records) {
+        if (record && now - record.fetchedAt < maxAgeMs) {
+          result[record.fid] = record.player;
+          this.persistedPlayers.add(record.player);
+        }
+      }
+    } catch (error) {
+      console.warn('Failed to read player cache', error);
+    }
+    return result;
+  }
+
+  // 寫入剛從伺服器取得的玩家資料
+  static async cachePlayers(players: Player[]): Promise<void> {
+    const fetchedAt = Date.now();
+    try {
+      await putMany('players', players.map(player => ({ fid: String(player.fid), player, fetchedAt } as StoredPlayer)));
+      for (const player of players) this.persistedPlayers.add(player);
+    } catch (error) {
+      console.warn('Failed to write player cache', error);
+    }
   }
 }
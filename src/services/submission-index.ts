@@ -0,0 +1,94 @@
+import { FormSubmission } from '../../types';
+
+// 報名列表的篩選索引
+// 每次載入（或更新）報名資料時建立一次；之後輸入搜尋字、切換聯盟或場次時，
+// 只對預先轉好小寫的欄位做比對，不再逐筆轉換字串、解析時間或重算各場次人數
+
+interface IndexedSubmission {
+  submission: FormSubmission;
+  // 小寫的玩家名稱
+  name: string;
+}
+
+export interface SubmissionIndex {
+  rows: IndexedSubmission[];
+  byEventDate: Map<string, number>;
+  // eventDate 為 null 的舊資料（遷移資料）的提交時間，由小到大排序
+  legacySubmittedAt: number[];
+  alliances: string[];
+}
+
+export interface SubmissionFilter {
+  search: string;
+  alliance: string;
+  // 未指定時顯示所有場次的報名
+  event: { eventDate: string; registrationStart: string } | null;
+  // null/undefined 或空陣列表示可管理所有聯盟
+  managedAlliances?: string[] | null;
+}
+
+export function buildSubmissionIndex(submissions: FormSubmission[]): SubmissionIndex {
+  const rows: IndexedSubmission[] = [];
+  const byEventDate = new Map<string, number>();
+  const legacySubmittedAt: number[] = [];
+  const alliances = new Set<string>();
+
+  for (const submission of submissions) {
+    rows.push({ submission, name: submission.playerName.toLowerCase() });
+    if (submission.eventDate) {
+      byEventDate.set(submission.eventDate, (byEventDate.get(submission.eventDate) || 0) + 1);
+    } else if (submission.eventDate === null) {
+      legacySubmittedAt.push(submission.submittedAt);
+    }
+    if (submission.alliance) alliances.add(submission.alliance);
+  }
+  legacySubmittedAt.sort((a, b) => a - b);
+
+  return { rows, byEventDate, legacySubmittedAt, alliances: Array.from(alliances) };
+}
+
+// 依搜尋字、聯盟、場次與可管理聯盟篩選，保留原本的順序
+export function filterSubmissions(index: SubmissionIndex, filter: SubmissionFilter): FormSubmission[] {
+  const search = filter.search;
+  const searchLower = search.toLowerCase();
+  const managed = filter.managedAlliances && filter.managedAlliances.length > 0
+    ? new Set(filter.managedAlliances)
+    : null;
+  const eventDate = filter.event?.eventDate;
+  const registrationStartTime = filter.event ? new Date(filter.event.registrationStart).getTime() : 0;
+
+  const result: FormSubmission[] = [];
+  for (const { submission, name } of index.rows) {
+    if (filter.alliance && submission.alliance !== filter.alliance) continue;
+    if (managed && !managed.has(submission.alliance)) continue;
+    if (filter.event) {
+      // 舊資料（eventDate 為 null）：提交時間在該場次報名開始之後，視為屬於此場次
+      const matchEvent = submission.eventDate
+        ? submission.eventDate === eventDate
+        : submission.submittedAt >= registrationStartTime;
+      if (!matchEvent) continue;
+    }
+    if (search && !name.includes(searchLower) && !submission.gameId.includes(search) && !submission.fid.includes(search)) {
+      continue;
+    }
+    result.push(submission);
+  }
+  return result;
+}
+
+// 場次的報名人數（包括提交時間在報名開始之後的舊資料）
+export function countEventSubmissions(index: SubmissionIndex, event: { eventDate: string; registrationStart: string }): number {
+  const registrationStartTime = new Date(event.registrationStart).getTime();
+  const legacy = index.legacySubmittedAt;
+
+  // 二分搜尋第一筆 >= 報名開始時間的舊資料
+  let low = 0;
+  let high = legacy.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (legacy[mid] >= registrationStartTime) high = mid;
+    else low = mid + 1;
+  }
+
+  return (index.byEventDate.get(event.eventDate) || 0) + (legacy.length - low);
+}